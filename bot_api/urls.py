@@ -1,13 +1,17 @@
 from django.urls import path
 from . import views
-from .views import telegram_bind, cards_list, cards_today, user_progress, tts, test, test_multiple_choice
+from .views import telegram_bind, cards_list, cards_search, cards_today, sync_changes, user_progress, review_forecast, tts, test, test_multiple_choice, submit_answers
 
 urlpatterns = [
     path('telegram/bind/', telegram_bind, name='api_telegram_bind'),
     path('cards/', cards_list, name='api_cards_list'),
+    path('cards/search/', cards_search, name='api_cards_search'),
     path('today/', cards_today, name='api_cards_today'),
+    path('sync/', sync_changes, name='api_sync'),
     path('progress/', user_progress, name='api_user_progress'),
+    path('forecast/', review_forecast, name='api_review_forecast'),
     path('tts/', tts, name='api_tts'),
     path('test/', test, name='api_test'),  # опционально
     path('test/multiple_choice/', test_multiple_choice, name='api_test_multiple_choice'),
+    path('answers/', submit_answers, name='api_submit_answers'),
 ] 
\ No newline at end of file
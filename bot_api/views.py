@@ -2,17 +2,28 @@ from django.shortcuts import get_object_or_404
 from django.http import JsonResponse, HttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from users.models import User
-from cards.models import Card, Schedule
+from cards.models import Card, Schedule, ReviewLog, UserStats, normalize_key
+from cards.forecast import forecast_review_load
+from cards.pagination import keyset_page, parse_limit
+from cards.search import search_cards
+from cards.decks import user_cards
+from cards.answers import apply_answers, parse_answers
+from cards.distractors import multiple_choice_options
+from cards.due_queue import due_schedules
+from cards.sync import SyncTokenExpired, change_record, changes_since, parse_sync_limit
 from cards.speechkit import synthesize_speech, SpeechKitError, SpeechKitConfigError, SpeechKitAPIError, SpeechKitNetworkError
-from datetime import date
 import json
-from django.db import models
 import logging
-from random import sample
 from .models import BotLog
 
 logger = logging.getLogger(__name__)
 
+# Размер страницы /api/cards/ и /api/cards/search/ по умолчанию
+CARDS_PAGE_SIZE = 100
+SEARCH_PAGE_SIZE = 20
+# Сколько верхних карточек очереди отдает /api/today/ по умолчанию
+TODAY_PAGE_SIZE = 20
+
 # Create your views here.
 
 def log_bot_event(event_type, telegram_id=None, user=None, request_text='', response_text='', success=None, raw_data=None):
@@ -64,11 +75,24 @@ def get_user_by_telegram_id(request):
     return user, None
 
 def cards_list(request):
+    """
+    Личные карточки пользователя постранично: GET-параметры limit (по умолчанию 100) и cursor.
+    В ответе next_cursor следующей страницы (null на последней) и total — всего личных карточек.
+    Карточки колод из подписок в список не входят (UserStats.total_cards учитывает и их).
+    """
     user, error = get_user_by_telegram_id(request)
     if error:
         log_bot_event('command', request_text='cards_list', response_text=str(error.content), success=False)
         return error
-    cards = Card.objects.filter(user=user)
+    try:
+        page = keyset_page(
+            Card.objects.filter(user=user),
+            request.GET.get('cursor'),
+            parse_limit(request.GET.get('limit'), default=CARDS_PAGE_SIZE),
+        )
+    except ValueError:
+        return JsonResponse({'error': 'invalid limit or cursor'}, status=400)
+    cards = page.items
     data = [
         {
             'id': c.id,
@@ -80,15 +104,56 @@ def cards_list(request):
         } for c in cards
     ]
     log_bot_event('command', telegram_id=user.telegram_id, user=user, request_text='cards_list', response_text=str(data), success=True)
+    return JsonResponse({
+        'cards': data,
+        'next_cursor': page.next_cursor,
+        'total': Card.objects.filter(user=user).count(),
+    })
+
+def cards_search(request):
+    """
+    Полнотекстовый поиск по личным карточкам пользователя: GET-параметры q и limit (по умолчанию 20).
+    Карточки возвращаются по убыванию релевантности. Как и /api/cards/, карточки колод из подписок не входят.
+    """
+    user, error = get_user_by_telegram_id(request)
+    if error:
+        log_bot_event('command', request_text='cards_search', response_text=str(error.content), success=False)
+        return error
+    query = request.GET.get('q', '').strip()
+    if not query:
+        return JsonResponse({'error': 'q required'}, status=400)
+    try:
+        limit = parse_limit(request.GET.get('limit'), default=SEARCH_PAGE_SIZE)
+    except ValueError:
+        return JsonResponse({'error': 'invalid limit'}, status=400)
+    data = [
+        {
+            'id': c.id,
+            'word': c.word,
+            'translation': c.translation,
+            'example': c.example,
+            'comment': c.comment,
+            'level': c.level,
+        } for c in search_cards(user, query, limit=limit)
+    ]
+    log_bot_event('command', telegram_id=user.telegram_id, user=user, request_text=f'cards_search {query}', response_text=str(data), success=True)
     return JsonResponse({'cards': data})
 
 def cards_today(request):
+    """
+    Верхние карточки очереди на сегодня: GET-параметр limit (по умолчанию TODAY_PAGE_SIZE).
+    Порядок — по приоритету REVIEW_PRIORITY, не больше остатка дневного лимита (см. cards.due_queue);
+    следующие карточки приходят в следующем запросе, после ответов на эти.
+    """
     user, error = get_user_by_telegram_id(request)
     if error:
         log_bot_event('command', request_text='cards_today', response_text=str(error.content), success=False)
         return error
-    today = date.today()
-    schedules = Schedule.objects.filter(card__user=user, next_review__lte=today).select_related('card')
+    try:
+        limit = parse_limit(request.GET.get('limit'), default=TODAY_PAGE_SIZE)
+    except ValueError:
+        return JsonResponse({'error': 'invalid limit'}, status=400)
+    schedules = due_schedules(user, limit).select_related('card')
     data = [
         {
             'id': s.card.id,
@@ -105,24 +170,74 @@ def cards_today(request):
     log_bot_event('command', telegram_id=user.telegram_id, user=user, request_text='cards_today', response_text=str(data), success=True)
     return JsonResponse({'cards': data})
 
+def sync_changes(request):
+    """
+    Журнал изменений для локальной копии клиента: GET-параметры since (токен) и limit.
+    Без since — все карточки пользователя. В ответе changes (карточки с полями расписания),
+    deleted (id исчезнувших карточек), next — токен следующего запроса и has_more.
+    Устаревший токен — 410: клиенту нужна полная синхронизация без since.
+    """
+    user, error = get_user_by_telegram_id(request)
+    if error:
+        log_bot_event('command', request_text='sync_changes', response_text=str(error.content), success=False)
+        return error
+    try:
+        page = changes_since(user, request.GET.get('since'), parse_sync_limit(request.GET.get('limit')))
+    except SyncTokenExpired:
+        return JsonResponse({'error': 'resync required'}, status=410)
+    except ValueError:
+        return JsonResponse({'error': 'invalid limit or since'}, status=400)
+    # В журнал — только объем: полный ответ первичной синхронизации может быть большим
+    log_bot_event(
+        'command', telegram_id=user.telegram_id, user=user, request_text='sync_changes',
+        response_text=f'changes={len(page.changes)} deleted={len(page.deleted)}', success=True,
+    )
+    return JsonResponse({
+        'changes': [change_record(schedule) for schedule in page.changes],
+        'deleted': page.deleted,
+        'next': page.token,
+        'has_more': page.has_more,
+    })
+
 def user_progress(request):
     user, error = get_user_by_telegram_id(request)
     if error:
         log_bot_event('command', request_text='user_progress', response_text=str(error.content), success=False)
         return error
-    total = Card.objects.filter(user=user).count()
-    learned = Schedule.objects.filter(card__user=user, interval__gte=21).count()  # условно "выучено"
-    errors = Schedule.objects.filter(card__user=user, last_result=False).count()
-    repetitions = Schedule.objects.filter(card__user=user).aggregate(total_reps=models.Sum('repetition'))['total_reps'] or 0
+    stats = UserStats.objects.for_user(user)
     resp = {
-        'total': total,
-        'learned': learned,
-        'errors': errors,
-        'repetitions': repetitions,
+        'total': stats.total_cards,
+        'learned': stats.learned,  # условно "выучено": интервал от 21 дня
+        'errors': stats.errors,
+        'repetitions': stats.repetitions,
     }
     log_bot_event('command', telegram_id=user.telegram_id, user=user, request_text='user_progress', response_text=str(resp), success=True)
     return JsonResponse(resp)
 
+def review_forecast(request):
+    """
+    Прогноз нагрузки: число карточек к повторению по дням.
+    GET-параметры: telegram_id, days (по умолчанию 30), pass_rate (по умолчанию 0.9).
+    """
+    user, error = get_user_by_telegram_id(request)
+    if error:
+        log_bot_event('command', request_text='review_forecast', response_text=str(error.content), success=False)
+        return error
+    try:
+        days = request.GET.get('days')
+        pass_rate = request.GET.get('pass_rate')
+        forecast = forecast_review_load(
+            user,
+            days=int(days) if days else None,
+            pass_rate=float(pass_rate) if pass_rate else None,
+        )
+    except ValueError as e:
+        log_bot_event('command', telegram_id=user.telegram_id, user=user, request_text='review_forecast', response_text=str(e), success=False)
+        return JsonResponse({'error': str(e)}, status=400)
+    resp = {'forecast': forecast}
+    log_bot_event('command', telegram_id=user.telegram_id, user=user, request_text='review_forecast', response_text=f'{len(forecast)} days', success=True)
+    return JsonResponse(resp)
+
 def tts(request):
     telegram_id = request.GET.get('telegram_id')
     word = request.GET.get('word')
@@ -133,13 +248,13 @@ def tts(request):
     if not user:
         log_bot_event('command', telegram_id=telegram_id, request_text=f'tts: {word}', response_text='user not found', success=False)
         return JsonResponse({'error': 'user not found'}, status=404)
-    card = Card.objects.filter(user=user, word=word).first()
+    card = user_cards(user).filter(norm_word=normalize_key(word)).first()
     if not card:
         log_bot_event('command', telegram_id=telegram_id, user=user, request_text=f'tts: {word}', response_text='word not found for user', success=False)
         return JsonResponse({'error': 'word not found for user'}, status=404)
     
     try:
-        audio_path = synthesize_speech(word)  # если потребуется язык, можно добавить language=...
+        audio_path = synthesize_speech(card.word)  # если потребуется язык, можно добавить language=...
         with open(audio_path, 'rb') as f:
             log_bot_event('command', telegram_id=telegram_id, user=user, request_text=f'tts: {word}', response_text='audio ok', success=True)
             return HttpResponse(f.read(), content_type='audio/ogg')
@@ -196,17 +311,14 @@ def test(request):
         if not user:
             log_bot_event('command', telegram_id=telegram_id, request_text=str(data), response_text='user not found', success=False)
             return JsonResponse({'error': 'user not found'}, status=404)
-        card = Card.objects.filter(user=user, id=card_id).first()
-        if not card:
+        # Расписание пользователя: личная карточка или карточка колоды из подписки
+        schedule = Schedule.objects.filter(user=user, card_id=card_id).select_related('card').first()
+        if not schedule:
             log_bot_event('command', telegram_id=telegram_id, user=user, request_text=str(data), response_text='card not found', success=False)
             return JsonResponse({'error': 'card not found'}, status=404)
-        schedule = Schedule.objects.filter(card=card).first()
-        if not schedule:
-            log_bot_event('command', telegram_id=telegram_id, user=user, request_text=str(data), response_text='schedule not found', success=False)
-            return JsonResponse({'error': 'schedule not found'}, status=404)
         quality = 5 if answer else 2
         from cards.sm2 import update_schedule
-        update_schedule(schedule, quality)
+        update_schedule(schedule, quality, source=ReviewLog.SOURCE_BOT)
         msg = '✅ Отлично! Карточка перенесена на следующий повтор.' if answer else '❌ Ошибка. Карточка будет показана раньше.'
         resp = {
             'result': 'ok',
@@ -233,20 +345,13 @@ def test_multiple_choice(request):
         if error:
             log_bot_event('command', request_text='test_multiple_choice (GET)', response_text=str(error.content), success=False)
             return error
-        today = date.today()
-        schedule = Schedule.objects.filter(card__user=user, next_review__lte=today).select_related('card').order_by('next_review').first()
+        schedule = due_schedules(user, 1).select_related('card').first()
         if not schedule:
             log_bot_event('command', telegram_id=user.telegram_id, user=user, request_text='test_multiple_choice (GET)', response_text='no_cards_today', success=False)
             return JsonResponse({'error': 'no_cards_today'}, status=404)
         card = schedule.card
-        all_translations = list(Card.objects.filter(user=user).exclude(id=card.id).values_list('translation', flat=True))
-        if len(all_translations) >= 3:
-            wrong_choices = sample(all_translations, 3)
-        else:
-            wrong_choices = all_translations + ['—'] * (3 - len(all_translations))
-        options = wrong_choices + [card.translation]
-        from random import shuffle
-        shuffle(options)
+        # Неверные варианты — похожие переводы из индекса пула (без выборки всех карточек)
+        options = multiple_choice_options(user.pk, card.translation, card.word, card.level)
         resp = {
             'card': {
                 'id': card.id,
@@ -272,18 +377,16 @@ def test_multiple_choice(request):
             if not user:
                 log_bot_event('command', telegram_id=telegram_id, request_text=str(data), response_text='user not found', success=False)
                 return JsonResponse({'error': 'user not found'}, status=404)
-            card = Card.objects.filter(user=user, id=card_id).first()
-            if not card:
+            # Расписание пользователя: личная карточка или карточка колоды из подписки
+            schedule = Schedule.objects.filter(user=user, card_id=card_id).select_related('card').first()
+            if not schedule:
                 log_bot_event('command', telegram_id=telegram_id, user=user, request_text=str(data), response_text='card not found', success=False)
                 return JsonResponse({'error': 'card not found'}, status=404)
-            schedule = Schedule.objects.filter(card=card).first()
-            if not schedule:
-                log_bot_event('command', telegram_id=telegram_id, user=user, request_text=str(data), response_text='schedule not found', success=False)
-                return JsonResponse({'error': 'schedule not found'}, status=404)
+            card = schedule.card
             is_correct = (answer.strip().lower() == card.translation.strip().lower())
             quality = 5 if is_correct else 2
             from cards.sm2 import update_schedule
-            update_schedule(schedule, quality)
+            update_schedule(schedule, quality, source=ReviewLog.SOURCE_BOT)
             msg = '✅ Верно!' if is_correct else f'❌ Неверно! Правильный ответ: {card.translation}'
             resp = {
                 'result': 'ok',
@@ -297,3 +400,35 @@ def test_multiple_choice(request):
         except Exception as e:
             log_bot_event('error', request_text='test_multiple_choice (POST)', response_text=str(e), success=False)
             return JsonResponse({'error': str(e)}, status=500)
+
+@csrf_exempt
+def submit_answers(request):
+    """
+    Пачка ответов, накопленных ботом: POST JSON {telegram_id, answers: [{card_id, quality | answer, answered_at}]}.
+    answer — true/false (знаю/не знаю) или выбранный перевод. Все ответы применяются
+    одной записью расписаний (см. cards.answers); в ответе results — статус каждого ответа.
+    """
+    if request.method != 'POST':
+        log_bot_event('command', request_text='submit_answers (not POST)', response_text='POST required', success=False)
+        return JsonResponse({'error': 'POST required'}, status=405)
+    try:
+        data = json.loads(request.body.decode('utf-8'))
+        telegram_id = data.get('telegram_id')
+        answers = parse_answers(data.get('answers'))
+    except (ValueError, AttributeError) as e:
+        log_bot_event('command', request_text='submit_answers', response_text=str(e), success=False)
+        return JsonResponse({'error': str(e)}, status=400)
+    if not telegram_id:
+        return JsonResponse({'error': 'telegram_id required'}, status=400)
+    user = User.objects.filter(telegram_id=telegram_id).first()
+    if not user:
+        log_bot_event('command', telegram_id=telegram_id, request_text='submit_answers', response_text='user not found', success=False)
+        return JsonResponse({'error': 'user not found'}, status=404)
+    results = apply_answers(user, answers, ReviewLog.SOURCE_BOT)
+    # В журнал — только объем: пачка может быть большой
+    accepted = sum(result['status'] == 'ok' for result in results)
+    log_bot_event(
+        'command', telegram_id=telegram_id, user=user, request_text='submit_answers',
+        response_text=f'answers={len(results)} accepted={accepted}', success=True,
+    )
+    return JsonResponse({'results': results})
@@ -1,22 +1,69 @@
 from django.contrib import admin
-from .models import Card, Schedule
+from .models import Card, Deck, Schedule, ReviewLog, UserStats, ImportJob
+from .search import search_filter
 from users.models import User
 from users.admin import CustomUserAdmin
 
 @admin.register(Card)
 class CardAdmin(admin.ModelAdmin):
-    list_display = ('word', 'translation', 'user', 'level', 'created_at', 'updated_at')
-    search_fields = ('word', 'translation', 'user__username')
-    list_filter = ('level', 'user')
+    list_display = ('word', 'translation', 'user', 'deck', 'level', 'created_at', 'updated_at')
+    search_fields = ('word', 'translation', 'example', 'comment')
+    list_filter = ('level', 'deck', 'user')
+    raw_id_fields = ('source',)
     ordering = ('-created_at',)
 
+    def get_search_results(self, request, queryset, search_term):
+        # Полнотекстовый индекс вместо icontains по search_fields (см. cards.search)
+        if not search_term.strip():
+            return queryset, False
+        return queryset.filter(search_filter(search_term)), False
+
+@admin.register(Deck)
+class DeckAdmin(admin.ModelAdmin):
+    list_display = ('title', 'owner', 'is_public', 'created_at')
+    search_fields = ('title', 'description')
+    list_filter = ('is_public',)
+    ordering = ('title',)
+
 @admin.register(Schedule)
 class ScheduleAdmin(admin.ModelAdmin):
-    list_display = ('card', 'next_review', 'interval', 'repetition', 'ef', 'last_result', 'updated_at')
-    search_fields = ('card__word', 'card__translation', 'card__user__username')
+    list_display = ('card', 'user', 'next_review', 'interval', 'repetition', 'ef', 'last_result', 'updated_at')
+    search_fields = ('card__word', 'card__translation', 'user__username')
     list_filter = ('next_review', 'interval', 'last_result')
     ordering = ('next_review',)
 
+@admin.register(ReviewLog)
+class ReviewLogAdmin(admin.ModelAdmin):
+    list_display = ('card', 'user', 'quality', 'prev_interval', 'new_interval', 'source', 'reviewed_at')
+    list_filter = ('source', 'quality')
+    date_hierarchy = 'reviewed_at'
+    ordering = ('-reviewed_at',)
+
+    def has_change_permission(self, request, obj=None):
+        # Журнал только для чтения
+        return False
+
+@admin.register(UserStats)
+class UserStatsAdmin(admin.ModelAdmin):
+    list_display = ('user', 'total_cards', 'learned', 'errors', 'repetitions', 'updated_at')
+    search_fields = ('user__username',)
+    ordering = ('-total_cards',)
+
+    def has_change_permission(self, request, obj=None):
+        # Счетчики ведутся автоматически; исправление — команда reconcile_user_stats
+        return False
+
+@admin.register(ImportJob)
+class ImportJobAdmin(admin.ModelAdmin):
+    list_display = ('filename', 'user', 'mode', 'status', 'size', 'rows', 'created', 'updated', 'error_count', 'created_at')
+    search_fields = ('filename', 'user__username')
+    list_filter = ('status', 'mode')
+    ordering = ('-created_at',)
+
+    def has_change_permission(self, request, obj=None):
+        # Состояние ведет задача импорта
+        return False
+
 # Регистрируем пользователя, если не был зарегистрирован
 try:
     admin.site.register(User, CustomUserAdmin)
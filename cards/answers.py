@@ -0,0 +1,179 @@
+"""
+Пакетный прием ответов на карточки.
+
+Раньше каждый ответ (страницы повторения и теста, /api/test/ и
+/api/test/multiple_choice/ бота) был отдельным HTTP-запросом и отдельным
+сохранением расписания. Клиент может копить ответы и отправлять их
+пачкой: владение карточками проверяется одним запросом, а все расписания
+пересчитываются и записываются одним bulk_update в одной транзакции
+(update_schedules).
+
+Ответ на карточку — оценка quality (0..5) или answer: True/False (знаю/не
+знаю, как в /api/test/) либо выбранный перевод (как в тесте с выбором
+ответа). Время ответа answered_at задает порядок применения ответов и
+время записи журнала. Ответ, данный раньше последнего изменения расписания
+(Schedule.updated_at), пропускается: так повторная отправка уже принятой
+пачки не засчитывается второй раз, а ответ, устаревший из-за ответа в
+другом месте, сброса или переноса, не затирает их результат.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional, Union
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Schedule
+from .sm2 import update_schedules
+
+# Наибольшее число ответов в одной пачке
+MAX_ANSWER_BATCH = 500
+
+STATUS_OK = 'ok'
+STATUS_NOT_FOUND = 'not_found'
+STATUS_STALE = 'stale'
+
+
+@dataclass
+class Answer:
+    """
+    Ответ на карточку из пачки.
+
+    Attributes:
+        card_id: ID карточки.
+        quality: Оценка 0..5 (None — задан answer).
+        answer: True/False или выбранный перевод.
+        answered_at: Время ответа.
+    """
+
+    card_id: int
+    quality: Optional[int]
+    answer: Union[bool, str, None]
+    answered_at: datetime
+
+    def correct(self, translation: str) -> bool:
+        """Верен ли ответ (для оценки — quality от 3)."""
+        if self.quality is not None:
+            return self.quality >= 3
+        if isinstance(self.answer, bool):
+            return self.answer
+        return self.answer.strip().lower() == translation.strip().lower()
+
+    def quality_for(self, translation: str) -> int:
+        """Оценка ответа: явная quality или 5/2 за верный/неверный ответ."""
+        if self.quality is not None:
+            return self.quality
+        return 5 if self.correct(translation) else 2
+
+
+def _parse_answer(item, now: datetime) -> Answer:
+    """Разбирает один элемент пачки; ValueError — некорректный элемент."""
+    if not isinstance(item, dict):
+        raise ValueError('ожидается объект')
+    card_id = item.get('card_id')
+    if not isinstance(card_id, int) or isinstance(card_id, bool):
+        raise ValueError('card_id должен быть целым числом')
+    quality, answer = item.get('quality'), item.get('answer')
+    if (quality is None) == (answer is None):
+        raise ValueError('нужно ровно одно из полей quality и answer')
+    if quality is not None and (
+        not isinstance(quality, int) or isinstance(quality, bool) or not 0 <= quality <= 5
+    ):
+        raise ValueError('quality должна быть целым числом от 0 до 5')
+    if answer is not None and not isinstance(answer, (bool, str)):
+        raise ValueError('answer должен быть true/false или строкой')
+    answered_at = now
+    if item.get('answered_at') is not None:
+        answered_at = parse_datetime(str(item['answered_at']))
+        if answered_at is None:
+            raise ValueError('answered_at должно быть датой и временем ISO 8601')
+        if timezone.is_naive(answered_at):
+            answered_at = timezone.make_aware(answered_at)
+        # Часы клиента могут спешить: ответ не может быть позже приема
+        answered_at = min(answered_at, now)
+    return Answer(card_id, quality, answer, answered_at)
+
+
+def parse_answers(items) -> list[Answer]:
+    """
+    Разбирает пачку ответов из JSON.
+
+    Args:
+        items: Список объектов {card_id, quality | answer, answered_at?}.
+
+    Returns:
+        Список Answer в порядке пачки.
+
+    Raises:
+        ValueError: Если пачка не список, длиннее MAX_ANSWER_BATCH или
+            содержит некорректный элемент (номер элемента — в сообщении).
+    """
+    if not isinstance(items, list):
+        raise ValueError('answers должен быть списком')
+    if len(items) > MAX_ANSWER_BATCH:
+        raise ValueError(f'не больше {MAX_ANSWER_BATCH} ответов в пачке')
+    now = timezone.now()
+    answers = []
+    for number, item in enumerate(items):
+        try:
+            answers.append(_parse_answer(item, now))
+        except ValueError as error:
+            raise ValueError(f'answers[{number}]: {error}') from None
+    return answers
+
+
+def apply_answers(user, answers: list[Answer], source: str) -> list[dict]:
+    """
+    Применяет пачку ответов пользователя одним пересчетом расписаний.
+
+    Расписания выбираются одним запросом (только карточки, которые повторяет
+    пользователь), ответы применяются в порядке answered_at, расписания
+    записываются одним bulk_update (см. update_schedules).
+
+    Args:
+        user: Пользователь.
+        answers: Ответы (parse_answers).
+        source: Источник для журнала (ReviewLog.SOURCE_WEB/SOURCE_BOT).
+
+    Returns:
+        Результаты в порядке answers: card_id и status (STATUS_OK,
+        STATUS_NOT_FOUND, STATUS_STALE); для принятых — correct и
+        next_review/interval после всех ответов пачки.
+
+    Example:
+        >>> apply_answers(user, parse_answers([{'card_id': 1, 'answer': True}]), 'bot')
+        [{'card_id': 1, 'status': 'ok', 'correct': True, 'next_review': '2025-01-02', 'interval': 1}]
+    """
+    if not answers:
+        return []
+    results: list[dict] = [{'card_id': answer.card_id} for answer in answers]
+    accepted = []
+    with transaction.atomic():
+        schedules = {
+            schedule.card_id: schedule
+            for schedule in Schedule.objects.select_for_update(of=('self',))
+            .filter(user=user, card_id__in={answer.card_id for answer in answers})
+            .select_related('card')
+        }
+        pairs, times = [], []
+        for number in sorted(range(len(answers)), key=lambda number: answers[number].answered_at):
+            answer = answers[number]
+            schedule = schedules.get(answer.card_id)
+            if schedule is None:
+                results[number]['status'] = STATUS_NOT_FOUND
+            elif answer.answered_at < schedule.updated_at:
+                results[number]['status'] = STATUS_STALE
+            else:
+                translation = schedule.card.translation
+                pairs.append((schedule, answer.quality_for(translation)))
+                times.append(answer.answered_at)
+                accepted.append((number, schedule, answer.correct(translation)))
+        update_schedules(pairs, source, times)
+    for number, schedule, correct in accepted:
+        results[number].update(
+            status=STATUS_OK, correct=correct,
+            next_review=schedule.next_review.isoformat(), interval=schedule.interval,
+        )
+    return results
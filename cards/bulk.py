@@ -0,0 +1,249 @@
+"""
+Пакетные операции над карточками пользователя.
+
+Удаление, смена уровня, перенос повторения и сброс прогресса применяются
+к выбранным карточкам (card_ids) или ко всем карточкам по фильтру уровня.
+Каждая операция — один UPDATE/DELETE по выборке пользователя плюс
+постоянное число служебных запросов (статистика, отметки синхронизации),
+независимо от числа карточек: сотни карточек меняются за один запрос
+вместо сотен переходов по страницам редактирования.
+
+Выборка всегда ограничена расписаниями пользователя (Schedule.user), поэтому
+в нее попадают и личные карточки, и повторяемые карточки колод; менять
+содержимое (уровень) и удалять строки Card можно только у личных карточек.
+"""
+
+from datetime import date, timedelta
+from typing import Iterable, Optional
+
+from django.db import transaction
+from django.db.models import Count, DateField, ExpressionWrapper, F, Q, QuerySet, Sum, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .distractors import invalidate_distractor_pool
+from .models import Card, ReviewLog, Schedule, UserStats, _invalidate_review_load, raw_delete
+from .review_log import flush_review_logs
+
+ACTION_DELETE = 'delete'
+ACTION_LEVEL = 'level'
+ACTION_POSTPONE = 'postpone'
+ACTION_RESET = 'reset'
+ACTION_CHOICES = [
+    (ACTION_DELETE, 'Удалить'),
+    (ACTION_LEVEL, 'Изменить уровень'),
+    (ACTION_POSTPONE, 'Отложить на N дней'),
+    (ACTION_RESET, 'Сбросить прогресс'),
+]
+
+# Значения полей расписания новой карточки (сброс прогресса)
+RESET_FIELDS = {
+    'interval': 1,
+    'repetition': 0,
+    'ef': 2.5,
+    'last_result': None,
+    'stability': None,
+    'difficulty': None,
+    'last_review': None,
+}
+
+
+def select_schedules(user, card_ids: Optional[Iterable[int]] = None,
+                     level: Optional[str] = None) -> QuerySet:
+    """
+    Расписания пользователя для выбранных карточек.
+
+    Args:
+        user: Пользователь.
+        card_ids: ID карточек (None — все карточки по фильтру).
+        level: Фильтр по уровню карточки (None — любой).
+
+    Returns:
+        QuerySet расписаний.
+    """
+    schedules = Schedule.objects.filter(user=user)
+    if card_ids is not None:
+        schedules = schedules.filter(card_id__in=list(card_ids))
+    if level:
+        schedules = schedules.filter(card__level=level)
+    return schedules
+
+
+def select_own_cards(user, card_ids: Optional[Iterable[int]] = None,
+                     level: Optional[str] = None) -> QuerySet:
+    """
+    Личные карточки пользователя из выборки (карточки колод не входят).
+
+    Args:
+        user: Пользователь.
+        card_ids: ID карточек (None — все карточки по фильтру).
+        level: Фильтр по уровню (None — любой).
+
+    Returns:
+        QuerySet карточек.
+    """
+    cards = Card.objects.filter(user=user)
+    if card_ids is not None:
+        cards = cards.filter(pk__in=list(card_ids))
+    if level:
+        cards = cards.filter(level=level)
+    return cards
+
+
+def bulk_delete(user, card_ids: Optional[Iterable[int]] = None, level: Optional[str] = None) -> int:
+    """
+    Убирает выбранные карточки из набора пользователя.
+
+    Расписания удаляются одним DELETE (delete_with_stats: статистика и
+    отметки синхронизации), затем журнал ответов и сами личные карточки —
+    по одному DELETE. Общие карточки колод остаются в колоде, у пользователя
+    удаляется только расписание (как при отписке).
+
+    Args:
+        user: Пользователь.
+        card_ids: ID карточек (None — все карточки по фильтру).
+        level: Фильтр по уровню.
+
+    Returns:
+        Число карточек, убранных из набора.
+    """
+    card_ids = None if card_ids is None else list(card_ids)
+    cards = select_own_cards(user, card_ids, level)
+    with transaction.atomic():
+        # Буферизованные ответы должны попасть в базу до удаления их карточек
+        flush_review_logs()
+        removed = select_schedules(user, card_ids, level).delete_with_stats()
+        raw_delete(ReviewLog.objects.filter(card__in=cards))
+        # Расписания и журнал удалены выше; личные карточки не бывают
+        # источником копий (Card.source указывает только на карточки колод)
+        raw_delete(cards, handled=('schedules', 'review_logs', 'copies'))
+    return removed
+
+
+def bulk_set_level(user, new_level: str, card_ids: Optional[Iterable[int]] = None,
+                   level: Optional[str] = None) -> int:
+    """
+    Меняет уровень выбранных личных карточек одним UPDATE.
+
+    Карточки колод пропускаются: их правка создает личную копию
+    (см. cards.decks.copy_on_write) и пакетом не выполняется.
+
+    Args:
+        user: Пользователь.
+        new_level: Новый уровень (значение из Card.LEVEL_CHOICES).
+        card_ids: ID карточек (None — все карточки по фильтру).
+        level: Фильтр по текущему уровню.
+
+    Returns:
+        Число измененных карточек.
+
+    Raises:
+        ValueError: Если уровень неизвестен.
+    """
+    if new_level not in dict(Card.LEVEL_CHOICES):
+        raise ValueError(f'Неизвестный уровень: {new_level}')
+    cards = select_own_cards(user, card_ids, level).exclude(level=new_level)
+    with transaction.atomic():
+        # Сначала отметка для синхронизации: после UPDATE фильтр по уровню уже не найдет карточки
+        Schedule.objects.filter(user=user, card__in=cards).update(updated_at=timezone.now())
+        updated = cards.update(level=new_level)
+    if updated:
+        # Пул вариантов теста хранит уровни карточек (MC_DISTRACTORS_SAME_LEVEL)
+        invalidate_distractor_pool(user.pk)
+    return updated
+
+
+def bulk_postpone(user, days: int, card_ids: Optional[Iterable[int]] = None,
+                  level: Optional[str] = None) -> int:
+    """
+    Переносит повторение выбранных карточек на days дней одним UPDATE.
+
+    Отсчет — от даты повторения, а для просроченных карточек от сегодня:
+    отложенная карточка не остается в сегодняшней очереди.
+
+    Args:
+        user: Пользователь.
+        days: На сколько дней отложить.
+        card_ids: ID карточек (None — все карточки по фильтру).
+        level: Фильтр по уровню.
+
+    Returns:
+        Число перенесенных карточек.
+    """
+    next_review = ExpressionWrapper(
+        Greatest(F('next_review'), Value(date.today())) + timedelta(days=days),
+        output_field=DateField(),
+    )
+    updated = select_schedules(user, card_ids, level).update(
+        next_review=next_review, updated_at=timezone.now(),
+    )
+    if updated:
+        _invalidate_review_load(user.pk)
+    return updated
+
+
+def bulk_reset(user, card_ids: Optional[Iterable[int]] = None, level: Optional[str] = None) -> int:
+    """
+    Сбрасывает прогресс выбранных карточек: расписание как у новой карточки.
+
+    Вклад сбрасываемых расписаний в статистику считается одним агрегирующим
+    запросом и вычитается одним UPDATE; расписания меняются одним UPDATE.
+
+    Args:
+        user: Пользователь.
+        card_ids: ID карточек (None — все карточки по фильтру).
+        level: Фильтр по уровню.
+
+    Returns:
+        Число сброшенных карточек.
+    """
+    schedules = select_schedules(user, card_ids, level)
+    with transaction.atomic():
+        totals = schedules.aggregate(
+            learned=Count('id', filter=Q(interval__gte=UserStats.LEARNED_INTERVAL)),
+            errors=Count('id', filter=Q(last_result=False)),
+            repetitions=Sum('repetition'),
+        )
+        updated = schedules.update(next_review=date.today(), updated_at=timezone.now(), **RESET_FIELDS)
+        UserStats.objects.adjust(
+            user.pk,
+            learned=-totals['learned'],
+            errors=-totals['errors'],
+            repetitions=-(totals['repetitions'] or 0),
+        )
+    if updated:
+        _invalidate_review_load(user.pk)
+    return updated
+
+
+def run_bulk_action(user, action: str, card_ids: Optional[Iterable[int]] = None,
+                    level: Optional[str] = None, new_level: Optional[str] = None,
+                    days: Optional[int] = None) -> int:
+    """
+    Выполняет пакетную операцию по ее коду (ACTION_*).
+
+    Args:
+        user: Пользователь.
+        action: Код операции.
+        card_ids: ID карточек (None — все карточки по фильтру).
+        level: Фильтр по уровню.
+        new_level: Новый уровень (для ACTION_LEVEL).
+        days: Число дней (для ACTION_POSTPONE).
+
+    Returns:
+        Число затронутых карточек.
+
+    Raises:
+        ValueError: Если операция неизвестна или не заданы ее параметры.
+    """
+    if action == ACTION_DELETE:
+        return bulk_delete(user, card_ids, level)
+    if action == ACTION_LEVEL:
+        return bulk_set_level(user, new_level, card_ids, level)
+    if action == ACTION_POSTPONE:
+        if not days:
+            raise ValueError('Не указано число дней')
+        return bulk_postpone(user, days, card_ids, level)
+    if action == ACTION_RESET:
+        return bulk_reset(user, card_ids, level)
+    raise ValueError(f'Неизвестная операция: {action}')
@@ -0,0 +1,214 @@
+"""
+Общие колоды с копированием при записи (copy-on-write).
+
+Карточки колоды хранятся один раз (Card с deck и без владельца), сколько бы
+пользователей на нее ни подписалось. Подписка (subscribe) создает только
+расписания подписчика — одним пакетным INSERT; отписка (unsubscribe) удаляет
+их одним DELETE. Хранилище и импорт колоды растут как O(слов), а не
+O(пользователей × слов).
+
+Личная копия карточки создается, только когда подписчик ее редактирует
+(copy_on_write): расписание и журнал ответов подписчика переносятся на копию,
+поэтому прогресс повторений сохраняется, а общая карточка у остальных
+подписчиков не меняется.
+"""
+
+from datetime import date
+from typing import IO
+
+from django.db import transaction
+from django.db.models import Count, Exists, OuterRef, Q, QuerySet
+from django.utils import timezone
+
+from .importer import IMPORT_BATCH_SIZE, MODE_SKIP, CardImporter, open_csv
+from .models import (
+    Card, Deck, DeckSubscription, ReviewLog, Schedule, SyncTombstone, UserStats,
+    _invalidate_review_load,
+)
+from .review_log import flush_review_logs
+from .sync import restamp_on_commit
+
+
+def visible_decks(user) -> QuerySet:
+    """
+    Колоды, доступные пользователю: публичные и собственные.
+
+    Args:
+        user: Пользователь.
+
+    Returns:
+        QuerySet колод с числом карточек в аннотации card_count.
+    """
+    return (
+        Deck.objects.filter(Q(is_public=True) | Q(owner=user))
+        .annotate(card_count=Count('cards'))
+    )
+
+
+def subscribe(user, deck: Deck, batch_size: int = IMPORT_BATCH_SIZE) -> int:
+    """
+    Подписывает пользователя на колоду (идемпотентно).
+
+    Создает расписания (next_review = сегодня) для карточек колоды, которых
+    у пользователя еще нет. Пропускаются карточки, уже отредактированные им
+    (есть личная копия), и совпадающие по ключу с его личными карточками.
+    Повторный вызов добавляет только новые карточки колоды.
+
+    Args:
+        user: Подписчик.
+        deck: Колода.
+        batch_size: Размер пакета INSERT.
+
+    Returns:
+        Число созданных расписаний.
+
+    Example:
+        >>> subscribe(user, Deck.objects.get(title='English 100'))
+        100
+    """
+    own_cards = Card.objects.filter(user=user)
+    card_ids = (
+        deck.cards.filter(user__isnull=True)
+        .exclude(Exists(Schedule.objects.filter(card=OuterRef('pk'), user=user)))
+        .exclude(Exists(own_cards.filter(source=OuterRef('pk'))))
+        .exclude(Exists(own_cards.filter(
+            norm_word=OuterRef('norm_word'), norm_translation=OuterRef('norm_translation'),
+        )))
+        .values_list('pk', flat=True)
+    )
+    today = date.today()
+    started = timezone.now()
+    with transaction.atomic():
+        restamp_on_commit(Schedule.objects.filter(user=user), started)
+        DeckSubscription.objects.get_or_create(user=user, deck=deck)
+        schedules = Schedule.objects.bulk_create(
+            [Schedule(card_id=pk, user=user, next_review=today) for pk in card_ids],
+            batch_size=batch_size,
+        )
+        UserStats.objects.adjust(user.pk, total_cards=len(schedules))
+    if schedules:
+        _invalidate_review_load(user.pk)
+    return len(schedules)
+
+
+def unsubscribe(user, deck: Deck) -> int:
+    """
+    Отписывает пользователя от колоды.
+
+    Удаляет его расписания общих карточек колоды одним DELETE. Личные копии
+    отредактированных карточек остаются (это уже карточки пользователя).
+
+    Args:
+        user: Подписчик.
+        deck: Колода.
+
+    Returns:
+        Число удаленных расписаний.
+    """
+    with transaction.atomic():
+        DeckSubscription.objects.filter(user=user, deck=deck).delete()
+        return Schedule.objects.filter(user=user, card__deck=deck).delete_with_stats()
+
+
+def sync_subscribers(deck: Deck) -> int:
+    """
+    Добавляет подписчикам расписания для новых карточек колоды.
+
+    Args:
+        deck: Колода, в которую добавлены карточки.
+
+    Returns:
+        Общее число созданных расписаний.
+    """
+    return sum(subscribe(subscription.user, deck) for subscription in deck.subscriptions.select_related('user'))
+
+
+def user_cards(user) -> QuerySet:
+    """
+    Карточки, доступные пользователю для просмотра, озвучки и редактирования.
+
+    Личные карточки и общие карточки колод, которые он повторяет (их
+    редактирование создает личную копию, см. copy_on_write).
+
+    Args:
+        user: Пользователь.
+
+    Returns:
+        QuerySet карточек.
+    """
+    return Card.objects.filter(
+        Q(user=user)
+        | Q(user__isnull=True, pk__in=Schedule.objects.filter(user=user).values('card_id'))
+    )
+
+
+def copy_on_write(card: Card, user) -> Card:
+    """
+    Сохраняет измененную общую карточку как личную копию пользователя.
+
+    Общая карточка в базе не меняется. Расписание пользователя и его записи
+    журнала ответов переносятся на копию, поэтому счетчики статистики не
+    меняются, а прогресс повторений сохраняется.
+
+    Args:
+        card: Экземпляр общей карточки с измененными полями (не сохранен).
+        user: Пользователь, редактирующий карточку.
+
+    Returns:
+        Сохраненная личная карточка.
+
+    Raises:
+        ValueError: Если карточка не является общей карточкой колоды.
+    """
+    if card.pk is None or card.deck_id is None:
+        raise ValueError('copy_on_write применяется только к общим карточкам колоды')
+    source_id = card.pk
+    with transaction.atomic():
+        schedule = Schedule.objects.select_for_update().filter(card_id=source_id, user=user).first()
+        card.pk = None
+        card._state.adding = True
+        card.user = user
+        card.deck = None
+        card.source_id = source_id
+        # Перенесенное расписание не дает сигналу post_save создать новое
+        card.schedule = schedule
+        card.save()
+        if schedule is not None:
+            schedule.card = card
+            schedule.save(update_fields=['card', 'updated_at'])
+            # Для синхронизации клиентов общая карточка заменена копией
+            SyncTombstone.objects.create(user=user, card_id=source_id)
+        # Ответы из буфера процесса записываются до переноса (журнал в других
+        # процессах может остаться за общей карточкой — он только для аналитики)
+        flush_review_logs()
+        ReviewLog.objects.filter(card_id=source_id, user=user).update(card=card)
+    return card
+
+
+def import_deck(deck: Deck, file: IO[bytes], batch_size: int = IMPORT_BATCH_SIZE,
+                mode: str = MODE_SKIP) -> CardImporter:
+    """
+    Импортирует общие карточки колоды из CSV и добавляет их подписчикам.
+
+    Формат файла — тот же, что у личного импорта (cards.importer).
+
+    Args:
+        deck: Колода.
+        file: Бинарный поток с CSV (word,translation,example,comment,level).
+        batch_size: Размер пакета INSERT/UPDATE.
+        mode: MODE_SKIP или MODE_UPDATE (обновлять существующие карточки колоды).
+
+    Returns:
+        CardImporter с итогами: created, updated, unchanged, duplicates, errors.
+    """
+    started = timezone.now()
+    with transaction.atomic():
+        # Правки общих карточек меняют расписания всех подписчиков
+        restamp_on_commit(Schedule.objects.filter(user__in=deck.subscriptions.values('user_id')), started)
+        importer = CardImporter(None, batch_size=batch_size, mode=mode, deck=deck)
+        with open_csv(file) as rows:
+            importer.feed(rows)
+        importer.flush()
+        if importer.created:
+            sync_subscribers(deck)
+    return importer
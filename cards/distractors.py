@@ -0,0 +1,337 @@
+"""
+Неверные варианты ответа (дистракторы) для тестов с выбором ответа.
+
+Раньше каждый вопрос теста загружал все переводы карточек пользователя,
+чтобы выбрать из них три случайных. Теперь карточки пользователя собираются
+в пул один раз: не больше POOL_SIZE карточек (случайная выборка, если их
+больше). По пулу строится индекс символьных триграмм перевода и слова
+(DistractorIndex), поэтому вопрос может получить «трудные» варианты —
+переводы, похожие на верный, или переводы слов, похожих на спрашиваемое
+(affect/effect), при необходимости того же уровня. Поиск соседей проходит
+только списки триграмм запроса, время не зависит от размера колоды.
+
+Хранение: записи пула лежат в кеше Django (общем для процессов, если задан
+REDIS_URL, см. lingua_track.cache) вместе с номером версии; индекс строится
+в памяти процесса и переиспользуется, пока версия в кеше не изменилась, —
+вопрос стоит одного чтения короткого ключа кеша.
+
+Пул сбрасывается при изменении набора карточек пользователя (создание,
+удаление, подписка, пакетные операции — _invalidate_review_load).
+Редактирование карточки (Card.save) не переписывает пул: запись карточки
+кладется в свой ключ поколения пула, затем меняется версия
+(update_distractor_entry). Одновременные правки разных карточек не
+затирают друг друга, а при сборке индекса записи правок накладываются на
+пул. Правки общих карточек колод попадают в пул по истечении
+POOL_CACHE_TIMEOUT.
+"""
+
+import random
+import uuid
+from collections import Counter, defaultdict
+from itertools import chain
+from typing import Iterable, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Card
+
+# Сколько карточек хранится в пуле пользователя
+POOL_SIZE = 1000
+
+POOL_CACHE_TIMEOUT = 60 * 60
+
+# Число неверных вариантов ответа в вопросе
+DISTRACTOR_COUNT = 3
+
+# Заполнитель, если у пользователя меньше карточек, чем вариантов
+EMPTY_OPTION = '—'
+
+# Похожие варианты выбираются случайно из стольких ближайших на каждый нужный
+# (чтобы одна и та же карточка не получала всегда одни и те же варианты)
+NEAREST_FACTOR = 2
+
+# Триграммы, которые есть больше чем у такой доли пула, не учитываются:
+# они не отличают похожие варианты от остальных, но удлиняют поиск
+COMMON_GRAM_SHARE = 0.5
+
+# Сколько индексов пользователей хранит процесс
+LOCAL_INDEX_LIMIT = 1000
+
+# Индексы, построенные процессом: user_id -> (версия пула, индекс)
+_local_indexes: dict[int, tuple[str, 'DistractorIndex']] = {}
+
+
+def _normalize(text: str) -> str:
+    """Текст для сравнения: как при проверке ответа — без регистра и крайних пробелов."""
+    return text.strip().lower()
+
+
+def trigrams(text: str) -> set[str]:
+    """
+    Символьные триграммы текста (с пробелами по краям, чтобы учитывались начало и конец).
+
+    Example:
+        >>> sorted(trigrams('кот'))
+        [' ко', 'кот', 'от ']
+    """
+    padded = f' {_normalize(text)} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _postings(texts: Iterable[str]) -> dict[str, list[int]]:
+    """Инвертированный индекс: триграмма -> номера записей."""
+    postings = defaultdict(list)
+    for number, text in enumerate(texts):
+        for gram in trigrams(text):
+            postings[gram].append(number)
+    return dict(postings)
+
+
+class DistractorIndex:
+    """
+    Пул карточек пользователя с индексом триграмм перевода и слова.
+
+    Attributes:
+        entries: Записи (card_id, translation, word, level).
+    """
+
+    def __init__(self, entries: list[tuple[int, str, str, str]]):
+        self.entries = entries
+        self._by_translation = _postings(entry[1] for entry in entries)
+        self._by_word = _postings(entry[2] for entry in entries)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def nearest(self, translation: str, word: str = '', level: Optional[str] = None,
+                limit: int = DISTRACTOR_COUNT * NEAREST_FACTOR) -> list[str]:
+        """
+        Переводы, ближайшие к верному ответу по числу общих триграмм.
+
+        Сходство — сумма общих триграмм перевода с translation и слова с word
+        (без слишком частых триграмм, см. COMMON_GRAM_SHARE), совпадающие
+        с ответом переводы пропускаются.
+
+        Args:
+            translation: Верный перевод.
+            word: Спрашиваемое слово.
+            level: Только карточки этого уровня (None — любого).
+            limit: Сколько переводов вернуть.
+
+        Returns:
+            До limit различных переводов, от более похожих к менее похожим.
+        """
+        common = max(1, int(len(self.entries) * COMMON_GRAM_SHARE))
+        lists = []
+        for query, postings in ((translation, self._by_translation), (word, self._by_word)):
+            if query:
+                lists += [postings[gram] for gram in trigrams(query)
+                          if gram in postings and len(postings[gram]) <= common]
+        scores = Counter(chain.from_iterable(lists))
+        ranked = sorted(scores, key=lambda number: (-scores[number], random.random()))
+        seen = {_normalize(translation)}
+        result = []
+        for number in ranked:
+            _, option, _, option_level = self.entries[number]
+            key = _normalize(option)
+            if key in seen or (level and option_level != level):
+                continue
+            seen.add(key)
+            result.append(option)
+            if len(result) == limit:
+                break
+        return result
+
+    def sample(self, answer: str, count: int = DISTRACTOR_COUNT, exclude: Iterable[str] = ()) -> list[str]:
+        """
+        Случайные переводы из пула, отличные от ответа, от exclude и друг от друга.
+
+        Берет count + 2 случайных индекса (запас на совпадения).
+
+        Args:
+            answer: Верный ответ.
+            count: Сколько вариантов нужно.
+            exclude: Уже выбранные варианты.
+
+        Returns:
+            До count вариантов.
+        """
+        chosen = []
+        if count <= 0:
+            return chosen
+        seen = {_normalize(answer), *map(_normalize, exclude)}
+        for number in random.sample(range(len(self.entries)), min(len(self.entries), count + 2)):
+            option = self.entries[number][1]
+            key = _normalize(option)
+            if key not in seen:
+                seen.add(key)
+                chosen.append(option)
+                if len(chosen) == count:
+                    break
+        return chosen
+
+    def distractors(self, answer: str, word: str = '', level: Optional[str] = None,
+                    similar: bool = True, count: int = DISTRACTOR_COUNT) -> list[str]:
+        """
+        Неверные варианты для вопроса.
+
+        Args:
+            answer: Верный перевод.
+            word: Спрашиваемое слово.
+            level: Похожие варианты только этого уровня (None — любого).
+            similar: Выбирать похожие варианты (иначе случайные).
+            count: Сколько вариантов нужно.
+
+        Returns:
+            Ровно count вариантов: похожие, затем случайные, недостающие — EMPTY_OPTION.
+        """
+        chosen = []
+        if similar:
+            nearest = self.nearest(answer, word, level, count * NEAREST_FACTOR)
+            chosen = random.sample(nearest, min(count, len(nearest)))
+        chosen += self.sample(answer, count - len(chosen), chosen)
+        return chosen + [EMPTY_OPTION] * (count - len(chosen))
+
+
+def _cache_key(user_id: int) -> str:
+    """Ключ кеша пула пользователя: (поколение, записи)."""
+    return f'distractor_pool:{user_id}'
+
+
+def _version_key(user_id: int) -> str:
+    """Ключ кеша версии пула пользователя."""
+    return f'distractor_pool_version:{user_id}'
+
+
+def _edit_key(user_id: int, generation: str, card_id: int) -> str:
+    """Ключ кеша записи отредактированной карточки в поколении пула."""
+    return f'distractor_entry:{user_id}:{generation}:{card_id}'
+
+
+def _entry(card: Card) -> tuple[int, str, str, str]:
+    """Запись пула для карточки."""
+    return (card.pk, card.translation, card.word, card.level)
+
+
+def _save_entries(user_id: int, entries: list) -> str:
+    """Сохраняет записи пула новым поколением; возвращает его (оно же — версия)."""
+    generation = uuid.uuid4().hex
+    cache.set_many(
+        {_cache_key(user_id): (generation, entries), _version_key(user_id): generation}, POOL_CACHE_TIMEOUT,
+    )
+    return generation
+
+
+def _apply_edits(user_id: int, generation: str, entries: list) -> list:
+    """Накладывает на записи пула записи правок этого поколения (один get_many)."""
+    keys = {_edit_key(user_id, generation, entry[0]): number for number, entry in enumerate(entries)}
+    edits = cache.get_many(keys)
+    if not edits:
+        return entries
+    entries = list(entries)
+    for key, entry in edits.items():
+        entries[keys[key]] = entry
+    return entries
+
+
+def invalidate_distractor_pool(user_id: int) -> None:
+    """Сбрасывает пул пользователя (будет собран заново при следующем вопросе)."""
+    cache.delete_many([_cache_key(user_id), _version_key(user_id)])
+
+
+def update_distractor_entry(card: Card) -> None:
+    """
+    Обновляет запись отредактированной карточки в пуле ее владельца.
+
+    Пул не собирается и не переписывается: запись карточки сохраняется в
+    отдельный ключ поколения пула, затем меняется версия. Обе записи в кеш
+    атомарны, поэтому одновременные правки не теряются; индекс в процессах
+    перестраивается по новой версии из кеша, без запроса к базе.
+    Если пула нет в кеше или карточки в нем нет, ничего не делает.
+
+    Args:
+        card: Сохраненная личная карточка.
+    """
+    if card.user_id is None:
+        return
+    pool = cache.get(_cache_key(card.user_id))
+    if pool is None:
+        return
+    generation, entries = pool
+    if any(entry[0] == card.pk for entry in entries):
+        cache.set(_edit_key(card.user_id, generation, card.pk), _entry(card), POOL_CACHE_TIMEOUT)
+        # Новая версия после записи правки: процессы перестроят индекс уже с ней
+        cache.set(_version_key(card.user_id), uuid.uuid4().hex, POOL_CACHE_TIMEOUT)
+
+
+def get_distractor_index(user_id: int) -> DistractorIndex:
+    """
+    Индекс пула карточек, которые повторяет пользователь.
+
+    Если версия пула в кеше совпадает с построенным процессом индексом,
+    возвращает его; иначе строит индекс по записям из кеша с наложенными
+    правками, а при их отсутствии собирает пул одним запросом.
+
+    Args:
+        user_id: ID пользователя.
+
+    Returns:
+        DistractorIndex не более чем из POOL_SIZE карточек.
+    """
+    version = cache.get(_version_key(user_id))
+    local = _local_indexes.get(user_id)
+    if version is not None and local is not None and local[0] == version:
+        return local[1]
+    pool = cache.get(_cache_key(user_id)) if version is not None else None
+    if pool is not None:
+        generation, entries = pool
+        entries = _apply_edits(user_id, generation, entries)
+    else:
+        entries = [
+            (pk, translation, word, level)
+            for pk, translation, word, level in Card.objects.filter(schedules__user_id=user_id)
+            .order_by()
+            .values_list('pk', 'translation', 'word', 'level')
+        ]
+        if len(entries) > POOL_SIZE:
+            entries = random.sample(entries, POOL_SIZE)
+        version = _save_entries(user_id, entries)
+    index = DistractorIndex(entries)
+    if len(_local_indexes) >= LOCAL_INDEX_LIMIT:
+        _local_indexes.clear()
+    _local_indexes[user_id] = (version, index)
+    return index
+
+
+def multiple_choice_options(user_id: int, answer: str, word: str = '', level: Optional[str] = None,
+                            index: Optional[DistractorIndex] = None) -> list[str]:
+    """
+    Варианты ответа для вопроса: верный и DISTRACTOR_COUNT неверных в случайном порядке.
+
+    Похожие варианты выбираются, если включена настройка MC_SIMILAR_DISTRACTORS;
+    с MC_DISTRACTORS_SAME_LEVEL — только среди карточек уровня level.
+
+    Args:
+        user_id: ID пользователя.
+        answer: Верный перевод.
+        word: Спрашиваемое слово.
+        level: Уровень карточки.
+        index: Индекс пула (по умолчанию — get_distractor_index(user_id)).
+
+    Returns:
+        Список из DISTRACTOR_COUNT + 1 вариантов.
+
+    Example:
+        >>> multiple_choice_options(user.id, 'яблоко', 'apple', 'beginner')
+        ['яблоня', 'яблоко', 'ябеда', 'блоки']
+    """
+    if index is None:
+        index = get_distractor_index(user_id)
+    options = index.distractors(
+        answer, word,
+        level=level if settings.MC_DISTRACTORS_SAME_LEVEL else None,
+        similar=settings.MC_SIMILAR_DISTRACTORS,
+    ) + [answer]
+    random.shuffle(options)
+    return options
@@ -0,0 +1,138 @@
+"""
+Очередь карточек на сегодня: порядок и дневной лимит.
+
+Пользователь, вернувшийся после перерыва, может иметь тысячи просроченных
+карточек. Раньше /api/today/ отдавал их все, упорядоченные только по
+next_review. Теперь очередь — верхние k расписаний в порядке приоритета,
+выбранные в базе (ORDER BY ... LIMIT k): в Python попадает не больше k строк.
+
+Приоритеты (REVIEW_PRIORITY):
+    - PRIORITY_DUE — раньше срок, раньше показ (по индексу (user, next_review)
+      LIMIT останавливает чтение после k строк);
+    - PRIORITY_OVERDUE — больше доля просрочки days_overdue / interval:
+      карточка с интервалом 2 дня, просроченная на неделю, забыта вероятнее,
+      чем карточка с интервалом 60 дней, просроченная на ту же неделю;
+    - PRIORITY_EF — сначала трудные карточки (меньше ef).
+
+Дневной лимит (DAILY_REVIEW_LIMIT, 0 — без лимита) уменьшается на число
+карточек, повторенных сегодня: расписаний с last_review = сегодня (индекс
+(user, last_review)). Счет ведется в базе, поэтому один и тот же у всех
+воркеров и не сбрасывается при перезапуске; повторный ответ на ту же
+карточку за день лимит не расходует.
+"""
+
+from datetime import date
+from typing import Optional
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import F, FloatField, Func, QuerySet, Value
+
+from .models import Schedule
+
+PRIORITY_DUE = 'due'
+PRIORITY_OVERDUE = 'overdue'
+PRIORITY_EF = 'ef'
+PRIORITY_CHOICES = [
+    (PRIORITY_DUE, 'По сроку повторения'),
+    (PRIORITY_OVERDUE, 'По доле просрочки'),
+    (PRIORITY_EF, 'Сначала трудные'),
+]
+
+
+class OverdueRatio(Func):
+    """
+    Доля просрочки расписания на дату today: (today - next_review) / interval.
+
+    Разность дат вычисляется по-своему в каждой СУБД, поэтому выражение
+    поддерживается для SQLite и PostgreSQL (см. order_due).
+    """
+
+    output_field = FloatField()
+
+    def __init__(self, today: date):
+        super().__init__(Value(today), F('next_review'), F('interval'))
+
+    def _compile(self, compiler, template: str):
+        sqls, params = [], []
+        for expression in self.get_source_expressions():
+            sql, expression_params = compiler.compile(expression)
+            sqls.append(sql)
+            params.extend(expression_params)
+        return template.format(*sqls), params
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return self._compile(compiler, '((julianday({0}) - julianday({1})) / NULLIF({2}, 0))')
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        return self._compile(compiler, '((CAST({0} AS date) - {1})::double precision / NULLIF({2}, 0))')
+
+
+def reviews_done_today(user_id: int) -> int:
+    """Число карточек, повторенных пользователем сегодня (один COUNT по индексу)."""
+    return Schedule.objects.filter(user_id=user_id, last_review=date.today()).count()
+
+
+def remaining_reviews(user_id: int) -> Optional[int]:
+    """
+    Сколько карточек еще можно показать сегодня.
+
+    Returns:
+        Остаток дневного лимита (не меньше 0) или None, если лимита нет.
+    """
+    if not settings.DAILY_REVIEW_LIMIT:
+        return None
+    return max(0, settings.DAILY_REVIEW_LIMIT - reviews_done_today(user_id))
+
+
+def order_due(schedules: QuerySet, priority: Optional[str] = None, today: Optional[date] = None) -> QuerySet:
+    """
+    Упорядочивает расписания по приоритету показа.
+
+    Args:
+        schedules: QuerySet расписаний.
+        priority: PRIORITY_DUE, PRIORITY_OVERDUE или PRIORITY_EF
+            (по умолчанию — settings.REVIEW_PRIORITY).
+        today: Дата для доли просрочки (по умолчанию — сегодня).
+
+    Returns:
+        Упорядоченный QuerySet (при равенстве — по next_review и id).
+
+    Raises:
+        ValueError: Если приоритет неизвестен.
+    """
+    priority = priority or settings.REVIEW_PRIORITY
+    if priority == PRIORITY_DUE:
+        return schedules.order_by('next_review', 'id')
+    if priority == PRIORITY_OVERDUE:
+        if connection.vendor not in ('sqlite', 'postgresql'):
+            return schedules.order_by('next_review', 'id')
+        ratio = OverdueRatio(today or date.today())
+        return schedules.order_by(ratio.desc(nulls_last=True), 'next_review', 'id')
+    if priority == PRIORITY_EF:
+        return schedules.order_by('ef', 'next_review', 'id')
+    raise ValueError(f'Unknown review priority: {priority}')
+
+
+def due_schedules(user, limit: Optional[int] = None, priority: Optional[str] = None) -> QuerySet:
+    """
+    Расписания на сегодня в порядке приоритета, не больше остатка дневного лимита.
+
+    Args:
+        user: Пользователь.
+        limit: Наибольшее число расписаний (None — только дневной лимит).
+        priority: Приоритет (по умолчанию — settings.REVIEW_PRIORITY).
+
+    Returns:
+        QuerySet с ORDER BY и LIMIT (без LIMIT, если ограничений нет).
+
+    Example:
+        >>> [s.card.word for s in due_schedules(user, 20).select_related('card')]
+        ['apple', 'cloud', ...]
+    """
+    today = date.today()
+    schedules = order_due(Schedule.objects.filter(user=user, next_review__lte=today), priority, today)
+    remaining = remaining_reviews(user.pk)
+    if remaining is not None:
+        limit = remaining if limit is None else min(limit, remaining)
+    return schedules if limit is None else schedules[:limit]
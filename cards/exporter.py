@@ -0,0 +1,151 @@
+"""
+Потоковый экспорт карточек в CSV и JSONL.
+
+Карточки читаются через values_list().iterator() — на PostgreSQL это
+серверный курсор, на SQLite выборка порциями, — и сразу сериализуются
+в куски по EXPORT_BUFFER_SIZE байт. Ни queryset, ни файл целиком в памяти
+не держатся, поэтому потребление памяти не зависит от размера колоды.
+Результат отдается через StreamingHttpResponse, при необходимости сжимаясь
+gzip на лету (gzip_stream).
+"""
+
+import csv
+import json
+import zlib
+from typing import Iterable, Iterator
+
+from .models import Card
+
+# Число строк, получаемых из базы за одну выборку
+EXPORT_CHUNK_SIZE = 2000
+
+# Примерный размер куска ответа в байтах
+EXPORT_BUFFER_SIZE = 64 * 1024
+
+FORMAT_CSV = 'csv'
+FORMAT_JSONL = 'jsonl'
+FORMATS = (FORMAT_CSV, FORMAT_JSONL)
+
+# Колонки CSV — тот же формат, что принимает импорт (cards.importer)
+CSV_FIELDS = ('word', 'translation', 'example', 'comment', 'level')
+
+# Поля расписания, добавляемые в JSONL
+SCHEDULE_FIELDS = (
+    'next_review', 'interval', 'repetition', 'ef', 'last_result', 'stability', 'difficulty',
+)
+
+
+class _Echo:
+    """Псевдофайл для csv.writer: write() возвращает строку, не сохраняя ее."""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def _buffered(lines: Iterable[str]) -> Iterator[bytes]:
+    """Склеивает строки в куски около EXPORT_BUFFER_SIZE байт (UTF-8)."""
+    buffer, size = [], 0
+    for line in lines:
+        buffer.append(line)
+        size += len(line)
+        if size >= EXPORT_BUFFER_SIZE:
+            yield ''.join(buffer).encode('utf-8')
+            buffer, size = [], 0
+    if buffer:
+        yield ''.join(buffer).encode('utf-8')
+
+
+def _cards(user):
+    """Личные карточки пользователя в порядке экспорта (без карточек колод из подписок)."""
+    return Card.objects.filter(user=user).order_by('word', 'pk')
+
+
+def iter_csv(user) -> Iterator[bytes]:
+    """
+    CSV с карточками пользователя (word,translation,example,comment,level).
+
+    Args:
+        user: Владелец карточек.
+
+    Yields:
+        Куски файла в UTF-8.
+    """
+    writer = csv.writer(_Echo())
+
+    def lines() -> Iterator[str]:
+        yield writer.writerow(CSV_FIELDS)
+        for row in _cards(user).values_list(*CSV_FIELDS).iterator(chunk_size=EXPORT_CHUNK_SIZE):
+            yield writer.writerow(row)
+
+    return _buffered(lines())
+
+
+def iter_jsonl(user) -> Iterator[bytes]:
+    """
+    JSONL с карточками пользователя и полями их расписаний.
+
+    Каждая строка — объект с полями CSV_FIELDS и SCHEDULE_FIELDS
+    (next_review в формате ISO 8601).
+
+    Args:
+        user: Владелец карточек.
+
+    Yields:
+        Куски файла в UTF-8.
+    """
+    fields = CSV_FIELDS + SCHEDULE_FIELDS
+    rows = _cards(user).values_list(
+        *CSV_FIELDS, *(f'schedules__{name}' for name in SCHEDULE_FIELDS)
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+    def lines() -> Iterator[str]:
+        for row in rows:
+            record = dict(zip(fields, row))
+            if record['next_review'] is not None:
+                record['next_review'] = record['next_review'].isoformat()
+            yield json.dumps(record, ensure_ascii=False) + '\n'
+
+    return _buffered(lines())
+
+
+def gzip_stream(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """
+    Сжимает поток кусков в формат gzip на лету.
+
+    Args:
+        chunks: Исходные куски.
+        level: Степень сжатия zlib (1–9).
+
+    Yields:
+        Куски gzip-файла (пустые пропускаются).
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_stream(user, fmt: str = FORMAT_CSV, compress: bool = False) -> Iterator[bytes]:
+    """
+    Поток экспорта карточек пользователя в заданном формате.
+
+    Args:
+        user: Владелец карточек.
+        fmt: FORMAT_CSV или FORMAT_JSONL.
+        compress: Сжимать ли поток gzip.
+
+    Returns:
+        Итератор кусков файла.
+
+    Raises:
+        ValueError: Если формат не поддерживается.
+    """
+    if fmt == FORMAT_CSV:
+        chunks = iter_csv(user)
+    elif fmt == FORMAT_JSONL:
+        chunks = iter_jsonl(user)
+    else:
+        raise ValueError(f'Unsupported export format: {fmt}')
+    return gzip_stream(chunks) if compress else chunks
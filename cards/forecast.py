@@ -0,0 +1,157 @@
+"""
+Прогноз нагрузки повторений для пользователя.
+
+Симулирует будущие шаги SM-2 для всех карточек пользователя сразу
+(массивами NumPy) и возвращает гистограмму ожидаемого числа карточек
+к повторению по дням. Результат кешируется до следующего ответа пользователя.
+"""
+
+from datetime import date, timedelta
+from typing import Optional
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Schedule
+from .sm2 import step_arrays
+
+# Параметры по умолчанию (можно переопределить в settings)
+DEFAULT_FORECAST_DAYS = getattr(settings, 'REVIEW_FORECAST_DAYS', 30)
+MAX_FORECAST_DAYS = 365
+DEFAULT_PASS_RATE = getattr(settings, 'REVIEW_FORECAST_PASS_RATE', 0.9)
+FORECAST_CACHE_TIMEOUT = 24 * 60 * 60
+
+# Оценки, которыми симулируются успешный и неуспешный ответы
+PASS_QUALITY = 4
+FAIL_QUALITY = 2
+
+
+def _cache_key(user_id: int) -> str:
+    """Ключ кеша прогноза пользователя (на текущий день)."""
+    return f'review_forecast:{user_id}:{date.today().isoformat()}'
+
+
+def invalidate_forecast(user_id: int) -> None:
+    """
+    Сбрасывает закешированный прогноз пользователя.
+
+    Вызывается после каждого ответа (update_schedule/update_schedules),
+    а также при добавлении и удалении карточек.
+    """
+    cache.delete(_cache_key(user_id))
+
+
+def simulate_due_counts(
+    next_review_offsets: np.ndarray,
+    interval: np.ndarray,
+    repetition: np.ndarray,
+    ef: np.ndarray,
+    days: int,
+    pass_rate: float,
+    seed: int = 0,
+) -> np.ndarray:
+    """
+    Векторизованная симуляция SM-2: число карточек к повторению по дням.
+
+    Просроченные карточки считаются подлежащими повторению сегодня (день 0).
+    Каждый день все карточки, у которых наступил срок, "отвечаются" с
+    вероятностью успеха pass_rate, после чего их интервалы пересчитываются
+    одним вызовом step_arrays.
+
+    Args:
+        next_review_offsets: Смещение next_review относительно сегодня в днях.
+        interval: Текущие интервалы.
+        repetition: Текущие счетчики повторений.
+        ef: Текущие коэффициенты эффективности.
+        days: Горизонт прогноза в днях.
+        pass_rate: Доля успешных ответов (от 0 до 1).
+        seed: Зерно генератора случайных чисел (прогноз детерминирован).
+
+    Returns:
+        Массив длины days с числом карточек на каждый день.
+    """
+    rng = np.random.default_rng(seed)
+    due = np.maximum(next_review_offsets.astype(np.int64), 0)
+    interval = interval.astype(np.int64)
+    repetition = repetition.astype(np.int64)
+    ef = ef.astype(np.float64)
+    counts = np.zeros(days, dtype=np.int64)
+
+    for day in range(days):
+        mask = due == day
+        n = int(np.count_nonzero(mask))
+        counts[day] = n
+        if not n:
+            continue
+        quality = np.where(rng.random(n) < pass_rate, PASS_QUALITY, FAIL_QUALITY)
+        new_interval, new_repetition, new_ef = step_arrays(
+            interval[mask], repetition[mask], ef[mask], quality
+        )
+        interval[mask] = new_interval
+        repetition[mask] = new_repetition
+        ef[mask] = new_ef
+        due[mask] = day + new_interval
+
+    return counts
+
+
+def forecast_review_load(
+    user,
+    days: Optional[int] = None,
+    pass_rate: Optional[float] = None,
+) -> list[dict]:
+    """
+    Прогноз числа карточек к повторению на ближайшие days дней.
+
+    Args:
+        user: Пользователь.
+        days: Горизонт прогноза (по умолчанию REVIEW_FORECAST_DAYS, максимум 365).
+        pass_rate: Ожидаемая доля успешных ответов (по умолчанию REVIEW_FORECAST_PASS_RATE).
+
+    Returns:
+        Список словарей {'date': date, 'due': int} по дням, начиная с сегодня.
+
+    Raises:
+        ValueError: Если days или pass_rate вне допустимого диапазона.
+
+    Example:
+        >>> forecast_review_load(user, days=7, pass_rate=0.85)
+        [{'date': date(2025, 1, 1), 'due': 12}, ...]
+    """
+    days = DEFAULT_FORECAST_DAYS if days is None else int(days)
+    pass_rate = DEFAULT_PASS_RATE if pass_rate is None else float(pass_rate)
+    if not (1 <= days <= MAX_FORECAST_DAYS):
+        raise ValueError(f"days must be between 1 and {MAX_FORECAST_DAYS}, got {days}")
+    if not (0.0 <= pass_rate <= 1.0):
+        raise ValueError(f"pass_rate must be between 0 and 1, got {pass_rate}")
+
+    key = _cache_key(user.pk)
+    cached = cache.get(key) or {}
+    params = (days, round(pass_rate, 4))
+    if params in cached:
+        return cached[params]
+
+    today = date.today()
+    rows = list(
+        Schedule.objects.filter(user=user)
+        .values_list('next_review', 'interval', 'repetition', 'ef')
+    )
+    if rows:
+        next_review, interval, repetition, ef = zip(*rows)
+        offsets = (
+            np.array(next_review, dtype='datetime64[D]') - np.datetime64(today, 'D')
+        ).astype(np.int64)
+        counts = simulate_due_counts(
+            offsets, np.array(interval), np.array(repetition), np.array(ef), days, pass_rate
+        )
+    else:
+        counts = np.zeros(days, dtype=np.int64)
+
+    result = [
+        {'date': today + timedelta(days=i), 'due': int(count)}
+        for i, count in enumerate(counts)
+    ]
+    cached[params] = result
+    cache.set(key, cached, FORECAST_CACHE_TIMEOUT)
+    return result
@@ -3,6 +3,7 @@
 
 CardForm — форма для создания и редактирования карточек.
 CardImportForm — форма для импорта карточек из CSV-файла.
+BulkActionForm — форма пакетной операции над выбранными карточками.
 """
 
 from django import forms
@@ -11,7 +12,9 @@ from django.utils.translation import gettext_lazy as _
 from django.core.files.uploadedfile import UploadedFile
 from typing import TYPE_CHECKING, Optional
 
-from .models import Card
+from .bulk import ACTION_CHOICES, ACTION_LEVEL, ACTION_POSTPONE
+from .decks import copy_on_write
+from .models import Card, ImportJob, normalize_key
 
 if TYPE_CHECKING:
     from django.contrib.auth.models import AbstractUser
@@ -86,15 +89,20 @@ class CardForm(forms.ModelForm):
             )
         }
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, user: Optional['User'] = None, **kwargs):
         """
         Инициализация формы с установкой даты повторения.
         
         Args:
             *args: Позиционные аргументы для ModelForm.
+            user: Владелец новой карточки (нужен для проверки дубликатов).
             **kwargs: Именованные аргументы для ModelForm.
         """
         super().__init__(*args, **kwargs)
+        # Общая карточка колоды: сохранение создаст личную копию (copy-on-write)
+        self.is_shared = self.instance.pk is not None and self.instance.deck_id is not None
+        if user is not None and self.instance.user_id is None:
+            self.instance.user = user
         
         # Устанавливаем текущую дату повторения для существующих карточек
         if self.instance and self.instance.pk and hasattr(self.instance, 'schedule'):
@@ -108,18 +116,19 @@ class CardForm(forms.ModelForm):
             Очищенные данные формы.
         
         Raises:
-            ValidationError: Если карточка с таким словом уже существует.
+            ValidationError: Если карточка с таким словом и переводом уже существует
+                (без учета регистра, лишних пробелов и формы Unicode).
         """
         cleaned_data = super().clean()
         word = cleaned_data.get('word')
         translation = cleaned_data.get('translation')
         
-        if word and translation:
-            # Проверяем уникальность карточки для пользователя
+        if word and translation and self.instance.user_id is not None:
+            # Проверяем уникальность по нормализованным ключам (поиск по уникальному индексу)
             existing_cards = Card.objects.filter(
-                user=self.instance.user if self.instance.pk else None,
-                word__iexact=word.strip(),
-                translation__iexact=translation.strip()
+                user_id=self.instance.user_id,
+                norm_word=normalize_key(word),
+                norm_translation=normalize_key(translation)
             )
             
             if self.instance.pk:
@@ -144,11 +153,16 @@ class CardForm(forms.ModelForm):
         
         Note:
             Если указана next_review, обновляет расписание повторения.
+            Изменения общей карточки колоды сохраняются в личную копию
+            пользователя (cards.decks.copy_on_write).
         """
         card = super().save(commit=False)
         
         if commit:
-            card.save()
+            if self.is_shared:
+                card = copy_on_write(card, card.user)
+            else:
+                card.save()
             
             # Обновляем дату повторения если указана
             next_review = self.cleaned_data.get('next_review')
@@ -168,10 +182,13 @@ class CardImportForm(forms.Form):
     
     Attributes:
         file: Поле для загрузки CSV-файла.
+        mode: Что делать с карточками, которые уже есть: пропускать или
+            обновлять example, comment и level (расписания сохраняются).
     
     Note:
         Ожидает CSV-файл в формате: word,translation,example,comment,level
-        с кодировкой UTF-8.
+        с кодировкой UTF-8. Разбор и запись выполняет cards.importer
+        (потоково, без чтения файла целиком в память).
     """
     
     file = forms.FileField(
@@ -185,6 +202,23 @@ class CardImportForm(forms.Form):
         )
     )
 
+    mode = forms.ChoiceField(
+        label=_('Существующие карточки'),
+        choices=ImportJob.MODE_CHOICES,
+        initial=ImportJob.MODE_SKIP,
+        required=False,
+        help_text=_('При обновлении прогресс повторений сохраняется'),
+        widget=forms.Select(
+            attrs={
+                'class': 'w-full px-3 py-2 border border-gray-300 rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500 focus:border-transparent'
+            }
+        )
+    )
+
+    def clean_mode(self) -> str:
+        """Режим импорта; по умолчанию существующие карточки пропускаются."""
+        return self.cleaned_data.get('mode') or ImportJob.MODE_SKIP
+
     def clean_file(self) -> UploadedFile:
         """
         Валидация загруженного файла.
@@ -210,57 +244,70 @@ class CardImportForm(forms.Form):
         
         return file
 
-    def get_csv_data(self) -> list[dict]:
+
+class BulkActionForm(forms.Form):
+    """
+    Форма пакетной операции над карточками (cards.bulk).
+    
+    Attributes:
+        action: Операция: удалить, изменить уровень, отложить, сбросить прогресс.
+        scope: К чему применить: к отмеченным карточкам или ко всем по фильтру.
+        card_ids: ID отмеченных карточек.
+        filter_level: Фильтр по уровню (как на странице списка).
+        new_level: Новый уровень (для смены уровня).
+        days: На сколько дней отложить повторение.
+    """
+    
+    SCOPE_SELECTED = 'selected'
+    SCOPE_FILTER = 'filter'
+    SCOPE_CHOICES = [
+        (SCOPE_SELECTED, _('Отмеченные')),
+        (SCOPE_FILTER, _('Все по фильтру')),
+    ]
+    
+    action = forms.ChoiceField(label=_('Действие'), choices=ACTION_CHOICES)
+    scope = forms.ChoiceField(choices=SCOPE_CHOICES, initial=SCOPE_SELECTED, required=False)
+    card_ids = forms.Field(required=False, widget=forms.MultipleHiddenInput)
+    filter_level = forms.ChoiceField(choices=[('', '')] + list(Card.LEVEL_CHOICES), required=False)
+    new_level = forms.ChoiceField(label=_('Новый уровень'), choices=Card.LEVEL_CHOICES, required=False)
+    days = forms.IntegerField(label=_('Дней'), min_value=1, max_value=365, required=False)
+
+    def clean_card_ids(self) -> list[int]:
         """
-        Извлекает данные из CSV-файла.
-        
-        Returns:
-            Список словарей с данными карточек.
+        ID отмеченных карточек.
         
         Raises:
-            ValidationError: Если формат файла некорректный.
+            ValidationError: Если ID не целые числа.
         """
-        import csv
-        from io import StringIO
+        try:
+            return [int(pk) for pk in self.cleaned_data.get('card_ids') or []]
+        except (TypeError, ValueError):
+            raise ValidationError(_('Некорректный список карточек.'))
+
+    def clean(self) -> dict:
+        """
+        Проверяет параметры выбранной операции и наличие отмеченных карточек.
         
-        file = self.cleaned_data.get('file')
-        if not file:
-            return []
+        Returns:
+            Очищенные данные формы.
+        """
+        cleaned_data = super().clean()
+        action = cleaned_data.get('action')
+        if cleaned_data.get('scope') != self.SCOPE_FILTER and not cleaned_data.get('card_ids'):
+            raise ValidationError(_('Отметьте карточки или выберите «Все по фильтру».'))
+        if action == ACTION_LEVEL and not cleaned_data.get('new_level'):
+            self.add_error('new_level', _('Выберите новый уровень.'))
+        if action == ACTION_POSTPONE and not cleaned_data.get('days'):
+            self.add_error('days', _('Укажите число дней.'))
+        return cleaned_data
+
+    def selection(self) -> dict:
+        """
+        Выборка для функций cards.bulk.
         
-        try:
-            # Читаем файл как текст
-            content = file.read().decode('utf-8')
-            file.seek(0)  # Сбрасываем позицию для повторного чтения
-            
-            # Парсим CSV
-            csv_file = StringIO(content)
-            reader = csv.DictReader(csv_file)
-            
-            # Проверяем обязательные поля
-            required_fields = {'word', 'translation'}
-            if not required_fields.issubset(set(reader.fieldnames or [])):
-                raise ValidationError(
-                    _('CSV-файл должен содержать поля: word, translation')
-                )
-            
-            # Извлекаем данные
-            cards_data = []
-            for row_num, row in enumerate(reader, start=2):  # Начинаем с 2 (заголовок = 1)
-                if not row.get('word') or not row.get('translation'):
-                    continue  # Пропускаем пустые строки
-                
-                cards_data.append({
-                    'word': row['word'].strip(),
-                    'translation': row['translation'].strip(),
-                    'example': row.get('example', '').strip(),
-                    'comment': row.get('comment', '').strip(),
-                    'level': row.get('level', 'beginner').strip(),
-                    'row_number': row_num
-                })
-            
-            return cards_data
-            
-        except UnicodeDecodeError:
-            raise ValidationError(_('Файл должен быть в кодировке UTF-8.'))
-        except Exception as e:
-            raise ValidationError(_(f'Ошибка чтения файла: {str(e)}')) 
\ No newline at end of file
+        Returns:
+            Словарь с card_ids (None — все по фильтру) и level.
+        """
+        if self.cleaned_data.get('scope') == self.SCOPE_FILTER:
+            return {'card_ids': None, 'level': self.cleaned_data.get('filter_level') or None}
+        return {'card_ids': self.cleaned_data['card_ids'], 'level': None}
@@ -0,0 +1,296 @@
+"""
+FSRS-подобный алгоритм планирования повторений и оптимизатор его параметров.
+
+Модель памяти FSRS (Free Spaced Repetition Scheduler, версия 4.5) описывает
+карточку двумя величинами: стабильностью S (через сколько дней вероятность
+вспомнить упадёт до 90%) и сложностью D (от 1 до 10). В отличие от SM-2 с
+фиксированными константами, 17 весов модели подбираются по истории ответов
+пользователя (ReviewLog), что позволяет держать заданный уровень запоминания
+меньшим числом повторений.
+
+Все формулы записаны поэлементно и работают как со скалярами, так и с
+массивами NumPy — оптимизатор пересчитывает всю историю пользователя сразу.
+
+References:
+    - FSRS: https://github.com/open-spaced-repetition/fsrs4anki/wiki/The-Algorithm
+"""
+
+from typing import Optional
+
+import numpy as np
+
+# Форма кривой забывания: R(t, S) = (1 + FACTOR * t / S) ** DECAY
+DECAY = -0.5
+FACTOR = 0.9 ** (1 / DECAY) - 1
+
+DEFAULT_RETENTION = 0.9
+
+# Веса FSRS-4.5 по умолчанию
+DEFAULT_WEIGHTS = (
+    0.4872, 1.4003, 3.7145, 13.8206, 5.1618, 1.2298, 0.8975, 0.031, 1.6474,
+    0.1367, 1.0461, 2.1072, 0.0793, 0.3246, 1.587, 0.2272, 2.8755,
+)
+
+# Допустимые границы весов (как в эталонном оптимизаторе FSRS)
+WEIGHT_BOUNDS = np.array([
+    (0.1, 100.0), (0.1, 100.0), (0.1, 100.0), (0.1, 100.0),
+    (1.0, 10.0), (0.1, 5.0), (0.1, 5.0), (0.0, 0.5),
+    (0.0, 3.0), (0.1, 0.8), (0.01, 2.5), (0.5, 5.0),
+    (0.01, 0.2), (0.01, 0.9), (0.01, 2.0), (0.0, 1.0), (1.0, 6.0),
+])
+
+MIN_STABILITY = 0.01
+
+
+def rating_from_quality(quality):
+    """
+    Переводит оценку SM-2 (0-5) в оценку FSRS (1-4).
+
+    0-2 → Again (1), 3 → Hard (2), 4 → Good (3), 5 → Easy (4).
+    Работает со скалярами и массивами.
+    """
+    return np.clip(np.asarray(quality) - 1, 1, 4)
+
+
+def retrievability(elapsed_days, stability):
+    """Вероятность вспомнить карточку через elapsed_days при стабильности stability."""
+    return (1 + FACTOR * elapsed_days / stability) ** DECAY
+
+
+def initial_stability(w, rating):
+    """Стабильность после первого ответа."""
+    return np.maximum(np.take(w[:4], rating - 1), MIN_STABILITY)
+
+
+def initial_difficulty(w, rating):
+    """Сложность после первого ответа."""
+    return np.clip(w[4] - (rating - 3) * w[5], 1, 10)
+
+
+def next_difficulty(w, difficulty, rating):
+    """Сложность после очередного ответа (с возвратом к среднему)."""
+    updated = difficulty - w[6] * (rating - 3)
+    return np.clip(w[7] * initial_difficulty(w, 3) + (1 - w[7]) * updated, 1, 10)
+
+
+def next_stability(w, difficulty, stability, r, rating):
+    """Стабильность после очередного ответа (вспомнил или забыл)."""
+    hard_penalty = np.where(rating == 2, w[15], 1.0)
+    easy_bonus = np.where(rating == 4, w[16], 1.0)
+    recall = stability * (
+        1 + np.exp(w[8]) * (11 - difficulty) * stability ** -w[9]
+        * (np.exp(w[10] * (1 - r)) - 1) * hard_penalty * easy_bonus
+    )
+    forget = (
+        w[11] * difficulty ** -w[12] * ((stability + 1) ** w[13] - 1)
+        * np.exp(w[14] * (1 - r))
+    )
+    return np.maximum(np.where(rating > 1, recall, forget), MIN_STABILITY)
+
+
+def next_interval(stability, retention: float = DEFAULT_RETENTION):
+    """Интервал в днях, через который вероятность вспомнить упадёт до retention."""
+    interval = stability / FACTOR * (retention ** (1 / DECAY) - 1)
+    return np.maximum(np.rint(interval), 1).astype(np.int64)
+
+
+def step(
+    w,
+    stability: Optional[float],
+    difficulty: Optional[float],
+    elapsed_days: float,
+    quality: int,
+    retention: float = DEFAULT_RETENTION,
+) -> tuple[float, float, int]:
+    """
+    Один шаг FSRS для одной карточки.
+
+    Args:
+        w: Веса модели (17 значений).
+        stability: Текущая стабильность (None для новой карточки).
+        difficulty: Текущая сложность (None для новой карточки).
+        elapsed_days: Дней с предыдущего ответа.
+        quality: Оценка SM-2 от 0 до 5.
+        retention: Целевая вероятность вспомнить.
+
+    Returns:
+        Кортеж (stability, difficulty, interval).
+    """
+    w = np.asarray(w, dtype=np.float64)
+    rating = int(rating_from_quality(quality))
+    if stability is None or difficulty is None:
+        new_s = initial_stability(w, rating)
+        new_d = initial_difficulty(w, rating)
+    else:
+        r = retrievability(max(elapsed_days, 0), stability)
+        new_s = next_stability(w, difficulty, stability, r, rating)
+        new_d = next_difficulty(w, difficulty, rating)
+    return float(new_s), float(new_d), int(next_interval(new_s, retention))
+
+
+class ReviewHistory:
+    """
+    История ответов, упакованная для векторизованного пересчёта.
+
+    Карточки отсортированы по убыванию длины истории, поэтому на k-м шаге
+    активны первые active[k] карточек и работа на шаге пропорциональна
+    числу ответов, а не числу карточек.
+
+    Attributes:
+        ratings: Оценки FSRS, матрица [карточки, шаги].
+        elapsed: Дни с предыдущего ответа, матрица [карточки, шаги].
+        active: Число карточек с ответом на каждом шаге.
+        n_reviews: Общее число ответов.
+    """
+
+    __slots__ = ('ratings', 'elapsed', 'lengths', 'active', 'n_reviews')
+
+    def __init__(self, card_ids, days, qualities):
+        """
+        Args:
+            card_ids: ID карточек ответов, отсортированные по (card_id, времени).
+            days: Номер дня ответа (например, ordinal даты).
+            qualities: Оценки SM-2 от 0 до 5.
+        """
+        card_ids = np.asarray(card_ids)
+        days = np.asarray(days, dtype=np.float64)
+        ratings = rating_from_quality(np.asarray(qualities, dtype=np.int64))
+        self.n_reviews = len(card_ids)
+        if not self.n_reviews:
+            self.ratings = np.zeros((0, 0), dtype=np.int64)
+            self.elapsed = np.zeros((0, 0))
+            self.lengths = np.zeros(0, dtype=np.int64)
+            self.active = np.zeros(0, dtype=np.int64)
+            return
+
+        starts = np.flatnonzero(np.r_[True, card_ids[1:] != card_ids[:-1]])
+        lengths = np.diff(np.r_[starts, len(card_ids)])
+        order = np.argsort(-lengths, kind='stable')
+        lengths, starts = lengths[order], starts[order]
+        max_len = int(lengths[0])
+
+        # Позиция каждого ответа в матрице [строка карточки, шаг]
+        rows = np.repeat(np.arange(len(lengths)), lengths)
+        cols = np.arange(self.n_reviews) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        src = np.repeat(starts, lengths) + cols
+
+        self.ratings = np.zeros((len(lengths), max_len), dtype=np.int64)
+        self.elapsed = np.zeros((len(lengths), max_len))
+        self.ratings[rows, cols] = ratings[src]
+        gaps = np.diff(days, prepend=days[0])
+        self.elapsed[rows, cols] = np.maximum(gaps[src], 0)
+        self.lengths = lengths
+        self.active = _active_counts(lengths)
+
+    def sample(self, rng: np.random.Generator, max_reviews: int) -> 'ReviewHistory':
+        """
+        Случайная подвыборка карточек (мини-батч) объёмом около max_reviews ответов.
+
+        Порядок карточек (по убыванию длины истории) сохраняется.
+        """
+        if self.n_reviews <= max_reviews:
+            return self
+        n_rows = max(1, int(len(self.lengths) * max_reviews / self.n_reviews))
+        rows = np.sort(rng.choice(len(self.lengths), size=n_rows, replace=False))
+        batch = ReviewHistory.__new__(ReviewHistory)
+        batch.lengths = self.lengths[rows]
+        max_len = int(batch.lengths[0])
+        batch.ratings = self.ratings[rows, :max_len]
+        batch.elapsed = self.elapsed[rows, :max_len]
+        batch.active = _active_counts(batch.lengths)
+        batch.n_reviews = int(batch.lengths.sum())
+        return batch
+
+
+def _active_counts(lengths: np.ndarray) -> np.ndarray:
+    """Число карточек с длиной истории больше k для каждого шага k."""
+    return np.bincount(lengths, minlength=int(lengths.max()) + 1)[::-1].cumsum()[::-1][1:]
+
+
+def log_loss(weights: np.ndarray, history: ReviewHistory) -> np.ndarray:
+    """
+    Средняя логистическая ошибка прогноза вспоминания для набора весов.
+
+    Args:
+        weights: Веса формы [17] или [P, 17] (P наборов весов считаются сразу).
+        history: Упакованная история ответов.
+
+    Returns:
+        Ошибка (скаляр или массив формы [P]).
+    """
+    w = np.atleast_2d(weights).T[:, :, None]  # [17, P, 1] для поэлементных формул
+    n = history.active[0] if len(history.active) else 0
+    rating0 = history.ratings[:n, 0][None, :]
+    stability = np.maximum(w[:4, :, 0][rating0[0] - 1].T, MIN_STABILITY)
+    difficulty = initial_difficulty(w, rating0)
+    total = np.zeros(w.shape[1])
+    count = 0
+
+    for k in range(1, len(history.active)):
+        n = history.active[k]
+        stability, difficulty = stability[:, :n], difficulty[:, :n]
+        rating = history.ratings[:n, k][None, :]
+        r = np.clip(retrievability(history.elapsed[:n, k][None, :], stability), 1e-6, 1 - 1e-6)
+        recalled = rating > 1
+        total -= np.where(recalled, np.log(r), np.log(1 - r)).sum(axis=1)
+        count += n
+        stability = next_stability(w, difficulty, stability, r, rating)
+        difficulty = next_difficulty(w, difficulty, rating)
+
+    loss = total / max(count, 1)
+    return loss if np.ndim(weights) > 1 else loss[0]
+
+
+def optimize(
+    history: ReviewHistory,
+    initial: Optional[np.ndarray] = None,
+    iterations: int = 150,
+    learning_rate: float = 0.05,
+    epsilon: float = 1e-4,
+    batch_reviews: int = 8192,
+    seed: int = 0,
+) -> tuple[np.ndarray, float]:
+    """
+    Подбирает веса FSRS градиентным спуском (Adam) по всей истории сразу.
+
+    Градиент считается конечными разностями, причём все 18 наборов весов
+    (текущий и 17 смещённых) прогоняются через историю одним векторизованным
+    проходом log_loss. Каждая итерация использует случайный мини-батч
+    карточек, поэтому время итерации не зависит от объёма истории.
+
+    Args:
+        history: Упакованная история ответов пользователя.
+        initial: Начальные веса (по умолчанию DEFAULT_WEIGHTS).
+        iterations: Число итераций.
+        learning_rate: Шаг Adam.
+        epsilon: Шаг конечных разностей (относительный).
+        batch_reviews: Примерный объём мини-батча (ответов).
+        seed: Зерно генератора мини-батчей.
+
+    Returns:
+        Кортеж (веса, итоговая ошибка).
+    """
+    w = np.array(DEFAULT_WEIGHTS if initial is None else initial, dtype=np.float64)
+    low, high = WEIGHT_BOUNDS[:, 0], WEIGHT_BOUNDS[:, 1]
+    w = np.clip(w, low, high)
+    n = len(w)
+    m = np.zeros(n)
+    v = np.zeros(n)
+    beta1, beta2 = 0.9, 0.999
+    eye = np.eye(n)
+    rng = np.random.default_rng(seed)
+
+    for t in range(1, iterations + 1):
+        h = epsilon * np.maximum(np.abs(w), 1.0)
+        candidates = np.vstack([w, w + eye * h])
+        losses = log_loss(candidates, history.sample(rng, batch_reviews))
+        grad = (losses[1:] - losses[0]) / h
+
+        m = beta1 * m + (1 - beta1) * grad
+        v = beta2 * v + (1 - beta2) * grad ** 2
+        m_hat = m / (1 - beta1 ** t)
+        v_hat = v / (1 - beta2 ** t)
+        # Шаг масштабируется на порядок величины веса
+        w = np.clip(w - learning_rate * np.maximum(np.abs(w), 1.0) * m_hat / (np.sqrt(v_hat) + 1e-8), low, high)
+
+    return w, float(log_loss(w, history))
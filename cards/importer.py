@@ -0,0 +1,423 @@
+"""
+Потоковый импорт карточек из CSV.
+
+Файл читается построчно (память не зависит от размера файла), существующие
+ключи карточек пользователя загружаются одним запросом в множество, проверка
+и отсев дубликатов выполняются в Python, а карточки с расписаниями пишутся
+пакетами через Card.objects.bulk_create_with_schedules().
+
+В режиме обновления (MODE_UPDATE) строки с существующим ключом не
+пропускаются: для каждой карточки хранится хеш полей example, comment и
+level, и через bulk_update записываются только изменившиеся карточки.
+Расписания при этом не затрагиваются, поэтому прогресс повторений
+сохраняется; повторный импорт неизмененного файла не изменяет ни одной строки.
+
+Большие файлы обрабатываются фоново (run_import_job, задача Celery
+cards.tasks.process_import_job): порциями строк, каждая — в своей транзакции
+вместе с байтовым смещением в ImportJob, что позволяет продолжить импорт
+после перезапуска воркера.
+"""
+
+import csv
+import hashlib
+import io
+import time
+from contextlib import contextmanager
+from itertools import islice
+from typing import IO, Iterable, Iterator, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .distractors import invalidate_distractor_pool
+from .models import Card, DeckSubscription, ImportJob, Schedule, normalize_key
+from .sync import restamp_on_commit
+
+# Размер пакета INSERT по умолчанию
+IMPORT_BATCH_SIZE = 1000
+
+LEVELS = dict(Card.LEVEL_CHOICES)
+
+# Режимы обработки строк с уже существующим ключом
+MODE_SKIP = ImportJob.MODE_SKIP
+MODE_UPDATE = ImportJob.MODE_UPDATE
+
+# Поля, которые обновляются в режиме MODE_UPDATE (ключ word/translation не меняется)
+UPDATE_FIELDS = ('example', 'comment', 'level')
+
+
+def content_hash(example: str, comment: str, level: str) -> bytes:
+    """
+    Хеш обновляемых полей карточки для обнаружения изменений.
+
+    Args:
+        example: Пример использования.
+        comment: Комментарий.
+        level: Уровень сложности.
+
+    Returns:
+        8-байтовый дайджест BLAKE2b.
+    """
+    data = '\x1f'.join((example, comment, level)).encode('utf-8')
+    return hashlib.blake2b(data, digest_size=8).digest()
+
+
+def load_existing(user, mode: str = MODE_SKIP, deck=None):
+    """
+    Загружает ключи карточек пользователя (или общей колоды) одним запросом.
+
+    Args:
+        user: Владелец карточек.
+        mode: Режим импорта.
+        deck: Колода — загрузить ключи ее общих карточек вместо карточек user.
+
+    Returns:
+        Для MODE_SKIP — множество ключей (norm_word, norm_translation);
+        для MODE_UPDATE — словарь ключ -> (pk, content_hash).
+    """
+    cards = Card.objects.filter(deck=deck) if deck is not None else Card.objects.filter(user=user)
+    if mode == MODE_UPDATE:
+        return {
+            (norm_word, norm_translation): (pk, content_hash(example, comment, level))
+            for norm_word, norm_translation, pk, example, comment, level in (
+                cards.values_list('norm_word', 'norm_translation', 'pk', *UPDATE_FIELDS)
+                .iterator(chunk_size=10000)
+            )
+        }
+    return set(cards.values_list('norm_word', 'norm_translation').iterator(chunk_size=10000))
+
+
+class CardImporter:
+    """
+    Построчная проверка и пакетная запись карточек одного пользователя.
+
+    С параметром deck импортирует общие карточки колоды: без владельца
+    и без расписаний (их создает подписка, см. cards.decks).
+
+    Attributes:
+        user: Владелец импортируемых карточек (None при импорте в колоду).
+        deck: Колода, в которую импортируются общие карточки.
+        batch_size: Число карточек в одном пакете INSERT/UPDATE.
+        mode: MODE_SKIP — существующие карточки пропускаются как дубликаты;
+            MODE_UPDATE — изменившиеся example/comment/level обновляются.
+        created: Число созданных карточек.
+        updated: Число обновленных карточек (MODE_UPDATE).
+        unchanged: Число совпавших с базой строк без изменений (MODE_UPDATE).
+        duplicates: Число пропущенных дубликатов.
+        errors: Сообщения об ошибках по строкам (в формате "Строка N: ...").
+
+    Example:
+        >>> importer = CardImporter(user)
+        >>> importer.feed(csv.DictReader(lines))
+        >>> importer.flush()
+        >>> importer.created, importer.errors
+    """
+
+    def __init__(self, user, batch_size: int = IMPORT_BATCH_SIZE, existing=None,
+                 mode: str = MODE_SKIP, deck=None):
+        self.user = user
+        self.deck = deck
+        self.batch_size = batch_size
+        self.mode = mode
+        self.created = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.duplicates = 0
+        self.errors: list[str] = []
+        self._pending: list[Card] = []
+        self._changed: list[Card] = []
+        self._pool_reset_scheduled = False
+        # Результат load_existing() для того же режима; может разделяться между
+        # несколькими импортерами одного файла (порции фонового импорта)
+        self._existing = load_existing(user, mode, deck) if existing is None else existing
+
+    def add_row(self, number: int, row: dict) -> None:
+        """
+        Проверяет одну строку CSV и ставит карточку в очередь на запись.
+
+        Args:
+            number: Номер строки данных (с 1, без заголовка).
+            row: Строка CSV (словарь из csv.DictReader).
+        """
+        word = (row.get('word') or '').strip()
+        translation = (row.get('translation') or '').strip()
+        if not word or not translation:
+            self.errors.append(f'Строка {number}: word и translation обязательны')
+            return
+        level = (row.get('level') or 'beginner').strip() or 'beginner'
+        if level not in LEVELS:
+            self.errors.append(f'Строка {number}: некорректный level')
+            return
+
+        example = (row.get('example') or '').strip()
+        comment = (row.get('comment') or '').strip()
+
+        # Дубликат — совпадение нормализованной пары с уже существующей или импортированной
+        key = (normalize_key(word), normalize_key(translation))
+        if self.mode == MODE_UPDATE and self._existing.get(key):
+            self._update(key, example, comment, level)
+            return
+        if key in self._existing:
+            self.duplicates += 1
+            self.errors.append(f'Строка {number}: дубликат "{word} — {translation}"')
+            return
+        self._mark_seen(key)
+
+        self._pending.append(Card(
+            user=self.user,
+            deck=self.deck,
+            word=word,
+            translation=translation,
+            example=example,
+            comment=comment,
+            level=level,
+        ))
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def _mark_seen(self, key: tuple) -> None:
+        """Запоминает ключ: следующая строка с ним будет дубликатом."""
+        if self.mode == MODE_UPDATE:
+            self._existing[key] = None
+        else:
+            self._existing.add(key)
+
+    def _update(self, key: tuple, example: str, comment: str, level: str) -> None:
+        """Ставит существующую карточку в очередь на обновление, если поля изменились."""
+        pk, digest = self._existing[key]
+        self._mark_seen(key)
+        if digest == content_hash(example, comment, level):
+            self.unchanged += 1
+            return
+        # bulk_update не заполняет auto_now, поэтому updated_at задается явно
+        self._changed.append(Card(
+            pk=pk, example=example, comment=comment, level=level, updated_at=timezone.now()
+        ))
+        if len(self._changed) >= self.batch_size:
+            self.flush()
+
+    def feed(self, rows: Iterable[dict], start: int = 1) -> None:
+        """
+        Обрабатывает последовательность строк CSV.
+
+        Args:
+            rows: Строки CSV (например, csv.DictReader).
+            start: Номер первой строки.
+        """
+        for number, row in enumerate(rows, start):
+            self.add_row(number, row)
+
+    def flush(self) -> None:
+        """Записывает накопленные новые карточки (личные — с расписаниями) и изменения существующих."""
+        if self._pending and self.deck is not None:
+            for card in self._pending:
+                card.set_norm_keys()
+            Card.objects.bulk_create(self._pending, batch_size=self.batch_size)
+            self.created += len(self._pending)
+            self._pending = []
+        if self._pending:
+            Card.objects.bulk_create_with_schedules(self._pending, batch_size=self.batch_size)
+            self.created += len(self._pending)
+            self._pending = []
+        if self._changed:
+            Card.objects.bulk_update(
+                self._changed, [*UPDATE_FIELDS, 'updated_at'], batch_size=self.batch_size
+            )
+            # Журнал синхронизации (cards.sync) видит изменения карточек по расписаниям
+            Schedule.objects.filter(card_id__in=[card.pk for card in self._changed]).update(
+                updated_at=timezone.now()
+            )
+            self.updated += len(self._changed)
+            self._changed = []
+            self._schedule_pool_reset()
+
+    def _schedule_pool_reset(self) -> None:
+        """
+        После фиксации сбрасывает пулы вариантов теста (cards.distractors).
+
+        Пул хранит уровни карточек (MC_DISTRACTORS_SAME_LEVEL), а обновление
+        идет bulk_update без Card.save. Сброс — после фиксации, чтобы пул не
+        собрался заново из еще не видимых изменений. При импорте в колоду
+        сбрасываются пулы всех подписчиков.
+        """
+        if self._pool_reset_scheduled:
+            return
+        self._pool_reset_scheduled = True
+        user, deck = self.user, self.deck
+
+        def reset() -> None:
+            if deck is not None:
+                user_ids = DeckSubscription.objects.filter(deck=deck).values_list('user_id', flat=True)
+            else:
+                user_ids = [user.pk]
+            for user_id in user_ids:
+                invalidate_distractor_pool(user_id)
+
+        transaction.on_commit(reset)
+
+
+@contextmanager
+def open_csv(file: IO[bytes]) -> Iterator[csv.DictReader]:
+    """
+    Потоковое чтение CSV из бинарного файла (UTF-8, BOM допускается).
+
+    Args:
+        file: Загруженный файл или другой бинарный поток.
+
+    Yields:
+        csv.DictReader, читающий файл построчно.
+
+    Note:
+        По выходе текстовая обертка отсоединяется, исходный файл не закрывается.
+    """
+    text = io.TextIOWrapper(file, encoding='utf-8-sig', newline='')
+    try:
+        yield csv.DictReader(text)
+    finally:
+        text.detach()
+
+
+def import_csv(user, file: IO[bytes], batch_size: int = IMPORT_BATCH_SIZE,
+               mode: str = MODE_SKIP) -> CardImporter:
+    """
+    Импортирует карточки пользователя из CSV в одной транзакции.
+
+    Args:
+        user: Владелец карточек.
+        file: Бинарный поток с CSV (word,translation,example,comment,level).
+        batch_size: Размер пакета INSERT/UPDATE.
+        mode: MODE_SKIP или MODE_UPDATE (обновлять существующие карточки).
+
+    Returns:
+        CardImporter с итогами: created, updated, unchanged, duplicates, errors.
+
+    Raises:
+        UnicodeDecodeError: Если файл не в UTF-8 (транзакция откатывается).
+        csv.Error: Если файл не разбирается как CSV.
+    """
+    started = timezone.now()
+    with transaction.atomic():
+        # Транзакция длинная: расписания отмечаются для синхронизации после фиксации
+        restamp_on_commit(Schedule.objects.filter(user=user), started)
+        importer = CardImporter(user, batch_size=batch_size, mode=mode)
+        with open_csv(file) as rows:
+            importer.feed(rows)
+        importer.flush()
+    return importer
+
+
+class _LineReader:
+    """
+    Итератор строк бинарного файла с учетом байтового смещения.
+
+    csv.reader запрашивает строки по одной и не читает вперед, поэтому после
+    каждой записи offset указывает точно на начало следующей — это смещение
+    сохраняется в ImportJob как точка продолжения.
+    """
+
+    def __init__(self, file: IO[bytes]):
+        self.file = file
+        self.offset = file.tell()
+
+    def __iter__(self) -> '_LineReader':
+        return self
+
+    def __next__(self) -> str:
+        line = self.file.readline()
+        if not line:
+            raise StopIteration
+        # BOM допускается только в начале файла
+        encoding = 'utf-8-sig' if self.offset == 0 else 'utf-8'
+        self.offset += len(line)
+        return line.decode(encoding)
+
+
+def run_import_job(job_id: int, chunk_rows: Optional[int] = None,
+                   time_budget: Optional[float] = None) -> ImportJob:
+    """
+    Обрабатывает загруженный файл задания импорта порциями строк.
+
+    Каждая порция записывается в отдельной транзакции вместе с новым смещением
+    и счетчиками задания. Если воркер остановится посреди порции, она
+    откатится целиком, и следующий запуск продолжит с последнего смещения.
+
+    Args:
+        job_id: Идентификатор ImportJob.
+        chunk_rows: Число строк в порции (по умолчанию IMPORT_JOB_CHUNK_ROWS).
+        time_budget: Ограничение времени работы в секундах; по его исчерпании
+            обработка прерывается после текущей порции, задание остается
+            активным (None — до конца файла).
+
+    Returns:
+        ImportJob в актуальном состоянии. Статус running означает, что работа
+        прервана по time_budget и задачу нужно поставить в очередь повторно.
+
+    Note:
+        Ошибки формата файла (не UTF-8, некорректный CSV) переводят задание
+        в статус failed; порции до ошибки остаются импортированными.
+    """
+    chunk_rows = chunk_rows or settings.IMPORT_JOB_CHUNK_ROWS
+    started = time.monotonic()
+    job = ImportJob.objects.select_related('user').get(pk=job_id)
+    if job.status not in ImportJob.ACTIVE_STATUSES:
+        return job
+    job.status = ImportJob.STATUS_RUNNING
+    job.save(update_fields=['status', 'updated_at'])
+
+    existing = load_existing(job.user, job.mode)
+    try:
+        with job.path.open('rb') as file:
+            file.seek(job.offset)
+            lines = _LineReader(file)
+            if job.fieldnames is None:
+                job.fieldnames = next(csv.reader(lines), [])
+                job.offset = lines.offset
+                job.save(update_fields=['fieldnames', 'offset', 'updated_at'])
+            reader = csv.DictReader(lines, fieldnames=job.fieldnames)
+
+            while True:
+                chunk_started = timezone.now()
+                with transaction.atomic():
+                    restamp_on_commit(Schedule.objects.filter(user=job.user), chunk_started)
+                    locked = ImportJob.objects.select_for_update().get(pk=job.pk)
+                    if locked.offset != job.offset or locked.status != ImportJob.STATUS_RUNNING:
+                        # Задание обработал или остановил другой воркер
+                        return locked
+                    importer = CardImporter(job.user, existing=existing, mode=job.mode)
+                    rows = list(islice(reader, chunk_rows))
+                    importer.feed(rows, start=job.rows + 1)
+                    importer.flush()
+
+                    job.offset = lines.offset
+                    job.rows += len(rows)
+                    job.created += importer.created
+                    job.updated += importer.updated
+                    job.unchanged += importer.unchanged
+                    job.duplicates += importer.duplicates
+                    job.error_count += len(importer.errors)
+                    room = settings.IMPORT_JOB_MAX_ERRORS - len(job.errors)
+                    job.errors.extend(importer.errors[:max(room, 0)])
+                    finished = len(rows) < chunk_rows
+                    if finished:
+                        job.status = ImportJob.STATUS_DONE
+                        job.finished_at = timezone.now()
+                    job.save()
+                if finished or (time_budget and time.monotonic() - started >= time_budget):
+                    break
+    except (UnicodeDecodeError, csv.Error) as exc:
+        # Порция с ошибкой откатилась: rows указывает на последнюю записанную строку
+        job.refresh_from_db()
+        job.status = ImportJob.STATUS_FAILED
+        job.message = f'Ошибка чтения файла после строки {job.rows}: {exc}'
+        job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'message', 'finished_at', 'updated_at'])
+    except FileNotFoundError:
+        job.status = ImportJob.STATUS_FAILED
+        job.message = 'Загруженный файл не найден'
+        job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'message', 'finished_at', 'updated_at'])
+
+    if job.status in (ImportJob.STATUS_DONE, ImportJob.STATUS_FAILED):
+        job.path.unlink(missing_ok=True)
+    return job
@@ -0,0 +1,203 @@
+"""
+Балансировка нагрузки повторений (load balancer для SM-2).
+
+Вместо детерминированного next_review = today + interval выбирает день
+внутри небольшого окна вокруг интервала SM-2 — тот, на который у пользователя
+запланировано меньше всего карточек. Число карточек по дням (гистограмма)
+хранится в кеше отдельным счетчиком на каждый день и поддерживается
+атомарными cache.incr/decr при каждом переносе карточки: одновременные
+ответы из веба и бота не затирают приращения друг друга.
+
+Гистограмма — подсказка, а не точный учет: счетчики могут немного
+разойтись с базой (гонка с перестроением, истечение ключей, изменения
+расписаний в обход update_schedule). Это влияет только на выбор дня внутри
+окна, расписание остается корректным; расхождение исчезает при следующем
+перестроении из Schedule (сброс при изменении набора карточек или по
+истечении HISTOGRAM_CACHE_TIMEOUT).
+
+Режим включается настройкой SM2_LOAD_BALANCE (по умолчанию выключен).
+"""
+
+import uuid
+from datetime import date, timedelta
+from typing import Iterable, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+
+from .models import Schedule
+
+HISTOGRAM_CACHE_TIMEOUT = 7 * 24 * 60 * 60
+
+# Интервалы короче этого значения не размываются (1 и 6 дней в начале обучения)
+MIN_FUZZ_INTERVAL = 3
+
+
+def is_enabled() -> bool:
+    """Включен ли режим балансировки (настройка SM2_LOAD_BALANCE)."""
+    return getattr(settings, 'SM2_LOAD_BALANCE', False)
+
+
+def _cache_key(user_id: int) -> str:
+    """Ключ кеша текущего поколения гистограммы пользователя."""
+    return f'due_histogram:{user_id}'
+
+
+def _day_key(user_id: int, generation: str, day: date) -> str:
+    """Ключ кеша счетчика карточек на день в поколении гистограммы."""
+    return f'due_histogram:{user_id}:{generation}:{day.isoformat()}'
+
+
+def invalidate_due_histogram(user_id: int) -> None:
+    """Сбрасывает гистограмму пользователя (будет перестроена при следующем обращении)."""
+    cache.delete(_cache_key(user_id))
+
+
+def _histogram_generation(user_id: int) -> str:
+    """
+    Поколение гистограммы пользователя; при отсутствии строит гистограмму.
+
+    Счетчики дней строятся одним агрегирующим запросом и записываются под
+    новым поколением, поэтому счетчики сброшенной гистограммы не
+    используются (и истекают сами).
+    """
+    generation = cache.get(_cache_key(user_id))
+    if generation is None:
+        generation = uuid.uuid4().hex
+        rows = (
+            Schedule.objects.filter(user_id=user_id, next_review__gte=date.today())
+            .values('next_review')
+            .annotate(due=Count('id'))
+        )
+        cache.set_many(
+            {_day_key(user_id, generation, row['next_review']): row['due'] for row in rows},
+            HISTOGRAM_CACHE_TIMEOUT,
+        )
+        cache.set(_cache_key(user_id), generation, HISTOGRAM_CACHE_TIMEOUT)
+    return generation
+
+
+def get_due_histogram(user_id: int, days: Iterable[date]) -> dict[str, int]:
+    """
+    Возвращает число карточек пользователя на заданные дни.
+
+    При отсутствии гистограммы в кеше она строится одним агрегирующим
+    запросом; счетчики дней читаются одним cache.get_many.
+
+    Args:
+        user_id: ID пользователя.
+        days: Даты.
+
+    Returns:
+        Словарь {дата в ISO-формате: число карточек} (дни без карточек опущены).
+    """
+    generation = _histogram_generation(user_id)
+    keys = {_day_key(user_id, generation, day): day.isoformat() for day in days}
+    return {keys[key]: max(0, due) for key, due in cache.get_many(list(keys)).items()}
+
+
+def fuzz_window(interval: int) -> int:
+    """
+    Полуширина окна размытия для интервала (в днях).
+
+    Args:
+        interval: Интервал SM-2 в днях.
+
+    Returns:
+        0 для коротких интервалов, иначе доля SM2_LOAD_BALANCE_FUZZ от интервала
+        (не меньше 1 и не больше SM2_LOAD_BALANCE_MAX_FUZZ дней).
+    """
+    if interval < MIN_FUZZ_INTERVAL:
+        return 0
+    fuzz = getattr(settings, 'SM2_LOAD_BALANCE_FUZZ', 0.1)
+    max_fuzz = getattr(settings, 'SM2_LOAD_BALANCE_MAX_FUZZ', 7)
+    return min(max_fuzz, max(1, round(interval * fuzz)))
+
+
+def candidate_intervals(interval: int) -> range:
+    """Интервалы окна вокруг интервала SM-2 (только он сам для коротких интервалов)."""
+    delta = fuzz_window(interval)
+    return range(max(1, interval - delta), interval + delta + 1)
+
+
+def pick_interval(histogram: dict[str, int], interval: int, today: date) -> int:
+    """
+    Выбирает наименее загруженный день в окне вокруг интервала.
+
+    При равной нагрузке предпочтение отдается дню, ближайшему к исходному
+    интервалу SM-2.
+
+    Args:
+        histogram: Гистограмма {дата ISO: число карточек}.
+        interval: Интервал SM-2 в днях.
+        today: Текущая дата.
+
+    Returns:
+        Скорректированный интервал в днях (не меньше 1).
+    """
+    if not fuzz_window(interval):
+        return interval
+    return min(
+        candidate_intervals(interval),
+        key=lambda days: (
+            histogram.get((today + timedelta(days=days)).isoformat(), 0),
+            abs(days - interval),
+        ),
+    )
+
+
+def _record_move(user_id: int, generation: str, old_date: Optional[date], new_date: date) -> None:
+    """
+    Переносит одну карточку между днями гистограммы атомарными приращениями.
+
+    Args:
+        user_id: ID пользователя.
+        generation: Поколение гистограммы.
+        old_date: Предыдущая дата next_review (или None для новой карточки).
+        new_date: Новая дата next_review.
+    """
+    if old_date is not None:
+        try:
+            cache.decr(_day_key(user_id, generation, old_date))
+        except ValueError:
+            # Дня нет в гистограмме (прошедшая дата или истекший счетчик)
+            pass
+    key = _day_key(user_id, generation, new_date)
+    if not cache.add(key, 1, HISTOGRAM_CACHE_TIMEOUT):
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Счетчик истек между add и incr
+            cache.set(key, 1, HISTOGRAM_CACHE_TIMEOUT)
+
+
+def balance(
+    moves: list[tuple[int, Optional[date], int]],
+    today: date,
+) -> list[int]:
+    """
+    Балансирует интервалы для набора ответов и обновляет гистограммы.
+
+    Для каждого ответа читает счетчики дней окна (один cache.get_many),
+    выбирает день и переносит карточку атомарными приращениями, так что
+    следующие ответы пачки и других процессов видят новую нагрузку.
+
+    Args:
+        moves: Тройки (user_id, старая дата next_review, интервал SM-2).
+        today: Текущая дата.
+
+    Returns:
+        Скорректированные интервалы в том же порядке.
+    """
+    generations: dict[int, str] = {}
+    result = []
+    for user_id, old_date, interval in moves:
+        if user_id not in generations:
+            generations[user_id] = _histogram_generation(user_id)
+        if fuzz_window(interval):
+            window = [today + timedelta(days=days) for days in candidate_intervals(interval)]
+            interval = pick_interval(get_due_histogram(user_id, window), interval, today)
+        _record_move(user_id, generations[user_id], old_date, today + timedelta(days=interval))
+        result.append(interval)
+    return result
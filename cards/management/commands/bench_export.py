@@ -0,0 +1,111 @@
+"""
+Django management command для замера памяти при экспорте карточек.
+
+Для каждого заданного размера колоды создает временного пользователя с
+карточками, выполняет прежний экспорт (HttpResponse из полностью
+загруженного queryset) и потоковый (cards.exporter) и выводит время,
+объем результата и пик памяти Python (tracemalloc). У потокового экспорта
+пик не должен расти с числом карточек. Все изменения откатываются.
+"""
+import csv
+import time
+import tracemalloc
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.http import HttpResponse
+from django.test.utils import override_settings
+
+from cards.exporter import FORMATS, export_stream
+from cards.models import Card
+
+
+class Rollback(Exception):
+    """Прерывает транзакцию замера, чтобы откатить тестовые данные."""
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает пик памяти прежнего и потокового экспорта карточек; данные откатываются'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            nargs='+',
+            default=[10_000, 100_000],
+            help='Размеры колоды для замера (по умолчанию 10000 100000)',
+        )
+        parser.add_argument(
+            '--format',
+            choices=FORMATS,
+            default='csv',
+            help='Формат потокового экспорта',
+        )
+        parser.add_argument(
+            '--gzip',
+            action='store_true',
+            help='Сжимать потоковый экспорт gzip',
+        )
+
+    def handle(self, *args, **options):
+        if min(options['rows']) <= 0:
+            raise CommandError('--rows должен быть положительным')
+
+        # При DEBUG=True Django хранит текст всех запросов — это исказило бы замер памяти
+        with override_settings(DEBUG=False):
+            for rows in options['rows']:
+                try:
+                    with transaction.atomic():
+                        user = self._seed(rows)
+                        self.stdout.write(f'Карточек: {rows}')
+                        self._measure('  прежний (HttpResponse)', lambda: self._legacy_export(user))
+                        self._measure(
+                            f'  потоковый ({options["format"]}{", gzip" if options["gzip"] else ""})',
+                            lambda: self._consume(export_stream(user, options['format'], options['gzip'])),
+                        )
+                        raise Rollback
+                except Rollback:
+                    pass
+
+    def _seed(self, rows: int):
+        """Создает временного пользователя с rows карточками."""
+        user = get_user_model().objects.create_user(username='__bench_export__')
+        levels = [code for code, _ in Card.LEVEL_CHOICES]
+        Card.objects.bulk_create_with_schedules([
+            Card(user=user, word=f'word{i}', translation=f'перевод{i}',
+                 example=f'Example sentence number {i}.', level=levels[i % 3])
+            for i in range(rows)
+        ], batch_size=2000)
+        return user
+
+    def _measure(self, label: str, run) -> None:
+        """Выполняет экспорт и печатает время, объем и пик памяти Python."""
+        tracemalloc.start()
+        started = time.perf_counter()
+        try:
+            size = run()
+            elapsed = time.perf_counter() - started
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        self.stdout.write(
+            f'{label}: {size / 1024 / 1024:.1f} МБ, {elapsed:.2f} с, '
+            f'пик памяти Python {peak / 1024 / 1024:.1f} МБ'
+        )
+
+    @staticmethod
+    def _consume(chunks) -> int:
+        """Читает поток, как это делает сервер при отправке клиенту."""
+        return sum(len(chunk) for chunk in chunks)
+
+    @staticmethod
+    def _legacy_export(user) -> int:
+        """Прежний алгоритм: все карточки и весь файл в памяти."""
+        cards = Card.objects.filter(user=user).order_by('word')
+        response = HttpResponse(content_type='text/csv')
+        writer = csv.writer(response)
+        writer.writerow(['word', 'translation', 'example', 'comment', 'level'])
+        for card in cards:
+            writer.writerow([card.word, card.translation, card.example, card.comment, card.level])
+        return len(response.content)
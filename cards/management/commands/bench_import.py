@@ -0,0 +1,156 @@
+"""
+Django management command для замера импорта карточек из CSV.
+
+Генерирует CSV с заданным числом строк (по умолчанию 100 000) во временный
+файл, импортирует его потоковым движком (cards.importer) для временного
+пользователя и выводит время, число SQL-запросов и пик памяти Python.
+Все изменения откатываются. С флагом --legacy дополнительно замеряет
+построчный импорт (exists() + create() на каждую строку) на части файла.
+"""
+import csv
+import io
+import resource
+import tempfile
+import time
+import tracemalloc
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import override_settings
+
+from cards.importer import import_csv, open_csv
+from cards.models import Card
+
+
+class Rollback(Exception):
+    """Прерывает транзакцию замера, чтобы откатить тестовые данные."""
+
+
+class Command(BaseCommand):
+    help = 'Замеряет потоковый импорт CSV (время, запросы, память); данные откатываются'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=100_000,
+            help='Число строк CSV (по умолчанию 100000)',
+        )
+        parser.add_argument(
+            '--duplicates',
+            type=float,
+            default=0.05,
+            help='Доля строк-дубликатов (по умолчанию 0.05)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Размер пакета INSERT',
+        )
+        parser.add_argument(
+            '--tracemalloc',
+            action='store_true',
+            help='Измерять пик памяти Python через tracemalloc (замедляет импорт в несколько раз)',
+        )
+        parser.add_argument(
+            '--legacy',
+            type=int,
+            default=0,
+            metavar='N',
+            help='Замерить построчный импорт на первых N строках для сравнения',
+        )
+
+    def handle(self, *args, **options):
+        if options['rows'] <= 0:
+            raise CommandError('--rows должен быть положительным')
+
+        # При DEBUG=True Django хранит текст всех запросов — это исказило бы замер памяти
+        with override_settings(DEBUG=False), tempfile.TemporaryFile() as file:
+            size = self._write_csv(file, options['rows'], options['duplicates'])
+            self.stdout.write(f'CSV: {options["rows"]} строк, {size / 1024 / 1024:.1f} МБ')
+
+            file.seek(0)
+            self._measure(
+                'Потоковый импорт',
+                lambda user: import_csv(user, file, options['batch_size']),
+                options['tracemalloc'],
+            )
+
+            if options['legacy']:
+                file.seek(0)
+                self._measure(
+                    f'Построчный импорт ({options["legacy"]} строк)',
+                    lambda user: self._legacy_import(user, file, options['legacy']),
+                    options['tracemalloc'],
+                )
+
+    def _write_csv(self, file, rows: int, duplicates: float) -> int:
+        """Записывает CSV с уникальными строками и заданной долей повторов."""
+        text = io.TextIOWrapper(file, encoding='utf-8', newline='', write_through=True)
+        writer = csv.writer(text)
+        writer.writerow(['word', 'translation', 'example', 'comment', 'level'])
+        levels = [code for code, _ in Card.LEVEL_CHOICES]
+        every = int(1 / duplicates) if duplicates > 0 else 0
+        for i in range(rows):
+            n = i - 1 if every and i and i % every == 0 else i
+            writer.writerow([f'word{n}', f'перевод{n}', f'Example sentence {n}.', '', levels[n % 3]])
+        text.flush()
+        text.detach()
+        return file.tell()
+
+    def _measure(self, label: str, run, trace: bool) -> None:
+        """Выполняет импорт для временного пользователя и печатает метрики."""
+        if trace:
+            tracemalloc.start()
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        try:
+            with transaction.atomic():
+                user = get_user_model().objects.create_user(username='__bench_import__')
+                queries = []
+                with connection.execute_wrapper(self._count_queries(queries)):
+                    started = time.perf_counter()
+                    result = run(user)
+                    elapsed = time.perf_counter() - started
+                raise Rollback
+        except Rollback:
+            pass
+        finally:
+            if trace:
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+        # ru_maxrss — в КБ (Linux): прирост пикового RSS процесса за время импорта
+        rss_growth = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before
+        memory = f'пик памяти Python {peak / 1024 / 1024:.1f} МБ' if trace else f'прирост пикового RSS {rss_growth / 1024:.1f} МБ'
+        self.stdout.write(
+            f'{label}: создано {result.created}, дубликатов {result.duplicates}, '
+            f'{elapsed:.2f} с, SQL-запросов {len(queries)}, {memory}'
+        )
+
+    @staticmethod
+    def _count_queries(counter: list):
+        """Обертка выполнения SQL, считающая запросы (без хранения их текста)."""
+        def wrapper(execute, sql, params, many, context):
+            counter.append(None)
+            return execute(sql, params, many, context)
+        return wrapper
+
+    @staticmethod
+    def _legacy_import(user, file, limit: int):
+        """Прежний алгоритм: exists() и create() (с сигналом) на каждую строку."""
+        from cards.importer import CardImporter
+
+        result = CardImporter(user, existing=set())
+        with open_csv(file) as rows:
+            for i, row in enumerate(rows, 1):
+                if i > limit:
+                    break
+                word, translation = row['word'].strip(), row['translation'].strip()
+                if Card.objects.filter(user=user, word=word, translation=translation).exists():
+                    result.duplicates += 1
+                    continue
+                Card.objects.create(user=user, word=word, translation=translation,
+                                    example=row['example'].strip(), level=row['level'])
+                result.created += 1
+        return result
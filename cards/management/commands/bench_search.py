@@ -0,0 +1,84 @@
+"""
+Django management command для замера полнотекстового поиска по карточкам.
+
+Берет случайные слова и префиксы из колоды пользователя и сравнивает время
+поиска через индекс (cards.search) с прежним способом — icontains по полям
+карточки (полный просмотр колоды).
+"""
+import random
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+
+from cards.models import Card
+from cards.search import SEARCH_LIMIT, search_cards
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает время поиска по индексу и через icontains для колоды пользователя'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            required=True,
+            help='Имя пользователя (колоду можно создать командой seed_cards)',
+        )
+        parser.add_argument(
+            '--queries',
+            type=int,
+            default=200,
+            help='Число поисковых запросов (по умолчанию 200)',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Зерно генератора случайных запросов',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(username=options['user'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f'Пользователь {options["user"]} не найден')
+        if options['queries'] <= 0:
+            raise CommandError('--queries должен быть положительным')
+
+        rng = random.Random(options['seed'])
+        ids = list(Card.objects.filter(user=user).values_list('pk', flat=True))
+        if not ids:
+            raise CommandError('У пользователя нет карточек')
+        queries = []
+        for card in Card.objects.filter(pk__in=rng.sample(ids, min(options['queries'], len(ids)))):
+            text = rng.choice([card.word, card.translation])
+            # Половина запросов — префиксы (поиск по мере набора)
+            queries.append(text[:max(3, len(text) // 2)] if rng.random() < 0.5 else text)
+
+        self.stdout.write(f'Карточек: {len(ids)}, запросов: {len(queries)}')
+        self._report('индекс', [self._time(lambda q=q: search_cards(user, q)) for q in queries])
+        self._report('icontains', [self._time(lambda q=q: self._legacy_search(user, q)) for q in queries])
+
+    @staticmethod
+    def _time(run) -> float:
+        started = time.perf_counter()
+        run()
+        return time.perf_counter() - started
+
+    def _report(self, label: str, timings: list[float]) -> None:
+        """Печатает медиану и 95-й перцентиль в миллисекундах."""
+        p95 = sorted(timings)[int(len(timings) * 0.95) - 1] if len(timings) > 1 else timings[0]
+        self.stdout.write(
+            f'  {label:<10} медиана {statistics.median(timings) * 1000:.2f} мс, p95 {p95 * 1000:.2f} мс'
+        )
+
+    @staticmethod
+    def _legacy_search(user, query: str) -> list:
+        """Прежний способ: icontains по четырем полям."""
+        condition = (
+            Q(word__icontains=query) | Q(translation__icontains=query)
+            | Q(example__icontains=query) | Q(comment__icontains=query)
+        )
+        return list(Card.objects.filter(condition, user=user).order_by('-created_at')[:SEARCH_LIMIT])
@@ -0,0 +1,58 @@
+"""
+Django management command для загрузки общей колоды из CSV.
+
+Создает колоду (или дополняет существующую с тем же названием) общими
+карточками из файла в формате импорта (word,translation,example,comment,level).
+Карточки хранятся один раз; подписчики колоды получают расписания новых
+карточек. Примеры колод — docs/eng_words_100.csv и docs/ai_llm_terms_50_format.csv.
+"""
+import logging
+
+from django.core.management.base import BaseCommand, CommandError
+
+from cards.decks import import_deck
+from cards.importer import MODE_SKIP, MODE_UPDATE
+from cards.models import Deck
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Загружает общую колоду карточек из CSV-файла'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Путь к CSV-файлу')
+        parser.add_argument('--title', required=True, help='Название колоды')
+        parser.add_argument('--description', default='', help='Описание колоды')
+        parser.add_argument(
+            '--private',
+            action='store_true',
+            help='Не показывать колоду всем пользователям',
+        )
+        parser.add_argument(
+            '--update',
+            action='store_true',
+            help='Обновлять example, comment и level уже загруженных карточек',
+        )
+
+    def handle(self, *args, **options):
+        deck, created = Deck.objects.get_or_create(
+            title=options['title'],
+            defaults={'description': options['description'], 'is_public': not options['private']},
+        )
+        try:
+            with open(options['path'], 'rb') as file:
+                result = import_deck(deck, file, mode=MODE_UPDATE if options['update'] else MODE_SKIP)
+        except OSError as e:
+            raise CommandError(f'Не удалось открыть файл: {e}')
+        except Exception as e:
+            logger.error(f"Ошибка в команде load_deck: {e}")
+            raise CommandError(f'Ошибка загрузки колоды: {e}')
+
+        for error in result.errors[:20]:
+            self.stderr.write(error)
+        self.stdout.write(self.style.SUCCESS(
+            f'Колода «{deck.title}» {"создана" if created else "обновлена"}: '
+            f'добавлено {result.created}, обновлено {result.updated}, '
+            f'дубликатов {result.duplicates}, ошибок {len(result.errors)}'
+        ))
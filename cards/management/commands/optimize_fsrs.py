@@ -0,0 +1,127 @@
+"""
+Django management command для подбора персональных весов FSRS.
+
+Загружает историю ответов пользователя из ReviewLog одним запросом,
+подбирает веса векторизованным градиентным спуском (cards.fsrs.optimize)
+и сохраняет их в User.scheduler_params.
+"""
+import logging
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from cards import fsrs
+from cards.models import ReviewLog
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Подбирает персональные веса FSRS по истории ответов (ReviewLog)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            action='append',
+            default=[],
+            help='Имя пользователя (можно указать несколько раз)',
+        )
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Обработать всех пользователей с достаточной историей',
+        )
+        parser.add_argument(
+            '--min-reviews',
+            type=int,
+            default=400,
+            help='Минимальное число ответов для подбора весов (по умолчанию 400)',
+        )
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=150,
+            help='Число итераций градиентного спуска',
+        )
+        parser.add_argument(
+            '--retention',
+            type=float,
+            default=fsrs.DEFAULT_RETENTION,
+            help='Целевая вероятность вспомнить (по умолчанию 0.9)',
+        )
+        parser.add_argument(
+            '--activate',
+            action='store_true',
+            help='Переключить пользователя на алгоритм FSRS после подбора',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Показать результат без сохранения',
+        )
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        if options['all']:
+            users = User.objects.filter(pk__in=ReviewLog.objects.values('user_id').distinct())
+        elif options['user']:
+            users = User.objects.filter(username__in=options['user'])
+            missing = set(options['user']) - set(users.values_list('username', flat=True))
+            if missing:
+                raise CommandError(f'Пользователи не найдены: {", ".join(sorted(missing))}')
+        else:
+            raise CommandError('Укажите --user <имя> или --all')
+
+        if not 0 < options['retention'] < 1:
+            raise CommandError('--retention должен быть в интервале (0, 1)')
+
+        for user in users:
+            try:
+                self._optimize_user(user, options)
+            except Exception as e:
+                self.stdout.write(self.style.ERROR(f'{user.username}: ошибка подбора весов: {e}'))
+                logger.error(f"Ошибка в команде optimize_fsrs для {user.username}: {e}")
+
+    def _optimize_user(self, user, options):
+        rows = list(
+            ReviewLog.objects.filter(user=user)
+            .order_by('card_id', 'reviewed_at')
+            .values_list('card_id', 'reviewed_at', 'quality')
+        )
+        if len(rows) < options['min_reviews']:
+            self.stdout.write(
+                f'{user.username}: недостаточно ответов ({len(rows)} < {options["min_reviews"]}), пропуск'
+            )
+            return
+
+        started = time.perf_counter()
+        card_ids, reviewed_at, qualities = zip(*rows)
+        days = [timezone.localtime(moment).date().toordinal() for moment in reviewed_at]
+        history = fsrs.ReviewHistory(card_ids, days, qualities)
+        initial = (user.scheduler_params or {}).get('w')
+        baseline = float(fsrs.log_loss(fsrs.DEFAULT_WEIGHTS, history))
+        weights, loss = fsrs.optimize(history, initial=initial, iterations=options['iterations'])
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(
+            f'{user.username}: {history.n_reviews} ответов, log-loss {baseline:.4f} → {loss:.4f} '
+            f'за {elapsed:.2f} с'
+        )
+        if options['dry_run']:
+            return
+
+        user.scheduler_params = {
+            'w': [round(float(value), 4) for value in weights],
+            'retention': options['retention'],
+            'loss': round(loss, 6),
+            'reviews': history.n_reviews,
+            'fitted_at': timezone.now().isoformat(),
+        }
+        fields = ['scheduler_params']
+        if options['activate']:
+            user.scheduler = 'fsrs'
+            fields.append('scheduler')
+        user.save(update_fields=fields)
+        self.stdout.write(self.style.SUCCESS(f'{user.username}: веса FSRS сохранены'))
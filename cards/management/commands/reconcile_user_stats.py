@@ -0,0 +1,44 @@
+"""
+Django management command для пересчета статистики пользователей.
+
+UserStats поддерживается инкрементально; команда пересобирает счетчики
+из расписаний (одним агрегирующим запросом)
+и исправляет возможные расхождения, например после ручных правок в админке.
+"""
+import logging
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from cards.models import UserStats
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает статистику прогресса пользователей (UserStats)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            action='append',
+            default=[],
+            help='Имя пользователя (можно указать несколько раз; по умолчанию — все)',
+        )
+
+    def handle(self, *args, **options):
+        user_ids = None
+        if options['user']:
+            users = get_user_model().objects.filter(username__in=options['user'])
+            found = dict(users.values_list('username', 'pk'))
+            missing = set(options['user']) - set(found)
+            if missing:
+                raise CommandError(f'Пользователи не найдены: {", ".join(sorted(missing))}')
+            user_ids = list(found.values())
+
+        try:
+            count = UserStats.objects.rebuild(user_ids)
+        except Exception as e:
+            logger.error(f"Ошибка в команде reconcile_user_stats: {e}")
+            raise CommandError(f'Ошибка пересчета статистики: {e}')
+        self.stdout.write(self.style.SUCCESS(f'Пересчитана статистика пользователей: {count}'))
@@ -0,0 +1,72 @@
+"""
+Django management command для заполнения базы тестовыми карточками.
+
+Создает карточки и их расписания пакетно (Card.objects.bulk_create_with_schedules),
+поэтому десятки тысяч карточек добавляются за несколько запросов.
+Используется для локальной разработки и замеров производительности.
+"""
+import random
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from cards.models import Card
+
+
+class Command(BaseCommand):
+    help = 'Создает тестовые карточки для пользователя (пакетной вставкой)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            required=True,
+            help='Имя пользователя, которому добавляются карточки',
+        )
+        parser.add_argument(
+            '--count',
+            type=int,
+            default=1000,
+            help='Число карточек (по умолчанию 1000)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Размер пакета INSERT',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Зерно генератора (уровни карточек)',
+        )
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        try:
+            user = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f'Пользователь не найден: {options["user"]}')
+        if options['count'] <= 0:
+            raise CommandError('--count должен быть положительным')
+
+        rng = random.Random(options['seed'])
+        levels = [code for code, _ in Card.LEVEL_CHOICES]
+        offset = Card.objects.filter(user=user).count()
+        cards = [
+            Card(
+                user=user,
+                word=f'word_{offset + i}',
+                translation=f'перевод_{offset + i}',
+                level=rng.choice(levels),
+            )
+            for i in range(options['count'])
+        ]
+
+        started = time.perf_counter()
+        Card.objects.bulk_create_with_schedules(cards, batch_size=options['batch_size'])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'{user.username}: создано карточек {len(cards)} за {elapsed:.2f} с'
+        ))
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.4 on 2026-10-17 02:25
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0003_alter_card_options_alter_schedule_options_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReviewLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quality', models.PositiveSmallIntegerField(help_text='Качество ответа от 0 до 5', verbose_name='Оценка')),
+                ('reviewed_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Время ответа')),
+                ('prev_interval', models.PositiveIntegerField(verbose_name='Интервал до (дней)')),
+                ('new_interval', models.PositiveIntegerField(verbose_name='Интервал после (дней)')),
+                ('prev_ef', models.FloatField(verbose_name='EF до')),
+                ('new_ef', models.FloatField(verbose_name='EF после')),
+                ('source', models.CharField(choices=[('web', 'Веб'), ('bot', 'Telegram-бот')], default='web', max_length=8, verbose_name='Источник')),
+                ('card', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='review_logs', to='cards.card', verbose_name='Карточка')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='review_logs', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Запись журнала ответов',
+                'verbose_name_plural': 'Журнал ответов',
+                'ordering': ['-reviewed_at'],
+                'indexes': [models.Index(fields=['reviewed_at'], name='cards_revie_reviewe_9917e5_idx'), models.Index(fields=['user', 'reviewed_at'], name='cards_revie_user_id_59472e_idx'), models.Index(fields=['card', 'reviewed_at'], name='cards_revie_card_id_bf3902_idx')],
+            },
+        ),
+    ]
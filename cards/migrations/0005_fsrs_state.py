@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-17 02:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0004_reviewlog'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='schedule',
+            name='difficulty',
+            field=models.FloatField(blank=True, help_text='Сложность карточки от 1 до 10 (только для FSRS)', null=True, verbose_name='Сложность (FSRS)'),
+        ),
+        migrations.AddField(
+            model_name='schedule',
+            name='stability',
+            field=models.FloatField(blank=True, help_text='Дней до падения вероятности вспомнить до 90% (только для FSRS)', null=True, verbose_name='Стабильность (FSRS)'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.4 on 2026-10-17 02:30
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0005_fsrs_state'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='schedule',
+            name='user',
+            field=models.ForeignKey(help_text='Владелец карточки (денормализовано для выборки карточек к повторению)', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='schedules', to=settings.AUTH_USER_MODEL, verbose_name='Владелец'),
+        ),
+    ]
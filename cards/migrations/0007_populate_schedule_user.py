@@ -0,0 +1,44 @@
+# Заполнение денормализованного владельца Schedule.user пакетами
+
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+BATCH_SIZE = 5000
+
+
+def populate_schedule_user(apps, schema_editor):
+    """Копирует card.user_id в schedule.user_id пакетами по диапазонам первичного ключа."""
+    Card = apps.get_model('cards', 'Card')
+    Schedule = apps.get_model('cards', 'Schedule')
+    owner = Subquery(Card.objects.filter(pk=OuterRef('card_id')).values('user_id')[:1])
+
+    pending = Schedule.objects.filter(user__isnull=True)
+    last_pk = 0
+    while True:
+        upper = (
+            pending.filter(pk__gt=last_pk)
+            .order_by('pk')
+            .values_list('pk', flat=True)[BATCH_SIZE - 1:BATCH_SIZE]
+            .first()
+        )
+        batch = pending.filter(pk__gt=last_pk)
+        if upper is not None:
+            batch = batch.filter(pk__lte=upper)
+        batch.update(user_id=owner)
+        if upper is None:
+            break
+        last_pk = upper
+
+
+class Migration(migrations.Migration):
+
+    # Каждый пакет фиксируется отдельно, чтобы не держать длинную транзакцию
+    atomic = False
+
+    dependencies = [
+        ('cards', '0006_schedule_user'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_schedule_user, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Владелец расписания обязателен; составной индекс (user, next_review)
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0007_populate_schedule_user'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='schedule',
+            name='user',
+            field=models.ForeignKey(help_text='Владелец карточки (денормализовано для выборки карточек к повторению)', on_delete=django.db.models.deletion.CASCADE, related_name='schedules', to=settings.AUTH_USER_MODEL, verbose_name='Владелец'),
+        ),
+        migrations.AddIndex(
+            model_name='schedule',
+            index=models.Index(fields=['user', 'next_review'], name='cards_sched_user_id_670001_idx'),
+        ),
+    ]
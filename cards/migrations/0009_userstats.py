@@ -0,0 +1,31 @@
+# Generated by Django 5.2.4 on 2026-10-17 02:36
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0008_schedule_user_not_null'),
+        ('users', '0003_user_scheduler'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+                ('total_cards', models.IntegerField(default=0, verbose_name='Всего карточек')),
+                ('learned', models.IntegerField(default=0, help_text='Карточки с интервалом повторения от 21 дня', verbose_name='Выучено')),
+                ('errors', models.IntegerField(default=0, help_text='Карточки с неудачным последним ответом', verbose_name='Ошибок')),
+                ('repetitions', models.IntegerField(default=0, help_text='Сумма счетчиков успешных повторений подряд', verbose_name='Повторений')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Обновлено')),
+            ],
+            options={
+                'verbose_name': 'Статистика пользователя',
+                'verbose_name_plural': 'Статистика пользователей',
+            },
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Начальное заполнение статистики пользователей агрегирующими запросами
+
+from django.conf import settings
+from django.db import migrations
+from django.db.models import Count, Q, Sum
+
+LEARNED_INTERVAL = 21
+
+
+def populate_user_stats(apps, schema_editor):
+    """Строит строку UserStats для каждого пользователя по его карточкам и расписаниям."""
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    Card = apps.get_model('cards', 'Card')
+    Schedule = apps.get_model('cards', 'Schedule')
+    UserStats = apps.get_model('cards', 'UserStats')
+
+    totals = dict(Card.objects.values('user_id').annotate(total=Count('id')).values_list('user_id', 'total'))
+    aggregates = {
+        row['user_id']: row
+        for row in Schedule.objects.values('user_id').annotate(
+            learned=Count('id', filter=Q(interval__gte=LEARNED_INTERVAL)),
+            errors=Count('id', filter=Q(last_result=False)),
+            repetitions=Sum('repetition'),
+        )
+    }
+    stats = []
+    for user_id in User.objects.values_list('pk', flat=True).iterator():
+        row = aggregates.get(user_id, {})
+        stats.append(UserStats(
+            user_id=user_id,
+            total_cards=totals.get(user_id, 0),
+            learned=row.get('learned', 0),
+            errors=row.get('errors', 0),
+            repetitions=row.get('repetitions') or 0,
+        ))
+    UserStats.objects.bulk_create(stats, batch_size=1000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0009_userstats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_user_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Нормализованные ключи карточек (заполняются миграцией 0012)
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0010_populate_userstats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='card',
+            name='norm_translation',
+            field=models.CharField(default='', editable=False, max_length=256, verbose_name='Ключ перевода'),
+        ),
+        migrations.AddField(
+            model_name='card',
+            name='norm_word',
+            field=models.CharField(default='', editable=False, max_length=256, verbose_name='Ключ слова'),
+        ),
+    ]
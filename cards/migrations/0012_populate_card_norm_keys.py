@@ -0,0 +1,52 @@
+# Заполнение нормализованных ключей карточек пакетами
+
+import unicodedata
+
+from django.db import migrations
+
+BATCH_SIZE = 2000
+
+
+def normalize_key(text):
+    """Копия cards.models.normalize_key на момент миграции."""
+    folded = unicodedata.normalize('NFC', text or '').casefold()
+    return unicodedata.normalize('NFC', ' '.join(folded.split()))
+
+
+def populate_norm_keys(apps, schema_editor):
+    """
+    Вычисляет norm_word/norm_translation для всех карточек.
+
+    Ранее проверка дубликатов была неполной, поэтому у пользователя могут быть
+    карточки, совпадающие после нормализации. Первая (по id) сохраняет ключ,
+    остальным к ключу перевода добавляется суффикс #<id> — данные не теряются,
+    а уникальный индекс можно построить.
+    """
+    Card = apps.get_model('cards', 'Card')
+    seen = set()
+    batch = []
+    cards = Card.objects.order_by('pk').only('pk', 'user_id', 'word', 'translation')
+    for card in cards.iterator(chunk_size=BATCH_SIZE):
+        card.norm_word = normalize_key(card.word)
+        card.norm_translation = normalize_key(card.translation)
+        key = (card.user_id, card.norm_word, card.norm_translation)
+        if key in seen:
+            card.norm_translation = f'{card.norm_translation}#{card.pk}'
+        seen.add(key)
+        batch.append(card)
+        if len(batch) >= BATCH_SIZE:
+            Card.objects.bulk_update(batch, ['norm_word', 'norm_translation'])
+            batch = []
+    if batch:
+        Card.objects.bulk_update(batch, ['norm_word', 'norm_translation'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0011_card_norm_keys'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_norm_keys, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Уникальность нормализованной пары (слово, перевод) для пользователя
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0012_populate_card_norm_keys'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='card',
+            constraint=models.UniqueConstraint(fields=('user', 'norm_word', 'norm_translation'), name='cards_card_unique_norm_key'),
+        ),
+    ]
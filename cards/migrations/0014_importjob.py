@@ -0,0 +1,44 @@
+# Generated by Django 5.2.4 on 2026-10-17 02:55
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0013_card_unique_norm_key'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('filename', models.CharField(max_length=255, verbose_name='Имя файла')),
+                ('size', models.BigIntegerField(verbose_name='Размер (байт)')),
+                ('uploaded', models.BigIntegerField(default=0, verbose_name='Загружено (байт)')),
+                ('offset', models.BigIntegerField(default=0, help_text='Смещение первой необработанной строки — точка продолжения', verbose_name='Обработано (байт)')),
+                ('fieldnames', models.JSONField(blank=True, null=True, verbose_name='Заголовок CSV')),
+                ('status', models.CharField(choices=[('uploading', 'Загрузка файла'), ('pending', 'В очереди'), ('running', 'Выполняется'), ('done', 'Завершено'), ('failed', 'Ошибка')], default='uploading', max_length=16, verbose_name='Статус')),
+                ('rows', models.PositiveIntegerField(default=0, verbose_name='Обработано строк')),
+                ('created', models.PositiveIntegerField(default=0, verbose_name='Создано карточек')),
+                ('duplicates', models.PositiveIntegerField(default=0, verbose_name='Дубликатов')),
+                ('error_count', models.PositiveIntegerField(default=0, verbose_name='Ошибок')),
+                ('errors', models.JSONField(blank=True, default=list, verbose_name='Ошибки по строкам')),
+                ('message', models.TextField(blank=True, verbose_name='Сообщение')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Создано')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Обновлено')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Завершено')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='import_jobs', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Задание импорта',
+                'verbose_name_plural': 'Задания импорта',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['user', 'created_at'], name='cards_impor_user_id_bea87d_idx'), models.Index(fields=['status', 'updated_at'], name='cards_impor_status_f331c8_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.4 on 2026-10-17 02:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0014_importjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importjob',
+            name='mode',
+            field=models.CharField(choices=[('skip', 'Пропускать существующие карточки'), ('update', 'Обновлять существующие карточки')], default='skip', max_length=16, verbose_name='Режим'),
+        ),
+        migrations.AddField(
+            model_name='importjob',
+            name='unchanged',
+            field=models.PositiveIntegerField(default=0, verbose_name='Без изменений'),
+        ),
+        migrations.AddField(
+            model_name='importjob',
+            name='updated',
+            field=models.PositiveIntegerField(default=0, verbose_name='Обновлено карточек'),
+        ),
+    ]
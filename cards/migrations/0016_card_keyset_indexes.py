@@ -0,0 +1,28 @@
+# Generated by Django 5.2.4 on 2026-10-17 03:03
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0015_importjob_mode'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='card',
+            index=models.Index(fields=['user', 'created_at', 'id'], name='cards_card_user_id_478494_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='card',
+            index=models.Index(fields=['user', 'level', 'created_at', 'id'], name='cards_card_user_id_3403b0_idx'),
+        ),
+        # Префикс нового индекса (user, level, ...) заменяет старый (user, level)
+        migrations.RemoveIndex(
+            model_name='card',
+            name='cards_card_user_id_efb68e_idx',
+        ),
+    ]
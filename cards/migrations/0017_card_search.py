@@ -0,0 +1,28 @@
+# Полнотекстовый поиск по карточкам: FTS5 с триггерами синхронизации (SQLite)
+# или GIN-индекс по tsvector (PostgreSQL). DDL идемпотентен и используется также
+# после migrate для восстановления триггеров SQLite (см. cards.search)
+
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    from cards.search import ensure_search_index
+
+    ensure_search_index(schema_editor.connection)
+
+
+def drop_search_index(apps, schema_editor):
+    from cards.search import drop_search_index
+
+    drop_search_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0016_card_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
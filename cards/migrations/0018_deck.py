@@ -0,0 +1,108 @@
+# Generated by Django 5.2.4 on 2026-10-17 03:18
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0017_card_search'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Deck',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=128, unique=True, verbose_name='Название')),
+                ('description', models.TextField(blank=True, verbose_name='Описание')),
+                ('is_public', models.BooleanField(default=True, help_text='Публичную колоду видят и могут подписаться все пользователи', verbose_name='Публичная')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Создано')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Обновлено')),
+            ],
+            options={
+                'verbose_name': 'Колода',
+                'verbose_name_plural': 'Колоды',
+                'ordering': ['title'],
+            },
+        ),
+        migrations.CreateModel(
+            name='DeckSubscription',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Подписан')),
+            ],
+            options={
+                'verbose_name': 'Подписка на колоду',
+                'verbose_name_plural': 'Подписки на колоды',
+            },
+        ),
+        migrations.AddField(
+            model_name='card',
+            name='source',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='copies', to='cards.card', verbose_name='Исходная карточка колоды'),
+        ),
+        migrations.AlterField(
+            model_name='card',
+            name='user',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='cards', to=settings.AUTH_USER_MODEL, verbose_name='Владелец'),
+        ),
+        migrations.AlterField(
+            model_name='schedule',
+            name='card',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='schedules', to='cards.card', verbose_name='Карточка'),
+        ),
+        migrations.AlterField(
+            model_name='schedule',
+            name='user',
+            field=models.ForeignKey(help_text='Кто повторяет карточку: владелец личной карточки или подписчик колоды', on_delete=django.db.models.deletion.CASCADE, related_name='schedules', to=settings.AUTH_USER_MODEL, verbose_name='Владелец'),
+        ),
+        migrations.AddConstraint(
+            model_name='schedule',
+            constraint=models.UniqueConstraint(fields=('card', 'user'), name='cards_schedule_unique_card_user'),
+        ),
+        migrations.AddField(
+            model_name='deck',
+            name='owner',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='decks', to=settings.AUTH_USER_MODEL, verbose_name='Автор'),
+        ),
+        migrations.AddField(
+            model_name='card',
+            name='deck',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='cards', to='cards.deck', verbose_name='Колода'),
+        ),
+        migrations.AddIndex(
+            model_name='card',
+            index=models.Index(fields=['deck', 'created_at', 'id'], name='cards_card_deck_id_b23880_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='card',
+            constraint=models.UniqueConstraint(condition=models.Q(('user__isnull', True)), fields=('deck', 'norm_word', 'norm_translation'), name='cards_card_unique_deck_key'),
+        ),
+        migrations.AddConstraint(
+            model_name='card',
+            constraint=models.CheckConstraint(condition=models.Q(models.Q(('deck__isnull', True), ('user__isnull', False)), models.Q(('deck__isnull', False), ('user__isnull', True)), _connector='OR'), name='cards_card_owner_or_deck'),
+        ),
+        migrations.AddField(
+            model_name='decksubscription',
+            name='deck',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='subscriptions', to='cards.deck', verbose_name='Колода'),
+        ),
+        migrations.AddField(
+            model_name='decksubscription',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='deck_subscriptions', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь'),
+        ),
+        migrations.AddField(
+            model_name='deck',
+            name='subscribers',
+            field=models.ManyToManyField(related_name='subscribed_decks', through='cards.DeckSubscription', to=settings.AUTH_USER_MODEL, verbose_name='Подписчики'),
+        ),
+        migrations.AddConstraint(
+            model_name='decksubscription',
+            constraint=models.UniqueConstraint(fields=('user', 'deck'), name='cards_decksubscription_unique'),
+        ),
+    ]
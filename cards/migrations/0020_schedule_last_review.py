@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-17 04:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0019_sync_tombstone'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='schedule',
+            name='last_review',
+            field=models.DateField(blank=True, help_text='Не меняется при ручном переносе даты повторения', null=True, verbose_name='Дата последнего ответа'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.4 on 2026-10-17 04:40
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0020_schedule_last_review'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='schedule',
+            index=models.Index(fields=['user', 'last_review'], name='cards_sched_user_id_84b7b1_idx'),
+        ),
+    ]
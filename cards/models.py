@@ -1,19 +1,32 @@
 """
 Модели приложения cards.
 
-Card — карточка для изучения слов.
-Schedule — расписание повторений по алгоритму SM-2 для каждой карточки.
+Card — карточка для изучения слов (личная или общая карточка колоды).
+Deck — общая колода; DeckSubscription — подписка пользователя на колоду.
+Schedule — расписание повторений по алгоритму SM-2 (одно на карточку и пользователя).
+ReviewLog — журнал ответов (только добавление) для аналитики и настройки алгоритма.
+UserStats — счетчики прогресса пользователя, поддерживаемые инкрементально.
+SyncTombstone — отметки об удалении карточек для синхронизации клиентов.
+ImportJob — фоновый импорт большого CSV-файла (загрузка частями, обработка в Celery).
 
 Модели реализуют систему интервального повторения с научно обоснованным
 алгоритмом SM-2 для эффективного запоминания иностранных слов.
 """
 
-from django.db import models
-from django.db.models.signals import post_save
+from django.db import connections, models, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.signals import post_save, post_delete, post_migrate
 from django.dispatch import receiver
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.utils import timezone
+import unicodedata
+from collections import Counter
 from datetime import date
-from typing import TYPE_CHECKING
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, Optional
+
+from .search import FTS_TABLE, ensure_search_index
 
 if TYPE_CHECKING:
     from django.contrib.auth.models import AbstractUser
@@ -22,6 +35,181 @@ else:
     User = get_user_model()
 
 
+def normalize_key(text: str) -> str:
+    """
+    Нормализованный ключ слова или перевода для поиска дубликатов.
+    
+    Приводит строку к Unicode NFC, регистронезависимой форме (casefold)
+    и схлопывает пробельные символы.
+    
+    Args:
+        text: Исходная строка.
+    
+    Returns:
+        Нормализованная строка.
+    
+    Example:
+        >>> normalize_key('  Straße\tHouse ')
+        'strasse house'
+    """
+    folded = unicodedata.normalize('NFC', text or '').casefold()
+    return unicodedata.normalize('NFC', ' '.join(folded.split()))
+
+
+class Deck(models.Model):
+    """
+    Общая колода карточек (например, "100 английских слов").
+
+    Карточки колоды хранятся один раз (Card с deck и без владельца).
+    Подписка на колоду создает только расписания подписчика; личная копия
+    карточки появляется, лишь когда подписчик ее редактирует (см. cards.decks).
+
+    Attributes:
+        title: Название колоды.
+        description: Описание.
+        owner: Автор колоды (None — колода сайта).
+        is_public: Видна ли колода всем пользователям.
+        created_at: Дата и время создания.
+        updated_at: Дата и время последнего обновления.
+    """
+
+    title = models.CharField(
+        max_length=128,
+        unique=True,
+        verbose_name='Название'
+    )
+    description = models.TextField(
+        blank=True,
+        verbose_name='Описание'
+    )
+    owner = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='decks',
+        verbose_name='Автор'
+    )
+    is_public = models.BooleanField(
+        default=True,
+        verbose_name='Публичная',
+        help_text='Публичную колоду видят и могут подписаться все пользователи'
+    )
+    subscribers = models.ManyToManyField(
+        User,
+        through='DeckSubscription',
+        related_name='subscribed_decks',
+        verbose_name='Подписчики'
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Создано'
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Обновлено'
+    )
+
+    class Meta:
+        """Мета-класс для настройки модели Deck."""
+        verbose_name = 'Колода'
+        verbose_name_plural = 'Колоды'
+        ordering = ['title']
+
+    def __str__(self) -> str:
+        """Строковое представление: название колоды."""
+        return self.title
+
+
+class DeckSubscription(models.Model):
+    """
+    Подписка пользователя на колоду.
+
+    Attributes:
+        user: Подписчик.
+        deck: Колода.
+        created_at: Дата и время подписки.
+    """
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='deck_subscriptions',
+        verbose_name='Пользователь'
+    )
+    deck = models.ForeignKey(
+        Deck,
+        on_delete=models.CASCADE,
+        related_name='subscriptions',
+        verbose_name='Колода'
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Подписан'
+    )
+
+    class Meta:
+        """Мета-класс для настройки модели DeckSubscription."""
+        verbose_name = 'Подписка на колоду'
+        verbose_name_plural = 'Подписки на колоды'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'deck'], name='cards_decksubscription_unique'),
+        ]
+
+    def __str__(self) -> str:
+        """Строковое представление: пользователь и колода."""
+        return f'{self.user_id} → {self.deck_id}'
+
+
+class CardManager(models.Manager):
+    """Менеджер карточек с пакетным созданием вместе с расписаниями."""
+
+    def bulk_create_with_schedules(
+        self,
+        cards: list['Card'],
+        batch_size: int = 1000,
+    ) -> list['Card']:
+        """
+        Создает карточки и их расписания двумя пакетными INSERT в одной транзакции.
+        
+        В отличие от save() не вызывает post_save для каждой строки: расписания
+        (next_review = сегодня) создаются одним bulk_create, кеши нагрузки
+        сбрасываются один раз на пользователя.
+        
+        Args:
+            cards: Несохраненные экземпляры Card.
+            batch_size: Размер пакета INSERT.
+        
+        Returns:
+            Список созданных карточек (с pk и заполненным card.schedule).
+        
+        Example:
+            >>> Card.objects.bulk_create_with_schedules(
+            ...     [Card(user=user, word='apple', translation='яблоко')]
+            ... )
+        """
+        cards = list(cards)
+        if not cards:
+            return cards
+        for card in cards:
+            card.set_norm_keys()
+        today = date.today()
+        with transaction.atomic(using=self.db):
+            self.bulk_create(cards, batch_size=batch_size)
+            schedules = [
+                Schedule(card=card, user_id=card.user_id, next_review=today)
+                for card in cards
+            ]
+            Schedule.objects.using(self.db).bulk_create(schedules, batch_size=batch_size)
+            for user_id, created in Counter(card.user_id for card in cards).items():
+                UserStats.objects.adjust(user_id, total_cards=created)
+        for card, schedule in zip(cards, schedules):
+            card.schedule = schedule
+        for user_id in {card.user_id for card in cards}:
+            _invalidate_review_load(user_id)
+        return cards
+
+
 class Card(models.Model):
     """
     Карточка для изучения иностранного слова.
@@ -30,19 +218,29 @@ class Card(models.Model):
     и уровень сложности. Каждая карточка автоматически получает расписание
     повторений при создании.
     
+    Общая карточка колоды (deck задан, user пуст) хранится один раз для всех
+    подписчиков: у каждого подписчика к ней свое расписание.
+    
     Attributes:
-        user: Владелец карточки (ForeignKey к User).
+        user: Владелец карточки (None у общей карточки колоды).
+        deck: Колода общей карточки (None у личной карточки).
+        source: Общая карточка, из которой получена личная копия при редактировании.
         word: Слово на иностранном языке (максимум 128 символов).
         translation: Перевод слова (максимум 128 символов).
         example: Пример использования (опционально).
         comment: Комментарий или заметка (опционально).
         level: Уровень сложности (beginner/intermediate/advanced).
+        norm_word: Нормализованное слово (casefold, NFC, схлопнутые пробелы).
+        norm_translation: Нормализованный перевод.
         created_at: Дата и время создания карточки.
         updated_at: Дата и время последнего обновления.
     
     Note:
-        При создании карточки автоматически создается связанный объект Schedule
-        через сигнал post_save.
+        Пара (norm_word, norm_translation) уникальна для пользователя
+        (для общих карточек — в пределах колоды) на уровне базы данных.
+        При создании личной карточки автоматически создается связанный объект Schedule
+        через сигнал post_save. Для массового создания используйте
+        Card.objects.bulk_create_with_schedules().
     """
     
     LEVEL_CHOICES = [
@@ -54,9 +252,29 @@ class Card(models.Model):
     user = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
+        null=True,
+        blank=True,
         related_name='cards',
         verbose_name='Владелец'
     )
+    deck = models.ForeignKey(
+        Deck,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        # Выборки по колоде обслуживает индекс (deck, created_at, id)
+        db_index=False,
+        related_name='cards',
+        verbose_name='Колода'
+    )
+    source = models.ForeignKey(
+        'self',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='copies',
+        verbose_name='Исходная карточка колоды'
+    )
     word = models.CharField(
         max_length=128,
         verbose_name='Слово',
@@ -84,6 +302,20 @@ class Card(models.Model):
         verbose_name='Уровень',
         help_text='Уровень сложности слова'
     )
+    # Нормализованные ключи (см. normalize_key) для индексного поиска дубликатов;
+    # casefold может удлинить строку (ß -> ss), поэтому длина с запасом
+    norm_word = models.CharField(
+        max_length=256,
+        editable=False,
+        default='',
+        verbose_name='Ключ слова'
+    )
+    norm_translation = models.CharField(
+        max_length=256,
+        editable=False,
+        default='',
+        verbose_name='Ключ перевода'
+    )
     created_at = models.DateTimeField(
         auto_now_add=True,
         verbose_name='Создано'
@@ -93,20 +325,122 @@ class Card(models.Model):
         verbose_name='Обновлено'
     )
 
+    objects = CardManager()
+
     class Meta:
         """Мета-класс для настройки модели Card."""
         verbose_name = 'Карточка'
         verbose_name_plural = 'Карточки'
         ordering = ['-created_at']
         indexes = [
-            models.Index(fields=['user', 'level']),
+            # Постраничный вывод по ключу (cards.pagination): (user, created_at, id),
+            # с фильтром по уровню — (user, level, created_at, id); префикс
+            # (user, level) обслуживает и прежние выборки по уровню
+            models.Index(fields=['user', 'created_at', 'id']),
+            models.Index(fields=['user', 'level', 'created_at', 'id']),
             models.Index(fields=['created_at']),
+            models.Index(fields=['deck', 'created_at', 'id']),
+        ]
+        constraints = [
+            # Префикс (user, norm_word) этого индекса обслуживает и поиск по слову
+            models.UniqueConstraint(
+                fields=['user', 'norm_word', 'norm_translation'],
+                name='cards_card_unique_norm_key',
+            ),
+            # У общих карточек user пуст (NULL не участвует в уникальности выше)
+            models.UniqueConstraint(
+                fields=['deck', 'norm_word', 'norm_translation'],
+                condition=Q(user__isnull=True),
+                name='cards_card_unique_deck_key',
+            ),
+            # Карточка либо личная, либо карточка колоды
+            models.CheckConstraint(
+                condition=Q(user__isnull=False, deck__isnull=True) | Q(user__isnull=True, deck__isnull=False),
+                name='cards_card_owner_or_deck',
+            ),
         ]
 
     def __str__(self) -> str:
         """Строковое представление: слово и перевод."""
         return f'{self.word} — {self.translation}'
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Запоминает владельца при загрузке, чтобы отследить его смену в save()."""
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_user_id = instance.__dict__.get('user_id')
+        return instance
+
+    def set_norm_keys(self) -> None:
+        """Заполняет norm_word и norm_translation из word и translation."""
+        self.norm_word = normalize_key(self.word)
+        self.norm_translation = normalize_key(self.translation)
+
+    def save(self, *args, **kwargs) -> None:
+        """
+        Сохраняет карточку.
+        
+        Note:
+            Нормализованные ключи norm_word/norm_translation пересчитываются
+            при каждом сохранении. При смене владельца денормализованное поле
+            Schedule.user обновляется тем же вызовом, статистика обоих
+            пользователей пересчитывается.
+            
+            Изменение существующей карточки обновляет Schedule.updated_at ее
+            расписаний: по нему журнал синхронизации (cards.sync) отдает
+            клиентам измененные карточки. Запись карточки в пуле вариантов
+            теста владельца (cards.distractors) обновляется.
+        """
+        self.set_norm_keys()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'word', 'translation'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'norm_word', 'norm_translation'}
+        adding = self._state.adding
+        super().save(*args, **kwargs)
+        loaded_user_id = getattr(self, '_loaded_user_id', None)
+        if loaded_user_id is not None and loaded_user_id != self.user_id:
+            Schedule.objects.filter(card=self).update(user_id=self.user_id, updated_at=timezone.now())
+            SyncTombstone.objects.create(user_id=loaded_user_id, card_id=self.pk)
+            UserStats.objects.rebuild([loaded_user_id, self.user_id])
+        elif not adding:
+            Schedule.objects.filter(card=self).update(updated_at=timezone.now())
+            from .distractors import update_distractor_entry
+            update_distractor_entry(self)
+        self._loaded_user_id = self.user_id
+
+    @property
+    def schedule(self) -> 'Schedule':
+        """
+        Расписание владельца личной карточки.
+        
+        Загружается одним запросом (или берется из prefetch_related('schedules'))
+        и кешируется в экземпляре. У общей карточки колоды владельца нет,
+        поэтому, как и у карточки без расписания, обращение вызывает
+        AttributeError (hasattr(card, 'schedule') возвращает False).
+        """
+        if '_schedule' not in self.__dict__:
+            schedule = None
+            if self.pk is not None and self.user_id is not None:
+                prefetched = getattr(self, '_prefetched_objects_cache', {}).get('schedules')
+                if prefetched is not None:
+                    schedule = next((s for s in prefetched if s.user_id == self.user_id), None)
+                else:
+                    schedule = Schedule.objects.filter(card=self, user_id=self.user_id).first()
+            self.__dict__['_schedule'] = schedule
+        if self.__dict__['_schedule'] is None:
+            raise AttributeError('Card has no schedule')
+        return self.__dict__['_schedule']
+
+    @schedule.setter
+    def schedule(self, value: Optional['Schedule']) -> None:
+        """Запоминает расписание владельца (без запроса к базе)."""
+        self.__dict__['_schedule'] = value
+
+    def refresh_from_db(self, *args, **kwargs) -> None:
+        """Перечитывает карточку из базы, сбрасывая закешированное расписание."""
+        self.__dict__.pop('_schedule', None)
+        super().refresh_from_db(*args, **kwargs)
+
     @property
     def is_due_for_review(self) -> bool:
         """
@@ -136,6 +470,75 @@ class Card(models.Model):
         return 'future'
 
 
+def raw_delete(queryset: models.QuerySet, handled: Iterable[str] = ()) -> int:
+    """
+    Удаляет строки queryset одним DELETE, без каскада и сигналов.
+    
+    Единственная обертка над приватным QuerySet._raw_delete. Вызывающий код
+    сам удаляет зависимые строки и учитывает статистику; чтобы новая ссылка
+    на модель (ForeignKey из другой модели) не оставила висячих строк молча,
+    все обратные связи модели должны быть перечислены в handled.
+    
+    Args:
+        queryset: Удаляемые строки.
+        handled: Имена обратных связей модели (accessor: 'schedules',
+            'review_logs', ...), которые вызывающий код уже очистил.
+    
+    Returns:
+        Число удаленных строк.
+    
+    Raises:
+        ValueError: Если у модели есть обратные связи вне handled.
+    
+    Example:
+        >>> raw_delete(ReviewLog.objects.filter(card__in=cards))
+    """
+    relations = {relation.get_accessor_name() for relation in queryset.model._meta.related_objects}
+    unhandled = relations - set(handled)
+    if unhandled:
+        raise ValueError(f'{queryset.model.__name__} has unhandled relations: {sorted(unhandled)}')
+    return queryset._raw_delete(queryset.db)
+
+
+class ScheduleQuerySet(models.QuerySet):
+    """Выборки расписаний с пакетным удалением."""
+
+    def delete_with_stats(self) -> int:
+        """
+        Удаляет расписания одним DELETE и вычитает их вклад из статистики.
+        
+        queryset.delete() вызывал бы post_delete (и UPDATE статистики) для
+        каждой строки; здесь удаляемые строки читаются одним SELECT (по ним
+        считается вклад в статистику и пишутся отметки SyncTombstone одним
+        пакетным INSERT), а вклад вычитается одним UPDATE на пользователя.
+        
+        Returns:
+            Число удаленных расписаний.
+        """
+        with transaction.atomic(using=self.db):
+            removed = list(
+                self.order_by().values_list('user_id', 'card_id', 'interval', 'last_result', 'repetition')
+            )
+            # На расписания никто не ссылается, поэтому каскад и сигналы не нужны
+            deleted = raw_delete(self)
+            SyncTombstone.objects.using(self.db).bulk_create(
+                [SyncTombstone(user_id=user_id, card_id=card_id) for user_id, card_id, *_ in removed],
+                batch_size=1000,
+            )
+            totals = {}
+            for user_id, _, interval, last_result, repetition in removed:
+                row = totals.setdefault(user_id, dict.fromkeys(UserStats.COUNTER_FIELDS, 0))
+                row['total_cards'] -= 1
+                row['learned'] -= interval >= UserStats.LEARNED_INTERVAL
+                row['errors'] -= last_result is False
+                row['repetitions'] -= repetition
+            for user_id, row in totals.items():
+                UserStats.objects.adjust(user_id, **row)
+        for user_id in totals:
+            _invalidate_review_load(user_id)
+        return deleted
+
+
 class Schedule(models.Model):
     """
     Расписание повторений для карточки по алгоритму SM-2.
@@ -145,12 +548,16 @@ class Schedule(models.Model):
     и результат последнего повторения.
     
     Attributes:
-        card: Связанная карточка (OneToOneField к Card).
+        card: Связанная карточка (личная или общая карточка колоды).
+        user: Кто повторяет карточку (для личной — копия card.user; индекс (user, next_review)).
         next_review: Дата следующего повторения.
         interval: Интервал в днях до следующего повторения.
         repetition: Номер текущего повторения (начинается с 0).
         ef: Коэффициент эффективности SM-2 (от 1.3 до 2.5).
         last_result: Результат последнего повторения (True/False/None).
+        stability: Стабильность памяти FSRS (None, пока карточка ведётся SM-2).
+        difficulty: Сложность FSRS (None, пока карточка ведётся SM-2).
+        last_review: Дата последнего ответа (None — ответов не было).
         updated_at: Дата и время последнего обновления.
     
     Note:
@@ -158,12 +565,19 @@ class Schedule(models.Model):
         качества ответов пользователя.
     """
     
-    card = models.OneToOneField(
+    card = models.ForeignKey(
         Card,
         on_delete=models.CASCADE,
-        related_name='schedule',
+        related_name='schedules',
         verbose_name='Карточка'
     )
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='schedules',
+        verbose_name='Владелец',
+        help_text='Кто повторяет карточку: владелец личной карточки или подписчик колоды'
+    )
     next_review = models.DateField(
         verbose_name='Дата следующего повторения'
     )
@@ -188,11 +602,31 @@ class Schedule(models.Model):
         verbose_name='Последний результат (успех)',
         help_text='True - знал, False - не знал, None - не тестировался'
     )
+    stability = models.FloatField(
+        null=True,
+        blank=True,
+        verbose_name='Стабильность (FSRS)',
+        help_text='Дней до падения вероятности вспомнить до 90% (только для FSRS)'
+    )
+    difficulty = models.FloatField(
+        null=True,
+        blank=True,
+        verbose_name='Сложность (FSRS)',
+        help_text='Сложность карточки от 1 до 10 (только для FSRS)'
+    )
+    last_review = models.DateField(
+        null=True,
+        blank=True,
+        verbose_name='Дата последнего ответа',
+        help_text='Не меняется при ручном переносе даты повторения'
+    )
     updated_at = models.DateTimeField(
         auto_now=True,
         verbose_name='Обновлено'
     )
 
+    objects = ScheduleQuerySet.as_manager()
+
     class Meta:
         """Мета-класс для настройки модели Schedule."""
         verbose_name = 'Расписание повторения'
@@ -201,8 +635,23 @@ class Schedule(models.Model):
         indexes = [
             models.Index(fields=['next_review']),
             models.Index(fields=['card', 'next_review']),
+            # "Что повторять сегодня" — один диапазонный проход по индексу без JOIN
+            models.Index(fields=['user', 'next_review']),
+            # Журнал синхронизации (cards.sync): изменения пользователя по порядку
+            models.Index(fields=['user', 'updated_at', 'id']),
+            # Дневной лимит (cards.due_queue): сколько карточек повторено сегодня
+            models.Index(fields=['user', 'last_review']),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['card', 'user'], name='cards_schedule_unique_card_user'),
         ]
 
+    def save(self, *args, **kwargs) -> None:
+        """Сохраняет расписание, заполняя владельца из карточки при необходимости."""
+        if self.user_id is None and self.card_id is not None:
+            self.user_id = self.card.user_id
+        super().save(*args, **kwargs)
+
     def __str__(self) -> str:
         """Строковое представление: краткая информация о расписании."""
         return f'Schedule for {self.card.word} (next: {self.next_review})'
@@ -228,6 +677,512 @@ class Schedule(models.Model):
         return (self.next_review - date.today()).days
 
 
+class ReviewLog(models.Model):
+    """
+    Запись журнала ответов пользователя (только добавление).
+    
+    Каждый ответ в веб-интерфейсе или боте сохраняет состояние SM-2 до и после
+    пересчёта. Записи не изменяются после создания и служат источником данных
+    для аналитики, прогнозов и настройки алгоритма.
+    
+    Attributes:
+        card: Карточка, на которую дан ответ.
+        user: Пользователь, ответивший на карточку.
+        quality: Оценка качества ответа (0-5).
+        reviewed_at: Дата и время ответа.
+        prev_interval: Интервал до ответа (дней).
+        new_interval: Интервал после ответа (дней).
+        prev_ef: Коэффициент эффективности до ответа.
+        new_ef: Коэффициент эффективности после ответа.
+        source: Источник ответа (web/bot).
+    
+    Note:
+        Записи создаются пакетно через cards.review_log (буфер + bulk_create),
+        поэтому ответ пользователя не платит отдельным INSERT.
+    """
+    
+    SOURCE_WEB = 'web'
+    SOURCE_BOT = 'bot'
+    SOURCE_CHOICES = [
+        (SOURCE_WEB, 'Веб'),
+        (SOURCE_BOT, 'Telegram-бот'),
+    ]
+    
+    card = models.ForeignKey(
+        Card,
+        on_delete=models.CASCADE,
+        related_name='review_logs',
+        verbose_name='Карточка'
+    )
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='review_logs',
+        verbose_name='Пользователь'
+    )
+    quality = models.PositiveSmallIntegerField(
+        verbose_name='Оценка',
+        help_text='Качество ответа от 0 до 5'
+    )
+    reviewed_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Время ответа'
+    )
+    prev_interval = models.PositiveIntegerField(
+        verbose_name='Интервал до (дней)'
+    )
+    new_interval = models.PositiveIntegerField(
+        verbose_name='Интервал после (дней)'
+    )
+    prev_ef = models.FloatField(
+        verbose_name='EF до'
+    )
+    new_ef = models.FloatField(
+        verbose_name='EF после'
+    )
+    source = models.CharField(
+        max_length=8,
+        choices=SOURCE_CHOICES,
+        default=SOURCE_WEB,
+        verbose_name='Источник'
+    )
+
+    class Meta:
+        """Мета-класс для настройки модели ReviewLog."""
+        verbose_name = 'Запись журнала ответов'
+        verbose_name_plural = 'Журнал ответов'
+        ordering = ['-reviewed_at']
+        indexes = [
+            # Диапазонные выборки по времени: вся история и история пользователя/карточки
+            models.Index(fields=['reviewed_at']),
+            models.Index(fields=['user', 'reviewed_at']),
+            models.Index(fields=['card', 'reviewed_at']),
+        ]
+
+    def __str__(self) -> str:
+        """Строковое представление: карточка, оценка и время."""
+        return f'Review card={self.card_id} q={self.quality} at {self.reviewed_at:%Y-%m-%d %H:%M:%S}'
+
+    def save(self, *args, **kwargs) -> None:
+        """
+        Сохраняет новую запись журнала.
+        
+        Raises:
+            ValueError: При попытке изменить существующую запись.
+        """
+        if not self._state.adding:
+            raise ValueError('ReviewLog is append-only')
+        super().save(*args, **kwargs)
+
+
+class UserStatsManager(models.Manager):
+    """Менеджер статистики: атомарные приращения и пакетный пересчет."""
+
+    def adjust(self, user_id: int, **deltas: int) -> None:
+        """
+        Атомарно изменяет счетчики пользователя одним UPDATE с F-выражениями.
+        
+        Args:
+            user_id: ID пользователя.
+            **deltas: Приращения счетчиков (total_cards, learned, errors, repetitions).
+        
+        Example:
+            >>> UserStats.objects.adjust(user.id, total_cards=1)
+        """
+        deltas = {field: delta for field, delta in deltas.items() if delta}
+        if deltas:
+            self.filter(user_id=user_id).update(
+                **{field: F(field) + delta for field, delta in deltas.items()}
+            )
+
+    def rebuild(self, user_ids: Optional[Iterable[int]] = None) -> int:
+        """
+        Пересчитывает статистику по расписаниям.
+        
+        Выполняет один агрегирующий запрос по расписаниям (сгруппированным
+        по пользователю) и записывает результат пакетным upsert. Число карточек —
+        число расписаний: личные карточки и карточки колод из подписок.
+        
+        Args:
+            user_ids: ID пользователей (по умолчанию — все пользователи).
+        
+        Returns:
+            Число пересчитанных строк статистики.
+        """
+        users = User.objects.all()
+        if user_ids is not None:
+            users = users.filter(pk__in=list(user_ids))
+        user_ids = list(users.values_list('pk', flat=True))
+        if not user_ids:
+            return 0
+
+        schedule_rows = (
+            Schedule.objects.filter(user_id__in=user_ids)
+            .values('user_id')
+            .annotate(
+                total=Count('id'),
+                learned=Count('id', filter=Q(interval__gte=UserStats.LEARNED_INTERVAL)),
+                errors=Count('id', filter=Q(last_result=False)),
+                repetitions=Sum('repetition'),
+            )
+        )
+        aggregates = {row['user_id']: row for row in schedule_rows}
+
+        stats = []
+        for user_id in user_ids:
+            row = aggregates.get(user_id, {})
+            stats.append(UserStats(
+                user_id=user_id,
+                total_cards=row.get('total', 0),
+                learned=row.get('learned', 0),
+                errors=row.get('errors', 0),
+                repetitions=row.get('repetitions') or 0,
+            ))
+        self.bulk_create(
+            stats,
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=['user'],
+            update_fields=UserStats.COUNTER_FIELDS,
+        )
+        return len(stats)
+
+    def for_user(self, user) -> 'UserStats':
+        """
+        Возвращает статистику пользователя (один запрос по первичному ключу).
+        
+        Если строки еще нет, она строится пересчетом.
+        """
+        try:
+            return self.get(pk=user.pk)
+        except UserStats.DoesNotExist:
+            self.rebuild([user.pk])
+            return self.get(pk=user.pk)
+
+
+class UserStats(models.Model):
+    """
+    Счетчики прогресса пользователя.
+    
+    Обновляются инкрементально (UPDATE с F-выражениями) при создании и
+    удалении карточек, подписке на колоды и при каждом ответе, поэтому страница прогресса и
+    команда бота /progress читают одну строку по первичному ключу.
+    Расхождения исправляет команда reconcile_user_stats.
+    
+    Attributes:
+        user: Пользователь (первичный ключ).
+        total_cards: Число карточек в повторении (личных и из подписок на колоды).
+        learned: Число выученных карточек (интервал от LEARNED_INTERVAL дней).
+        errors: Число карточек с неудачным последним ответом.
+        repetitions: Сумма счетчиков успешных повторений подряд.
+        updated_at: Дата и время последнего пересчета.
+    """
+    
+    # Карточка считается выученной при интервале от трех недель
+    LEARNED_INTERVAL = 21
+    COUNTER_FIELDS = ['total_cards', 'learned', 'errors', 'repetitions']
+    
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Пользователь'
+    )
+    total_cards = models.IntegerField(
+        default=0,
+        verbose_name='Всего карточек'
+    )
+    learned = models.IntegerField(
+        default=0,
+        verbose_name='Выучено',
+        help_text='Карточки с интервалом повторения от 21 дня'
+    )
+    errors = models.IntegerField(
+        default=0,
+        verbose_name='Ошибок',
+        help_text='Карточки с неудачным последним ответом'
+    )
+    repetitions = models.IntegerField(
+        default=0,
+        verbose_name='Повторений',
+        help_text='Сумма счетчиков успешных повторений подряд'
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Обновлено'
+    )
+
+    objects = UserStatsManager()
+
+    class Meta:
+        """Мета-класс для настройки модели UserStats."""
+        verbose_name = 'Статистика пользователя'
+        verbose_name_plural = 'Статистика пользователей'
+
+    def __str__(self) -> str:
+        """Строковое представление: пользователь и число карточек."""
+        return f'Stats user={self.user_id} cards={self.total_cards}'
+
+    @property
+    def percentage(self) -> float:
+        """Доля выученных карточек в процентах."""
+        return (self.learned / self.total_cards) * 100 if self.total_cards > 0 else 0
+
+    @classmethod
+    def schedule_delta(cls, before, after) -> dict[str, int]:
+        """
+        Изменение счетчиков при переходе расписания из одного состояния в другое.
+        
+        Args:
+            before: Состояние до ответа (Sm2State или Schedule).
+            after: Состояние после ответа (Sm2State или Schedule).
+        
+        Returns:
+            Приращения learned, errors и repetitions для adjust().
+        """
+        return {
+            'learned': (after.interval >= cls.LEARNED_INTERVAL) - (before.interval >= cls.LEARNED_INTERVAL),
+            'errors': (after.last_result is False) - (before.last_result is False),
+            'repetitions': after.repetition - before.repetition,
+        }
+
+
+class SyncTombstone(models.Model):
+    """
+    Отметка об исчезновении карточки из набора повторения пользователя.
+    
+    Создается при удалении расписания (удаление карточки, отписка от колоды),
+    при переносе расписания на личную копию карточки и при смене владельца.
+    Журнал синхронизации (cards.sync) передает клиентам id таких карточек,
+    чтобы они удалили их из локальной копии. Отметки старше
+    SYNC_TOMBSTONE_TTL_DAYS удаляются задачей purge_sync_tombstones.
+    
+    Attributes:
+        user: Пользователь, у которого исчезла карточка.
+        card_id: ID карточки (сама карточка может быть уже удалена).
+        deleted_at: Дата и время удаления.
+    """
+    
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        # Выборки по пользователю обслуживает индекс (user, id)
+        db_index=False,
+        related_name='sync_tombstones',
+        verbose_name='Пользователь'
+    )
+    card_id = models.BigIntegerField(
+        verbose_name='ID карточки'
+    )
+    deleted_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Удалено'
+    )
+
+    class Meta:
+        """Мета-класс для настройки модели SyncTombstone."""
+        verbose_name = 'Удаление для синхронизации'
+        verbose_name_plural = 'Удаления для синхронизации'
+        indexes = [
+            models.Index(fields=['user', 'id']),
+            models.Index(fields=['deleted_at']),
+        ]
+
+    def __str__(self) -> str:
+        """Строковое представление: пользователь и карточка."""
+        return f'Tombstone user={self.user_id} card={self.card_id}'
+
+
+class ImportJob(models.Model):
+    """
+    Фоновый импорт карточек из CSV-файла.
+    
+    Файл загружается частями (uploaded растет до size), затем задача Celery
+    обрабатывает его порциями строк. После каждой порции в одной транзакции
+    с карточками сохраняются байтовое смещение offset и счетчики, поэтому
+    после перезапуска воркера импорт продолжается с места остановки.
+    
+    Attributes:
+        user: Владелец импортируемых карточек.
+        filename: Исходное имя файла.
+        size: Размер файла в байтах (объявлен при создании задания).
+        uploaded: Сколько байт уже загружено.
+        offset: Байтовое смещение первой необработанной строки.
+        fieldnames: Заголовок CSV (запоминается при обработке первой порции).
+        mode: Обработка существующих карточек (MODE_CHOICES).
+        status: Состояние задания (STATUS_CHOICES).
+        rows: Число обработанных строк.
+        created: Число созданных карточек.
+        updated: Число обновленных карточек (режим update).
+        unchanged: Число строк, совпавших с карточками без изменений (режим update).
+        duplicates: Число пропущенных дубликатов.
+        error_count: Общее число ошибок по строкам.
+        errors: Первые IMPORT_JOB_MAX_ERRORS сообщений об ошибках.
+        message: Описание фатальной ошибки (для статуса failed).
+        created_at: Дата и время создания задания.
+        updated_at: Дата и время последнего изменения (прогресса).
+        finished_at: Дата и время завершения.
+    """
+    
+    STATUS_UPLOADING = 'uploading'
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_UPLOADING, 'Загрузка файла'),
+        (STATUS_PENDING, 'В очереди'),
+        (STATUS_RUNNING, 'Выполняется'),
+        (STATUS_DONE, 'Завершено'),
+        (STATUS_FAILED, 'Ошибка'),
+    ]
+    ACTIVE_STATUSES = (STATUS_PENDING, STATUS_RUNNING)
+    
+    MODE_SKIP = 'skip'
+    MODE_UPDATE = 'update'
+    MODE_CHOICES = [
+        (MODE_SKIP, 'Пропускать существующие карточки'),
+        (MODE_UPDATE, 'Обновлять существующие карточки'),
+    ]
+    
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='import_jobs',
+        verbose_name='Пользователь'
+    )
+    filename = models.CharField(
+        max_length=255,
+        verbose_name='Имя файла'
+    )
+    size = models.BigIntegerField(
+        verbose_name='Размер (байт)'
+    )
+    uploaded = models.BigIntegerField(
+        default=0,
+        verbose_name='Загружено (байт)'
+    )
+    offset = models.BigIntegerField(
+        default=0,
+        verbose_name='Обработано (байт)',
+        help_text='Смещение первой необработанной строки — точка продолжения'
+    )
+    fieldnames = models.JSONField(
+        null=True,
+        blank=True,
+        verbose_name='Заголовок CSV'
+    )
+    mode = models.CharField(
+        max_length=16,
+        choices=MODE_CHOICES,
+        default=MODE_SKIP,
+        verbose_name='Режим'
+    )
+    status = models.CharField(
+        max_length=16,
+        choices=STATUS_CHOICES,
+        default=STATUS_UPLOADING,
+        verbose_name='Статус'
+    )
+    rows = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Обработано строк'
+    )
+    created = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Создано карточек'
+    )
+    updated = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Обновлено карточек'
+    )
+    unchanged = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Без изменений'
+    )
+    duplicates = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Дубликатов'
+    )
+    error_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Ошибок'
+    )
+    errors = models.JSONField(
+        default=list,
+        blank=True,
+        verbose_name='Ошибки по строкам'
+    )
+    message = models.TextField(
+        blank=True,
+        verbose_name='Сообщение'
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Создано'
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Обновлено'
+    )
+    finished_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Завершено'
+    )
+
+    class Meta:
+        """Мета-класс для настройки модели ImportJob."""
+        verbose_name = 'Задание импорта'
+        verbose_name_plural = 'Задания импорта'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'created_at']),
+            # Поиск зависших заданий для перезапуска
+            models.Index(fields=['status', 'updated_at']),
+        ]
+
+    def __str__(self) -> str:
+        """Строковое представление: файл и статус."""
+        return f'Import {self.filename} ({self.status})'
+
+    @property
+    def path(self) -> Path:
+        """Путь к загруженному файлу (общий каталог веб-сервера и воркеров)."""
+        return Path(settings.IMPORT_UPLOAD_DIR) / f'{self.pk}.csv'
+
+    @property
+    def progress(self) -> float:
+        """Прогресс обработки в процентах (по байтам файла)."""
+        return round(self.offset / self.size * 100, 1) if self.size else 100.0
+
+    def as_status(self) -> dict:
+        """
+        Состояние задания для JSON-эндпоинта опроса.
+        
+        Returns:
+            Словарь со статусом, прогрессом загрузки и обработки и ошибками.
+        """
+        return {
+            'id': self.pk,
+            'status': self.status,
+            'mode': self.mode,
+            'filename': self.filename,
+            'size': self.size,
+            'uploaded': self.uploaded,
+            'processed': self.offset,
+            'progress': self.progress,
+            'rows': self.rows,
+            'created': self.created,
+            'updated': self.updated,
+            'unchanged': self.unchanged,
+            'duplicates': self.duplicates,
+            'error_count': self.error_count,
+            'errors': self.errors,
+            'message': self.message,
+        }
+
 @receiver(post_save, sender=Card)
 def create_schedule_for_card(
     sender: type[Card],
@@ -248,8 +1203,85 @@ def create_schedule_for_card(
         Расписание создается только для новых карточек, чтобы избежать
         дублирования при обновлении существующих карточек.
     """
-    if created and not hasattr(instance, 'schedule'):
-        Schedule.objects.create(
+    # Общие карточки колод получают расписания при подписке (cards.decks.subscribe)
+    if created and instance.user_id is not None and not hasattr(instance, 'schedule'):
+        instance.schedule = Schedule.objects.create(
             card=instance,
+            user_id=instance.user_id,
             next_review=date.today()
         )
+        UserStats.objects.adjust(instance.user_id, total_cards=1)
+        _invalidate_review_load(instance.user_id)
+
+
+@receiver(post_delete, sender=Schedule)
+def update_stats_on_schedule_delete(
+    sender: type[Schedule],
+    instance: Schedule,
+    **kwargs
+) -> None:
+    """
+    Вычитает вклад удаленного расписания из статистики пользователя.
+    
+    Расписание удаляется каскадом вместе с карточкой (в том числе с общей
+    карточкой колоды — у всех подписчиков), поэтому здесь же уменьшается
+    счетчик карточек, записывается отметка SyncTombstone для синхронизации
+    и сбрасываются прогноз и гистограмма нагрузки.
+    
+    При удалении самого пользователя (origin — User или QuerySet
+    пользователей) статистика и отметки удаляются вместе с ним: запись
+    отметки со ссылкой на удаляемого пользователя нарушила бы внешний ключ.
+    """
+    origin = kwargs.get('origin')
+    if isinstance(origin, User) or (isinstance(origin, models.QuerySet) and origin.model is User):
+        return
+    UserStats.objects.adjust(
+        instance.user_id,
+        total_cards=-1,
+        learned=-(instance.interval >= UserStats.LEARNED_INTERVAL),
+        errors=-(instance.last_result is False),
+        repetitions=-instance.repetition,
+    )
+    SyncTombstone.objects.create(user_id=instance.user_id, card_id=instance.card_id)
+    _invalidate_review_load(instance.user_id)
+
+
+@receiver(post_save, sender=User)
+def create_stats_for_user(
+    sender,
+    instance,
+    created: bool,
+    raw: bool = False,
+    **kwargs
+) -> None:
+    """Создает пустую строку статистики для нового пользователя."""
+    if created and not raw:
+        UserStats.objects.get_or_create(user=instance)
+
+
+@receiver(post_migrate)
+def restore_card_search_index(sender, using, **kwargs):
+    """
+    Восстанавливает триггеры полнотекстового поиска после migrate (SQLite).
+    
+    Миграции, пересоздающие таблицу cards_card в SQLite, удаляют ее триггеры;
+    без них индекс FTS5 перестал бы обновляться. Если индекс еще не создан
+    (миграция 0017 не применена), ничего не делает.
+    """
+    if sender.name != 'cards':
+        return
+    connection = connections[using]
+    if connection.vendor == 'sqlite' and FTS_TABLE in connection.introspection.table_names():
+        ensure_search_index(connection)
+
+def _invalidate_review_load(user_id: int) -> None:
+    """Сбрасывает закешированные данные о карточках пользователя: прогноз, гистограмму нагрузки, очередь сессии повторения и пул вариантов теста."""
+    from .forecast import invalidate_forecast
+    from .load_balancer import invalidate_due_histogram
+    from .distractors import invalidate_distractor_pool
+    from .review_session import reset_review_sessions
+    invalidate_forecast(user_id)
+    invalidate_due_histogram(user_id)
+    reset_review_sessions(user_id)
+    invalidate_distractor_pool(user_id)
+
@@ -0,0 +1,134 @@
+"""
+Постраничный вывод карточек по ключу (keyset pagination).
+
+Страницы упорядочены по (created_at, id) от новых к старым. Вместо OFFSET
+следующая страница начинается с условия "строго раньше последней показанной
+карточки", поэтому запрос страницы идет по индексу (user, created_at, id)
+и стоит одинаково на первой и на тысячной странице.
+
+Курсор — непрозрачная строка (base64 от created_at и id последней карточки
+страницы), передается в GET-параметре cursor.
+"""
+
+import base64
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+from django.db.models import Q, QuerySet
+
+# Размер страницы по умолчанию и максимальный
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+ORDERING = ('-created_at', '-id')
+
+
+@dataclass
+class KeysetPage:
+    """
+    Страница результатов.
+
+    Attributes:
+        items: Объекты страницы.
+        next_cursor: Курсор следующей страницы (None — страница последняя).
+    """
+
+    items: list
+    next_cursor: Optional[str]
+
+    @property
+    def has_next(self) -> bool:
+        """Есть ли следующая страница."""
+        return self.next_cursor is not None
+
+
+def encode_cursor(created_at: datetime, pk: int) -> str:
+    """
+    Кодирует позицию (created_at, id) в курсор.
+
+    Args:
+        created_at: Дата создания последнего объекта страницы.
+        pk: Его идентификатор.
+
+    Returns:
+        Строка base64url без выравнивания.
+    """
+    raw = f'{created_at.isoformat()}|{pk}'.encode('ascii')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """
+    Декодирует курсор в позицию (created_at, id).
+
+    Args:
+        cursor: Строка из encode_cursor().
+
+    Returns:
+        Кортеж (created_at, id).
+
+    Raises:
+        ValueError: Если курсор поврежден.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode('ascii')
+        created_at, pk = raw.split('|')
+        return datetime.fromisoformat(created_at), int(pk)
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise ValueError(f'Invalid cursor: {cursor!r}') from exc
+
+
+def parse_limit(value: Optional[str], default: int = DEFAULT_PAGE_SIZE) -> int:
+    """
+    Размер страницы из GET-параметра limit.
+
+    Args:
+        value: Значение параметра (None — по умолчанию).
+        default: Размер по умолчанию.
+
+    Returns:
+        Размер страницы от 1 до MAX_PAGE_SIZE.
+
+    Raises:
+        ValueError: Если значение не целое число.
+    """
+    if value in (None, ''):
+        return default
+    return max(1, min(int(value), MAX_PAGE_SIZE))
+
+
+def keyset_page(queryset: QuerySet, cursor: Optional[str] = None,
+                limit: int = DEFAULT_PAGE_SIZE) -> KeysetPage:
+    """
+    Возвращает страницу queryset после позиции курсора.
+
+    Args:
+        queryset: Объекты с полями created_at и id (порядок переопределяется).
+        cursor: Курсор предыдущей страницы (None — первая страница).
+        limit: Размер страницы.
+
+    Returns:
+        KeysetPage с объектами и курсором следующей страницы.
+
+    Raises:
+        ValueError: Если курсор поврежден.
+
+    Example:
+        >>> page = keyset_page(Card.objects.filter(user=user), request.GET.get('cursor'), 50)
+        >>> page.items, page.next_cursor
+    """
+    queryset = queryset.order_by(*ORDERING)
+    if cursor:
+        created_at, pk = decode_cursor(cursor)
+        # created_at <= X задает границу диапазона индекса, OR уточняет равные created_at
+        queryset = queryset.filter(created_at__lte=created_at).filter(
+            Q(created_at__lt=created_at) | Q(id__lt=pk)
+        )
+    # Лишний объект показывает, есть ли следующая страница, без COUNT
+    items = list(queryset[:limit + 1])
+    if len(items) <= limit:
+        return KeysetPage(items, None)
+    items = items[:limit]
+    last = items[-1]
+    return KeysetPage(items, encode_cursor(last.created_at, last.pk))
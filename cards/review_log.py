@@ -0,0 +1,183 @@
+"""
+Буферизованная запись журнала ответов (ReviewLog).
+
+Ответы накапливаются в памяти процесса и записываются одним bulk_create,
+когда буфер заполнен (REVIEW_LOG_BUFFER_SIZE записей) или устарел
+(REVIEW_LOG_FLUSH_INTERVAL секунд). Проверка возраста выполняется по
+окончании каждого запроса, после каждой задачи Celery буфер сбрасывается
+целиком, оставшиеся записи сбрасываются при завершении процесса.
+
+Если пачка не записалась (например, карточку удалили, пока ответ ждал в
+буфере), записи повторяются по одной: теряются только ошибочные строки.
+
+Note:
+    При аварийном завершении процесса (SIGKILL, OOM) теряется не больше
+    REVIEW_LOG_BUFFER_SIZE записей за последние REVIEW_LOG_FLUSH_INTERVAL
+    секунд. Расписание от журнала не зависит; оптимизатор FSRS
+    (cards.fsrs.optimize) обучается на доступной истории и переносит
+    такие пропуски.
+"""
+
+import atexit
+import logging
+import threading
+import time
+from typing import Optional
+
+from celery.signals import task_postrun
+from django.conf import settings
+from django.core.signals import request_finished
+from django.db import transaction
+from django.dispatch import receiver
+
+from .models import ReviewLog
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUFFER_SIZE = 100
+DEFAULT_FLUSH_INTERVAL = 30
+
+
+class ReviewLogBuffer:
+    """
+    Потокобезопасный буфер записей ReviewLog.
+
+    Attributes:
+        max_size: Размер буфера, при достижении которого выполняется запись.
+        max_age: Максимальный возраст самой старой записи в секундах.
+    """
+
+    def __init__(self, max_size: Optional[int] = None, max_age: Optional[float] = None):
+        self._max_size = max_size
+        self._max_age = max_age
+        self._lock = threading.Lock()
+        self._entries: list[ReviewLog] = []
+        self._first_added_at: Optional[float] = None
+
+    @property
+    def max_size(self) -> int:
+        if self._max_size is not None:
+            return self._max_size
+        return getattr(settings, 'REVIEW_LOG_BUFFER_SIZE', DEFAULT_BUFFER_SIZE)
+
+    @property
+    def max_age(self) -> float:
+        if self._max_age is not None:
+            return self._max_age
+        return getattr(settings, 'REVIEW_LOG_FLUSH_INTERVAL', DEFAULT_FLUSH_INTERVAL)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, entries: list[ReviewLog]) -> None:
+        """
+        Добавляет записи в буфер и сбрасывает его при переполнении.
+
+        Внутри транзакции сброс откладывается до ее фиксации: записи буфера
+        не должны откатываться вместе с чужим ответом, а ошибка их записи —
+        ломать транзакцию ответа.
+
+        Args:
+            entries: Несохранённые объекты ReviewLog.
+        """
+        if not entries:
+            return
+        with self._lock:
+            if not self._entries:
+                self._first_added_at = time.monotonic()
+            self._entries.extend(entries)
+            full = len(self._entries) >= self.max_size
+        if full:
+            transaction.on_commit(self.flush)
+
+    def flush_if_stale(self) -> int:
+        """Сбрасывает буфер, если самая старая запись старше max_age."""
+        first = self._first_added_at
+        if first is None or time.monotonic() - first < self.max_age:
+            return 0
+        return self.flush()
+
+    def flush(self) -> int:
+        """
+        Записывает все накопленные записи одним bulk_create.
+
+        При ошибке пачки записи повторяются по одной (см. _save_each).
+
+        Returns:
+            Количество записанных строк.
+        """
+        with self._lock:
+            entries, self._entries = self._entries, []
+            self._first_added_at = None
+        if not entries:
+            return 0
+        try:
+            with transaction.atomic():
+                ReviewLog.objects.bulk_create(entries, batch_size=1000)
+        except Exception as e:
+            logger.warning(f"Ошибка записи журнала ответов ({len(entries)} записей), запись по одной: {e}")
+            return self._save_each(entries)
+        return len(entries)
+
+    @staticmethod
+    def _save_each(entries: list[ReviewLog]) -> int:
+        """
+        Записывает записи по одной, пропуская ошибочные.
+
+        Каждая запись — в своей точке сохранения, чтобы ошибка одной строки
+        не прерывала внешнюю транзакцию (PostgreSQL).
+
+        Returns:
+            Количество записанных строк.
+        """
+        saved = 0
+        for entry in entries:
+            try:
+                with transaction.atomic():
+                    ReviewLog.objects.bulk_create([entry])
+            except Exception as e:
+                logger.error(
+                    f"Запись журнала ответов отброшена (user={entry.user_id}, card={entry.card_id}): {e}"
+                )
+            else:
+                saved += 1
+        return saved
+
+    def clear(self) -> None:
+        """Отбрасывает накопленные записи без сохранения."""
+        with self._lock:
+            self._entries = []
+            self._first_added_at = None
+
+
+review_log_buffer = ReviewLogBuffer()
+
+
+def log_reviews(entries: list[ReviewLog]) -> None:
+    """Ставит записи журнала в очередь на пакетную запись."""
+    review_log_buffer.add(entries)
+
+
+def flush_review_logs() -> int:
+    """Принудительно записывает накопленные записи журнала."""
+    return review_log_buffer.flush()
+
+
+@receiver(request_finished)
+def flush_stale_review_logs(sender, **kwargs) -> None:
+    """По окончании запроса сбрасывает буфер, если он устарел."""
+    review_log_buffer.flush_if_stale()
+
+
+@task_postrun.connect
+def flush_review_logs_after_task(**kwargs) -> None:
+    """
+    После задачи Celery сбрасывает буфер целиком.
+
+    В воркере Celery нет request_finished, а между задачами процесс может
+    простаивать долго, поэтому записи не ждут проверки возраста.
+    """
+    review_log_buffer.flush()
+
+
+atexit.register(flush_review_logs)
@@ -0,0 +1,203 @@
+"""
+Сессия повторения: снимок очереди карточек на сегодня.
+
+Страницы повторения (review_card) и теста (test_multiple_choice_view) раньше
+выполняли выборку карточек на сегодня на каждый запрос, а тест еще и
+загружал весь список в память, чтобы взять элемент по ?idx=. Сессия делает
+одну выборку при старте: упорядоченный список карточек на сегодня (не
+больше REVIEW_SESSION_SIZE) вместе с данными для показа и, для теста,
+вариантами ответа. Снимок хранится в кеше (общем для воркеров, если задан
+REDIS_URL, см. lingua_track.cache), каждая следующая карточка уже загружена
+в нем; ответ стоит одного чтения расписания по первичному ключу и одного
+UPDATE расписания (update_schedule).
+
+Форма ответа передает позицию и schedule_id показанной карточки. Ответ
+принимается, только если оба совпадают с текущей карточкой снимка: если
+снимок успел смениться (истек, сброшен изменением набора карточек, пропал
+из кеша), ответ не засчитывается другой карточке.
+
+Снимок пересоздается, когда он пройден до конца (следующие карточки на
+сегодня, в том числе добавленные во время сессии, попадут в новый), в новый
+день или по истечении REVIEW_SESSION_TIMEOUT. Правки карточки во время
+сессии видны со следующего снимка.
+"""
+
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .distractors import get_distractor_index, multiple_choice_options
+from .due_queue import due_schedules
+from .models import Card, Schedule
+from .sm2 import update_schedule
+
+KIND_REVIEW = 'review'
+KIND_TEST = 'test'
+
+
+@dataclass
+class ReviewItem:
+    """
+    Карточка в снимке сессии: все, что нужно для показа и проверки ответа.
+
+    Attributes:
+        schedule_id: ID расписания пользователя.
+        id: ID карточки.
+        word, translation, example, comment, level: Поля карточки.
+        deck_id: Колода (для общих карточек).
+        options: Варианты ответа (только в тесте).
+    """
+
+    schedule_id: int
+    id: int
+    word: str
+    translation: str
+    example: str
+    comment: str
+    level: str
+    deck_id: Optional[int] = None
+    options: list[str] = field(default_factory=list)
+
+    def get_level_display(self) -> str:
+        """Название уровня, как у Card.get_level_display()."""
+        return dict(Card.LEVEL_CHOICES).get(self.level, self.level)
+
+
+def _cache_key(user_id: int, kind: str) -> str:
+    """Ключ кеша сессии пользователя."""
+    return f'review_session:{user_id}:{kind}'
+
+
+class ReviewSession:
+    """
+    Очередь карточек сессии повторения или теста.
+
+    Attributes:
+        user_id: ID пользователя.
+        kind: KIND_REVIEW или KIND_TEST.
+        items: Снимок очереди.
+        position: Индекс текущей карточки.
+        day: Дата снимка.
+
+    Example:
+        >>> session = ReviewSession.load(user, KIND_REVIEW)
+        >>> session.current.word
+        'apple'
+        >>> session.answer(session.position, 5, session.current.schedule_id)
+    """
+
+    def __init__(self, user_id: int, kind: str, items: list[ReviewItem], position: int = 0,
+                 day: Optional[date] = None):
+        self.user_id = user_id
+        self.kind = kind
+        self.items = items
+        self.position = position
+        self.day = day or date.today()
+
+    @classmethod
+    def load(cls, user, kind: str) -> 'ReviewSession':
+        """
+        Текущая сессия пользователя; при отсутствии, устаревании или
+        завершении — новый снимок.
+
+        Args:
+            user: Пользователь.
+            kind: KIND_REVIEW или KIND_TEST.
+
+        Returns:
+            ReviewSession (current is None, если карточек на сегодня нет).
+        """
+        session = cache.get(_cache_key(user.pk, kind))
+        if session is None or session.day != date.today() or session.current is None:
+            session = cls.start(user, kind)
+        return session
+
+    @classmethod
+    def start(cls, user, kind: str) -> 'ReviewSession':
+        """
+        Снимает очередь карточек на сегодня одним запросом и сохраняет в кеш.
+
+        Порядок и размер очереди — по приоритету и дневному лимиту
+        (см. cards.due_queue).
+
+        Для теста варианты ответа выбираются здесь же, по индексу пула
+        карточек пользователя (см. cards.distractors).
+
+        Args:
+            user: Пользователь.
+            kind: KIND_REVIEW или KIND_TEST.
+
+        Returns:
+            Новая сессия.
+        """
+        rows = due_schedules(user, settings.REVIEW_SESSION_SIZE).values_list(
+            'id', 'card_id', 'card__word', 'card__translation', 'card__example',
+            'card__comment', 'card__level', 'card__deck_id',
+        )
+        items = [ReviewItem(*row) for row in rows]
+        if kind == KIND_TEST and items:
+            index = get_distractor_index(user.pk)
+            for item in items:
+                item.options = multiple_choice_options(user.pk, item.translation, item.word, item.level, index)
+        session = cls(user.pk, kind, items)
+        session.save()
+        return session
+
+    @property
+    def current(self) -> Optional[ReviewItem]:
+        """Текущая карточка (None — снимок пройден)."""
+        return self.items[self.position] if self.position < len(self.items) else None
+
+    @property
+    def total(self) -> int:
+        """Число карточек в снимке."""
+        return len(self.items)
+
+    def save(self) -> None:
+        """Сохраняет сессию в кеш (пустая сессия не хранится)."""
+        if self.items:
+            cache.set(_cache_key(self.user_id, self.kind), self, settings.REVIEW_SESSION_TIMEOUT)
+
+    def answer(self, position: int, quality: int, schedule_id: Optional[int] = None) -> Optional[ReviewItem]:
+        """
+        Принимает ответ на карточку в позиции position и переходит к следующей.
+
+        Повторная отправка той же формы (position уже пройдена) игнорируется,
+        как и ответ, чей schedule_id не совпадает с текущей карточкой (снимок
+        сменился после показа формы).
+        Если карточка удалена или уже повторена в другом месте (бот, другая
+        вкладка), расписание не меняется, сессия просто идет дальше.
+
+        Args:
+            position: Позиция карточки, на которую отвечали (из формы).
+            quality: Оценка от 0 до 5.
+            schedule_id: Расписание карточки, на которую отвечали (из формы;
+                None — не проверяется).
+
+        Returns:
+            Карточка, на которую принят ответ, или None.
+
+        Raises:
+            ValueError: Если quality вне диапазона 0..5.
+        """
+        item = self.current
+        if item is None or position != self.position:
+            return None
+        if schedule_id is not None and schedule_id != item.schedule_id:
+            return None
+        schedule = Schedule.objects.filter(
+            pk=item.schedule_id, user_id=self.user_id, next_review__lte=date.today(),
+        ).first()
+        if schedule is not None:
+            update_schedule(schedule, quality)
+        self.position += 1
+        self.save()
+        return item
+
+
+def reset_review_sessions(user_id: int) -> None:
+    """Сбрасывает снимки сессий пользователя (следующий запрос снимет очередь заново)."""
+    cache.delete_many([_cache_key(user_id, kind) for kind in (KIND_REVIEW, KIND_TEST)])
@@ -0,0 +1,137 @@
+"""
+Подключаемые алгоритмы планирования повторений.
+
+Scheduler — общий интерфейс алгоритма: пересчитывает поля Schedule после
+ответа (без сохранения). Реализации: SM2Scheduler (по умолчанию) и
+FSRSScheduler с персональными весами. Алгоритм выбирается для каждого
+пользователя полями User.scheduler и User.scheduler_params; выбор кешируется,
+чтобы ответ не стоил дополнительного запроса к таблице пользователей.
+"""
+
+from datetime import date, timedelta
+from typing import TYPE_CHECKING, Optional
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from . import fsrs
+from .sm2 import Sm2State, step
+
+if TYPE_CHECKING:
+    from .models import Schedule
+
+SCHEDULER_CACHE_TIMEOUT = 60 * 60
+
+
+class Scheduler:
+    """
+    Интерфейс алгоритма планирования повторений.
+
+    Attributes:
+        name: Код алгоритма (совпадает со значением User.scheduler).
+    """
+
+    name = ''
+
+    def apply(self, schedule: 'Schedule', quality: int, today: date) -> None:
+        """
+        Пересчитывает расписание после ответа (без сохранения в БД).
+
+        Args:
+            schedule: Расписание карточки (изменяется на месте).
+            quality: Оценка качества ответа от 0 до 5.
+            today: Дата ответа.
+        """
+        raise NotImplementedError
+
+
+class SM2Scheduler(Scheduler):
+    """Классический SM-2 (см. cards.sm2.step)."""
+
+    name = 'sm2'
+
+    def apply(self, schedule: 'Schedule', quality: int, today: date) -> None:
+        step(Sm2State.from_schedule(schedule), quality, today).apply_to(schedule)
+
+
+class FSRSScheduler(Scheduler):
+    """
+    FSRS-подобный алгоритм с персональными весами (см. cards.fsrs).
+
+    Поля interval, next_review, repetition и last_result ведутся так же,
+    как в SM-2 (статистика и прогнозы продолжают работать), ef не меняется.
+    Дата предыдущего ответа берется из Schedule.last_review: next_review
+    может быть перенесен вручную, массовым переносом или балансировкой.
+    Для расписаний без last_review (ответы до появления поля) она
+    восстанавливается как next_review - interval.
+
+    Attributes:
+        weights: Веса модели (17 значений).
+        retention: Целевая вероятность вспомнить.
+    """
+
+    name = 'fsrs'
+
+    def __init__(self, weights=None, retention: float = fsrs.DEFAULT_RETENTION):
+        self.weights = tuple(weights) if weights else fsrs.DEFAULT_WEIGHTS
+        self.retention = retention
+
+    def apply(self, schedule: 'Schedule', quality: int, today: date) -> None:
+        if not (0 <= quality <= 5):
+            raise ValueError(f"Quality must be between 0 and 5, got {quality}")
+        last_review = schedule.last_review or schedule.next_review - timedelta(days=schedule.interval)
+        elapsed = (today - last_review).days
+        schedule.stability, schedule.difficulty, schedule.interval = fsrs.step(
+            self.weights, schedule.stability, schedule.difficulty, elapsed, quality, self.retention
+        )
+        schedule.repetition = schedule.repetition + 1 if quality >= 3 else 0
+        schedule.next_review = today + timedelta(days=schedule.interval)
+        schedule.last_result = quality >= 3
+
+
+def build_scheduler(name: Optional[str], params: Optional[dict] = None) -> Scheduler:
+    """
+    Создает алгоритм по коду и параметрам пользователя.
+
+    Args:
+        name: Код алгоритма ('sm2' или 'fsrs'); неизвестный код — SM-2.
+        params: Параметры алгоритма (для FSRS: {'w': [...], 'retention': 0.9}).
+
+    Returns:
+        Экземпляр Scheduler.
+    """
+    params = params or {}
+    if name == FSRSScheduler.name:
+        return FSRSScheduler(params.get('w'), params.get('retention', fsrs.DEFAULT_RETENTION))
+    return SM2Scheduler()
+
+
+def _cache_key(user_id: int) -> str:
+    """Ключ кеша настроек алгоритма пользователя."""
+    return f'scheduler:{user_id}'
+
+
+def get_scheduler(user_id: int) -> Scheduler:
+    """
+    Возвращает алгоритм планирования, выбранный пользователем.
+
+    Args:
+        user_id: ID пользователя.
+
+    Returns:
+        Экземпляр Scheduler (настройки берутся из кеша, при промахе — одним запросом).
+    """
+    config = cache.get(_cache_key(user_id))
+    if config is None:
+        row = get_user_model().objects.filter(pk=user_id).values_list('scheduler', 'scheduler_params').first()
+        config = row or ('sm2', None)
+        cache.set(_cache_key(user_id), config, SCHEDULER_CACHE_TIMEOUT)
+    return build_scheduler(*config)
+
+
+@receiver(post_save, sender=get_user_model())
+def invalidate_scheduler_on_user_save(sender, instance, **kwargs) -> None:
+    """Сбрасывает закешированный выбор алгоритма после сохранения пользователя."""
+    cache.delete(_cache_key(instance.pk))
@@ -0,0 +1,271 @@
+"""
+Полнотекстовый поиск по карточкам (word, translation, example, comment).
+
+Реализация зависит от СУБД:
+
+- SQLite — виртуальная таблица FTS5 cards_card_fts (external content над
+  cards_card). Синхронизируется триггерами на INSERT/UPDATE/DELETE, поэтому
+  индекс актуален и при save(), и при bulk_create()/bulk_update() импорта,
+  и при queryset.update()/delete(). В документ входят также user_id и level:
+  ограничение по владельцу и уровню выполняется внутри MATCH по индексу.
+  Ранжирование — bm25 с повышенным весом word и translation (среди
+  RANK_CANDIDATES самых новых совпадений).
+- PostgreSQL — GIN-индекс по выражению tsvector (SEARCH_VECTOR_SQL);
+  индекс по выражению поддерживается самой СУБД, ранжирование — ts_rank
+  с весами A (word, translation), C (example), D (comment).
+- Прочие СУБД — icontains по четырем полям без ранжирования.
+
+Запрос пользователя разбивается на слова; ищутся карточки, содержащие все
+слова (последнее — как префикс, для поиска по мере набора).
+
+Индексы создаются миграцией 0017_card_search; триггеры SQLite
+восстанавливаются после migrate (ensure_search_index), так как SQLite
+удаляет их при пересоздании таблицы cards_card в миграциях.
+"""
+
+import re
+from typing import Optional
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+# Число результатов поиска по умолчанию
+SEARCH_LIMIT = 50
+
+# Максимум слов запроса (остальные отбрасываются)
+MAX_TERMS = 8
+
+# Сколько совпадений (самых новых) ранжируется. Короткий префикс может совпасть
+# со всей колодой, а вычисление релевантности для каждой из 100 000 карточек
+# стоит сотни миллисекунд; такой запрос все равно малоизбирателен
+RANK_CANDIDATES = 2000
+
+FTS_TABLE = 'cards_card_fts'
+
+# Колонки документа FTS5: user_id и level — для фильтрации внутри MATCH
+FTS_COLUMNS = ('user_id', 'level', 'word', 'translation', 'example', 'comment')
+
+# Веса bm25 по колонкам FTS_COLUMNS
+FTS_WEIGHTS = (0.0, 0.0, 10.0, 10.0, 2.0, 1.0)
+
+SQLITE_SEARCH_DDL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    f"{', '.join(FTS_COLUMNS)}, content='cards_card', content_rowid='id', "
+    f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON cards_card BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, {', '.join(FTS_COLUMNS)}) "
+    f"VALUES (new.id, {', '.join('new.' + c for c in FTS_COLUMNS)}); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON cards_card BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {', '.join(FTS_COLUMNS)}) "
+    f"VALUES ('delete', old.id, {', '.join('old.' + c for c in FTS_COLUMNS)}); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF {', '.join(FTS_COLUMNS)} "
+    f"ON cards_card BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {', '.join(FTS_COLUMNS)}) "
+    f"VALUES ('delete', old.id, {', '.join('old.' + c for c in FTS_COLUMNS)}); "
+    f"INSERT INTO {FTS_TABLE}(rowid, {', '.join(FTS_COLUMNS)}) "
+    f"VALUES (new.id, {', '.join('new.' + c for c in FTS_COLUMNS)}); END",
+)
+
+SQLITE_TRIGGERS = (f'{FTS_TABLE}_ai', f'{FTS_TABLE}_ad', f'{FTS_TABLE}_au')
+
+# Конфигурация 'simple': без стемминга, одинаково для английских и русских слов
+SEARCH_VECTOR_SQL = (
+    "setweight(to_tsvector('simple'::regconfig, word), 'A') || "
+    "setweight(to_tsvector('simple'::regconfig, translation), 'A') || "
+    "setweight(to_tsvector('simple'::regconfig, example), 'C') || "
+    "setweight(to_tsvector('simple'::regconfig, comment), 'D')"
+)
+
+POSTGRES_SEARCH_DDL = (
+    f"CREATE INDEX IF NOT EXISTS cards_card_search_idx ON cards_card USING gin (({SEARCH_VECTOR_SQL}))",
+)
+
+TERM_RE = re.compile(r'\w+')
+
+
+def search_terms(query: str) -> list[str]:
+    """
+    Слова поискового запроса (в нижнем регистре, не более MAX_TERMS).
+
+    Args:
+        query: Строка, введенная пользователем.
+
+    Returns:
+        Список слов; пустой, если искать нечего.
+    """
+    return TERM_RE.findall(query.casefold())[:MAX_TERMS]
+
+
+def _fts_query(terms: list[str], user_id: Optional[int] = None, level: Optional[str] = None) -> str:
+    """Выражение MATCH для FTS5: все слова, последнее — как префикс."""
+    parts = [f'"{term}"' for term in terms]
+    parts[-1] += '*'
+    text = ' AND '.join(parts)
+    if user_id is not None:
+        text = f'user_id : "{user_id}" AND ({text})'
+    if level:
+        text = f'level : "{level}" AND {text}'
+    return text
+
+
+def _ts_query(terms: list[str]) -> str:
+    """Выражение to_tsquery для PostgreSQL: все слова, последнее — как префикс."""
+    parts = [f"'{term}'" for term in terms]
+    parts[-1] += ':*'
+    return ' & '.join(parts)
+
+
+def ensure_search_index(using_connection=None) -> None:
+    """
+    Создает поисковый индекс, если его нет (идемпотентно).
+
+    Для SQLite также восстанавливает триггеры синхронизации и, если их не
+    было, перестраивает индекс по текущему содержимому cards_card.
+
+    Args:
+        using_connection: Соединение с базой (по умолчанию — default).
+    """
+    conn = using_connection or connection
+    with conn.cursor() as cursor:
+        if conn.vendor == 'sqlite':
+            placeholders = ', '.join(['%s'] * len(SQLITE_TRIGGERS))
+            cursor.execute(
+                f"SELECT count(*) FROM sqlite_master WHERE type = 'trigger' AND name IN ({placeholders})",
+                SQLITE_TRIGGERS,
+            )
+            complete = cursor.fetchone()[0] == len(SQLITE_TRIGGERS)
+            for statement in SQLITE_SEARCH_DDL:
+                cursor.execute(statement)
+            if not complete:
+                cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+        elif conn.vendor == 'postgresql':
+            for statement in POSTGRES_SEARCH_DDL:
+                cursor.execute(statement)
+
+
+def drop_search_index(using_connection=None) -> None:
+    """
+    Удаляет поисковый индекс (обратная операция миграции).
+
+    Args:
+        using_connection: Соединение с базой (по умолчанию — default).
+    """
+    conn = using_connection or connection
+    with conn.cursor() as cursor:
+        if conn.vendor == 'sqlite':
+            for trigger in SQLITE_TRIGGERS:
+                cursor.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+            cursor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+        elif conn.vendor == 'postgresql':
+            cursor.execute('DROP INDEX IF EXISTS cards_card_search_idx')
+
+
+def search_card_ids(user, query: str, level: Optional[str] = None,
+                    limit: int = SEARCH_LIMIT) -> list[int]:
+    """
+    Идентификаторы карточек пользователя, найденных по запросу, по релевантности.
+
+    Args:
+        user: Владелец карточек.
+        query: Поисковый запрос.
+        level: Ограничить уровнем сложности.
+        limit: Максимум результатов.
+
+    Returns:
+        Список id от наиболее релевантной карточки.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return []
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(
+                f'SELECT rowid FROM ('
+                f'SELECT rowid, bm25({FTS_TABLE}, {", ".join(map(str, FTS_WEIGHTS))}) AS score '
+                f'FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s ORDER BY rowid DESC LIMIT %s'
+                f') ORDER BY score, rowid DESC LIMIT %s',
+                [_fts_query(terms, user.pk, level), RANK_CANDIDATES, limit],
+            )
+            return [row[0] for row in cursor.fetchall()]
+        if connection.vendor == 'postgresql':
+            level_sql = 'AND level = %s ' if level else ''
+            ts_query = _ts_query(terms)
+            cursor.execute(
+                f"SELECT id FROM cards_card WHERE id IN ("
+                f"SELECT id FROM cards_card "
+                f"WHERE user_id = %s {level_sql}AND ({SEARCH_VECTOR_SQL}) @@ to_tsquery('simple', %s) "
+                f"ORDER BY id DESC LIMIT %s"
+                f") ORDER BY ts_rank({SEARCH_VECTOR_SQL}, to_tsquery('simple', %s)) DESC, id DESC LIMIT %s",
+                [user.pk, *([level] if level else []), ts_query, RANK_CANDIDATES, ts_query, limit],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    from .models import Card
+
+    cards = Card.objects.filter(search_filter(query), user=user)
+    if level:
+        cards = cards.filter(level=level)
+    return list(cards.order_by('-created_at', '-id').values_list('pk', flat=True)[:limit])
+
+
+def search_cards(user, query: str, level: Optional[str] = None, limit: int = SEARCH_LIMIT) -> list:
+    """
+    Карточки пользователя, найденные по запросу, по релевантности.
+
+    Ищутся только личные карточки (Card.user = user) — тот же набор, что в
+    списке карточек и /api/cards/. Общие карточки колод из подписок не
+    входят: у них нет владельца, и ограничение по user_id в индексе их не
+    находит.
+
+    Args:
+        user: Владелец карточек.
+        query: Поисковый запрос.
+        level: Ограничить уровнем сложности.
+        limit: Максимум результатов.
+
+    Returns:
+        Список Card (с подгруженным расписанием) от наиболее релевантной.
+
+    Example:
+        >>> [card.word for card in search_cards(user, 'hel')]
+        ['hello', 'help']
+    """
+    from .models import Card
+
+    ids = search_card_ids(user, query, level, limit)
+    cards = Card.objects.prefetch_related('schedules').in_bulk(ids)
+    return [cards[pk] for pk in ids if pk in cards]
+
+
+def search_filter(query: str) -> Q:
+    """
+    Условие поиска для queryset карточек (без ранжирования, по всем пользователям).
+
+    Используется в админке вместо icontains по search_fields.
+
+    Args:
+        query: Поисковый запрос.
+
+    Returns:
+        Q-объект; для пустого запроса — условие, не совпадающее ни с чем.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return Q(pk__in=[])
+    if connection.vendor == 'sqlite':
+        return Q(pk__in=RawSQL(
+            f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [_fts_query(terms)]
+        ))
+    if connection.vendor == 'postgresql':
+        return Q(pk__in=RawSQL(
+            f"SELECT id FROM cards_card WHERE ({SEARCH_VECTOR_SQL}) @@ to_tsquery('simple', %s)",
+            [_ts_query(terms)],
+        ))
+    condition = Q()
+    for term in terms:
+        condition &= (
+            Q(word__icontains=term) | Q(translation__icontains=term)
+            | Q(example__icontains=term) | Q(comment__icontains=term)
+        )
+    return condition
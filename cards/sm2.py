@@ -1,7 +1,10 @@
 """
 Модуль SM-2 для интервального повторения карточек.
 
-Содержит функцию update_schedule для обновления расписания по алгоритму SM-2.
+Содержит чистое ORM-независимое состояние Sm2State с функцией step,
+функцию update_schedule для обновления расписания по алгоритму SM-2
+и пакетную версию update_schedules, которая пересчитывает много карточек
+за один векторизованный проход и сохраняет их одним bulk_update.
 Алгоритм основан на научных исследованиях эффективности интервального повторения.
 
 References:
@@ -9,77 +12,415 @@ References:
     - Spaced Repetition: https://en.wikipedia.org/wiki/Spaced_repetition
 """
 
-from datetime import date, timedelta
-from typing import TYPE_CHECKING
+from collections import Counter, defaultdict
+from datetime import date, datetime, timedelta
+from typing import TYPE_CHECKING, Iterable, Optional, Sequence
+
+import numpy as np
+from django.db import transaction
+from django.utils import timezone
 
 if TYPE_CHECKING:
-    from .models import Schedule
+    from .models import ReviewLog, Schedule
+
+
+# Границы и начальные значения алгоритма SM-2
+MIN_EF = 1.3
+DEFAULT_EF = 2.5
+
+
+def _validate_quality(quality: int) -> None:
+    """Проверяет, что оценка лежит в диапазоне [0, 5]."""
+    if not (0 <= quality <= 5):
+        raise ValueError(f"Quality must be between 0 and 5, got {quality}")
 
 
-def update_schedule(schedule: 'Schedule', quality: int) -> None:
+class Sm2State:
     """
-    Обновляет расписание повторения карточки по алгоритму SM-2.
+    Состояние карточки в алгоритме SM-2 без привязки к ORM.
+    
+    Компактный объект со __slots__ для предпросмотра, симуляций и горячих
+    циклов: создание и пересчёт не требуют модели Schedule и не обращаются к БД.
+    
+    Attributes:
+        interval: Интервал в днях до следующего повторения.
+        repetition: Счетчик успешных повторений подряд.
+        ef: Коэффициент эффективности (не меньше 1.3).
+        next_review: Дата следующего повторения (или None).
+        last_result: Результат последнего повторения (True/False/None).
+    """
+    
+    __slots__ = ('interval', 'repetition', 'ef', 'next_review', 'last_result')
+    
+    def __init__(
+        self,
+        interval: int = 1,
+        repetition: int = 0,
+        ef: float = DEFAULT_EF,
+        next_review: Optional[date] = None,
+        last_result: Optional[bool] = None,
+    ):
+        self.interval = interval
+        self.repetition = repetition
+        self.ef = ef
+        self.next_review = next_review
+        self.last_result = last_result
     
-    Алгоритм SM-2 адаптирует интервалы повторения на основе качества ответа
-    пользователя. При успешных ответах интервал увеличивается экспоненциально,
-    при неуспешных - сбрасывается к минимальному значению.
+    def __repr__(self) -> str:
+        return (
+            f'Sm2State(interval={self.interval}, repetition={self.repetition}, '
+            f'ef={self.ef}, next_review={self.next_review}, last_result={self.last_result})'
+        )
+    
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Sm2State):
+            return NotImplemented
+        return self.as_tuple() == other.as_tuple()
+    
+    def as_tuple(self) -> tuple:
+        """Возвращает поля состояния кортежем (удобно для сравнения)."""
+        return (self.interval, self.repetition, self.ef, self.next_review, self.last_result)
+    
+    @classmethod
+    def from_schedule(cls, schedule: 'Schedule') -> 'Sm2State':
+        """Снимает состояние SM-2 с объекта Schedule (без запросов к БД)."""
+        return cls(
+            interval=schedule.interval,
+            repetition=schedule.repetition,
+            ef=schedule.ef,
+            next_review=schedule.next_review,
+            last_result=schedule.last_result,
+        )
+    
+    def apply_to(self, schedule: 'Schedule') -> None:
+        """Переносит состояние в объект Schedule (без сохранения)."""
+        schedule.interval = self.interval
+        schedule.repetition = self.repetition
+        schedule.ef = self.ef
+        schedule.next_review = self.next_review
+        schedule.last_result = self.last_result
+
+
+def step(state: Sm2State, quality: int, today: date) -> Sm2State:
+    """
+    Чистый шаг алгоритма SM-2: возвращает новое состояние после ответа.
+    
+    Исходное состояние не изменяется, модель и БД не используются.
     
     Args:
-        schedule: Объект Schedule с текущими параметрами повторения.
+        state: Текущее состояние карточки.
         quality: Оценка качества ответа от 0 до 5.
             - 0-2: Не знал (повторение через 1 день)
             - 3-5: Знал (увеличение интервала)
+        today: Дата ответа, от которой отсчитывается next_review.
+    
+    Returns:
+        Новое состояние Sm2State.
     
     Raises:
-        AssertionError: Если quality не в диапазоне [0, 5].
-        ValueError: Если schedule не является объектом Schedule.
+        ValueError: Если quality не в диапазоне [0, 5].
     
-    Note:
-        Функция изменяет schedule in-place и автоматически сохраняет изменения.
-        
     Example:
-        >>> from cards.models import Schedule
-        >>> schedule = Schedule.objects.get(id=1)
-        >>> update_schedule(schedule, 4)  # Хороший ответ
-        >>> print(schedule.interval)  # Увеличенный интервал
-        >>> print(schedule.next_review)  # Новая дата повторения
+        >>> state = Sm2State(interval=6, repetition=2, ef=2.5)
+        >>> step(state, 4, date(2025, 1, 1)).interval
+        15
     """
-    # Валидация входных параметров
-    if not (0 <= quality <= 5):
-        raise ValueError(f"Quality must be between 0 and 5, got {quality}")
-    
-    if not hasattr(schedule, 'interval'):
-        raise ValueError("schedule must be a Schedule object")
+    _validate_quality(quality)
     
     # Сброс при неуспешном ответе (quality < 3)
     if quality < 3:
-        schedule.repetition = 0
-        schedule.interval = 1
+        repetition = 0
+        interval = 1
     else:
         # Успешный ответ - увеличиваем интервал
-        if schedule.repetition == 0:
+        if state.repetition == 0:
             # Первое успешное повторение
-            schedule.interval = 1
-        elif schedule.repetition == 1:
+            interval = 1
+        elif state.repetition == 1:
             # Второе успешное повторение
-            schedule.interval = 6
+            interval = 6
         else:
             # Последующие повторения: интервал * эффективность
-            schedule.interval = int(schedule.interval * schedule.ef)
-        
-        schedule.repetition += 1
+            interval = int(state.interval * state.ef)
+        repetition = state.repetition + 1
     
     # Обновление коэффициента эффективности (EF)
     # Формула: EF = EF + (0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
     # Минимальное значение EF = 1.3
     ef_delta = 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02)
-    schedule.ef = max(1.3, schedule.ef + ef_delta)
+    ef = max(MIN_EF, state.ef + ef_delta)
     
-    # Расчет следующей даты повторения
-    schedule.next_review = date.today() + timedelta(days=schedule.interval)
+    return Sm2State(
+        interval=interval,
+        repetition=repetition,
+        ef=ef,
+        next_review=today + timedelta(days=interval),
+        last_result=quality >= 3,
+    )
+
+
+def update_schedule(schedule: 'Schedule', quality: int, source: str = 'web') -> None:
+    """
+    Обновляет расписание повторения карточки по алгоритму SM-2.
+    
+    Тонкая обёртка над step(): снимает состояние с Schedule, выполняет
+    шаг алгоритма и сохраняет результат в базе данных. Если пользователь
+    выбрал другой алгоритм (User.scheduler), шаг выполняет он
+    (см. cards.schedulers).
+    
+    Args:
+        schedule: Объект Schedule с текущими параметрами повторения.
+        quality: Оценка качества ответа от 0 до 5.
+        source: Источник ответа для журнала (ReviewLog.SOURCE_WEB/SOURCE_BOT).
+    
+    Raises:
+        ValueError: Если quality не в диапазоне [0, 5] или schedule
+            не является объектом Schedule.
+    
+    Note:
+        Функция изменяет schedule in-place и автоматически сохраняет изменения.
+        Ответ записывается в журнал ReviewLog через буфер (без отдельного INSERT),
+        счетчики UserStats изменяются в той же транзакции, что и расписание.
+        
+    Example:
+        >>> from cards.models import Schedule
+        >>> schedule = Schedule.objects.get(id=1)
+        >>> update_schedule(schedule, 4)  # Хороший ответ
+        >>> print(schedule.interval)  # Увеличенный интервал
+        >>> print(schedule.next_review)  # Новая дата повторения
+    """
+    _validate_quality(quality)
+    if not hasattr(schedule, 'interval'):
+        raise ValueError("schedule must be a Schedule object")
+    
+    from . import load_balancer
+    from .forecast import invalidate_forecast
+    from .models import UserStats
+    from .review_log import log_reviews
+    from .schedulers import get_scheduler
+    
+    today = date.today()
+    user_id = schedule.user_id
+    previous = Sm2State.from_schedule(schedule)
+    get_scheduler(user_id).apply(schedule, quality, today)
+    schedule.last_review = today
+    if load_balancer.is_enabled():
+        # Сдвигаем дату на наименее загруженный день в окне вокруг интервала
+        schedule.interval, = load_balancer.balance([(user_id, previous.next_review, schedule.interval)], today)
+        schedule.next_review = today + timedelta(days=schedule.interval)
+    with transaction.atomic():
+        schedule.save()
+        UserStats.objects.adjust(user_id, **UserStats.schedule_delta(previous, schedule))
+    
+    log_reviews([_review_log_entry(schedule, user_id, quality, previous, source)])
+    invalidate_forecast(user_id)
+
+
+def _review_log_entry(
+    schedule: 'Schedule',
+    user_id: int,
+    quality: int,
+    previous: Sm2State,
+    source: str,
+) -> 'ReviewLog':
+    """Создаёт (без сохранения) запись журнала для одного ответа."""
+    from .models import ReviewLog
+    return ReviewLog(
+        card_id=schedule.card_id,
+        user_id=user_id,
+        quality=quality,
+        prev_interval=previous.interval,
+        new_interval=schedule.interval,
+        prev_ef=previous.ef,
+        new_ef=schedule.ef,
+        source=source,
+    )
+
+
+# Поля Schedule, которые изменяют алгоритмы планирования (для bulk_update)
+SCHEDULE_FIELDS = [
+    'next_review', 'interval', 'repetition', 'ef', 'last_result',
+    'stability', 'difficulty', 'last_review', 'updated_at',
+]
+
+
+def update_schedules(
+    pairs: Iterable[tuple['Schedule', int]],
+    source: str = 'web',
+    reviewed_at: Optional[Sequence[datetime]] = None,
+) -> list['Schedule']:
+    """
+    Пакетно обновляет расписания по алгоритму SM-2.
+    
+    Вычисляет новые interval, repetition, ef, next_review и last_result
+    для всех пар (schedule, quality) массивами NumPy и записывает результат
+    одним bulk_update внутри транзакции. Результат полностью совпадает
+    с последовательными вызовами update_schedule. Расписания пользователей
+    с другим алгоритмом (User.scheduler) пересчитываются этим алгоритмом.
+    
+    Args:
+        pairs: Пары (schedule, quality), quality — оценка от 0 до 5.
+            Одно расписание может встречаться несколько раз: оценки
+            применяются в порядке следования, как при последовательных
+            вызовах update_schedule.
+        source: Источник ответов для журнала ReviewLog.
+        reviewed_at: Время каждого ответа для журнала (в порядке pairs);
+            по умолчанию — время записи.
+    
+    Returns:
+        Список уникальных обновлённых расписаний (в порядке первого появления).
+    
+    Raises:
+        ValueError: Если какая-либо оценка вне диапазона [0, 5] или объект
+            не является Schedule. В этом случае ни одно расписание не меняется.
+    
+    Example:
+        >>> from cards.sm2 import update_schedules
+        >>> update_schedules([(s1, 5), (s2, 2), (s3, 4)])  # один UPDATE-запрос
+    """
+    pairs = list(pairs)
+    for schedule, quality in pairs:
+        _validate_quality(quality)
+        if not hasattr(schedule, 'interval'):
+            raise ValueError("schedule must be a Schedule object")
+    if not pairs:
+        return []
+    
+    # Раскладываем пары по раундам: k-я оценка одного и того же расписания
+    # попадает в k-й раунд, чтобы сохранить порядок применения оценок
+    rounds: list[list[tuple['Schedule', int]]] = []
+    round_numbers: list[list[int]] = []
+    seen: dict[int, int] = {}
+    unique: list['Schedule'] = []
+    for number, (schedule, quality) in enumerate(pairs):
+        occurrence = seen.get(id(schedule), 0)
+        if occurrence == 0:
+            unique.append(schedule)
+        seen[id(schedule)] = occurrence + 1
+        if occurrence == len(rounds):
+            rounds.append([])
+            round_numbers.append([])
+        rounds[occurrence].append((schedule, quality))
+        round_numbers[occurrence].append(number)
+    
+    from . import load_balancer
+    from .forecast import invalidate_forecast
+    from .models import UserStats
+    from .review_log import log_reviews
+    from .schedulers import SM2Scheduler, get_scheduler
+    
+    today = date.today()
+    original_states = [Sm2State.from_schedule(schedule) for schedule in unique]
+    schedulers = {user_id: get_scheduler(user_id) for user_id in {s.user_id for s in unique}}
+    history: list[tuple['Schedule', int, Sm2State, Sm2State]] = []
+    history_numbers: list[int] = []
+    for batch, numbers in zip(rounds, round_numbers):
+        before = [Sm2State.from_schedule(schedule) for schedule, _ in batch]
+        sm2_batch = []
+        for schedule, quality in batch:
+            scheduler = schedulers[schedule.user_id]
+            if isinstance(scheduler, SM2Scheduler):
+                sm2_batch.append((schedule, quality))
+            else:
+                scheduler.apply(schedule, quality, today)
+        if sm2_batch:
+            _apply_sm2_vectorized(sm2_batch, today)
+        for schedule, _ in batch:
+            schedule.last_review = today
+        history.extend(
+            (schedule, quality, prev, Sm2State.from_schedule(schedule))
+            for (schedule, quality), prev in zip(batch, before)
+        )
+        history_numbers.extend(numbers)
+    
+    if load_balancer.is_enabled():
+        intervals = load_balancer.balance(
+            [(s.user_id, old.next_review, s.interval) for s, old in zip(unique, original_states)],
+            today,
+        )
+        for schedule, interval in zip(unique, intervals):
+            schedule.interval = interval
+            schedule.next_review = today + timedelta(days=interval)
+    
+    now = timezone.now()
+    for schedule in unique:
+        schedule.updated_at = now
+    # Приращения статистики суммируются по пользователю: один UPDATE на пользователя
+    stats_deltas: dict[int, Counter] = defaultdict(Counter)
+    for schedule, old in zip(unique, original_states):
+        stats_deltas[schedule.user_id].update(UserStats.schedule_delta(old, schedule))
+    with transaction.atomic():
+        type(unique[0]).objects.bulk_update(unique, SCHEDULE_FIELDS)
+        for user_id, deltas in stats_deltas.items():
+            UserStats.objects.adjust(user_id, **deltas)
+    
+    entries = []
+    last_round = {id(schedule): i for i, (schedule, *_) in enumerate(history)}
+    for i, (schedule, quality, prev, new) in enumerate(history):
+        entry = _review_log_entry(schedule, schedule.user_id, quality, prev, source)
+        if last_round[id(schedule)] != i:
+            # Промежуточный ответ по карточке, повторённой в пачке
+            entry.new_interval, entry.new_ef = new.interval, new.ef
+        if reviewed_at is not None:
+            entry.reviewed_at = reviewed_at[history_numbers[i]]
+        entries.append(entry)
+    log_reviews(entries)
+    
+    for user_id in {schedule.user_id for schedule in unique}:
+        invalidate_forecast(user_id)
+    return unique
+
+
+def step_arrays(
+    interval: np.ndarray,
+    repetition: np.ndarray,
+    ef: np.ndarray,
+    quality: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Векторизованный шаг SM-2 над массивами NumPy (без ORM и дат).
+    
+    Args:
+        interval: Текущие интервалы (int64).
+        repetition: Текущие счетчики повторений (int64).
+        ef: Текущие коэффициенты эффективности (float64).
+        quality: Оценки от 0 до 5 (int64), проверка диапазона на вызывающей стороне.
+    
+    Returns:
+        Кортеж новых массивов (interval, repetition, ef).
+    """
+    passed = quality >= 3
+    # Интервал: 1 день при провале и первом успехе, 6 при втором, далее interval * ef
+    grown = (interval * ef).astype(np.int64)
+    new_interval = np.where(repetition == 1, 6, np.where(repetition == 0, 1, grown))
+    new_interval = np.where(passed, new_interval, 1)
+    new_repetition = np.where(passed, repetition + 1, 0)
+    
+    # Та же формула EF, что и в step (порядок операций сохранён)
+    miss = 5 - quality
+    ef_delta = 0.1 - miss * (0.08 + miss * 0.02)
+    new_ef = np.maximum(MIN_EF, ef + ef_delta)
+    return new_interval, new_repetition, new_ef
+
+
+def _apply_sm2_vectorized(batch: list[tuple['Schedule', int]], today: date) -> None:
+    """
+    Применяет один шаг SM-2 к расписаниям пачки (без сохранения в БД).
+    
+    Args:
+        batch: Пары (schedule, quality), каждое расписание не более одного раза.
+        today: Дата, от которой отсчитывается next_review.
+    """
+    quality = np.fromiter((q for _, q in batch), dtype=np.int64, count=len(batch))
+    repetition = np.fromiter((s.repetition for s, _ in batch), dtype=np.int64, count=len(batch))
+    interval = np.fromiter((s.interval for s, _ in batch), dtype=np.int64, count=len(batch))
+    ef = np.fromiter((s.ef for s, _ in batch), dtype=np.float64, count=len(batch))
     
-    # Сохранение результата (успех = quality >= 3)
-    schedule.last_result = quality >= 3
+    new_interval, new_repetition, new_ef = step_arrays(interval, repetition, ef, quality)
     
-    # Сохранение изменений в базе данных
-    schedule.save() 
\ No newline at end of file
+    for i, (schedule, q) in enumerate(batch):
+        schedule.interval = int(new_interval[i])
+        schedule.repetition = int(new_repetition[i])
+        schedule.ef = float(new_ef[i])
+        schedule.next_review = today + timedelta(days=schedule.interval)
+        schedule.last_result = q >= 3
@@ -0,0 +1,262 @@
+"""
+Журнал изменений для инкрементальной синхронизации клиентов.
+
+Клиент (бот, офлайн-приложение) хранит локальную копию карточек, которые
+повторяет пользователь, и запрашивает только изменения после токена
+предыдущей синхронизации. Трафик в установившемся режиме пропорционален
+активности пользователя, а не размеру колоды.
+
+Изменения читаются по расписаниям пользователя: Schedule.updated_at
+обновляется и при ответе, и при изменении карточки (Card.save, импорт
+в режиме обновления), поэтому одна выборка по индексу (user, updated_at, id)
+дает все измененные карточки вместе с их расписаниями. Исчезнувшие карточки
+передаются по отметкам SyncTombstone.
+
+Токен — непрозрачная строка с позицией в обоих потоках: (updated_at, id)
+последнего расписания и id последней отметки. Выдаются только изменения
+старше SYNC_COMMIT_LAG_SECONDS: запись, чье updated_at уже вычислено, но
+транзакция еще не зафиксирована, не окажется позади выданного токена.
+
+Задержка покрывает только короткие транзакции (ответы, правки, пакетные
+действия). Импорт и подписка на колоду могут фиксироваться дольше, поэтому
+после фиксации они заново отмечают затронутые расписания
+(restamp_on_commit) — короткими UPDATE со временем уже после фиксации.
+"""
+
+import base64
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max, Q, QuerySet
+from django.utils import timezone
+
+from .models import Schedule, SyncTombstone
+
+# Размер страницы по умолчанию и максимальный
+DEFAULT_SYNC_PAGE_SIZE = 500
+MAX_SYNC_PAGE_SIZE = 5000
+
+# Расписаний в одном UPDATE повторной отметки (restamp_on_commit)
+RESTAMP_BATCH_SIZE = 1000
+
+# Поля карточки и расписания в записи изменения
+CARD_FIELDS = ('word', 'translation', 'example', 'comment', 'level', 'deck_id')
+SCHEDULE_FIELDS = (
+    'next_review', 'interval', 'repetition', 'ef', 'last_result', 'stability', 'difficulty',
+)
+
+
+class SyncTokenExpired(Exception):
+    """Токен старше SYNC_TOMBSTONE_TTL_DAYS: отметки об удалении могли быть очищены."""
+
+
+@dataclass
+class SyncPage:
+    """
+    Порция изменений.
+
+    Attributes:
+        changes: Измененные расписания пользователя (с карточками).
+        deleted: ID карточек, исчезнувших из набора пользователя.
+        token: Токен для следующего запроса.
+        has_more: Есть ли еще изменения (следующую порцию запрашивать сразу).
+    """
+
+    changes: list
+    deleted: list[int]
+    token: str
+    has_more: bool
+
+
+def encode_token(issued_at: datetime, updated_at: Optional[datetime], schedule_id: int,
+                 tombstone_id: int) -> str:
+    """
+    Кодирует позицию синхронизации в токен.
+
+    Args:
+        issued_at: Время выдачи токена (для проверки срока).
+        updated_at: updated_at последнего переданного расписания (None — с начала).
+        schedule_id: Его id.
+        tombstone_id: id последней переданной отметки об удалении.
+
+    Returns:
+        Строка base64url без выравнивания.
+    """
+    position = updated_at.isoformat() if updated_at else ''
+    raw = f'{issued_at.isoformat()}|{position}|{schedule_id}|{tombstone_id}'.encode('ascii')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_token(token: str) -> tuple[datetime, Optional[datetime], int, int]:
+    """
+    Декодирует токен из encode_token().
+
+    Raises:
+        ValueError: Если токен поврежден.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)).decode('ascii')
+        issued_at, updated_at, schedule_id, tombstone_id = raw.split('|')
+        return (
+            datetime.fromisoformat(issued_at),
+            datetime.fromisoformat(updated_at) if updated_at else None,
+            int(schedule_id),
+            int(tombstone_id),
+        )
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise ValueError(f'Invalid sync token: {token!r}') from exc
+
+
+def parse_sync_limit(value: Optional[str]) -> int:
+    """
+    Размер порции из GET-параметра limit (от 1 до MAX_SYNC_PAGE_SIZE).
+
+    Raises:
+        ValueError: Если значение не целое число.
+    """
+    if value in (None, ''):
+        return DEFAULT_SYNC_PAGE_SIZE
+    return max(1, min(int(value), MAX_SYNC_PAGE_SIZE))
+
+
+def changes_since(user, token: Optional[str] = None, limit: int = DEFAULT_SYNC_PAGE_SIZE) -> SyncPage:
+    """
+    Изменения карточек пользователя после позиции токена.
+
+    Без токена возвращает все карточки пользователя (первичная
+    синхронизация), удалений при этом нет.
+
+    Args:
+        user: Пользователь.
+        token: Токен предыдущего ответа.
+        limit: Максимум изменений и удалений в порции.
+
+    Returns:
+        SyncPage с изменениями, удалениями и токеном следующего запроса.
+
+    Raises:
+        ValueError: Если токен поврежден.
+        SyncTokenExpired: Если токен устарел — клиенту нужна полная синхронизация.
+
+    Example:
+        >>> page = changes_since(user, token)
+        >>> while page.has_more:
+        ...     page = changes_since(user, page.token)
+    """
+    now = timezone.now()
+    horizon = now - timedelta(seconds=settings.SYNC_COMMIT_LAG_SECONDS)
+    tombstones = SyncTombstone.objects.filter(user=user, deleted_at__lt=horizon)
+    if token:
+        issued_at, since, schedule_id, tombstone_id = decode_token(token)
+        if issued_at < now - timedelta(days=settings.SYNC_TOMBSTONE_TTL_DAYS):
+            raise SyncTokenExpired(token)
+    else:
+        since, schedule_id = None, 0
+        tombstone_id = tombstones.aggregate(last=Max('id'))['last'] or 0
+
+    schedules = (
+        Schedule.objects.filter(user=user, updated_at__lt=horizon)
+        .select_related('card')
+        .order_by('updated_at', 'id')
+    )
+    if since is not None:
+        # updated_at >= X задает границу диапазона индекса, OR уточняет равные updated_at
+        schedules = schedules.filter(updated_at__gte=since).filter(
+            Q(updated_at__gt=since) | Q(id__gt=schedule_id)
+        )
+    changes = list(schedules[:limit + 1])
+    has_more = len(changes) > limit
+    if has_more:
+        changes = changes[:limit]
+        since, schedule_id = changes[-1].updated_at, changes[-1].pk
+    else:
+        # Все расписания до горизонта переданы
+        since, schedule_id = horizon, 0
+
+    removed = list(
+        tombstones.filter(id__gt=tombstone_id).order_by('id').values_list('id', 'card_id')[:limit + 1]
+    )
+    if len(removed) > limit:
+        removed = removed[:limit]
+        has_more = True
+    if removed:
+        tombstone_id = removed[-1][0]
+    card_ids = {card_id for _, card_id in removed}
+    # Карточка могла вернуться (повторная подписка) — тогда она не удалена
+    live = set(Schedule.objects.filter(user=user, card_id__in=card_ids).values_list('card_id', flat=True))
+    deleted = sorted(card_ids - live)
+
+    return SyncPage(changes, deleted, encode_token(now, since, schedule_id, tombstone_id), has_more)
+
+
+def restamp_on_commit(schedules: QuerySet, since: datetime) -> None:
+    """
+    После фиксации текущей транзакции заново отмечает измененные ей расписания.
+
+    updated_at вычисляется при записи строки; если транзакция длится дольше
+    SYNC_COMMIT_LAG_SECONDS, синхронизация успевает выдать токен позже этого
+    времени, пока строки еще не видны, и клиент их пропустит. Повторная
+    отметка ставит updated_at после фиксации, порциями по RESTAMP_BATCH_SIZE
+    (каждый UPDATE — короткая транзакция в пределах задержки).
+
+    Args:
+        schedules: Расписания, которые могла изменить транзакция (отбор по
+            индексу (user, updated_at, id), например filter(user=user)).
+        since: Время до начала транзакции; отмечаются строки с updated_at >= since.
+
+    Note:
+        Строки, измененные в том же окне другими запросами, тоже отмечаются
+        заново и придут клиенту еще раз — это безопасно.
+
+    Example:
+        >>> started = timezone.now()
+        >>> with transaction.atomic():
+        ...     restamp_on_commit(Schedule.objects.filter(user=user), started)
+        ...     importer.flush()
+    """
+    def restamp() -> None:
+        # Все строки транзакции отмечены раньше cutoff; отмеченные заново — позже
+        cutoff = timezone.now()
+        pending = schedules.filter(updated_at__gte=since, updated_at__lt=cutoff).order_by()
+        while True:
+            ids = list(pending.values_list('pk', flat=True)[:RESTAMP_BATCH_SIZE])
+            if not ids:
+                return
+            Schedule.objects.filter(pk__in=ids).update(updated_at=timezone.now())
+
+    transaction.on_commit(restamp)
+
+
+def change_record(schedule: Schedule) -> dict:
+    """
+    Запись изменения для ответа API: поля карточки и расписания.
+
+    Args:
+        schedule: Расписание с загруженной карточкой.
+
+    Returns:
+        Словарь, сериализуемый в JSON (даты — ISO 8601).
+    """
+    card = schedule.card
+    record = {'id': card.pk, **{field: getattr(card, field) for field in CARD_FIELDS}}
+    record.update({field: getattr(schedule, field) for field in SCHEDULE_FIELDS})
+    record['next_review'] = schedule.next_review.isoformat()
+    record['updated_at'] = schedule.updated_at.isoformat()
+    return record
+
+
+def purge_tombstones(now: Optional[datetime] = None) -> int:
+    """
+    Удаляет отметки об удалении старше SYNC_TOMBSTONE_TTL_DAYS.
+
+    Returns:
+        Число удаленных отметок.
+    """
+    now = now or timezone.now()
+    deleted, _ = SyncTombstone.objects.filter(
+        deleted_at__lt=now - timedelta(days=settings.SYNC_TOMBSTONE_TTL_DAYS)
+    ).delete()
+    return deleted
@@ -1,7 +1,9 @@
 from celery import shared_task
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from cards.models import Schedule
-from datetime import date
+from django.utils import timezone
+from cards.models import ImportJob, Schedule
+from datetime import date, timedelta
 import requests
 import os
 
@@ -15,22 +17,74 @@ def send_daily_review_reminders():
     """
     User = get_user_model()
     today = date.today()
-    users = User.objects.exclude(telegram_id__isnull=True).exclude(telegram_id='')
+    # Пользователи с Telegram и карточками на сегодня — одним запросом по индексу (user, next_review)
+    due_user_ids = Schedule.objects.filter(next_review__lte=today).values('user_id')
+    users = (
+        User.objects.exclude(telegram_id__isnull=True).exclude(telegram_id='')
+        .filter(pk__in=due_user_ids)
+    )
     count = 0
     for user in users:
-        # Есть ли карточки на сегодня?
-        has_today = Schedule.objects.filter(card__user=user, next_review__lte=today).exists()
-        if has_today:
-            # Отправить напоминание через Telegram-бот (через API или напрямую)
-            payload = {
-                'telegram_id': user.telegram_id,
-                'message': '⏰ Сегодня есть слова для повторения! Зайди в LinguaTrack или напиши /today боту.'
-            }
-            try:
-                resp = requests.post(TELEGRAM_BOT_NOTIFY_URL, json=payload, timeout=10)
-                if resp.status_code == 200:
-                    count += 1
-            except Exception as e:
-                # Можно логировать ошибку
-                pass
-    return f'Отправлено напоминаний: {count}' 
\ No newline at end of file
+        # Отправить напоминание через Telegram-бот (через API или напрямую)
+        payload = {
+            'telegram_id': user.telegram_id,
+            'message': '⏰ Сегодня есть слова для повторения! Зайди в LinguaTrack или напиши /today боту.'
+        }
+        try:
+            resp = requests.post(TELEGRAM_BOT_NOTIFY_URL, json=payload, timeout=10)
+            if resp.status_code == 200:
+                count += 1
+        except Exception as e:
+            # Можно логировать ошибку
+            pass
+    return f'Отправлено напоминаний: {count}'
+
+
+# Время обработки за один запуск задачи — с запасом до CELERY_TASK_SOFT_TIME_LIMIT
+IMPORT_JOB_TIME_BUDGET = 40
+
+
+@shared_task(acks_late=True, reject_on_worker_lost=True)
+def process_import_job(job_id):
+    """
+    Фоновая обработка задания импорта CSV (ImportJob).
+    
+    Обрабатывает файл порциями не дольше IMPORT_JOB_TIME_BUDGET секунд и, если
+    файл не закончился, ставит себя в очередь повторно. Сообщение подтверждается
+    только после выполнения (acks_late), поэтому при падении воркера задача
+    вернется в очередь и продолжит с сохраненного смещения.
+    """
+    from cards.importer import run_import_job
+
+    job = run_import_job(job_id, time_budget=IMPORT_JOB_TIME_BUDGET)
+    if job.status == ImportJob.STATUS_RUNNING:
+        process_import_job.delay(job_id)
+    return f'Импорт {job_id}: {job.status}, строк {job.rows}'
+
+
+@shared_task
+def resume_stalled_import_jobs():
+    """
+    Периодическая задача: перезапускает задания импорта без прогресса.
+    
+    Подхватывает задания, потерянные при перезапуске воркера или брокера:
+    активные, но не обновлявшиеся дольше IMPORT_JOB_STALE_SECONDS.
+    """
+    stale_before = timezone.now() - timedelta(seconds=settings.IMPORT_JOB_STALE_SECONDS)
+    job_ids = list(
+        ImportJob.objects.filter(status__in=ImportJob.ACTIVE_STATUSES, updated_at__lt=stale_before)
+        .values_list('pk', flat=True)
+    )
+    for job_id in job_ids:
+        process_import_job.delay(job_id)
+    return f'Перезапущено заданий импорта: {len(job_ids)}'
+
+
+@shared_task
+def purge_sync_tombstones():
+    """
+    Ежедневная задача: удаляет отметки об удалении карточек старше SYNC_TOMBSTONE_TTL_DAYS.
+    """
+    from cards.sync import purge_tombstones
+
+    return f'Удалено отметок синхронизации: {purge_tombstones()}'
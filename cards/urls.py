@@ -3,17 +3,28 @@ URL-маршруты для приложения cards.
 CRUD для карточек пользователя.
 """
 from django.urls import path
-from .views import CardListView, CardCreateView, CardUpdateView, CardDeleteView
+from .views import CardListView, CardCreateView, CardUpdateView, CardDeleteView, card_bulk, answer_batch
 from .views import review_card, review_mode, import_cards, tts_card, export_cards, test_multiple_choice_view
+from .views import import_job_create, import_job_chunk, import_job_status
+from .views import deck_list, deck_detail, deck_subscribe, deck_unsubscribe
 
 urlpatterns = [
     path('', CardListView.as_view(), name='card_list'),  # Список и фильтрация карточек
     path('add/', CardCreateView.as_view(), name='card_add'),  # Создание карточки
+    path('bulk/', card_bulk, name='card_bulk'),  # Пакетные операции над карточками
     path('review/', review_card, name='card_review'),  # Режим повторения
+    path('answers/', answer_batch, name='card_answers'),  # Пачка ответов (JSON)
     path('review_mode/', review_mode, name='review_mode'),  # Выбор режима повторения
     path('import/', import_cards, name='card_import'),  # Импорт карточек
+    path('import/jobs/', import_job_create, name='import_job_create'),  # Фоновый импорт: создание задания
+    path('import/jobs/<int:pk>/chunk/', import_job_chunk, name='import_job_chunk'),  # Загрузка части файла
+    path('import/jobs/<int:pk>/', import_job_status, name='import_job_status'),  # Статус задания (JSON)
     path('export/', export_cards, name='card_export'),  # Экспорт карточек в CSV
     path('test/', test_multiple_choice_view, name='card_test'),  # Тестирование (множественный выбор)
+    path('decks/', deck_list, name='deck_list'),  # Общие колоды
+    path('decks/<int:pk>/', deck_detail, name='deck_detail'),  # Карточки колоды
+    path('decks/<int:pk>/subscribe/', deck_subscribe, name='deck_subscribe'),  # Подписка на колоду
+    path('decks/<int:pk>/unsubscribe/', deck_unsubscribe, name='deck_unsubscribe'),  # Отписка от колоды
     path('<int:pk>/edit/', CardUpdateView.as_view(), name='card_edit'),  # Редактирование карточки
     path('<int:pk>/delete/', CardDeleteView.as_view(), name='card_delete'),  # Удаление карточки
     path('<int:pk>/tts/', tts_card, name='card_tts'),  # Озвучка карточки (TTS)
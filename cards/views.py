@@ -8,26 +8,37 @@ from django.contrib.auth.decorators import login_required
 from django.utils.decorators import method_decorator
 from django.views.generic import ListView, CreateView, UpdateView, DeleteView
 from django.urls import reverse_lazy
-from .models import Card, Schedule
-from .forms import CardForm, CardImportForm
-import csv
-from io import TextIOWrapper
+from .models import Card, Deck, ImportJob, ReviewLog
+from .forms import BulkActionForm, CardForm, CardImportForm
+from .importer import import_csv
+from .exporter import FORMAT_CSV, FORMATS, export_stream
+from .pagination import KeysetPage, keyset_page, parse_limit
+from .search import search_cards
+from .bulk import run_bulk_action
+from .answers import apply_answers, parse_answers
+from .review_session import KIND_REVIEW, KIND_TEST, ReviewSession
+from .decks import subscribe, unsubscribe, user_cards, visible_decks
+from .tasks import process_import_job
 from django.contrib import messages
-from .sm2 import update_schedule
-from datetime import date
-from django.http import HttpResponseRedirect, FileResponse, JsonResponse, Http404, HttpResponse
+from django.http import HttpResponseRedirect, FileResponse, JsonResponse, Http404, StreamingHttpResponse
 from django.urls import reverse
 from .speechkit import synthesize_speech, SpeechKitError, SpeechKitConfigError, SpeechKitAPIError, SpeechKitNetworkError
 import logging
-from random import sample, shuffle
 from django.views.decorators.http import require_GET, require_POST
+from django.db import IntegrityError, transaction
+from django.conf import settings
+import json
 
 logger = logging.getLogger(__name__)
 
 @method_decorator(login_required, name='dispatch')
 class CardListView(ListView):
     """
-    Список карточек пользователя с фильтрацией по уровню сложности.
+    Список личных карточек пользователя с фильтрацией по уровню сложности.
+    Карточки колод из подписок показываются на страницах колод (deck_detail).
+    Постраничный вывод по ключу (created_at, id): GET-параметры cursor и limit (см. cards.pagination).
+    GET-параметр q — полнотекстовый поиск: результаты по релевантности, одной страницей (см. cards.search).
+    Поиск, как и список, — только по личным карточкам; карточки колод из подписок он не находит.
     Шаблон: cards/card_list.html
     """
     model = Card
@@ -35,12 +46,29 @@ class CardListView(ListView):
     context_object_name = 'cards'
 
     def get_queryset(self):
-        """Фильтрует карточки по пользователю и уровню сложности (GET-параметр level)."""
-        qs = Card.objects.filter(user=self.request.user).select_related('schedule').order_by('-created_at')
+        """Фильтрует карточки по пользователю и уровню сложности (GET-параметр level), возвращает одну страницу."""
+        qs = Card.objects.filter(user=self.request.user).prefetch_related('schedules')
         level = self.request.GET.get('level')
-        if level in dict(Card.LEVEL_CHOICES):
-            qs = qs.filter(level=level)
-        return qs
+        if level not in dict(Card.LEVEL_CHOICES):
+            level = None
+        try:
+            limit = parse_limit(self.request.GET.get('limit'))
+            query = self.request.GET.get('q', '').strip()
+            if query:
+                self.page = KeysetPage(search_cards(self.request.user, query, level, limit), None)
+                return self.page.items
+            if level:
+                qs = qs.filter(level=level)
+            self.page = keyset_page(qs, self.request.GET.get('cursor'), limit)
+        except ValueError:
+            raise Http404('Некорректная страница')
+        return self.page.items
+
+    def get_context_data(self, **kwargs):
+        """Добавляет курсор следующей страницы."""
+        context = super().get_context_data(**kwargs)
+        context['next_cursor'] = self.page.next_cursor
+        return context
 
 @method_decorator(login_required, name='dispatch')
 class CardCreateView(CreateView):
@@ -53,10 +81,22 @@ class CardCreateView(CreateView):
     template_name = 'cards/card_form.html'
     success_url = reverse_lazy('card_list')
 
+    def get_form_kwargs(self):
+        """Передает форме владельца для проверки дубликатов."""
+        kwargs = super().get_form_kwargs()
+        kwargs['user'] = self.request.user
+        return kwargs
+
     def form_valid(self, form):
         """Привязывает карточку к текущему пользователю."""
         form.instance.user = self.request.user
-        return super().form_valid(form)
+        try:
+            with transaction.atomic():
+                return super().form_valid(form)
+        except IntegrityError:
+            # Параллельно создана такая же карточка: уникальный индекс по нормализованным ключам
+            form.add_error(None, 'Карточка с таким словом и переводом уже существует.')
+            return self.form_invalid(form)
 
 @method_decorator(login_required, name='dispatch')
 class CardUpdateView(UpdateView):
@@ -70,8 +110,14 @@ class CardUpdateView(UpdateView):
     success_url = reverse_lazy('card_list')
 
     def get_queryset(self):
-        """Ограничивает редактирование только своими карточками."""
-        return Card.objects.filter(user=self.request.user)
+        """Свои карточки и повторяемые карточки колод (изменения сохраняются в личную копию)."""
+        return user_cards(self.request.user)
+
+    def get_form_kwargs(self):
+        """Передает форме пользователя: владельца личной копии общей карточки."""
+        kwargs = super().get_form_kwargs()
+        kwargs['user'] = self.request.user
+        return kwargs
     
     def form_valid(self, form):
         """Сохраняет карточку и обновляет дату повторения если указана."""
@@ -105,6 +151,29 @@ class CardDeleteView(DeleteView):
         """Ограничивает удаление только своими карточками."""
         return Card.objects.filter(user=self.request.user)
 
+@login_required
+@require_POST
+def card_bulk(request):
+    """
+    Пакетная операция над отмеченными карточками или всеми по фильтру уровня.
+    Удаление, смена уровня, перенос и сброс прогресса — один запрос по выборке пользователя (см. cards.bulk).
+    """
+    form = BulkActionForm(request.POST)
+    level = request.POST.get('filter_level')
+    url = reverse('card_list') + (f'?level={level}' if level in dict(Card.LEVEL_CHOICES) else '')
+    if not form.is_valid():
+        for errors in form.errors.values():
+            for error in errors:
+                messages.error(request, error)
+        return redirect(url)
+    data = form.cleaned_data
+    count = run_bulk_action(
+        request.user, data['action'], new_level=data['new_level'], days=data['days'], **form.selection(),
+    )
+    action = dict(form.fields['action'].choices)[data['action']]
+    messages.success(request, f'{action}: {count} карточек')
+    return redirect(url)
+
 @login_required
 def review_mode(request):
     """
@@ -120,12 +189,13 @@ def review_mode(request):
 def review_card(request):
     """
     Режим повторения: слово→перевод или перевод→слово (выбор через review_mode).
+    Карточки берутся из снимка очереди на сегодня (см. cards.review_session).
     """
     mode = request.session.get('review_mode', 'word2trans')
-    schedule = Schedule.objects.filter(card__user=request.user, next_review__lte=date.today()).order_by('next_review').select_related('card').first()
-    if not schedule:
+    session = ReviewSession.load(request.user, KIND_REVIEW)
+    card = session.current
+    if card is None:
         return render(request, 'cards/review_done.html')
-    card = schedule.card
     if request.method == 'POST':
         try:
             quality = int(request.POST.get('quality'))
@@ -133,55 +203,64 @@ def review_card(request):
         except (TypeError, ValueError, AssertionError):
             messages.error(request, 'Оценка должна быть от 0 до 5')
             return HttpResponseRedirect(reverse('card_review'))
-        update_schedule(schedule, quality)
+        position, schedule_id = _session_target(request, session)
+        session.answer(position, quality, schedule_id)
         return HttpResponseRedirect(reverse('card_review'))
     # Определяем, что показывать: слово или перевод
     show_word = (mode == 'word2trans')
-    return render(request, 'cards/review.html', {'card': card, 'schedule': schedule, 'show_word': show_word, 'mode': mode})
+    return render(request, 'cards/review.html', {
+        'card': card, 'show_word': show_word, 'mode': mode,
+        'position': session.position, 'total': session.total,
+    })
+
+def _session_target(request, session):
+    """
+    Позиция и schedule_id карточки, на которую отвечали (скрытые поля формы).
+    Без поля позиции — текущая, без schedule_id — не проверяется; некорректные значения ответ не примут.
+    """
+    try:
+        position = int(request.POST.get('position', session.position))
+        schedule_id = request.POST.get('schedule_id')
+        return position, None if schedule_id is None else int(schedule_id)
+    except (TypeError, ValueError):
+        return -1, None
+
+@login_required
+@require_POST
+def answer_batch(request):
+    """
+    Пачка ответов, накопленных на клиенте: JSON {"answers": [{card_id, quality | answer, answered_at}]}.
+    Все ответы применяются одной записью расписаний (см. cards.answers).
+
+    Returns:
+        JSON {"results": [...]} со статусом каждого ответа; 400 — некорректная пачка (ничего не применено).
+    """
+    try:
+        answers = parse_answers(json.loads(request.body).get('answers'))
+    except (ValueError, AttributeError) as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    return JsonResponse({'results': apply_answers(request.user, answers, ReviewLog.SOURCE_WEB)})
 
 @login_required
 def import_cards(request):
     """
     Импорт карточек из CSV-файла для текущего пользователя.
-    Проверяет дубли по слову и переводу.
+    Проверяет дубли по слову и переводу; файл читается потоково, карточки пишутся пакетами.
+    В режиме update существующие карточки обновляются (только изменившиеся).
     """
     if request.method == 'POST':
         form = CardImportForm(request.POST, request.FILES)
         if form.is_valid():
             file = form.cleaned_data['file']
             try:
-                decoded = TextIOWrapper(file, encoding='utf-8')
-                reader = csv.DictReader(decoded)
-                count, errors, duplicates = 0, [], 0
-                for i, row in enumerate(reader, 1):
-                    word = row.get('word', '').strip()
-                    translation = row.get('translation', '').strip()
-                    if not word or not translation:
-                        errors.append(f'Строка {i}: word и translation обязательны')
-                        continue
-                    level = row.get('level', 'beginner').strip() or 'beginner'
-                    if level not in dict(Card.LEVEL_CHOICES):
-                        errors.append(f'Строка {i}: некорректный level')
-                        continue
-                    
-                    # Проверка на дубли по слову и переводу
-                    if Card.objects.filter(user=request.user, word=word, translation=translation).exists():
-                        duplicates += 1
-                        errors.append(f'Строка {i}: дубликат "{word} — {translation}"')
-                        continue
-                    
-                    Card.objects.create(
-                        user=request.user,
-                        word=word,
-                        translation=translation,
-                        example=row.get('example', '').strip(),
-                        comment=row.get('comment', '').strip(),
-                        level=level,
-                    )
-                    count += 1
+                # Потоковый разбор и пакетная запись (см. cards.importer)
+                result = import_csv(request.user, file, mode=form.cleaned_data['mode'])
+                count, duplicates, errors = result.created, result.duplicates, result.errors
                 
                 if count:
                     messages.success(request, f'Импортировано карточек: {count}')
+                if result.updated:
+                    messages.success(request, f'Обновлено карточек: {result.updated}')
                 if duplicates:
                     messages.warning(request, f'Пропущено дубликатов: {duplicates}')
                 if errors:
@@ -193,33 +272,144 @@ def import_cards(request):
         form = CardImportForm()
     return render(request, 'cards/import.html', {'form': form})
 
+# Размер блока копирования загружаемой части файла на диск
+UPLOAD_COPY_BLOCK = 64 * 1024
+
+
+@login_required
+@require_POST
+def import_job_create(request):
+    """
+    Создает задание фонового импорта CSV (ImportJob).
+    
+    Тело запроса — JSON {"filename": ..., "size": <байт>, "mode": "skip"|"update"}
+    (mode необязателен, по умолчанию skip). Файл затем
+    загружается частями через import_job_chunk, после последней части
+    обработка выполняется задачей Celery.
+    
+    Returns:
+        JSON с id задания, размером части и адресами загрузки и статуса (201).
+    """
+    try:
+        data = json.loads(request.body)
+        filename = str(data['filename'])[:255]
+        size = int(data['size'])
+        mode = data.get('mode', ImportJob.MODE_SKIP)
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return JsonResponse({'error': 'Ожидается JSON с filename и size'}, status=400)
+    if mode not in dict(ImportJob.MODE_CHOICES):
+        return JsonResponse({'error': 'Некорректный режим импорта'}, status=400)
+    if not filename.lower().endswith('.csv'):
+        return JsonResponse({'error': 'Файл должен быть в формате CSV'}, status=400)
+    if not 0 < size <= settings.IMPORT_MAX_UPLOAD_SIZE:
+        limit = settings.IMPORT_MAX_UPLOAD_SIZE // (1024 * 1024)
+        return JsonResponse({'error': f'Размер файла должен быть от 1 байта до {limit} МБ'}, status=400)
+
+    job = ImportJob.objects.create(user=request.user, filename=filename, size=size, mode=mode)
+    job.path.parent.mkdir(parents=True, exist_ok=True)
+    job.path.touch()
+    return JsonResponse({
+        'id': job.pk,
+        'chunk_size': settings.IMPORT_UPLOAD_CHUNK_SIZE,
+        'upload_url': reverse('import_job_chunk', args=[job.pk]),
+        'status_url': reverse('import_job_status', args=[job.pk]),
+    }, status=201)
+
+
+@login_required
+@require_POST
+def import_job_chunk(request, pk):
+    """
+    Принимает очередную часть файла задания импорта.
+    
+    Тело запроса — байты части (application/octet-stream), заголовок
+    X-Chunk-Offset — ее смещение в файле. Тело копируется на диск блоками,
+    не загружаясь в память целиком. Смещение должно совпадать с уже
+    загруженным объемом; при расхождении (например, после обрыва связи)
+    возвращается 409 с актуальным uploaded, и клиент продолжает с него.
+    
+    Returns:
+        JSON-статус задания (см. ImportJob.as_status).
+    """
+    try:
+        offset = int(request.headers.get('X-Chunk-Offset', ''))
+        length = int(request.META.get('CONTENT_LENGTH') or 0)
+    except ValueError:
+        return JsonResponse({'error': 'Некорректный X-Chunk-Offset'}, status=400)
+
+    with transaction.atomic():
+        job = get_object_or_404(ImportJob.objects.select_for_update(), pk=pk, user=request.user)
+        if job.status != ImportJob.STATUS_UPLOADING:
+            return JsonResponse({'error': 'Файл уже загружен', **job.as_status()}, status=409)
+        if offset != job.uploaded:
+            return JsonResponse({'error': 'Неверное смещение части', **job.as_status()}, status=409)
+        if not 0 < length <= settings.IMPORT_UPLOAD_CHUNK_SIZE or offset + length > job.size:
+            return JsonResponse({'error': 'Некорректный размер части'}, status=400)
+
+        written = 0
+        with job.path.open('r+b') as file:
+            file.seek(offset)
+            while written < length:
+                block = request.read(min(UPLOAD_COPY_BLOCK, length - written))
+                if not block:
+                    break
+                file.write(block)
+                written += len(block)
+            # Отбросить хвост прерванной ранее попытки
+            file.truncate()
+        if written != length:
+            return JsonResponse({'error': 'Часть получена не полностью', **job.as_status()}, status=400)
+
+        job.uploaded += written
+        if job.uploaded == job.size:
+            job.status = ImportJob.STATUS_PENDING
+            transaction.on_commit(lambda: process_import_job.delay(job.pk))
+        job.save(update_fields=['uploaded', 'status', 'updated_at'])
+    return JsonResponse(job.as_status())
+
+
+@login_required
+@require_GET
+def import_job_status(request, pk):
+    """
+    Состояние задания импорта для опроса со страницы (JSON).
+    
+    Returns:
+        JSON-статус задания (см. ImportJob.as_status).
+    """
+    job = get_object_or_404(ImportJob, pk=pk, user=request.user)
+    return JsonResponse(job.as_status())
+
 @login_required
 def export_cards(request):
     """
-    Экспорт всех карточек пользователя в CSV.
-    """
-    cards = Card.objects.filter(user=request.user).order_by('word')
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = 'attachment; filename=cards_export.csv'
-    writer = csv.writer(response)
-    writer.writerow(['word', 'translation', 'example', 'comment', 'level'])
-    for card in cards:
-        writer.writerow([
-            card.word,
-            card.translation,
-            card.example,
-            card.comment,
-            card.level
-        ])
+    Потоковый экспорт всех карточек пользователя.
+    GET-параметры: format=csv|jsonl (JSONL включает поля расписания), gzip=1 — сжатие на лету.
+    Память не зависит от размера колоды (см. cards.exporter).
+    """
+    fmt = request.GET.get('format', FORMAT_CSV)
+    if fmt not in FORMATS:
+        return JsonResponse({'error': 'Поддерживаемые форматы: csv, jsonl'}, status=400)
+    compress = request.GET.get('gzip') in ('1', 'true')
+
+    filename = f'cards_export.{fmt}'
+    content_type = 'text/csv; charset=utf-8' if fmt == FORMAT_CSV else 'application/x-ndjson; charset=utf-8'
+    if compress:
+        filename += '.gz'
+        content_type = 'application/gzip'
+    response = StreamingHttpResponse(
+        export_stream(request.user, fmt, compress), content_type=content_type
+    )
+    response['Content-Disposition'] = f'attachment; filename={filename}'
     return response
 
 @login_required
 def tts_card(request, pk):
     """
     Возвращает озвучку слова (или примера) карточки через Yandex SpeechKit (с кешем).
-    Только для своих карточек. GET-параметры: field=word|example|translation, lang, voice.
+    Только для своих карточек и повторяемых карточек колод. GET-параметры: field=word|example|translation, lang, voice.
     """
-    card = get_object_or_404(Card, pk=pk, user=request.user)
+    card = get_object_or_404(user_cards(request.user), pk=pk)
     field = request.GET.get('field', 'word')
     text = getattr(card, field, None)
     if not text:
@@ -265,47 +455,78 @@ def tts_card(request, pk):
 def test_multiple_choice_view(request):
     """
     Тестирование с множественным выбором: очередь карточек на сегодня, 4 варианта, обратная связь, статистика.
+    Очередь и варианты ответа снимаются один раз на сессию (см. cards.review_session).
     """
-    # Получаем все карточки на сегодня
-    schedules = list(Schedule.objects.filter(card__user=request.user, next_review__lte=date.today()).select_related('card').order_by('next_review'))
-    if not schedules:
-        return render(request, 'cards/test_done.html')
-    # Индекс текущей карточки (через GET или POST)
-    idx = int(request.GET.get('idx', 0))
-    if idx >= len(schedules):
-        return render(request, 'cards/test_done.html')
-    schedule = schedules[idx]
-    card = schedule.card
+    session = ReviewSession.load(request.user, KIND_TEST)
     feedback = None
     correct = None
-    if request.method == 'POST':
-        answer = request.POST.get('answer')
+    if request.method == 'POST' and session.current is not None:
+        card = session.current
+        answer = request.POST.get('answer') or ''
         is_correct = (answer.strip().lower() == card.translation.strip().lower())
         quality = 5 if is_correct else 2
-        update_schedule(schedule, quality)
-        feedback = '✅ Верно!' if is_correct else f'❌ Неверно! Правильный ответ: {card.translation}'
-        correct = is_correct
-        idx += 1
-        if idx >= len(schedules):
-            return render(request, 'cards/test_done.html')
-        # Переходим к следующей карточке
-        schedule = schedules[idx]
-        card = schedule.card
-    # Генерируем варианты ответа
-    all_translations = list(Card.objects.filter(user=request.user).exclude(id=card.id).values_list('translation', flat=True))
-    if len(all_translations) >= 3:
-        wrong_choices = sample(all_translations, 3)
-    else:
-        wrong_choices = all_translations + ['—'] * (3 - len(all_translations))
-    options = wrong_choices + [card.translation]
-    shuffle(options)
+        position, schedule_id = _session_target(request, session)
+        if session.answer(position, quality, schedule_id) is not None:
+            feedback = '✅ Верно!' if is_correct else f'❌ Неверно! Правильный ответ: {card.translation}'
+            correct = is_correct
+    card = session.current
+    if card is None:
+        return render(request, 'cards/test_done.html')
     context = {
         'card': card,
-        'schedule': schedule,
-        'options': options,
-        'idx': idx,
-        'total': len(schedules),
+        'options': card.options,
+        'position': session.position,
+        'total': session.total,
         'feedback': feedback,
         'correct': correct,
     }
     return render(request, 'cards/test.html', context)
+
+@login_required
+def deck_list(request):
+    """
+    Общие колоды: публичные и собственные, с числом карточек и отметкой подписки.
+    Шаблон: cards/deck_list.html
+    """
+    decks = list(visible_decks(request.user))
+    subscribed = set(request.user.deck_subscriptions.values_list('deck_id', flat=True))
+    for deck in decks:
+        deck.is_subscribed = deck.pk in subscribed
+    return render(request, 'cards/deck_list.html', {'decks': decks})
+
+@login_required
+def deck_detail(request, pk):
+    """
+    Карточки колоды, постранично по ключу (GET-параметры cursor и limit).
+    Шаблон: cards/deck_detail.html
+    """
+    deck = get_object_or_404(visible_decks(request.user), pk=pk)
+    try:
+        page = keyset_page(deck.cards.all(), request.GET.get('cursor'), parse_limit(request.GET.get('limit')))
+    except ValueError:
+        raise Http404('Некорректная страница')
+    is_subscribed = request.user.deck_subscriptions.filter(deck=deck).exists()
+    return render(request, 'cards/deck_detail.html', {
+        'deck': deck,
+        'cards': page.items,
+        'next_cursor': page.next_cursor,
+        'is_subscribed': is_subscribed,
+    })
+
+@login_required
+@require_POST
+def deck_subscribe(request, pk):
+    """Подписка на колоду: расписания для ее карточек, без копирования самих карточек."""
+    deck = get_object_or_404(visible_decks(request.user), pk=pk)
+    created = subscribe(request.user, deck)
+    messages.success(request, f'Вы подписались на колоду «{deck.title}». Добавлено карточек: {created}')
+    return redirect('deck_list')
+
+@login_required
+@require_POST
+def deck_unsubscribe(request, pk):
+    """Отписка от колоды: удаляет расписания ее карточек, личные копии остаются."""
+    deck = get_object_or_404(Deck, pk=pk)
+    removed = unsubscribe(request.user, deck)
+    messages.success(request, f'Вы отписались от колоды «{deck.title}». Удалено карточек из повторения: {removed}')
+    return redirect('deck_list')
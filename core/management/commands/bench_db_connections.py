@@ -0,0 +1,86 @@
+"""
+Django management command для замера накладных расходов на соединение с БД.
+
+Имитирует жизненный цикл запроса (сигналы request_started/request_finished,
+по которым Django закрывает или переиспользует соединение) с одним легким
+запросом к БД. Сравнивает режим "новое соединение на каждый запрос"
+(CONN_MAX_AGE=0, как было раньше) с текущими настройками: постоянными
+соединениями или пулом.
+"""
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.signals import request_finished, request_started
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает время запроса к БД с новым соединением и с постоянным/пулом'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=500,
+            help='Число имитируемых запросов в каждом режиме (по умолчанию 500)',
+        )
+        parser.add_argument(
+            '--database',
+            default='default',
+            help='Алиас базы данных',
+        )
+
+    def handle(self, *args, **options):
+        if options['requests'] <= 0:
+            raise CommandError('--requests должен быть положительным')
+        connection = connections[options['database']]
+        settings_dict = connection.settings_dict
+        configured = settings_dict['CONN_MAX_AGE']
+        pooled = bool(settings_dict.get('OPTIONS', {}).get('pool'))
+
+        self.stdout.write(
+            f'{connection.vendor}: CONN_MAX_AGE={configured}, пул={"да" if pooled else "нет"}, '
+            f'запросов: {options["requests"]}'
+        )
+        modes = [('новое соединение на запрос', 0)]
+        if pooled or configured != 0:
+            modes.append(('текущие настройки', configured))
+
+        results = {}
+        try:
+            for label, max_age in modes:
+                settings_dict['CONN_MAX_AGE'] = max_age
+                connection.close()
+                results[label] = self._run(connection, options['requests'])
+        finally:
+            settings_dict['CONN_MAX_AGE'] = configured
+            connection.close()
+
+        for label, timings in results.items():
+            self.stdout.write(
+                f'  {label:<28} медиана {statistics.median(timings) * 1000:.3f} мс, '
+                f'p95 {self._p95(timings) * 1000:.3f} мс, '
+                f'всего {sum(timings):.2f} с'
+            )
+        if len(results) == 2:
+            cold, warm = (statistics.median(timings) for timings in results.values())
+            self.stdout.write(self.style.SUCCESS(f'Ускорение (медиана): {cold / warm:.1f}x'))
+
+    def _run(self, connection, n: int) -> list[float]:
+        """Выполняет n имитированных запросов и возвращает их длительности в секундах."""
+        timings = []
+        for _ in range(n):
+            started = time.perf_counter()
+            request_started.send(sender=self.__class__)
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+                cursor.fetchone()
+            request_finished.send(sender=self.__class__)
+            timings.append(time.perf_counter() - started)
+        return timings
+
+    @staticmethod
+    def _p95(timings: list[float]) -> float:
+        """95-й перцентиль длительностей."""
+        return sorted(timings)[int(len(timings) * 0.95) - 1]
@@ -0,0 +1,41 @@
+"""
+Настройки кеша Django из переменных окружения.
+
+Прогноз нагрузки, гистограмма балансировки, выбранный пользователем алгоритм,
+сессии повторения и пул вариантов теста хранятся в кеше и сбрасываются при
+ответах и изменениях карточек в любом процессе (воркеры gunicorn, API бота,
+Celery). Поэтому кеш должен быть общим для процессов:
+
+- REDIS_URL задан — Redis (django.core.cache.backends.redis.RedisCache);
+- REDIS_URL не задан — LocMem в памяти процесса (разработка в одном
+  процессе и тесты; с несколькими процессами сбросы не видны соседям).
+
+Используется в settings.py: CACHES = {'default': cache_from_env()}.
+"""
+
+import os
+
+# Префикс ключей: Redis может быть общим с брокером Celery
+KEY_PREFIX = 'linguatrack'
+
+
+def cache_from_env() -> dict:
+    """
+    Конфигурация кеша по умолчанию из REDIS_URL.
+
+    Returns:
+        Словарь для CACHES['default'].
+
+    Example:
+        >>> os.environ['REDIS_URL'] = 'redis://redis:6379/0'
+        >>> cache_from_env()['BACKEND']
+        'django.core.cache.backends.redis.RedisCache'
+    """
+    url = os.getenv('REDIS_URL')
+    if not url:
+        return {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}
+    return {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': url,
+        'KEY_PREFIX': KEY_PREFIX,
+    }
@@ -12,6 +12,9 @@ import os
 
 from celery.schedules import crontab
 
+from .cache import cache_from_env
+from .db import database_from_env
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -68,11 +71,17 @@ TEMPLATES = [
 WSGI_APPLICATION = 'lingua_track.wsgi.application'
 
 # --- База данных ---
+# DATABASE_URL (postgresql://... или sqlite:///...), по умолчанию SQLite в BASE_DIR.
+# Постоянные соединения: DB_CONN_MAX_AGE (секунд); пул psycopg: DB_POOL=True
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    'default': database_from_env(BASE_DIR),
+}
+
+# --- Кеш ---
+# REDIS_URL — общий для процессов Redis (сбросы кешей видны всем воркерам и Celery);
+# без него — LocMem в памяти процесса (разработка и тесты)
+CACHES = {
+    'default': cache_from_env(),
 }
 
 # --- Валидация паролей ---
@@ -106,6 +115,58 @@ STATICFILES_DIRS = [BASE_DIR / 'static']
 # --- Primary key ---
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# --- Прогноз нагрузки повторений ---
+REVIEW_FORECAST_DAYS = int(os.getenv('REVIEW_FORECAST_DAYS', '30'))
+REVIEW_FORECAST_PASS_RATE = float(os.getenv('REVIEW_FORECAST_PASS_RATE', '0.9'))
+
+# --- Балансировка нагрузки SM-2 ---
+# Выбор наименее загруженного дня в окне ±SM2_LOAD_BALANCE_FUZZ * interval
+SM2_LOAD_BALANCE = os.getenv('SM2_LOAD_BALANCE', 'False').lower() in ('1', 'true', 'yes')
+SM2_LOAD_BALANCE_FUZZ = float(os.getenv('SM2_LOAD_BALANCE_FUZZ', '0.1'))
+SM2_LOAD_BALANCE_MAX_FUZZ = int(os.getenv('SM2_LOAD_BALANCE_MAX_FUZZ', '7'))
+
+# --- Журнал ответов (ReviewLog) ---
+# Записи накапливаются в памяти и пишутся одним bulk_create
+REVIEW_LOG_BUFFER_SIZE = int(os.getenv('REVIEW_LOG_BUFFER_SIZE', '100'))
+REVIEW_LOG_FLUSH_INTERVAL = int(os.getenv('REVIEW_LOG_FLUSH_INTERVAL', '30'))  # секунд
+
+# --- Сессия повторения (cards.review_session) ---
+# Сколько карточек на сегодня снимается в очередь сессии за один запрос
+REVIEW_SESSION_SIZE = int(os.getenv('REVIEW_SESSION_SIZE', '100'))
+# Время жизни снимка очереди в кеше (секунды)
+REVIEW_SESSION_TIMEOUT = int(os.getenv('REVIEW_SESSION_TIMEOUT', str(2 * 60 * 60)))
+
+# --- Очередь карточек на сегодня (cards.due_queue) ---
+# Наибольшее число карточек, повторенных за день (0 — без лимита)
+DAILY_REVIEW_LIMIT = int(os.getenv('DAILY_REVIEW_LIMIT', '0'))
+# Порядок карточек на сегодня: due (по сроку), overdue (по доле просрочки), ef (сначала трудные)
+REVIEW_PRIORITY = os.getenv('REVIEW_PRIORITY', 'due')
+
+# --- Тест с выбором ответа (cards.distractors) ---
+# Неверные варианты похожи на верный ответ (иначе выбираются случайно)
+MC_SIMILAR_DISTRACTORS = os.getenv('MC_SIMILAR_DISTRACTORS', 'True').lower() in ('1', 'true', 'yes')
+# Похожие варианты только из карточек того же уровня
+MC_DISTRACTORS_SAME_LEVEL = os.getenv('MC_DISTRACTORS_SAME_LEVEL', 'False').lower() in ('1', 'true', 'yes')
+
+# --- Импорт карточек ---
+# Большие файлы загружаются частями и обрабатываются в Celery (cards.ImportJob);
+# каталог должен быть общим для веб-сервера и воркеров
+IMPORT_UPLOAD_DIR = os.getenv('IMPORT_UPLOAD_DIR', str(BASE_DIR / 'media' / 'imports'))
+IMPORT_MAX_UPLOAD_SIZE = int(os.getenv('IMPORT_MAX_UPLOAD_SIZE', str(500 * 1024 * 1024)))
+IMPORT_UPLOAD_CHUNK_SIZE = 4 * 1024 * 1024   # байт в одном запросе загрузки (меньше client_max_body_size nginx)
+IMPORT_JOB_CHUNK_ROWS = int(os.getenv('IMPORT_JOB_CHUNK_ROWS', '5000'))  # строк в одной транзакции
+IMPORT_JOB_MAX_ERRORS = 1000                  # сколько сообщений об ошибках хранить в задании
+IMPORT_JOB_STALE_SECONDS = 600                # задание без прогресса дольше — перезапускается
+
+# --- Синхронизация клиентов (cards.sync, /api/sync/) ---
+# Изменения моложе этого срока выдаются следующей синхронизацией: успевает
+# зафиксироваться транзакция, уже вычислившая updated_at. Срок должен быть
+# больше самой длинной короткой транзакции (ответ, правка, пакетное действие);
+# импорт и подписка отмечают расписания заново после фиксации
+SYNC_COMMIT_LAG_SECONDS = int(os.getenv('SYNC_COMMIT_LAG_SECONDS', '2'))
+# Срок хранения отметок об удалении; более старый токен требует полной синхронизации
+SYNC_TOMBSTONE_TTL_DAYS = int(os.getenv('SYNC_TOMBSTONE_TTL_DAYS', '30'))
+
 # --- Celery ---
 CELERY_BROKER_URL = os.getenv('CELERY_BROKER_URL', 'redis://localhost:6379/0')
 CELERY_RESULT_BACKEND = os.getenv('CELERY_RESULT_BACKEND', 'redis://localhost:6379/0')
@@ -121,4 +182,12 @@ CELERY_BEAT_SCHEDULE = {
         'task': 'cards.tasks.send_daily_review_reminders',
         'schedule': crontab(hour=8, minute=0),  # каждый день в 8:00 утра
     },
+    'resume-stalled-import-jobs': {
+        'task': 'cards.tasks.resume_stalled_import_jobs',
+        'schedule': crontab(minute='*/10'),  # каждые 10 минут
+    },
+    'purge-sync-tombstones': {
+        'task': 'cards.tasks.purge_sync_tombstones',
+        'schedule': crontab(hour=3, minute=30),  # каждый день в 3:30
+    },
 }
@@ -128,19 +128,67 @@ class DjangoAPIClient:
         else:
             return False, str(response)
 
-    def get_cards(self, telegram_id: int) -> Tuple[bool, List[Dict[str, Any]]]:
+    def get_cards(self, telegram_id: int, limit: Optional[int] = None) -> Tuple[bool, List[Dict[str, Any]]]:
         """
-        Получает список карточек пользователя.
+        Получает первую страницу карточек пользователя (новые первыми).
         
         Args:
             telegram_id: Telegram ID пользователя.
+            limit: Размер страницы (по умолчанию — размер страницы API).
         
         Returns:
             Кортеж (success, cards_list).
         """
+        success, page = self.get_cards_page(telegram_id, limit=limit)
+        return success, page.get('cards', [])
+
+    def get_cards_page(
+        self,
+        telegram_id: int,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None
+    ) -> Tuple[bool, Dict[str, Any]]:
+        """
+        Получает страницу карточек пользователя.
+        
+        Args:
+            telegram_id: Telegram ID пользователя.
+            limit: Размер страницы.
+            cursor: Курсор из next_cursor предыдущей страницы.
+        
+        Returns:
+            Кортеж (success, page), где page — словарь с ключами
+            cards, next_cursor и total.
+        """
         params = {'telegram_id': telegram_id}
+        if limit:
+            params['limit'] = limit
+        if cursor:
+            params['cursor'] = cursor
         success, response = self._make_request('GET', 'api/cards/', params=params)
         
+        if success and isinstance(response, dict):
+            return True, response
+        else:
+            return False, {}
+
+    def search_cards(self, telegram_id: int, query: str, limit: Optional[int] = None) -> Tuple[bool, List[Dict[str, Any]]]:
+        """
+        Ищет карточки пользователя по слову, переводу, примеру и комментарию.
+        
+        Args:
+            telegram_id: Telegram ID пользователя.
+            query: Поисковый запрос.
+            limit: Максимум результатов.
+        
+        Returns:
+            Кортеж (success, cards_list) — карточки по убыванию релевантности.
+        """
+        params = {'telegram_id': telegram_id, 'q': query}
+        if limit:
+            params['limit'] = limit
+        success, response = self._make_request('GET', 'api/cards/search/', params=params)
+        
         if success and isinstance(response, dict):
             return True, response.get('cards', [])
         else:
@@ -182,6 +230,25 @@ class DjangoAPIClient:
         else:
             return False, {}
 
+    def get_forecast(self, telegram_id: int, days: int = 7) -> Tuple[bool, List[Dict[str, Any]]]:
+        """
+        Получает прогноз числа карточек к повторению по дням.
+
+        Args:
+            telegram_id: Telegram ID пользователя.
+            days: Горизонт прогноза в днях.
+
+        Returns:
+            Кортеж (success, forecast_list).
+        """
+        params = {'telegram_id': telegram_id, 'days': days}
+        success, response = self._make_request('GET', 'api/forecast/', params=params)
+
+        if success and isinstance(response, dict):
+            return True, response.get('forecast', [])
+        else:
+            return False, []
+
     def get_tts_audio(self, telegram_id: int, word: str) -> Tuple[bool, Optional[bytes]]:
         """
         Получает аудиофайл для озвучки слова.
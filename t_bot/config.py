@@ -20,17 +20,22 @@ API_ENDPOINTS = {
     'cards': f'{DJANGO_API_URL}/cards/',
     'today': f'{DJANGO_API_URL}/today/',
     'progress': f'{DJANGO_API_URL}/progress/',
+    'forecast': f'{DJANGO_API_URL}/forecast/',
     'tts': f'{DJANGO_API_URL}/tts/',
     'test': f'{DJANGO_API_URL}/test/',
     'test_multiple_choice': f'{DJANGO_API_URL}/test/multiple_choice/',
 }
 
+# Горизонт прогноза /forecast (дней)
+FORECAST_DAYS = 7
+
 # Настройки бота
 BOT_COMMANDS = [
     ('start', 'Начать работу с ботом'),
     ('cards', 'Показать все карточки'),
     ('today', 'Карточки на сегодня'),
     ('progress', 'Мой прогресс'),
+    ('forecast', 'Прогноз повторений на неделю'),
     ('say', 'Озвучить слово'),
     ('test', 'Пройти тест (знаю/не знаю)'),
     ('test_mc', 'Тест с множественным выбором'),
@@ -45,8 +50,10 @@ MESSAGES = {
 /start — начать работу, привязать аккаунт через magic-ссылку
 /help — эта справка
 /cards — показать все карточки (первые 10)
+/search запрос — найти карточки по слову, переводу или примеру
 /today — карточки на сегодня для повторения
 /progress — мой прогресс и статистика
+/forecast — сколько карточек к повторению в ближайшие дни
 /say слово — озвучить слово (только из своих карточек)
 /test — пройти тест по карточкам на сегодня (знаю/не знаю)
 /test_mc — пройти тест с множественным выбором
@@ -58,5 +65,7 @@ MESSAGES = {
     'no_cards': 'У тебя пока нет карточек. Добавь их на сайте!',
     'no_today': 'Сегодня нет карточек для повторения.',
     'word_not_found': 'Слово не найдено в твоих карточках.',
+    'search_usage': 'Использование: /search слово',
+    'search_empty': 'Ничего не найдено.',
     'error': 'Произошла ошибка. Попробуй позже.',
 } 
\ No newline at end of file
@@ -8,11 +8,13 @@ from aiogram.filters import Command, CommandObject
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.utils.keyboard import InlineKeyboardBuilder
+from datetime import date
 from typing import Dict, List
+import html
 import io
 
 from .api_client import DjangoAPIClient
-from .config import MESSAGES
+from .config import FORECAST_DAYS, MESSAGES
 
 router = Router()
 api_client = DjangoAPIClient()
@@ -73,10 +75,12 @@ async def cmd_help(message: Message):
 
 @router.message(Command("cards"))
 async def cmd_cards(message: Message):
-    """Обработчик команды /cards - показывает все карточки пользователя."""
+    """Обработчик команды /cards - показывает последние 10 карточек пользователя."""
     telegram_id = message.from_user.id
     
-    success, cards = api_client.get_cards(telegram_id)
+    # Только первая страница: карточек может быть десятки тысяч
+    success, page = api_client.get_cards_page(telegram_id, limit=10)
+    cards = page.get('cards', [])
     
     if not success:
         await message.answer(MESSAGES['not_bound'])
@@ -88,7 +92,7 @@ async def cmd_cards(message: Message):
     
     # Формируем сообщение с карточками
     response = "📚 Твои карточки:\n\n"
-    for i, card in enumerate(cards[:10], 1):  # Показываем первые 10
+    for i, card in enumerate(cards, 1):  # Показываем первые 10
         level_emoji = {
             'beginner': '🟢',
             'intermediate': '🟡', 
@@ -102,8 +106,34 @@ async def cmd_cards(message: Message):
         
         response += "\n"
     
-    if len(cards) > 10:
-        response += f"... и еще {len(cards) - 10} карточек"
+    total = page.get('total', len(cards))
+    if total > len(cards):
+        response += f"... и еще {total - len(cards)} карточек"
+    
+    await message.answer(response, parse_mode="HTML")
+
+@router.message(Command("search"))
+async def cmd_search(message: Message):
+    """Обработчик команды /search - полнотекстовый поиск по карточкам."""
+    query = message.text.strip()[len("/search"):].strip()
+    if not query:
+        await message.answer(MESSAGES['search_usage'])
+        return
+    
+    telegram_id = message.from_user.id
+    success, cards = api_client.search_cards(telegram_id, query, limit=10)
+    
+    if not success:
+        await message.answer(MESSAGES['not_bound'])
+        return
+    
+    if not cards:
+        await message.answer(MESSAGES['search_empty'])
+        return
+    
+    response = f"🔎 Найдено по запросу «{html.escape(query)}»:\n\n"
+    for i, card in enumerate(cards, 1):
+        response += f"{i}. <b>{html.escape(card['word'])}</b> — {html.escape(card['translation'])}\n"
     
     await message.answer(response, parse_mode="HTML")
 
@@ -174,6 +204,24 @@ async def cmd_progress(message: Message):
     
     await message.answer(response)
 
+@router.message(Command("forecast"))
+async def cmd_forecast(message: Message):
+    """Обработчик команды /forecast - прогноз числа карточек к повторению на неделю."""
+    telegram_id = message.from_user.id
+    
+    success, forecast = api_client.get_forecast(telegram_id, days=FORECAST_DAYS)
+    
+    if not success:
+        await message.answer(MESSAGES['not_bound'])
+        return
+    
+    response = f"📅 Прогноз повторений на {FORECAST_DAYS} дней:\n\n"
+    for day in forecast:
+        response += f"{date.fromisoformat(day['date']):%d.%m} — {day['due']}\n"
+    response += f"\nВсего: {sum(day['due'] for day in forecast)}"
+    
+    await message.answer(response)
+
 @router.message(Command("test"))
 async def cmd_test(message: Message, state: FSMContext):
     telegram_id = message.from_user.id
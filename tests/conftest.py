@@ -8,13 +8,31 @@
 import pytest
 from django.contrib.auth import get_user_model
 from django.test import Client
+from django.core.cache import cache
 from cards.models import Card, Schedule
 from cards.sm2 import update_schedule
+from cards.review_log import review_log_buffer
 from datetime import date, timedelta
 
 User = get_user_model()
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Очищает кеш между тестами (прогнозы и т.п. не должны протекать)."""
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def clear_review_log_buffer():
+    """Отбрасывает несброшенные записи журнала ответов между тестами."""
+    review_log_buffer.clear()
+    yield
+    review_log_buffer.clear()
+
+
 @pytest.fixture
 def user():
     """Создает тестового пользователя."""
@@ -0,0 +1,137 @@
+"""
+Тесты пакетного приема ответов (cards.answers, /cards/answers/, /api/answers/).
+
+Проверяет, что пачка применяется постоянным числом запросов и дает то же
+расписание, что и последовательные ответы, чужие карточки и некорректные
+пачки не меняют расписаний, а повторная отправка пачки не засчитывается.
+"""
+
+import json
+from datetime import timedelta
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+
+from cards.answers import STATUS_NOT_FOUND, STATUS_OK, STATUS_STALE, apply_answers, parse_answers
+from cards.models import Card, ReviewLog, Schedule
+from cards.review_log import flush_review_logs
+from cards.sm2 import update_schedule
+
+
+@pytest.fixture
+def cards(user):
+    """Двадцать карточек пользователя, созданных вчера."""
+    cards = Card.objects.bulk_create_with_schedules([
+        Card(user=user, word=f'word{i}', translation=f'слово{i}') for i in range(20)
+    ])
+    Schedule.objects.filter(card__in=cards).update(updated_at=timezone.now() - timedelta(days=1))
+    return cards
+
+
+@pytest.fixture
+def other_card(django_user_model):
+    """Карточка другого пользователя."""
+    other = django_user_model.objects.create_user(username='other', password='x')
+    return Card.objects.create(user=other, word='apple', translation='яблоко')
+
+
+def state(card) -> tuple:
+    """Поля SM-2 расписания карточки."""
+    schedule = Schedule.objects.get(card=card)
+    return (schedule.interval, schedule.repetition, schedule.ef, schedule.next_review, schedule.last_result)
+
+
+@pytest.mark.django_db
+class TestApplyAnswers:
+    """Тесты функций cards.answers."""
+
+    def test_batch_matches_sequential(self, user, cards, django_assert_max_num_queries):
+        """Пачка — постоянное число запросов, расписание как при ответах по одному."""
+        items = [{'card_id': card.pk, 'quality': i % 6} for i, card in enumerate(cards)]
+        # SELECT расписаний, алгоритм пользователя, bulk UPDATE, UPDATE статистики и точки сохранения
+        with django_assert_max_num_queries(8):
+            results = apply_answers(user, parse_answers(items), ReviewLog.SOURCE_WEB)
+        assert [result['status'] for result in results] == [STATUS_OK] * 20
+        batch = [state(card) for card in cards]
+
+        Schedule.objects.filter(card__in=cards).update(
+            interval=1, repetition=0, ef=2.5, last_result=None, updated_at=timezone.now() - timedelta(days=1),
+        )
+        for item in items:
+            update_schedule(Schedule.objects.get(card_id=item['card_id']), item['quality'])
+        assert [state(card) for card in cards] == batch
+
+    def test_answers_and_order(self, user, cards):
+        """answer — знаю/не знаю или перевод; ответы на одну карточку применяются по answered_at."""
+        now = timezone.now()
+        results = apply_answers(user, parse_answers([
+            {'card_id': cards[0].pk, 'answer': True, 'answered_at': (now - timedelta(seconds=10)).isoformat()},
+            {'card_id': cards[0].pk, 'answer': False, 'answered_at': (now - timedelta(seconds=20)).isoformat()},
+            {'card_id': cards[1].pk, 'answer': ' Слово1 '},
+            {'card_id': cards[2].pk, 'answer': 'слово0'},
+        ]), ReviewLog.SOURCE_BOT)
+        assert [result['correct'] for result in results] == [True, False, True, False]
+        # Последним применен верный ответ (он позже по времени)
+        assert Schedule.objects.get(card=cards[0]).last_result is True
+        flush_review_logs()
+        logs = ReviewLog.objects.filter(card=cards[0]).order_by('reviewed_at')
+        assert [log.quality for log in logs] == [2, 5]
+        assert logs[0].reviewed_at == now - timedelta(seconds=20)
+
+    def test_not_found_and_resend(self, user, cards, other_card):
+        """Чужие карточки не меняются; повторная отправка пачки не засчитывается."""
+        items = [{'card_id': cards[0].pk, 'quality': 5}, {'card_id': other_card.pk, 'quality': 5}]
+        answers = parse_answers(items)
+        assert [r['status'] for r in apply_answers(user, answers, ReviewLog.SOURCE_WEB)] == [
+            STATUS_OK, STATUS_NOT_FOUND,
+        ]
+        assert Schedule.objects.get(card=other_card).repetition == 0
+        assert [r['status'] for r in apply_answers(user, answers, ReviewLog.SOURCE_WEB)] == [
+            STATUS_STALE, STATUS_NOT_FOUND,
+        ]
+        assert Schedule.objects.get(card=cards[0]).repetition == 1
+
+    @pytest.mark.parametrize('items', [
+        {'card_id': 1},
+        [{'card_id': '1', 'quality': 5}],
+        [{'card_id': 1, 'quality': 6}],
+        [{'card_id': 1, 'quality': 5, 'answer': True}],
+        [{'card_id': 1, 'answer': 1}],
+        [{'card_id': 1, 'quality': 5, 'answered_at': 'вчера'}],
+    ])
+    def test_invalid_batch(self, items):
+        """Некорректная пачка отклоняется целиком."""
+        with pytest.raises(ValueError):
+            parse_answers(items)
+
+
+@pytest.mark.django_db
+class TestAnswerViews:
+    """Тесты страницы и API пачки ответов."""
+
+    def test_web(self, authenticated_client, user, cards):
+        """Пачка с веб-клиента; некорректная пачка не применяется."""
+        url = reverse('card_answers')
+        body = {'answers': [{'card_id': cards[0].pk, 'quality': 4}, {'card_id': cards[1].pk, 'quality': 9}]}
+        response = authenticated_client.post(url, json.dumps(body), content_type='application/json')
+        assert response.status_code == 400
+        assert Schedule.objects.get(card=cards[0]).repetition == 0
+
+        body['answers'].pop()
+        response = authenticated_client.post(url, json.dumps(body), content_type='application/json')
+        assert response.json()['results'][0]['status'] == STATUS_OK
+        assert Schedule.objects.get(card=cards[0]).repetition == 1
+
+    def test_bot(self, client, user_with_telegram):
+        """Пачка ответов бота записывается в журнал с источником bot."""
+        card = Card.objects.create(user=user_with_telegram, word='apple', translation='яблоко')
+        body = {'telegram_id': 123456789, 'answers': [{'card_id': card.pk, 'answer': 'яблоко'}]}
+        response = client.post(reverse('api_submit_answers'), json.dumps(body), content_type='application/json')
+        assert response.json()['results'] == [{
+            'card_id': card.pk, 'status': STATUS_OK, 'correct': True,
+            'next_review': Schedule.objects.get(card=card).next_review.isoformat(), 'interval': 1,
+        }]
+        flush_review_logs()
+        assert ReviewLog.objects.get(card=card).source == ReviewLog.SOURCE_BOT
+        assert client.get(reverse('api_submit_answers')).status_code == 405
@@ -0,0 +1,153 @@
+"""
+Тесты пакетных операций над карточками (cards.bulk, /cards/bulk/).
+
+Проверяет, что удаление, смена уровня, перенос и сброс прогресса выполняются
+постоянным числом запросов, затрагивают только карточки пользователя,
+сохраняют счетчики статистики равными полному пересчету и попадают в журнал
+синхронизации.
+"""
+
+import io
+from datetime import date, timedelta
+
+import pytest
+from django.urls import reverse
+
+from cards.bulk import bulk_delete, bulk_postpone, bulk_reset, bulk_set_level
+from cards.decks import import_deck, subscribe
+from cards.models import Card, Deck, ReviewLog, Schedule, UserStats
+from cards.review_log import flush_review_logs
+from cards.sm2 import update_schedule
+from cards.sync import changes_since
+
+
+def counters(user) -> list[int]:
+    """Счетчики статистики пользователя."""
+    stats = UserStats.objects.get(user=user)
+    return [getattr(stats, field) for field in UserStats.COUNTER_FIELDS]
+
+
+def assert_stats_consistent(user) -> None:
+    """Инкрементальные счетчики совпадают с полным пересчетом."""
+    incremental = counters(user)
+    UserStats.objects.rebuild([user.pk])
+    assert counters(user) == incremental
+
+
+@pytest.fixture(autouse=True)
+def no_commit_lag(settings):
+    """Изменения видны синхронизации сразу после записи."""
+    settings.SYNC_COMMIT_LAG_SECONDS = 0
+
+
+@pytest.fixture
+def cards(user):
+    """Двадцать личных карточек: половина начального уровня, половина среднего, у всех есть ответы."""
+    cards = Card.objects.bulk_create_with_schedules([
+        Card(user=user, word=f'word{i}', translation=f'слово{i}',
+             level='beginner' if i % 2 else 'intermediate')
+        for i in range(20)
+    ])
+    for i, card in enumerate(cards):
+        update_schedule(card.schedule, 5 if i % 3 else 1)
+    return cards
+
+
+@pytest.fixture
+def other_cards(django_user_model):
+    """Карточки другого пользователя (не должны меняться)."""
+    other = django_user_model.objects.create_user(username='other', password='x')
+    return Card.objects.bulk_create_with_schedules([
+        Card(user=other, word=f'word{i}', translation=f'слово{i}', level='beginner') for i in range(3)
+    ])
+
+
+@pytest.mark.django_db
+class TestBulk:
+    """Тесты функций cards.bulk."""
+
+    def test_delete_selected(self, user, cards, other_cards, django_assert_max_num_queries):
+        """Удаление — постоянное число запросов, чужие карточки не затрагиваются."""
+        ids = [card.pk for card in cards[:10]] + [other_cards[0].pk]
+        flush_review_logs()
+        # SELECT, 3 DELETE, INSERT отметок, UPDATE статистики и точки сохранения
+        with django_assert_max_num_queries(10):
+            assert bulk_delete(user, ids) == 10
+        assert Card.objects.filter(user=user).count() == 10
+        assert not ReviewLog.objects.filter(card_id__in=ids[:10]).exists()
+        assert Card.objects.filter(pk=other_cards[0].pk).exists()
+        assert counters(user)[0] == 10
+        assert_stats_consistent(user)
+
+    def test_delete_by_filter_keeps_deck_cards(self, user, cards):
+        """Удаление по фильтру убирает карточки колоды только из набора пользователя."""
+        deck = Deck.objects.create(title='Fruits')
+        import_deck(deck, io.BytesIO('word,translation,level\napple,яблоко,beginner\n'.encode()))
+        subscribe(user, deck)
+
+        assert bulk_delete(user, level='beginner') == 11
+        assert set(Card.objects.filter(user=user).values_list('level', flat=True)) == {'intermediate'}
+        assert deck.cards.count() == 1
+        assert not Schedule.objects.filter(user=user, card__deck=deck).exists()
+        assert_stats_consistent(user)
+
+    def test_set_level(self, user, cards, other_cards, django_assert_max_num_queries):
+        """Смена уровня — одним UPDATE карточек, изменения видны синхронизации."""
+        token = changes_since(user).token
+        with django_assert_max_num_queries(4):
+            assert bulk_set_level(user, 'advanced', level='beginner') == 10
+        assert Card.objects.filter(user=user, level='advanced').count() == 10
+        assert Card.objects.filter(level='beginner').count() == 3
+        assert len(changes_since(user, token).changes) == 10
+        with pytest.raises(ValueError):
+            bulk_set_level(user, 'expert')
+
+    def test_postpone(self, user, cards, django_assert_max_num_queries):
+        """Перенос считает от сегодняшнего дня для просроченных карточек."""
+        overdue, scheduled = cards[0], cards[1]
+        Schedule.objects.filter(pk=overdue.schedule.pk).update(next_review=date.today() - timedelta(days=5))
+        scheduled_review = Schedule.objects.get(pk=scheduled.schedule.pk).next_review
+
+        with django_assert_max_num_queries(2):
+            assert bulk_postpone(user, 3, [overdue.pk, scheduled.pk]) == 2
+        assert Schedule.objects.get(card=overdue).next_review == date.today() + timedelta(days=3)
+        assert Schedule.objects.get(card=scheduled).next_review == scheduled_review + timedelta(days=3)
+
+    def test_reset(self, user, cards, django_assert_max_num_queries):
+        """Сброс прогресса возвращает расписание к начальному и обновляет статистику."""
+        with django_assert_max_num_queries(5):
+            assert bulk_reset(user, level='intermediate') == 10
+        reset = Schedule.objects.filter(user=user, card__level='intermediate')
+        assert set(reset.values_list('repetition', 'interval', 'last_result', 'next_review')) == {
+            (0, 1, None, date.today())
+        }
+        assert Schedule.objects.filter(user=user, card__level='beginner', repetition__gt=0).exists()
+        assert_stats_consistent(user)
+
+
+@pytest.mark.django_db
+class TestBulkView:
+    """Тесты страницы пакетных операций."""
+
+    def test_bulk_view(self, authenticated_client, user, cards):
+        """Форма на странице списка применяет операцию к отмеченным карточкам."""
+        response = authenticated_client.get(reverse('card_list'))
+        assert 'bulk-form' in response.content.decode()
+
+        url = reverse('card_bulk')
+        ids = [cards[0].pk, cards[2].pk]
+        response = authenticated_client.post(url, {'action': 'level', 'new_level': 'advanced', 'card_ids': ids})
+        assert response.status_code == 302
+        assert set(Card.objects.filter(pk__in=ids).values_list('level', flat=True)) == {'advanced'}
+
+        response = authenticated_client.post(url, {'action': 'delete', 'scope': 'filter', 'filter_level': 'advanced'})
+        assert response.url == reverse('card_list') + '?level=advanced'
+        assert not Card.objects.filter(pk__in=ids).exists()
+
+    def test_bulk_view_validation(self, authenticated_client, user, cards):
+        """Без отмеченных карточек и без параметров операции ничего не меняется."""
+        url = reverse('card_bulk')
+        authenticated_client.post(url, {'action': 'delete'})
+        authenticated_client.post(url, {'action': 'postpone', 'card_ids': [cards[0].pk]})
+        assert Card.objects.filter(user=user).count() == 20
+        assert authenticated_client.get(url).status_code == 405
@@ -0,0 +1,26 @@
+"""
+Тесты настроек кеша (lingua_track.cache).
+
+Проверяет, что с REDIS_URL кеш общий для процессов (Redis),
+а без него — LocMem для разработки и тестов.
+"""
+
+from lingua_track.cache import KEY_PREFIX, cache_from_env
+
+
+class TestCacheFromEnv:
+    """Тесты сборки CACHES['default'] из окружения."""
+
+    def test_default_locmem(self, monkeypatch):
+        """Без REDIS_URL — кеш в памяти процесса."""
+        monkeypatch.delenv('REDIS_URL', raising=False)
+        assert cache_from_env() == {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}
+
+    def test_redis(self, monkeypatch):
+        """REDIS_URL задает общий кеш Redis с префиксом ключей."""
+        monkeypatch.setenv('REDIS_URL', 'redis://:secret@redis:6379/0')
+        assert cache_from_env() == {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': 'redis://:secret@redis:6379/0',
+            'KEY_PREFIX': KEY_PREFIX,
+        }
@@ -0,0 +1,65 @@
+"""
+Тесты настроек подключения к базе данных (lingua_track.db).
+
+Проверяет разбор DATABASE_URL, постоянные соединения и пул для PostgreSQL
+и настройку PRAGMA для SQLite.
+"""
+
+import pytest
+from pathlib import Path
+from lingua_track.db import SQLITE_PRAGMAS, database_from_env
+
+BASE_DIR = Path('/srv/app')
+
+
+class TestDatabaseFromEnv:
+    """Тесты сборки DATABASES['default'] из окружения."""
+
+    @pytest.fixture(autouse=True)
+    def clean_env(self, monkeypatch):
+        for name in ('DATABASE_URL', 'DB_CONN_MAX_AGE', 'DB_POOL', 'DB_POOL_MAX_SIZE'):
+            monkeypatch.delenv(name, raising=False)
+
+    def test_default_sqlite(self):
+        """Без DATABASE_URL — SQLite в BASE_DIR с WAL и постоянными соединениями."""
+        config = database_from_env(BASE_DIR)
+        assert config['ENGINE'] == 'django.db.backends.sqlite3'
+        assert config['NAME'] == BASE_DIR / 'db.sqlite3'
+        assert config['CONN_MAX_AGE'] == 600
+        assert 'PRAGMA journal_mode=WAL' in SQLITE_PRAGMAS
+        assert config['OPTIONS']['init_command'] == '; '.join(SQLITE_PRAGMAS)
+        assert config['OPTIONS']['transaction_mode'] == 'IMMEDIATE'
+
+    def test_sqlite_url(self, monkeypatch):
+        """sqlite:/// задает путь относительно BASE_DIR или абсолютный."""
+        monkeypatch.setenv('DATABASE_URL', 'sqlite:///data/lt.db')
+        assert database_from_env(BASE_DIR)['NAME'] == BASE_DIR / 'data/lt.db'
+        monkeypatch.setenv('DATABASE_URL', 'sqlite:////var/lib/lt.db')
+        assert database_from_env(BASE_DIR)['NAME'] == '/var/lib/lt.db'
+
+    def test_postgres_persistent_connections(self, monkeypatch):
+        """PostgreSQL: параметры из URL, CONN_MAX_AGE и проверка соединений."""
+        monkeypatch.setenv('DATABASE_URL', 'postgresql://lt_user:p%40ss@db:5433/linguatrack?sslmode=require')
+        monkeypatch.setenv('DB_CONN_MAX_AGE', '120')
+        config = database_from_env(BASE_DIR)
+        assert config['ENGINE'] == 'django.db.backends.postgresql'
+        assert (config['NAME'], config['USER'], config['PASSWORD']) == ('linguatrack', 'lt_user', 'p@ss')
+        assert (config['HOST'], config['PORT']) == ('db', '5433')
+        assert config['CONN_MAX_AGE'] == 120
+        assert config['CONN_HEALTH_CHECKS'] is True
+        assert config['OPTIONS'] == {'sslmode': 'require'}
+
+    def test_postgres_pool(self, monkeypatch):
+        """DB_POOL включает пул psycopg и отключает CONN_MAX_AGE."""
+        monkeypatch.setenv('DATABASE_URL', 'postgres://lt@db/linguatrack')
+        monkeypatch.setenv('DB_POOL', 'true')
+        monkeypatch.setenv('DB_POOL_MAX_SIZE', '20')
+        config = database_from_env(BASE_DIR)
+        assert config['CONN_MAX_AGE'] == 0
+        assert config['OPTIONS']['pool']['max_size'] == 20
+
+    def test_unsupported_scheme(self, monkeypatch):
+        """Неизвестная схема — ошибка конфигурации."""
+        monkeypatch.setenv('DATABASE_URL', 'mysql://lt@db/linguatrack')
+        with pytest.raises(ValueError):
+            database_from_env(BASE_DIR)
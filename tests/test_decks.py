@@ -0,0 +1,194 @@
+"""
+Тесты общих колод (cards.decks).
+
+Проверяет, что карточки колоды хранятся один раз, подписка создает только
+расписания, редактирование создает личную копию с сохранением прогресса,
+отписка удаляет расписания одним запросом, а счетчики статистики
+совпадают с полным пересчетом.
+"""
+
+import io
+import json
+from pathlib import Path
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+
+from cards.decks import copy_on_write, import_deck, subscribe, unsubscribe
+from cards.models import Card, Deck, ReviewLog, Schedule, UserStats
+from cards.sm2 import update_schedule
+
+DOCS = Path(__file__).resolve().parent.parent / 'docs'
+
+
+def counters(user) -> list[int]:
+    """Счетчики статистики пользователя."""
+    stats = UserStats.objects.get(user=user)
+    return [getattr(stats, field) for field in UserStats.COUNTER_FIELDS]
+
+
+@pytest.fixture
+def deck():
+    """Колода из трех общих карточек."""
+    deck = Deck.objects.create(title='Fruits')
+    import_deck(deck, io.BytesIO(
+        'word,translation,example\napple,яблоко,An apple.\npear,груша,\nplum,слива,\n'.encode()
+    ))
+    return deck
+
+
+@pytest.fixture
+def other(django_user_model):
+    """Второй подписчик."""
+    return django_user_model.objects.create_user(username='other', password='x')
+
+
+@pytest.mark.django_db
+class TestDecks:
+    """Тесты подписки и копирования при записи."""
+
+    def test_subscribe_shares_cards(self, user, other, deck):
+        """Подписчики получают расписания, карточки не копируются."""
+        assert Card.objects.filter(deck=deck, user__isnull=True).count() == 3
+        assert not Schedule.objects.filter(card__deck=deck).exists()
+
+        assert subscribe(user, deck) == 3
+        assert subscribe(other, deck) == 3
+        assert subscribe(user, deck) == 0
+        assert Card.objects.count() == 3
+        assert Schedule.objects.filter(user=user, card__deck=deck).count() == 3
+        assert counters(user)[0] == 3
+
+    def test_subscribe_skips_own_cards(self, user, deck):
+        """Карточки, которые уже есть у пользователя, не добавляются повторно."""
+        Card.objects.create(user=user, word='Apple', translation='Яблоко')
+        assert subscribe(user, deck) == 2
+        assert counters(user)[0] == 3
+
+    def test_new_deck_cards_reach_subscribers(self, user, deck):
+        """Карточки, добавленные в колоду, появляются у подписчиков."""
+        subscribe(user, deck)
+        import_deck(deck, io.BytesIO('word,translation\napple,яблоко\nkiwi,киви\n'.encode()))
+        assert Schedule.objects.filter(user=user, card__word='kiwi').exists()
+        assert counters(user)[0] == 4
+
+    def test_copy_on_write(self, user, other, deck):
+        """Правка создает личную копию с прогрессом; у других подписчиков карточка прежняя."""
+        subscribe(user, deck)
+        subscribe(other, deck)
+        shared = Card.objects.get(deck=deck, word='apple')
+        schedule = Schedule.objects.get(card=shared, user=user)
+        update_schedule(schedule, 5)
+
+        shared.translation = 'яблочко'
+        copy = copy_on_write(shared, user)
+
+        original = Card.objects.get(deck=deck, word='apple')
+        assert original.translation == 'яблоко'
+        assert (copy.user, copy.deck, copy.source_id) == (user, None, original.pk)
+        assert copy.schedule.pk == schedule.pk
+        assert copy.schedule.repetition == 1
+        assert ReviewLog.objects.filter(user=user, card=copy).count() == 1
+        assert Schedule.objects.filter(card=original).get().user == other
+        assert counters(user)[0] == 3
+
+        # Повторная подписка не возвращает общую карточку
+        assert subscribe(user, deck) == 0
+        with pytest.raises(ValueError):
+            copy_on_write(copy, user)
+
+    def test_unsubscribe(self, user, deck, django_assert_max_num_queries):
+        """Отписка удаляет расписания одним DELETE, личные копии остаются."""
+        subscribe(user, deck)
+        pear = Card.objects.get(deck=deck, word='pear')
+        pear.comment = 'моя заметка'
+        copy_on_write(pear, user)
+        for schedule in Schedule.objects.filter(user=user, card__deck=deck):
+            update_schedule(schedule, 2)
+
+        # + пакетный INSERT отметок SyncTombstone для синхронизации клиентов
+        with django_assert_max_num_queries(9):
+            assert unsubscribe(user, deck) == 2
+        assert list(Card.objects.filter(user=user).values_list('word', flat=True)) == ['pear']
+        incremental = counters(user)
+        assert incremental == [1, 0, 0, 0]
+        UserStats.objects.rebuild([user.pk])
+        assert counters(user) == incremental
+
+    def test_deleting_deck_card_updates_subscribers(self, user, other, deck):
+        """Удаление общей карточки уменьшает счетчики всех подписчиков."""
+        subscribe(user, deck)
+        subscribe(other, deck)
+        Card.objects.get(deck=deck, word='plum').delete()
+        assert counters(user)[0] == counters(other)[0] == 2
+
+    def test_load_deck_command(self, user):
+        """Команда load_deck загружает пример колоды из docs."""
+        call_command(
+            'load_deck', str(DOCS / 'eng_words_100.csv'), title='English 100',
+            stdout=io.StringIO(), stderr=io.StringIO(),
+        )
+        deck = Deck.objects.get(title='English 100')
+        # В файле 119 строк, из них 3 повтора
+        assert deck.cards.count() == 116
+        assert subscribe(user, deck) == 116
+
+
+@pytest.mark.django_db
+class TestDeckViews:
+    """Тесты страниц колод, редактирования и ответов бота."""
+
+    def test_subscribe_and_review(self, authenticated_client, user, deck):
+        """Подписка со страницы колод; карточки колоды попадают в повторение."""
+        response = authenticated_client.get(reverse('deck_list'))
+        assert [(d.title, d.card_count, d.is_subscribed) for d in response.context['decks']] == [('Fruits', 3, False)]
+
+        authenticated_client.post(reverse('deck_subscribe', args=[deck.pk]))
+        response = authenticated_client.get(reverse('card_review'))
+        assert response.context['card'].deck_id == deck.pk
+
+        authenticated_client.post(reverse('deck_unsubscribe', args=[deck.pk]))
+        assert not Schedule.objects.filter(user=user).exists()
+
+    def test_edit_shared_card(self, authenticated_client, user, deck):
+        """Редактирование общей карточки через форму сохраняет личную копию."""
+        shared = Card.objects.get(deck=deck, word='plum')
+        url = reverse('card_edit', args=[shared.pk])
+        assert authenticated_client.get(url).status_code == 404
+
+        subscribe(user, deck)
+        response = authenticated_client.post(url, {
+            'word': 'plum', 'translation': 'слива', 'comment': 'сушеная — чернослив', 'level': 'beginner',
+        })
+        assert response.status_code == 302
+        shared.refresh_from_db()
+        assert shared.comment == ''
+        assert Card.objects.get(user=user, source=shared).comment == 'сушеная — чернослив'
+
+    def test_lists_show_personal_cards(self, authenticated_client, client, user_with_telegram, deck):
+        """Список, /api/cards/ и экспорт — личные карточки; total совпадает со списком."""
+        Card.objects.create(user=user_with_telegram, word='cherry', translation='вишня')
+        subscribe(user_with_telegram, deck)
+        assert UserStats.objects.get(user=user_with_telegram).total_cards == 4
+
+        data = client.get(reverse('api_cards_list'), {'telegram_id': 123456789}).json()
+        assert ([card['word'] for card in data['cards']], data['total']) == (['cherry'], 1)
+
+        authenticated_client.force_login(user_with_telegram)
+        response = authenticated_client.get(reverse('card_list'))
+        assert [card.word for card in response.context['cards']] == ['cherry']
+        export = b''.join(authenticated_client.get(reverse('card_export')).streaming_content).decode()
+        assert 'cherry' in export and 'apple' not in export
+
+    def test_bot_answer_on_deck_card(self, client, user_with_telegram, deck):
+        """Бот принимает ответ на карточку колоды по расписанию пользователя."""
+        subscribe(user_with_telegram, deck)
+        card = Card.objects.get(deck=deck, word='apple')
+        response = client.post(
+            reverse('api_test'),
+            json.dumps({'telegram_id': 123456789, 'card_id': card.pk, 'answer': True}),
+            content_type='application/json',
+        )
+        assert response.json()['result'] == 'ok'
+        assert Schedule.objects.get(card=card, user=user_with_telegram).repetition == 1
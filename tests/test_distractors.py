@@ -0,0 +1,156 @@
+"""
+Тесты пула и индекса вариантов ответа (cards.distractors).
+
+Проверяет, что пул собирается одним запросом и дальше берется из кеша,
+похожие варианты находятся по триграммам перевода и слова (с ограничением
+по уровню), варианты не совпадают с верным ответом и друг с другом,
+а правки карточек обновляют пул без повторной выборки.
+"""
+
+import io
+import threading
+
+import pytest
+from django.urls import reverse
+
+from cards import distractors
+from cards.bulk import bulk_set_level
+from cards.importer import MODE_UPDATE, import_csv
+from cards.distractors import (
+    EMPTY_OPTION, DistractorIndex, get_distractor_index, multiple_choice_options,
+)
+from cards.models import Card
+
+
+@pytest.fixture
+def translations(user):
+    """Двадцать карточек пользователя."""
+    return Card.objects.bulk_create_with_schedules([
+        Card(user=user, word=f'word{i}', translation=f'слово{i}') for i in range(20)
+    ])
+
+
+@pytest.fixture
+def similar_index():
+    """Индекс с похожими и непохожими переводами и словами."""
+    return DistractorIndex([
+        (1, 'яблоко', 'apple', 'beginner'),
+        (2, 'яблоня', 'apple tree', 'intermediate'),
+        (3, 'облако', 'cloud', 'beginner'),
+        (4, 'влиять', 'affect', 'advanced'),
+        (5, 'эффект', 'effect', 'advanced'),
+        (6, 'кошка', 'cat', 'beginner'),
+        (7, 'собака', 'dog', 'beginner'),
+        (8, 'Яблоко ', 'apple', 'beginner'),
+    ])
+
+
+@pytest.mark.django_db
+class TestDistractorPool:
+    """Тесты пула в кеше."""
+
+    def test_pool_is_cached(self, user, translations, django_assert_num_queries):
+        """Пул собирается одним запросом, вопрос из кеша — без запросов."""
+        with django_assert_num_queries(1):
+            index = get_distractor_index(user.pk)
+        assert sorted(entry[1] for entry in index.entries) == sorted(card.translation for card in translations)
+        with django_assert_num_queries(0):
+            options = multiple_choice_options(user.pk, 'слово1', 'word1')
+        assert len(set(options)) == 4 and 'слово1' in options
+
+    def test_pool_size_is_bounded(self, user, translations, monkeypatch):
+        """В пуле не больше POOL_SIZE карточек."""
+        monkeypatch.setattr(distractors, 'POOL_SIZE', 5)
+        assert len(get_distractor_index(user.pk)) == 5
+
+    def test_edit_updates_entry(self, user, translations, django_assert_max_num_queries):
+        """Правка карточки меняет ее запись в пуле без повторной выборки."""
+        get_distractor_index(user.pk)
+        card = translations[0]
+        card.translation = 'слово0 новое'
+        card.save()
+        with django_assert_max_num_queries(0):
+            index = get_distractor_index(user.pk)
+        assert 'слово0 новое' in [entry[1] for entry in index.entries]
+        assert index.nearest('новое', limit=1) == ['слово0 новое']
+
+    def test_import_update_resets_pool(self, user, translations, django_capture_on_commit_callbacks):
+        """Импорт в режиме обновления сбрасывает пул: новые уровни видны в вариантах."""
+        get_distractor_index(user.pk)
+        with django_capture_on_commit_callbacks(execute=True):
+            import_csv(user, io.BytesIO('word,translation,level\nword0,слово0,advanced\n'.encode()), mode=MODE_UPDATE)
+        levels = {entry[0]: entry[3] for entry in get_distractor_index(user.pk).entries}
+        assert levels[translations[0].pk] == 'advanced'
+
+    def test_concurrent_edits_are_kept(self, user, translations):
+        """Одновременные правки разных карточек не затирают друг друга."""
+        get_distractor_index(user.pk)
+        barrier = threading.Barrier(4)
+
+        def edit(card):
+            card.translation = f'{card.translation} правка'
+            barrier.wait()
+            distractors.update_distractor_entry(card)
+
+        threads = [threading.Thread(target=edit, args=(card,)) for card in translations[:4]]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        options = {entry[1] for entry in get_distractor_index(user.pk).entries}
+        assert {f'слово{i} правка' for i in range(4)} <= options
+
+    def test_set_changes_reset_pool(self, user, translations):
+        """Новая и удаленная карточки сразу отражаются в пуле."""
+        get_distractor_index(user.pk)
+        card = Card.objects.create(user=user, word='apple', translation='яблоко')
+        assert 'яблоко' in [entry[1] for entry in get_distractor_index(user.pk).entries]
+        card.delete()
+        assert 'яблоко' not in [entry[1] for entry in get_distractor_index(user.pk).entries]
+
+    def test_bulk_level_resets_pool(self, user, translations):
+        """Пакетная смена уровня сразу видна в пуле (варианты того же уровня)."""
+        get_distractor_index(user.pk)
+        bulk_set_level(user, 'advanced', [card.pk for card in translations[:5]])
+        levels = {entry[0]: entry[3] for entry in get_distractor_index(user.pk).entries}
+        assert [levels[card.pk] for card in translations[:6]] == ['advanced'] * 5 + ['beginner']
+
+
+class TestDistractorIndex:
+    """Тесты поиска похожих вариантов."""
+
+    def test_nearest_by_translation_and_word(self, similar_index):
+        """Ближайшие — похожие по переводу и по слову; сам ответ (без регистра) не входит."""
+        assert similar_index.nearest('яблоко', 'apple', limit=2) == ['яблоня', 'облако']
+        assert similar_index.nearest('влиять', 'affect', limit=1) == ['эффект']
+
+    def test_nearest_same_level(self, similar_index):
+        """С уровнем учитываются только карточки этого уровня."""
+        assert similar_index.nearest('яблоко', 'apple', level='beginner', limit=1) == ['облако']
+
+    def test_distractors(self, similar_index, settings):
+        """Варианты различны, не совпадают с ответом; недостающие — заполнитель."""
+        for _ in range(50):
+            wrong = similar_index.distractors('яблоко', 'apple')
+            assert len(set(wrong)) == 3
+            assert not {'яблоко', 'Яблоко '} & set(wrong)
+        assert DistractorIndex([(1, 'груша', 'pear', 'beginner')]).distractors('яблоко') == [
+            'груша', EMPTY_OPTION, EMPTY_OPTION,
+        ]
+        assert DistractorIndex([]).distractors('яблоко') == [EMPTY_OPTION] * 3
+
+
+@pytest.mark.django_db
+class TestBotQuestion:
+    """Тест вопроса бота."""
+
+    def test_bot_question(self, client, user_with_telegram, django_assert_max_num_queries):
+        """Вопрос бота с прогретым пулом не выбирает переводы всех карточек."""
+        Card.objects.bulk_create_with_schedules([
+            Card(user=user_with_telegram, word=f'word{i}', translation=f'слово{i}') for i in range(10)
+        ])
+        get_distractor_index(user_with_telegram.pk)
+        url = reverse('api_test_multiple_choice')
+        with django_assert_max_num_queries(3):
+            data = client.get(url, {'telegram_id': 123456789}).json()
+        assert len(set(data['options'])) == 4
@@ -0,0 +1,118 @@
+"""
+Тесты очереди карточек на сегодня (cards.due_queue).
+
+Проверяет порядок по приоритетам, выбор верхних k карточек одним запросом
+с LIMIT и дневной лимит повторенных карточек в боте и сессии повторения.
+"""
+
+from datetime import date, timedelta
+
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+
+from cards.due_queue import (
+    PRIORITY_DUE, PRIORITY_EF, PRIORITY_OVERDUE, due_schedules, remaining_reviews, reviews_done_today,
+)
+from cards.models import Card, Schedule
+from cards.review_session import KIND_REVIEW, ReviewSession
+from cards.sm2 import update_schedule, update_schedules
+
+
+@pytest.fixture
+def backlog(user_with_telegram):
+    """
+    Просроченные карточки: (дней просрочки, интервал, ef).
+
+    Доля просрочки: a — 10/60, b — 5/2, c — 3/1, d — 1/1; e — на будущее.
+    """
+    today = date.today()
+    params = {'a': (10, 60, 2.5), 'b': (5, 2, 2.0), 'c': (3, 1, 1.3), 'd': (1, 1, 1.8), 'e': (-3, 5, 1.5)}
+    cards = Card.objects.bulk_create_with_schedules([
+        Card(user=user_with_telegram, word=word, translation=word) for word in params
+    ])
+    for card in cards:
+        overdue, interval, ef = params[card.word]
+        Schedule.objects.filter(card=card).update(
+            next_review=today - timedelta(days=overdue), interval=interval, ef=ef,
+        )
+    return cards
+
+
+def words(schedules) -> list[str]:
+    """Слова карточек расписаний."""
+    return [schedule.card.word for schedule in schedules.select_related('card')]
+
+
+@pytest.mark.django_db
+class TestDueQueue:
+    """Тесты порядка и лимитов очереди."""
+
+    def test_priorities(self, user_with_telegram, backlog):
+        """Порядок по сроку, по доле просрочки и по ef; карточки на будущее не входят."""
+        assert words(due_schedules(user_with_telegram, priority=PRIORITY_DUE)) == ['a', 'b', 'c', 'd']
+        assert words(due_schedules(user_with_telegram, priority=PRIORITY_OVERDUE)) == ['c', 'b', 'd', 'a']
+        assert words(due_schedules(user_with_telegram, priority=PRIORITY_EF)) == ['c', 'd', 'b', 'a']
+        with pytest.raises(ValueError):
+            due_schedules(user_with_telegram, priority='random')
+
+    def test_top_k_in_one_query(self, user_with_telegram, backlog, settings, django_assert_num_queries):
+        """Верхние k карточек — один запрос с LIMIT."""
+        settings.REVIEW_PRIORITY = PRIORITY_OVERDUE
+        with django_assert_num_queries(1) as context:
+            assert words(due_schedules(user_with_telegram, 2)) == ['c', 'b']
+        assert 'LIMIT 2' in context.captured_queries[0]['sql']
+
+    def test_daily_limit(self, user_with_telegram, backlog, settings):
+        """Лимит уменьшается на число карточек, повторенных сегодня, в том числе пачкой."""
+        settings.DAILY_REVIEW_LIMIT = 3
+        assert words(due_schedules(user_with_telegram)) == ['a', 'b', 'c']
+        update_schedule(Schedule.objects.get(card=backlog[0]), 5)
+        # Два ответа на одну карточку расходуют лимит один раз
+        schedule = Schedule.objects.get(card=backlog[1])
+        update_schedules([(schedule, 1), (schedule, 5)])
+        # Счет в базе: не зависит от кеша процесса
+        cache.clear()
+        assert reviews_done_today(user_with_telegram.pk) == 2
+        assert remaining_reviews(user_with_telegram.pk) == 1
+        assert words(due_schedules(user_with_telegram, 10)) == ['c']
+
+        update_schedule(Schedule.objects.get(card=backlog[2]), 5)
+        assert not due_schedules(user_with_telegram).exists()
+        settings.DAILY_REVIEW_LIMIT = 0
+        assert remaining_reviews(user_with_telegram.pk) is None
+        assert words(due_schedules(user_with_telegram)) == ['d']
+
+
+@pytest.mark.django_db
+class TestDueQueueViews:
+    """Тесты очереди в боте и в сессии повторения."""
+
+    def test_bot_today(self, client, user_with_telegram, backlog, settings):
+        """/api/today/ отдает верхние карточки по приоритету в пределах лимита."""
+        settings.DAILY_REVIEW_LIMIT = 2
+        settings.REVIEW_PRIORITY = PRIORITY_OVERDUE
+        data = client.get(reverse('api_cards_today'), {'telegram_id': 123456789}).json()
+        assert [card['word'] for card in data['cards']] == ['c', 'b']
+        data = client.get(reverse('api_test_multiple_choice'), {'telegram_id': 123456789}).json()
+        assert data['card']['word'] == 'c'
+
+    def test_bot_today_default_limit(self, client, user_with_telegram, backlog, django_assert_max_num_queries):
+        """Без дневного лимита /api/today/ все равно выбирает только верхние k карточек."""
+        from bot_api.views import TODAY_PAGE_SIZE
+        with django_assert_max_num_queries(10) as context:
+            data = client.get(reverse('api_cards_today'), {'telegram_id': 123456789}).json()
+        assert len(data['cards']) == 4
+        assert any(f'LIMIT {TODAY_PAGE_SIZE}' in query['sql'] for query in context.captured_queries
+                   if 'cards_schedule' in query['sql'])
+        data = client.get(reverse('api_cards_today'), {'telegram_id': 123456789, 'limit': 2}).json()
+        assert [card['word'] for card in data['cards']] == ['a', 'b']
+
+    def test_session_limit(self, user_with_telegram, backlog, settings):
+        """Снимок сессии не больше остатка дневного лимита."""
+        settings.DAILY_REVIEW_LIMIT = 2
+        session = ReviewSession.load(user_with_telegram, KIND_REVIEW)
+        assert [item.word for item in session.items] == ['a', 'b']
+        session.answer(0, 5)
+        session.answer(1, 5)
+        assert ReviewSession.load(user_with_telegram, KIND_REVIEW).current is None
@@ -0,0 +1,72 @@
+"""
+Тесты потокового экспорта карточек (cards.exporter, cards.views.export_cards).
+
+Проверяет формат CSV (совместимый с импортом), JSONL с полями расписания,
+сжатие gzip на лету и то, что ответ отдается потоком.
+"""
+
+import gzip
+import io
+import json
+
+import pytest
+from django.urls import reverse
+
+from cards import exporter
+from cards.importer import import_csv
+from cards.models import Card
+
+
+def content(response) -> bytes:
+    """Собирает тело потокового ответа."""
+    assert response.streaming
+    return b''.join(response.streaming_content)
+
+
+@pytest.mark.django_db
+class TestExportCards:
+    """Тесты представления экспорта."""
+
+    def test_csv_round_trip(self, authenticated_client, user, multiple_cards):
+        """Экспортированный CSV импортируется обратно без ошибок."""
+        response = authenticated_client.get(reverse('card_export'))
+        assert response['Content-Type'].startswith('text/csv')
+        assert 'cards_export.csv' in response['Content-Disposition']
+
+        data = content(response)
+        lines = data.decode('utf-8').splitlines()
+        assert lines[0] == 'word,translation,example,comment,level'
+        assert len(lines) == len(multiple_cards) + 1
+
+        Card.objects.filter(user=user).delete()
+        result = import_csv(user, io.BytesIO(data))
+        assert (result.created, result.errors) == (len(multiple_cards), [])
+
+    def test_jsonl_with_schedule(self, authenticated_client, schedule):
+        """JSONL содержит поля расписания; next_review — в ISO 8601."""
+        response = authenticated_client.get(reverse('card_export'), {'format': 'jsonl'})
+        assert response['Content-Type'].startswith('application/x-ndjson')
+
+        record = json.loads(content(response).decode('utf-8').splitlines()[0])
+        assert record['word'] == 'hello'
+        assert record['next_review'] == schedule.next_review.isoformat()
+        assert {'interval', 'repetition', 'ef', 'last_result', 'stability', 'difficulty'} <= record.keys()
+
+    def test_gzip(self, authenticated_client, card):
+        """gzip=1 сжимает поток, имя файла получает расширение .gz."""
+        response = authenticated_client.get(reverse('card_export'), {'gzip': '1'})
+        assert response['Content-Type'] == 'application/gzip'
+        assert 'cards_export.csv.gz' in response['Content-Disposition']
+        assert gzip.decompress(content(response)).decode('utf-8').splitlines()[1].startswith('hello,')
+
+    def test_unknown_format(self, authenticated_client):
+        """Неизвестный формат отклоняется."""
+        assert authenticated_client.get(reverse('card_export'), {'format': 'xml'}).status_code == 400
+
+    def test_chunked_output(self, user, multiple_cards, monkeypatch, django_assert_num_queries):
+        """Строки склеиваются в куски, база читается одним запросом на выборку."""
+        monkeypatch.setattr(exporter, 'EXPORT_BUFFER_SIZE', 64)
+        with django_assert_num_queries(1):
+            chunks = list(exporter.iter_csv(user))
+        assert len(chunks) > 1
+        assert all(len(chunk) < 64 + 200 for chunk in chunks)
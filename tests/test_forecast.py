@@ -0,0 +1,83 @@
+"""
+Тесты прогноза нагрузки повторений.
+
+Проверяет векторизованную симуляцию SM-2, кеширование прогноза
+до следующего ответа и API-эндпоинт для бота.
+"""
+
+import pytest
+import numpy as np
+from datetime import date, timedelta
+from cards.forecast import forecast_review_load, simulate_due_counts
+from cards.sm2 import update_schedule
+
+
+@pytest.mark.sm2
+class TestSimulateDueCounts:
+    """Тесты симуляции без БД."""
+
+    def test_overdue_cards_due_today(self):
+        """Просроченные карточки попадают в сегодняшний день."""
+        counts = simulate_due_counts(
+            np.array([-5, 0, 3]), np.array([1, 1, 1]), np.array([0, 0, 0]),
+            np.array([2.5, 2.5, 2.5]), days=3, pass_rate=1.0,
+        )
+        # Два сегодня, затем оба снова через день (interval=1 при первом успехе)
+        assert counts.tolist() == [2, 2, 0]
+
+    def test_failures_return_next_day(self):
+        """При pass_rate=0 каждая карточка повторяется ежедневно."""
+        counts = simulate_due_counts(
+            np.array([0, 0]), np.array([20, 30]), np.array([5, 6]),
+            np.array([2.5, 2.0]), days=5, pass_rate=0.0,
+        )
+        assert counts.tolist() == [2, 2, 2, 2, 2]
+
+
+@pytest.mark.django_db
+@pytest.mark.sm2
+class TestForecastService:
+    """Тесты сервиса прогноза с БД и кешем."""
+
+    def test_histogram_shape(self, user, cards_with_schedules):
+        """Прогноз содержит по записи на каждый день, начиная с сегодня."""
+        forecast = forecast_review_load(user, days=10, pass_rate=0.9)
+        assert len(forecast) == 10
+        assert forecast[0]['date'] == date.today()
+        assert forecast[-1]['date'] == date.today() + timedelta(days=9)
+        assert forecast[0]['due'] == 1  # только одна карточка на сегодня
+
+    def test_cached_until_answer(self, user, schedule, django_assert_num_queries):
+        """Повторный запрос берётся из кеша, ответ сбрасывает кеш."""
+        forecast_review_load(user, days=7)
+        with django_assert_num_queries(0):
+            forecast_review_load(user, days=7)
+
+        update_schedule(schedule, 5)
+        forecast = forecast_review_load(user, days=7)
+        assert forecast[0]['due'] == 0
+        assert forecast[1]['due'] == 1
+
+    def test_invalid_params(self, user):
+        """Недопустимые параметры вызывают ValueError."""
+        with pytest.raises(ValueError):
+            forecast_review_load(user, days=0)
+        with pytest.raises(ValueError):
+            forecast_review_load(user, pass_rate=1.5)
+
+
+@pytest.mark.django_db
+@pytest.mark.api
+class TestForecastAPI:
+    """Тесты API-эндпоинта прогноза."""
+
+    def test_forecast_endpoint(self, client, user_with_telegram):
+        """Эндпоинт возвращает прогноз по telegram_id."""
+        response = client.get('/api/forecast/', {'telegram_id': user_with_telegram.telegram_id, 'days': 5})
+        assert response.status_code == 200
+        assert len(response.json()['forecast']) == 5
+
+    def test_forecast_endpoint_bad_days(self, client, user_with_telegram):
+        """Некорректный горизонт — ошибка 400."""
+        response = client.get('/api/forecast/', {'telegram_id': user_with_telegram.telegram_id, 'days': 1000})
+        assert response.status_code == 400
@@ -0,0 +1,245 @@
+"""
+Тесты потокового импорта карточек из CSV (cards.importer).
+
+Проверяет сообщения об ошибках по строкам, отсев дубликатов (в базе и внутри
+файла), пакетную запись и откат транзакции при ошибке чтения, а также фоновый
+импорт: обработку порциями с продолжением по смещению и загрузку частями.
+"""
+
+import io
+import json
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from cards import views
+from cards.importer import MODE_UPDATE, import_csv, run_import_job
+from cards.models import Card, ImportJob, Schedule, UserStats
+
+
+def csv_file(*lines: str, bom: bool = False) -> io.BytesIO:
+    """Собирает CSV-файл в памяти из строк."""
+    data = '\n'.join(['word,translation,example,comment,level', *lines]).encode('utf-8')
+    return io.BytesIO((b'\xef\xbb\xbf' if bom else b'') + data)
+
+
+@pytest.mark.django_db
+class TestImportCsv:
+    """Тесты движка импорта."""
+
+    def test_row_errors(self, user, card):
+        """Ошибки по строкам сообщаются в прежнем формате."""
+        result = import_csv(user, csv_file(
+            'apple,яблоко,,,beginner',
+            ',пусто,,,beginner',
+            'pear,груша,,,expert',
+            'HELLO,привет,,,beginner',
+            'Apple ,ЯБЛОКО,,,beginner',
+        ))
+        assert result.created == 1
+        assert result.duplicates == 2
+        assert result.errors == [
+            'Строка 2: word и translation обязательны',
+            'Строка 3: некорректный level',
+            'Строка 4: дубликат "HELLO — привет"',
+            'Строка 5: дубликат "Apple — ЯБЛОКО"',
+        ]
+
+    def test_batched_inserts(self, user, django_assert_max_num_queries):
+        """Карточки и расписания пишутся пакетами, число запросов не зависит от строк."""
+        lines = [f'word{i},слово{i},,,intermediate' for i in range(25)]
+        # ключи + SAVEPOINT/RELEASE внешней транзакции + 3 пакета по 5 запросов
+        with django_assert_max_num_queries(18):
+            result = import_csv(user, csv_file(*lines), batch_size=10)
+        assert result.created == 25
+        assert Schedule.objects.filter(user=user).count() == 25
+        assert UserStats.objects.get(user=user).total_cards == 25
+
+    def test_bom_and_missing_columns(self, user):
+        """BOM в начале файла и короткие строки не ломают разбор."""
+        result = import_csv(user, csv_file('cat,кот', bom=True))
+        assert result.created == 1
+        assert Card.objects.get(user=user).level == 'beginner'
+
+    def test_decode_error_rolls_back(self, user):
+        """Ошибка декодирования откатывает уже записанные пакеты."""
+        # Больше буфера чтения TextIOWrapper, чтобы первые пакеты успели записаться
+        lines = [f'word{i},слово{i},,,beginner' for i in range(2000)]
+        file = io.BytesIO(csv_file(*lines).getvalue() + b'\nbad,\xff\xfe,,,beginner\n')
+        with pytest.raises(UnicodeDecodeError):
+            import_csv(user, file, batch_size=100)
+        assert not Card.objects.filter(user=user).exists()
+
+
+@pytest.mark.django_db
+class TestImportUpdateMode:
+    """Тесты режима обновления существующих карточек."""
+
+    def test_updates_changed_fields_keeps_schedule(self, user, schedule):
+        """Изменившиеся поля обновляются, расписание и ключ карточки не меняются."""
+        schedule.repetition, schedule.interval = 3, 10
+        schedule.save()
+
+        result = import_csv(user, csv_file(
+            'Hello,ПРИВЕТ,New example,,advanced',
+            'cat,кот,,,beginner',
+            'hello,привет,Again,,beginner',
+        ), mode=MODE_UPDATE)
+        assert (result.created, result.updated, result.unchanged) == (1, 1, 0)
+        assert result.errors == ['Строка 3: дубликат "hello — привет"']
+
+        card = Card.objects.get(pk=schedule.card_id)
+        assert (card.word, card.example, card.comment, card.level) == ('hello', 'New example', '', 'advanced')
+        schedule.refresh_from_db()
+        assert (schedule.repetition, schedule.interval) == (3, 10)
+        assert UserStats.objects.get(user=user).total_cards == 2
+
+    def test_unchanged_reimport_touches_no_rows(self, user):
+        """Повторный импорт неизмененного файла не выполняет ни одного INSERT/UPDATE."""
+        lines = [f'word{i},слово{i},Example {i},,intermediate' for i in range(50)]
+        import_csv(user, csv_file(*lines), mode=MODE_UPDATE)
+
+        with CaptureQueriesContext(connection) as captured:
+            result = import_csv(user, csv_file(*lines), mode=MODE_UPDATE)
+        assert (result.created, result.updated, result.unchanged) == (0, 0, 50)
+        assert not [q for q in captured if q['sql'].startswith(('INSERT', 'UPDATE'))]
+
+    def test_batched_updates(self, user, django_assert_max_num_queries):
+        """Изменения записываются пакетами bulk_update."""
+        lines = [f'word{i},слово{i},,,beginner' for i in range(25)]
+        import_csv(user, csv_file(*lines))
+        changed = [f'word{i},слово{i},Example {i},,beginner' for i in range(25)]
+        # ключи + SAVEPOINT/RELEASE внешней транзакции + 3 пакета UPDATE (каждый в своей транзакции)
+        with django_assert_max_num_queries(12):
+            result = import_csv(user, csv_file(*changed), batch_size=10, mode=MODE_UPDATE)
+        assert result.updated == 25
+        assert Card.objects.filter(user=user, example__startswith='Example').count() == 25
+
+
+@pytest.fixture
+def import_dir(settings, tmp_path):
+    """Каталог загрузок импорта во временной папке."""
+    settings.IMPORT_UPLOAD_DIR = str(tmp_path)
+    return tmp_path
+
+
+def make_job(user, data: bytes, **fields) -> ImportJob:
+    """Создает задание с уже загруженным файлом."""
+    job = ImportJob.objects.create(
+        user=user, filename='cards.csv', size=len(data), uploaded=len(data),
+        status=ImportJob.STATUS_PENDING, **fields
+    )
+    job.path.write_bytes(data)
+    return job
+
+
+@pytest.mark.django_db
+class TestImportJob:
+    """Тесты фоновой обработки задания импорта."""
+
+    def test_resumes_from_offset(self, user, card, import_dir):
+        """Прерванная по времени обработка продолжается с сохраненного смещения."""
+        lines = [f'word{i},слово{i},,,beginner' for i in range(20)]
+        lines[3] = ',пусто,,,beginner'
+        lines[12] = '"multi","строка\nс переносом","",,advanced'
+        lines[15] = 'Hello,ПРИВЕТ,,,beginner'
+        job = make_job(user, csv_file(*lines, bom=True).getvalue())
+
+        job = run_import_job(job.pk, chunk_rows=10, time_budget=1e-9)
+        assert job.status == ImportJob.STATUS_RUNNING
+        assert (job.rows, job.created) == (10, 9)
+        assert job.fieldnames == ['word', 'translation', 'example', 'comment', 'level']
+        assert 0 < job.offset < job.size
+
+        job = run_import_job(job.pk, chunk_rows=10)
+        assert job.status == ImportJob.STATUS_DONE
+        assert (job.rows, job.created, job.duplicates, job.offset) == (20, 18, 1, job.size)
+        assert job.errors == [
+            'Строка 4: word и translation обязательны',
+            'Строка 16: дубликат "Hello — ПРИВЕТ"',
+        ]
+        assert Card.objects.get(user=user, word='multi').translation == 'строка\nс переносом'
+        assert UserStats.objects.get(user=user).total_cards == 19
+        assert not job.path.exists()
+
+    def test_finished_job_is_not_reprocessed(self, user, import_dir):
+        """Повторная доставка задачи не импортирует файл второй раз."""
+        job = make_job(user, csv_file('cat,кот').getvalue())
+        run_import_job(job.pk)
+        assert run_import_job(job.pk).status == ImportJob.STATUS_DONE
+        assert Card.objects.filter(user=user).count() == 1
+
+    def test_decode_error_fails_job(self, user, import_dir):
+        """Ошибка декодирования откатывает текущую порцию и завершает задание ошибкой."""
+        lines = [f'word{i},слово{i},,,beginner' for i in range(15)]
+        job = make_job(user, csv_file(*lines).getvalue() + b'\nbad,\xff,,,beginner\n')
+
+        job = run_import_job(job.pk, chunk_rows=10)
+        assert job.status == ImportJob.STATUS_FAILED
+        assert 'после строки 10' in job.message
+        assert Card.objects.filter(user=user).count() == 10
+        assert not job.path.exists()
+
+
+@pytest.mark.django_db
+class TestImportJobViews:
+    """Тесты загрузки файла частями и опроса статуса."""
+
+    def test_chunked_upload_and_status(self, authenticated_client, user, import_dir,
+                                       settings, monkeypatch, django_capture_on_commit_callbacks):
+        """Файл загружается частями, после последней части задание ставится в очередь."""
+        settings.IMPORT_UPLOAD_CHUNK_SIZE = 16
+        queued = []
+        monkeypatch.setattr(views.process_import_job, 'delay', queued.append)
+        data = csv_file('cat,кот', 'dog,собака').getvalue()
+
+        response = authenticated_client.post(
+            reverse('import_job_create'),
+            json.dumps({'filename': 'cards.csv', 'size': len(data)}),
+            content_type='application/json',
+        )
+        assert response.status_code == 201
+        job = response.json()
+        assert job['chunk_size'] == 16
+
+        with django_capture_on_commit_callbacks(execute=True):
+            for offset in range(0, len(data), 16):
+                response = authenticated_client.post(
+                    job['upload_url'], data[offset:offset + 16],
+                    content_type='application/octet-stream', HTTP_X_CHUNK_OFFSET=str(offset),
+                )
+                assert response.status_code == 200
+        assert response.json()['status'] == ImportJob.STATUS_PENDING
+        assert queued == [job['id']]
+        assert ImportJob.objects.get(pk=job['id']).path.read_bytes() == data
+
+        run_import_job(job['id'])
+        status = authenticated_client.get(job['status_url']).json()
+        assert (status['status'], status['created'], status['progress']) == ('done', 2, 100.0)
+
+    def test_wrong_offset_conflict(self, authenticated_client, user, import_dir):
+        """Часть с неверным смещением отклоняется с текущим объемом загрузки."""
+        job = ImportJob.objects.create(user=user, filename='cards.csv', size=100)
+        job.path.touch()
+        response = authenticated_client.post(
+            reverse('import_job_chunk', args=[job.pk]), b'x' * 10,
+            content_type='application/octet-stream', HTTP_X_CHUNK_OFFSET='50',
+        )
+        assert response.status_code == 409
+        assert response.json()['uploaded'] == 0
+
+    def test_size_limit_and_ownership(self, authenticated_client, user, import_dir, settings):
+        """Слишком большой файл отклоняется, чужое задание недоступно."""
+        settings.IMPORT_MAX_UPLOAD_SIZE = 1000
+        response = authenticated_client.post(
+            reverse('import_job_create'),
+            json.dumps({'filename': 'cards.csv', 'size': 1001}),
+            content_type='application/json',
+        )
+        assert response.status_code == 400
+
+        other = type(user).objects.create_user(username='other')
+        job = ImportJob.objects.create(user=other, filename='cards.csv', size=10)
+        assert authenticated_client.get(reverse('import_job_status', args=[job.pk])).status_code == 404
@@ -7,9 +7,11 @@
 
 import pytest
 from django.core.exceptions import ValidationError
-from django.db import IntegrityError
+from django.db import IntegrityError, transaction
 from django.contrib.auth import get_user_model
-from cards.models import Card, Schedule
+from cards.models import Card, Schedule, ReviewLog, UserStats, normalize_key, raw_delete
+from cards.review_log import review_log_buffer, flush_review_logs
+from cards.sm2 import update_schedule, update_schedules
 from bot_api.models import BotLog
 from datetime import date, timedelta
 
@@ -154,6 +156,36 @@ class TestCardModel:
         assert isinstance(card.schedule, Schedule)
         assert card.schedule.card == card
 
+    def test_normalize_key(self):
+        """Тест нормализации: casefold, NFC и схлопывание пробелов."""
+        assert normalize_key('  Straße \t House ') == 'strasse house'
+        # 'é' в разложенной форме (e + combining acute) совпадает с составной
+        assert normalize_key('Cafe\u0301') == normalize_key('café')
+
+    def test_norm_keys_saved(self, user):
+        """Тест заполнения нормализованных ключей при сохранении."""
+        card = Card.objects.create(user=user, word=' Hello  World', translation='Привет')
+        assert (card.norm_word, card.norm_translation) == ('hello world', 'привет')
+
+        card.word = 'HELLO'
+        card.save(update_fields=['word'])
+        card.refresh_from_db()
+        assert card.norm_word == 'hello'
+
+    def test_normalized_uniqueness(self, user, card):
+        """Тест уникальности нормализованной пары на уровне БД."""
+        with pytest.raises(IntegrityError):
+            Card.objects.create(user=user, word='HELLO ', translation='Привет')
+
+    def test_form_rejects_normalized_duplicate(self, user, card):
+        """Тест проверки дубликатов в форме для новой карточки."""
+        from cards.forms import CardForm
+
+        form = CardForm({'word': 'Hello', 'translation': ' ПРИВЕТ', 'level': 'beginner'}, user=user)
+        assert not form.is_valid()
+        form = CardForm({'word': 'Hello', 'translation': 'здравствуй', 'level': 'beginner'}, user=user)
+        assert form.is_valid()
+
 
 @pytest.mark.django_db
 @pytest.mark.models
@@ -254,6 +286,19 @@ class TestScheduleModel:
 class TestCardScheduleIntegration:
     """Интеграционные тесты карточек и расписаний."""
     
+    def test_raw_delete_relations(self):
+        """
+        Все ссылки на Card и Schedule очищаются до DELETE без каскада.
+        
+        Новая ссылка (ForeignKey на Card или Schedule) должна обрабатываться
+        в cards.bulk.bulk_delete и ScheduleQuerySet.delete_with_stats.
+        """
+        assert {r.get_accessor_name() for r in Card._meta.related_objects} == {'copies', 'schedules', 'review_logs'}
+        assert not Schedule._meta.related_objects
+        assert not ReviewLog._meta.related_objects
+        with pytest.raises(ValueError):
+            raw_delete(Card.objects.none(), handled=('schedules', 'review_logs'))
+    
     def test_automatic_schedule_creation(self, user):
         """Тест автоматического создания расписания при создании карточки."""
         # Создаем карточку
@@ -267,7 +312,49 @@ class TestCardScheduleIntegration:
         assert hasattr(card, 'schedule')
         assert card.schedule.card == card
         assert card.schedule.next_review == date.today()
-    
+        assert card.schedule.user_id == user.id
+
+    def test_schedule_owner_follows_card(self, user, user_with_telegram):
+        """Тест синхронизации денормализованного владельца расписания."""
+        card = Card.objects.create(user=user, word='test', translation='тест')
+        card = Card.objects.get(pk=card.pk)
+
+        card.user = user_with_telegram
+        card.save()
+
+        assert Schedule.objects.get(card=card).user == user_with_telegram
+        assert not Schedule.objects.filter(user=user).exists()
+
+    def test_bulk_create_with_schedules(self, user, django_assert_max_num_queries):
+        """Тест пакетного создания карточек с расписаниями."""
+        cards = [Card(user=user, word=f'w{i}', translation=f'п{i}') for i in range(50)]
+
+        # SAVEPOINT/RELEASE + два INSERT + UPDATE статистики, независимо от числа карточек
+        with django_assert_max_num_queries(5):
+            created = Card.objects.bulk_create_with_schedules(cards)
+
+        assert all(card.pk for card in created)
+        assert created[0].schedule.next_review == date.today()
+        schedules = Schedule.objects.filter(user=user)
+        assert schedules.count() == 50
+        assert set(schedules.values_list('card_id', flat=True)) == {card.pk for card in created}
+
+    def test_import_uses_bulk_insert(self, authenticated_client, user, card, django_assert_max_num_queries):
+        """Импорт CSV не зависит по числу запросов от числа строк и пропускает дубликаты."""
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from django.urls import reverse
+
+        rows = ['word,translation,level', 'Hello ,ПРИВЕТ,beginner']
+        rows += [f'word{i},слово{i},beginner' for i in range(200)]
+        upload = SimpleUploadedFile('cards.csv', '\n'.join(rows).encode('utf-8'), content_type='text/csv')
+
+        with django_assert_max_num_queries(15):
+            response = authenticated_client.post(reverse('card_import'), {'file': upload})
+
+        assert response.status_code == 302
+        assert Card.objects.filter(user=user).count() == 201
+        assert Schedule.objects.filter(user=user).count() == 201
+
     def test_card_properties_with_schedule(self, card):
         """Тест свойств карточки, связанных с расписанием."""
         # Готова к повторению сегодня
@@ -304,6 +391,111 @@ class TestCardScheduleIntegration:
         assert card.review_status == 'no_schedule'
 
 
+@pytest.mark.django_db
+@pytest.mark.models
+class TestReviewLogModel:
+    """Тесты журнала ответов."""
+    
+    def test_answer_is_buffered(self, user, schedule_with_history):
+        """Ответ попадает в буфер, а не в БД, до сброса."""
+        update_schedule(schedule_with_history, 4)
+        assert ReviewLog.objects.count() == 0
+        assert len(review_log_buffer) == 1
+        
+        assert flush_review_logs() == 1
+        log = ReviewLog.objects.get()
+        assert log.user == user
+        assert log.card_id == schedule_with_history.card_id
+        assert (log.quality, log.prev_interval, log.prev_ef) == (4, 15, 2.3)
+        assert (log.new_interval, log.new_ef) == (schedule_with_history.interval, schedule_with_history.ef)
+        assert log.source == ReviewLog.SOURCE_WEB
+    
+    def test_buffer_flushes_when_full(self, settings, multiple_cards, django_capture_on_commit_callbacks):
+        """Заполненный буфер записывается одним bulk_create."""
+        settings.REVIEW_LOG_BUFFER_SIZE = 5
+        with django_capture_on_commit_callbacks(execute=True):
+            update_schedules(((card.schedule, 5) for card in multiple_cards), source=ReviewLog.SOURCE_BOT)
+        assert len(review_log_buffer) == 0
+        assert ReviewLog.objects.filter(source=ReviewLog.SOURCE_BOT).count() == 5
+    
+    def test_buffer_flush_after_commit(self, settings, multiple_cards, django_capture_on_commit_callbacks):
+        """Внутри транзакции заполненный буфер сбрасывается после фиксации."""
+        settings.REVIEW_LOG_BUFFER_SIZE = 5
+        with django_capture_on_commit_callbacks(execute=True):
+            with transaction.atomic():
+                update_schedules((card.schedule, 5) for card in multiple_cards)
+                assert len(review_log_buffer) == 5
+        assert ReviewLog.objects.count() == 5
+
+    @pytest.mark.django_db(transaction=True)
+    def test_buffer_keeps_good_rows(self, user, multiple_cards):
+        """Ошибка одной записи (карточка удалена до сброса) не теряет остальные."""
+        update_schedules((card.schedule, 5) for card in multiple_cards)
+        deleted = multiple_cards[0]
+        deleted.delete()
+        assert flush_review_logs() == 4
+        assert not ReviewLog.objects.filter(card_id=deleted.pk).exists()
+        assert ReviewLog.objects.count() == 4
+
+    def test_review_log_is_append_only(self, user, card):
+        """Существующую запись нельзя изменить."""
+        log = ReviewLog.objects.create(
+            card=card, user=user, quality=3,
+            prev_interval=1, new_interval=1, prev_ef=2.5, new_ef=2.36
+        )
+        log.quality = 5
+        with pytest.raises(ValueError):
+            log.save()
+
+
+@pytest.mark.django_db
+@pytest.mark.models
+class TestUserStatsModel:
+    """Тесты инкрементальной статистики пользователя."""
+
+    @staticmethod
+    def _counters(user):
+        stats = UserStats.objects.get(user=user)
+        return [getattr(stats, field) for field in UserStats.COUNTER_FIELDS]
+
+    def test_incremental_matches_rebuild(self, user, multiple_cards):
+        """Счетчики после создания, ответов и удаления совпадают с полным пересчетом."""
+        schedule_with_history = Card.objects.create(user=user, word='mature', translation='зрелый').schedule
+        Schedule.objects.filter(pk=schedule_with_history.pk).update(repetition=3, interval=15, ef=2.3)
+        schedule_with_history.refresh_from_db()
+        UserStats.objects.rebuild([user.pk])  # расписание изменено напрямую
+        Card.objects.bulk_create_with_schedules(
+            [Card(user=user, word=f'bulk{i}', translation=f'пакет{i}') for i in range(3)]
+        )
+        update_schedule(schedule_with_history, 5)  # интервал 15 -> 34: карточка выучена
+        update_schedules([(card.schedule, q) for card, q in zip(multiple_cards, [5, 1, 4, 0, 5])])
+        multiple_cards[1].delete()
+
+        incremental = self._counters(user)
+        UserStats.objects.rebuild([user.pk])
+        assert incremental == self._counters(user)
+        assert incremental[:2] == [8, 1]
+
+    def test_progress_is_single_lookup(self, authenticated_client, user, multiple_cards, django_assert_num_queries):
+        """Страница прогресса читает статистику одним запросом."""
+        from django.urls import reverse
+        from cards.forecast import forecast_review_load
+
+        forecast_review_load(user)  # прогноз закеширован
+        # сессия + пользователь + статистика
+        with django_assert_num_queries(3):
+            response = authenticated_client.get(reverse('user_progress'))
+        assert response.context['total'] == 5
+
+    def test_reconcile_command(self, user, multiple_cards):
+        """Команда reconcile_user_stats исправляет расхождения."""
+        from django.core.management import call_command
+
+        UserStats.objects.filter(user=user).update(total_cards=0, repetitions=100)
+        call_command('reconcile_user_stats', user=[user.username])
+        assert self._counters(user) == [5, 0, 0, 0]
+
+
 @pytest.mark.django_db
 @pytest.mark.models
 class TestBotLogModel:
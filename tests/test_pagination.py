@@ -0,0 +1,102 @@
+"""
+Тесты постраничного вывода по ключу (cards.pagination).
+
+Проверяет обход всех страниц без пропусков и повторов (включая карточки
+с одинаковым created_at), обработку некорректного курсора и то, что запрос
+страницы идет по индексу без сортировки.
+"""
+
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from cards.models import Card
+from cards.pagination import decode_cursor, encode_cursor, keyset_page
+
+
+@pytest.fixture
+def many_cards(user):
+    """25 карточек; у части одинаковый created_at."""
+    cards = Card.objects.bulk_create_with_schedules([
+        Card(user=user, word=f'word{i}', translation=f'слово{i}', level='beginner')
+        for i in range(25)
+    ])
+    now = timezone.now()
+    for i, card in enumerate(cards):
+        card.created_at = now if i < 12 else now - timedelta(minutes=i)
+    Card.objects.bulk_update(cards, ['created_at'])
+    return cards
+
+
+@pytest.mark.django_db
+class TestKeysetPagination:
+    """Тесты постраничного вывода."""
+
+    def test_walk_all_pages(self, user, many_cards):
+        """Обход страниц выдает все карточки по одному разу в порядке (created_at, id) по убыванию."""
+        seen, cursor, pages = [], None, 0
+        while True:
+            page = keyset_page(Card.objects.filter(user=user), cursor, limit=10)
+            seen += page.items
+            pages += 1
+            if not page.has_next:
+                break
+            cursor = page.next_cursor
+        assert pages == 3
+        expected = sorted(many_cards, key=lambda c: (c.created_at, c.pk), reverse=True)
+        assert [c.pk for c in seen] == [c.pk for c in expected]
+
+    def test_cursor_round_trip(self):
+        """Курсор кодирует и восстанавливает позицию."""
+        created_at = timezone.now()
+        assert decode_cursor(encode_cursor(created_at, 42)) == (created_at, 42)
+        with pytest.raises(ValueError):
+            decode_cursor('not-a-cursor')
+
+    def test_page_query_uses_index(self, user, many_cards):
+        """Страница после курсора читается по индексу без сортировки всей колоды."""
+        cursor = keyset_page(Card.objects.filter(user=user), limit=10).next_cursor
+        with CaptureQueriesContext(connection) as captured:
+            keyset_page(Card.objects.filter(user=user), cursor, limit=10)
+        with connection.cursor() as db:
+            db.execute(f'EXPLAIN QUERY PLAN {captured[0]["sql"]}')
+            plan = ' '.join(str(row) for row in db.fetchall())
+        assert 'USING INDEX' in plan
+        assert 'TEMP B-TREE' not in plan
+
+
+@pytest.mark.django_db
+class TestPaginatedViews:
+    """Тесты страниц списка и API."""
+
+    def test_card_list_pages(self, authenticated_client, many_cards):
+        """Список показывает страницу и ссылку на следующую."""
+        response = authenticated_client.get(reverse('card_list'), {'limit': 10})
+        assert len(response.context['cards']) == 10
+        cursor = response.context['next_cursor']
+        assert cursor
+
+        response = authenticated_client.get(reverse('card_list'), {'limit': 10, 'cursor': cursor})
+        assert len(response.context['cards']) == 10
+        assert authenticated_client.get(reverse('card_list'), {'cursor': 'broken'}).status_code == 404
+
+    def test_api_cards_pages(self, client, user_with_telegram):
+        """API возвращает страницу, курсор следующей и общее число карточек."""
+        Card.objects.bulk_create_with_schedules([
+            Card(user=user_with_telegram, word=f'word{i}', translation=f'слово{i}') for i in range(5)
+        ])
+        url = reverse('api_cards_list')
+        data = client.get(url, {'telegram_id': 123456789, 'limit': 2}).json()
+        assert (len(data['cards']), data['total']) == (2, 5)
+
+        words = [card['word'] for card in data['cards']]
+        while data['next_cursor']:
+            data = client.get(url, {'telegram_id': 123456789, 'limit': 2, 'cursor': data['next_cursor']}).json()
+            words += [card['word'] for card in data['cards']]
+        assert sorted(words) == sorted(f'word{i}' for i in range(5))
+
+        assert client.get(url, {'telegram_id': 123456789, 'cursor': 'broken'}).status_code == 400
@@ -0,0 +1,121 @@
+"""
+Тесты сессии повторения (cards.review_session) и страниц повторения и теста.
+
+Проверяет, что очередь карточек на сегодня снимается один раз на сессию,
+ответ стоит постоянного числа запросов, повторная отправка формы не
+засчитывается дважды, а снимок пересоздается после изменений набора карточек.
+"""
+
+from datetime import date, timedelta
+
+import pytest
+from django.urls import reverse
+
+from cards.bulk import bulk_delete
+from cards.models import Card, Schedule
+from cards.review_session import KIND_REVIEW, KIND_TEST, ReviewSession
+from cards.sm2 import update_schedule
+
+
+@pytest.fixture
+def queue(user):
+    """Двадцать карточек на сегодня: просроченные раньше сегодняшних."""
+    cards = Card.objects.bulk_create_with_schedules([
+        Card(user=user, word=f'word{i}', translation=f'слово{i}') for i in range(20)
+    ])
+    Schedule.objects.filter(card__in=cards[10:]).update(next_review=date.today() - timedelta(days=1))
+    return cards
+
+
+@pytest.mark.django_db
+class TestReviewSession:
+    """Тесты снимка очереди."""
+
+    def test_snapshot_order_and_answer(self, user, queue, django_assert_max_num_queries):
+        """Очередь упорядочена по дате; ответ — чтение по ключу и запись расписания."""
+        session = ReviewSession.load(user, KIND_REVIEW)
+        assert [item.id for item in session.items] == [card.pk for card in queue[10:] + queue[:10]]
+
+        with django_assert_max_num_queries(6):
+            session = ReviewSession.load(user, KIND_REVIEW)
+            assert session.answer(0, 5).id == queue[10].pk
+        assert Schedule.objects.get(card=queue[10]).repetition == 1
+
+        # Повторная отправка той же позиции игнорируется
+        assert session.answer(0, 5) is None
+        assert ReviewSession.load(user, KIND_REVIEW).position == 1
+
+    def test_session_size_and_restart(self, user, queue, settings):
+        """Снимок ограничен REVIEW_SESSION_SIZE; после прохождения снимается следующий."""
+        settings.REVIEW_SESSION_SIZE = 15
+        session = ReviewSession.load(user, KIND_REVIEW)
+        for position in range(15):
+            session.answer(position, 4)
+        session = ReviewSession.load(user, KIND_REVIEW)
+        assert [item.id for item in session.items] == [card.pk for card in queue[5:10]]
+
+    def test_card_answered_elsewhere(self, user, queue):
+        """Карточка, уже повторенная ботом, пропускается без второго ответа."""
+        session = ReviewSession.load(user, KIND_REVIEW)
+        update_schedule(Schedule.objects.get(card=queue[10]), 5)
+        session.answer(0, 5)
+        assert Schedule.objects.get(card=queue[10]).repetition == 1
+        assert session.current.id == queue[11].pk
+
+    def test_answer_to_replaced_snapshot(self, user, queue):
+        """Ответ на карточку из прежнего снимка не засчитывается карточке на той же позиции."""
+        shown = ReviewSession.load(user, KIND_REVIEW).current
+        bulk_delete(user, [queue[10].pk])
+        session = ReviewSession.load(user, KIND_REVIEW)
+        assert session.answer(0, 5, shown.schedule_id) is None
+        assert Schedule.objects.get(card=queue[11]).repetition == 0
+        assert session.answer(0, 5, session.current.schedule_id).id == queue[11].pk
+
+    def test_changes_reset_snapshot(self, user, queue):
+        """Удаление карточек сбрасывает снимок: удаленные карточки больше не показываются."""
+        ReviewSession.load(user, KIND_REVIEW)
+        bulk_delete(user, [queue[10].pk])
+        assert ReviewSession.load(user, KIND_REVIEW).current.id == queue[11].pk
+
+    def test_test_options(self, user, queue):
+        """В тесте у каждой карточки четыре варианта, среди них верный."""
+        session = ReviewSession.load(user, KIND_TEST)
+        for item in session.items:
+            assert len(item.options) == 4
+            assert item.translation in item.options
+            assert len(set(item.options)) == 4
+
+
+@pytest.mark.django_db
+class TestReviewViews:
+    """Тесты страниц повторения и теста."""
+
+    def test_review_page(self, authenticated_client, due_cards):
+        """Страница повторения проходит очередь по одной карточке."""
+        url = reverse('card_review')
+        seen = []
+        for position in range(len(due_cards)):
+            response = authenticated_client.get(url)
+            card = response.context['card']
+            seen.append(card.id)
+            assert response.context['position'] == position
+            assert f'name="schedule_id" value="{card.schedule_id}"' in response.content.decode()
+            authenticated_client.post(url, {'quality': 5, 'position': position, 'schedule_id': card.schedule_id})
+        assert seen == [card.pk for card in due_cards]
+        assert authenticated_client.get(url).templates[0].name == 'cards/review_done.html'
+
+    def test_multiple_choice_page(self, authenticated_client, due_cards, future_cards):
+        """Тест: верный ответ засчитывается, повторная отправка формы — нет."""
+        url = reverse('card_test')
+        response = authenticated_client.get(url)
+        card = response.context['card']
+        assert response.context['total'] == 3
+
+        response = authenticated_client.post(url, {'answer': 'нет', 'position': 0, 'schedule_id': card.schedule_id + 1000})
+        assert response.context['feedback'] is None
+        response = authenticated_client.post(url, {'answer': card.translation, 'position': 0, 'schedule_id': card.schedule_id})
+        assert response.context['feedback'] == '✅ Верно!'
+        assert response.context['position'] == 1
+        response = authenticated_client.post(url, {'answer': 'нет', 'position': 0})
+        assert response.context['feedback'] is None
+        assert Schedule.objects.get(card_id=card.id).repetition == 1
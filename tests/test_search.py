@@ -0,0 +1,126 @@
+"""
+Тесты полнотекстового поиска по карточкам (cards.search).
+
+Проверяет поиск по всем полям и префиксу, ранжирование, изоляцию
+пользователей, синхронизацию индекса при сохранении, пакетном импорте и
+удалении, восстановление триггеров после migrate, а также поиск на
+странице списка, в API бота и в админке.
+"""
+
+import io
+
+import pytest
+from django.db import connection
+from django.urls import reverse
+
+from cards.decks import import_deck, subscribe
+from cards.importer import MODE_UPDATE, import_csv
+from cards.models import Card, Deck
+from cards.search import SQLITE_TRIGGERS, ensure_search_index, search_cards, search_filter
+
+
+def words(cards) -> list[str]:
+    """Слова найденных карточек в порядке выдачи."""
+    return [card.word for card in cards]
+
+
+@pytest.fixture
+def deck(user):
+    """Несколько карточек с разными полями."""
+    return Card.objects.bulk_create_with_schedules([
+        Card(user=user, word='apple', translation='яблоко', example='An apple a day.', level='beginner'),
+        Card(user=user, word='pineapple', translation='ананас', comment='тропический фрукт', level='advanced'),
+        Card(user=user, word='juice', translation='сок', example='Apple juice is sweet.', level='beginner'),
+        Card(user=user, word='ёж', translation='hedgehog', level='intermediate'),
+    ])
+
+
+@pytest.mark.django_db
+class TestSearch:
+    """Тесты поиска."""
+
+    def test_fields_and_prefix(self, user, deck):
+        """Ищется по всем полям; последнее слово — как префикс; регистр не важен."""
+        assert words(search_cards(user, 'ЯБЛОК')) == ['apple']
+        assert words(search_cards(user, 'тропический')) == ['pineapple']
+        assert words(search_cards(user, 'sweet juice')) == ['juice']
+        assert words(search_cards(user, 'Hedge')) == ['ёж']
+        assert search_cards(user, '  ... ') == []
+
+    def test_ranking(self, user, deck):
+        """Совпадение в слове выше совпадения в примере."""
+        assert words(search_cards(user, 'apple')) == ['apple', 'juice']
+
+    def test_level_and_owner(self, user, deck):
+        """Фильтр по уровню; карточки других пользователей не находятся."""
+        other = type(user).objects.create_user(username='other')
+        Card.objects.create(user=other, word='apple', translation='яблоко')
+        assert words(search_cards(user, 'apple', level='beginner')) == ['apple', 'juice']
+        assert words(search_cards(user, 'apple', level='advanced')) == []
+        assert words(search_cards(other, 'apple')) == ['apple']
+
+    def test_subscribed_deck_cards_not_found(self, user, deck):
+        """Поиск, как и список карточек, — по личным карточкам, без карточек колод из подписок."""
+        shared = Deck.objects.create(title='Fruits')
+        import_deck(shared, io.BytesIO('word,translation\napplesauce,пюре\n'.encode()))
+        subscribe(user, shared)
+        assert words(search_cards(user, 'apple')) == ['apple', 'juice']
+
+    def test_index_follows_changes(self, user, deck):
+        """Индекс обновляется при save(), пакетном импорте и удалении."""
+        card = deck[1]
+        card.word = 'mango'
+        card.save()
+        assert words(search_cards(user, 'mango')) == ['mango']
+        assert words(search_cards(user, 'pineapple')) == []
+
+        import_csv(user, io.BytesIO('word,translation,example\nplum,слива,Ripe plum\n'.encode()))
+        assert words(search_cards(user, 'слива')) == ['plum']
+        import_csv(user, io.BytesIO('word,translation,example\nplum,слива,Sour fruit\n'.encode()), mode=MODE_UPDATE)
+        assert words(search_cards(user, 'sour')) == ['plum']
+
+        Card.objects.filter(word='plum').delete()
+        assert search_cards(user, 'слива') == []
+
+    def test_triggers_restored(self, user, deck):
+        """Пропавшие триггеры восстанавливаются, индекс перестраивается."""
+        if connection.vendor != 'sqlite':
+            pytest.skip('Триггеры используются только в SQLite')
+        with connection.cursor() as cursor:
+            for trigger in SQLITE_TRIGGERS:
+                cursor.execute(f'DROP TRIGGER {trigger}')
+        Card.objects.create(user=user, word='grape', translation='виноград')
+        assert search_cards(user, 'grape') == []
+
+        ensure_search_index()
+        assert words(search_cards(user, 'grape')) == ['grape']
+
+    def test_admin_filter(self, user, deck):
+        """Условие для админки ищет по всем пользователям."""
+        assert set(Card.objects.filter(search_filter('apple')).values_list('word', flat=True)) == {'apple', 'juice'}
+
+
+@pytest.mark.django_db
+class TestSearchViews:
+    """Тесты поиска на странице списка и в API бота."""
+
+    def test_card_list_search(self, authenticated_client, deck):
+        """Параметр q выводит найденные карточки по релевантности без курсора."""
+        response = authenticated_client.get(reverse('card_list'), {'q': 'apple'})
+        assert words(response.context['cards']) == ['apple', 'juice']
+        assert response.context['next_cursor'] is None
+
+    def test_api_search(self, client, user_with_telegram):
+        """API поиска возвращает карточки и требует запрос."""
+        Card.objects.create(user=user_with_telegram, word='apple', translation='яблоко')
+        url = reverse('api_cards_search')
+        data = client.get(url, {'telegram_id': 123456789, 'q': 'ябл'}).json()
+        assert [card['word'] for card in data['cards']] == ['apple']
+        assert client.get(url, {'telegram_id': 123456789}).status_code == 400
+
+    def test_admin_search(self, client, deck, django_user_model):
+        """Поиск в админке карточек использует полнотекстовый индекс."""
+        admin = django_user_model.objects.create_superuser(username='admin', password='x')
+        client.force_login(admin)
+        response = client.get(reverse('admin:cards_card_changelist'), {'q': 'ананас'})
+        assert [card.word for card in response.context['cl'].result_list] == ['pineapple']
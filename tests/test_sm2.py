@@ -6,9 +6,13 @@
 """
 
 import pytest
+import random
+import threading
 from datetime import date, timedelta
-from cards.sm2 import update_schedule
-from cards.models import Schedule
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from cards.sm2 import Sm2State, step, update_schedule, update_schedules
+from cards.models import Card, Schedule
 
 
 @pytest.mark.django_db
@@ -260,4 +264,290 @@ class TestSM2Integration:
         schedule.save()
         
         assert schedule.is_due is True
-        assert schedule.days_until_review == -2 
\ No newline at end of file
+        assert schedule.days_until_review == -2
+
+
+@pytest.mark.django_db
+@pytest.mark.sm2
+class TestSM2Batch:
+    """Тесты пакетного SM-2 (update_schedules)."""
+    
+    @staticmethod
+    def _snapshot(schedule):
+        return (schedule.interval, schedule.repetition, schedule.ef,
+                schedule.next_review, schedule.last_result)
+    
+    @pytest.mark.parametrize('seed', range(5))
+    def test_batch_matches_scalar(self, user, seed):
+        """Свойство: пакетный расчёт совпадает со скалярным для случайных состояний."""
+        rng = random.Random(seed)
+        states, qualities = [], []
+        for i in range(40):
+            card = Card.objects.create(user=user, word=f'w{seed}_{i}', translation=f't{i}')
+            schedule = card.schedule
+            schedule.repetition = rng.randint(0, 8)
+            schedule.interval = rng.randint(1, 400)
+            schedule.ef = rng.choice([1.3, 2.5, round(rng.uniform(1.3, 2.8), 3)])
+            schedule.save()
+            states.append(schedule)
+            qualities.append(rng.randint(0, 5))
+        
+        expected = []
+        for schedule, quality in zip(states, qualities):
+            twin = Schedule.objects.get(pk=schedule.pk)
+            update_schedule(twin, quality)
+            expected.append(self._snapshot(twin))
+        
+        update_schedules(zip(states, qualities))
+        for schedule, snapshot in zip(states, expected):
+            assert self._snapshot(schedule) == snapshot
+            schedule.refresh_from_db()
+            assert self._snapshot(schedule) == snapshot
+    
+    def test_repeated_schedule_applies_in_order(self, schedule):
+        """Повторяющееся расписание обрабатывается как последовательные вызовы."""
+        twin = Schedule.objects.get(pk=schedule.pk)
+        for quality in (5, 4, 5, 2):
+            update_schedule(twin, quality)
+        
+        updated = update_schedules([(schedule, 5), (schedule, 4), (schedule, 5), (schedule, 2)])
+        assert updated == [schedule]
+        assert self._snapshot(schedule) == self._snapshot(twin)
+    
+    def test_single_update_query(self, multiple_cards):
+        """Все расписания сохраняются одним UPDATE."""
+        schedules = [card.schedule for card in multiple_cards]
+        with CaptureQueriesContext(connection) as ctx:
+            update_schedules((s, 4) for s in schedules)
+        updates = [q for q in ctx.captured_queries if q['sql'].startswith('UPDATE "cards_schedule"')]
+        assert len(updates) == 1
+    
+    def test_invalid_quality_changes_nothing(self, schedule):
+        """Невалидная оценка отклоняет всю пачку без изменений."""
+        before = self._snapshot(schedule)
+        with pytest.raises(ValueError):
+            update_schedules([(schedule, 4), (schedule, 6)])
+        assert self._snapshot(schedule) == before
+    
+    def test_empty_batch(self):
+        """Пустая пачка не обращается к БД."""
+        assert update_schedules([]) == []
+
+
+@pytest.mark.sm2
+class TestSm2State:
+    """Тесты чистого шага SM-2 без ORM."""
+    
+    def test_step_is_pure(self):
+        """step не изменяет исходное состояние."""
+        state = Sm2State(interval=15, repetition=3, ef=2.3)
+        new_state = step(state, 4, date(2025, 1, 1))
+        assert state.as_tuple() == (15, 3, 2.3, None, None)
+        assert new_state.interval == int(15 * 2.3)
+        assert new_state.repetition == 4
+        assert new_state.next_review == date(2025, 1, 1) + timedelta(days=new_state.interval)
+        assert new_state.last_result is True
+    
+    def test_step_failure_resets(self):
+        """Неуспешный ответ сбрасывает повторения и уменьшает EF."""
+        new_state = step(Sm2State(interval=40, repetition=5, ef=2.5), 1, date(2025, 1, 1))
+        assert (new_state.interval, new_state.repetition) == (1, 0)
+        assert new_state.ef < 2.5
+        assert new_state.last_result is False
+    
+    def test_step_rejects_invalid_quality(self):
+        """Оценка вне диапазона вызывает ValueError."""
+        with pytest.raises(ValueError):
+            step(Sm2State(), 6, date(2025, 1, 1))
+    
+    def test_state_has_no_dict(self):
+        """Состояние компактное: только __slots__."""
+        assert not hasattr(Sm2State(), '__dict__')
+    
+    @pytest.mark.django_db
+    def test_update_schedule_matches_step(self, schedule_with_history):
+        """update_schedule даёт тот же результат, что и step."""
+        expected = step(Sm2State.from_schedule(schedule_with_history), 3, date.today())
+        update_schedule(schedule_with_history, 3)
+        assert Sm2State.from_schedule(schedule_with_history) == expected
+
+
+@pytest.mark.django_db
+@pytest.mark.sm2
+class TestLoadBalancer:
+    """Тесты режима балансировки нагрузки."""
+    
+    def test_pick_interval_prefers_least_loaded_day(self):
+        """Выбирается наименее загруженный день в окне."""
+        from cards.load_balancer import pick_interval
+        today = date(2025, 1, 1)
+        histogram = {(today + timedelta(days=d)).isoformat(): 10 for d in range(15, 26)}
+        histogram[(today + timedelta(days=22)).isoformat()] = 1
+        assert pick_interval(histogram, 20, today) == 22
+    
+    def test_pick_interval_keeps_short_intervals(self):
+        """Короткие интервалы не размываются."""
+        from cards.load_balancer import pick_interval
+        assert pick_interval({}, 1, date(2025, 1, 1)) == 1
+        assert pick_interval({}, 2, date(2025, 1, 1)) == 2
+    
+    def test_update_schedule_spreads_bunched_cards(self, settings, user):
+        """Карточки с одинаковым состоянием разносятся по разным дням."""
+        settings.SM2_LOAD_BALANCE = True
+        schedules = []
+        for i in range(6):
+            card = Card.objects.create(user=user, word=f'bunch{i}', translation=f'пачка{i}')
+            schedule = card.schedule
+            schedule.repetition = 3
+            schedule.interval = 20
+            schedule.ef = 2.5
+            schedule.save()
+            schedules.append(schedule)
+        
+        for schedule in schedules:
+            update_schedule(schedule, 4)
+        
+        reviews = {schedule.next_review for schedule in schedules}
+        assert len(reviews) == 6
+        for schedule in schedules:
+            assert abs(schedule.interval - 50) <= 5
+            assert schedule.next_review == date.today() + timedelta(days=schedule.interval)
+    
+    def test_concurrent_moves_keep_counts(self, user):
+        """Одновременные переносы не теряют приращений; счетчики совпадают с перестроением."""
+        from cards.load_balancer import balance, get_due_histogram, invalidate_due_histogram
+        today = date.today()
+        Card.objects.bulk_create_with_schedules([
+            Card(user=user, word=f'word{i}', translation=f'слово{i}') for i in range(5)
+        ])
+        window = [today + timedelta(days=days) for days in range(60)]
+        before = sum(get_due_histogram(user.pk, window).values())
+        
+        def answer():
+            balance([(user.pk, None, 30)] * 50, today)
+        
+        threads = [threading.Thread(target=answer) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        histogram = get_due_histogram(user.pk, window)
+        assert sum(histogram.values()) == before + 200
+        assert set(histogram) <= {day.isoformat() for day in window}
+        
+        Schedule.objects.filter(user=user).update(next_review=today + timedelta(days=3))
+        invalidate_due_histogram(user.pk)
+        assert get_due_histogram(user.pk, window) == {(today + timedelta(days=3)).isoformat(): 5}
+
+
+@pytest.mark.django_db
+@pytest.mark.sm2
+class TestFSRSScheduler:
+    """Тесты подключаемого алгоритма FSRS."""
+    
+    def test_user_can_switch_to_fsrs(self, user, schedule):
+        """Выбор FSRS у пользователя меняет алгоритм пересчёта."""
+        user.scheduler = 'fsrs'
+        user.save()
+        
+        update_schedule(schedule, 4)
+        schedule.refresh_from_db()
+        assert schedule.stability is not None
+        assert schedule.difficulty is not None
+        assert schedule.repetition == 1
+        assert schedule.next_review == date.today() + timedelta(days=schedule.interval)
+    
+    def test_batch_uses_user_scheduler(self, user, multiple_cards):
+        """Пакетный пересчёт учитывает алгоритм пользователя."""
+        user.scheduler = 'fsrs'
+        user.save()
+        schedules = [card.schedule for card in multiple_cards]
+        
+        update_schedules((s, 5) for s in schedules)
+        for schedule in schedules:
+            schedule.refresh_from_db()
+            assert schedule.stability is not None
+    
+    def test_elapsed_from_last_review(self, user, schedule, monkeypatch):
+        """Прошедшие дни считаются от last_review, а не от перенесенной даты повторения."""
+        from cards import fsrs
+        user.scheduler = 'fsrs'
+        user.save()
+        today = date.today()
+        update_schedule(schedule, 4)
+        assert schedule.last_review == today
+
+        # Через 10 дней после ответа дата повторения перенесена вручную на сегодня
+        Schedule.objects.filter(pk=schedule.pk).update(
+            last_review=today - timedelta(days=10), next_review=today, interval=30,
+        )
+        schedule.refresh_from_db()
+        elapsed = []
+        real_step = fsrs.step
+
+        def spy(weights, stability, difficulty, days, *args):
+            elapsed.append(days)
+            return real_step(weights, stability, difficulty, days, *args)
+
+        monkeypatch.setattr(fsrs, 'step', spy)
+        update_schedule(schedule, 4)
+        assert elapsed == [10]
+
+    def test_forgetting_shortens_interval(self):
+        """Ошибка уменьшает стабильность и интервал."""
+        from cards import fsrs
+        stability, difficulty, interval = fsrs.step(fsrs.DEFAULT_WEIGHTS, 30.0, 5.0, 30, 5)
+        forgot = fsrs.step(fsrs.DEFAULT_WEIGHTS, 30.0, 5.0, 30, 1)
+        assert stability > 30.0
+        assert forgot[0] < 30.0
+        assert forgot[2] < interval
+    
+    def test_optimizer_reduces_loss(self):
+        """Оптимизатор уменьшает ошибку на синтетической истории."""
+        import numpy as np
+        from cards import fsrs
+        rng = np.random.default_rng(0)
+        true_w = np.array(fsrs.DEFAULT_WEIGHTS)
+        true_w[8] = 1.0
+        card_ids, days, qualities = [], [], []
+        for card_id in range(300):
+            stability = difficulty = None
+            day, elapsed = 0, 0
+            for _ in range(8):
+                quality = 4
+                if stability is not None and rng.random() > fsrs.retrievability(elapsed, stability):
+                    quality = 1
+                stability, difficulty, interval = fsrs.step(true_w, stability, difficulty, elapsed, quality)
+                card_ids.append(card_id)
+                days.append(day)
+                qualities.append(quality)
+                elapsed = int(rng.integers(1, 2 * interval + 1))
+                day += elapsed
+        history = fsrs.ReviewHistory(card_ids, days, qualities)
+        
+        baseline = fsrs.log_loss(fsrs.DEFAULT_WEIGHTS, history)
+        weights, loss = fsrs.optimize(history, iterations=60)
+        assert loss < baseline
+        assert np.all(weights >= fsrs.WEIGHT_BOUNDS[:, 0])
+        assert np.all(weights <= fsrs.WEIGHT_BOUNDS[:, 1])
+    
+    def test_optimize_command_saves_weights(self, user, multiple_cards):
+        """Команда optimize_fsrs сохраняет веса и включает FSRS."""
+        from django.core.management import call_command
+        from django.utils import timezone
+        from cards.models import ReviewLog
+        start = timezone.now() - timedelta(days=60)
+        ReviewLog.objects.bulk_create([
+            ReviewLog(
+                card=card, user=user, quality=4 if i % 3 else 2,
+                reviewed_at=start + timedelta(days=i * 3),
+                prev_interval=1, new_interval=1, prev_ef=2.5, new_ef=2.5,
+            )
+            for card in multiple_cards for i in range(10)
+        ])
+        
+        call_command('optimize_fsrs', user=[user.username], min_reviews=10, iterations=5, activate=True)
+        user.refresh_from_db()
+        assert user.scheduler == 'fsrs'
+        assert len(user.scheduler_params['w']) == 17
+        assert user.scheduler_params['reviews'] == 50
@@ -0,0 +1,187 @@
+"""
+Тесты журнала изменений для синхронизации клиентов (cards.sync, /api/sync/).
+
+Проверяет первичную синхронизацию порциями, выдачу только изменившихся
+карточек (ответ, правка, импорт), отметки об удалении (удаление, отписка,
+копия общей карточки), задержку фиксации, срок токена и очистку отметок.
+"""
+
+import io
+from datetime import timedelta
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+
+from cards.decks import copy_on_write, import_deck, subscribe, unsubscribe
+from cards.importer import MODE_UPDATE, import_csv
+from cards.models import Card, Deck, Schedule, SyncTombstone
+from cards.sm2 import update_schedule
+from cards.sync import SyncTokenExpired, changes_since, encode_token, purge_tombstones
+
+
+def sync(user, token=None, limit=500):
+    """Полный проход по порциям: (id измененных карточек, id удаленных, токен)."""
+    changed, deleted = [], []
+    while True:
+        page = changes_since(user, token, limit)
+        changed += [schedule.card_id for schedule in page.changes]
+        deleted += page.deleted
+        token = page.token
+        if not page.has_more:
+            return changed, deleted, token
+
+
+@pytest.fixture(autouse=True)
+def no_commit_lag(settings):
+    """Изменения видны синхронизации сразу после записи."""
+    settings.SYNC_COMMIT_LAG_SECONDS = 0
+
+
+@pytest.fixture
+def cards(user):
+    """Пять личных карточек."""
+    return Card.objects.bulk_create_with_schedules([
+        Card(user=user, word=f'word{i}', translation=f'слово{i}') for i in range(5)
+    ])
+
+
+@pytest.mark.django_db
+class TestSync:
+    """Тесты журнала изменений."""
+
+    def test_initial_sync_in_pages(self, user, cards):
+        """Первичная синхронизация отдает все карточки порциями, затем изменений нет."""
+        changed, deleted, token = sync(user, limit=2)
+        assert sorted(changed) == sorted(card.pk for card in cards)
+        assert deleted == []
+        assert sync(user, token)[:2] == ([], [])
+
+    def test_only_changes_are_returned(self, user, cards):
+        """После токена приходят только отвеченные, измененные и импортированные карточки."""
+        token = sync(user)[2]
+        update_schedule(cards[0].schedule, 5)
+        cards[1].comment = 'заметка'
+        cards[1].save()
+        import_csv(user, io.BytesIO('word,translation,example\nword2,слово2,new example\n'.encode()), mode=MODE_UPDATE)
+
+        changed, deleted, token = sync(user, token)
+        assert sorted(changed) == sorted(card.pk for card in cards[:3])
+        assert deleted == []
+        assert sync(user, token)[:2] == ([], [])
+
+    def test_deletions(self, user, cards):
+        """Удаление карточки и отписка от колоды передаются как удаления."""
+        deck = Deck.objects.create(title='Fruits')
+        import_deck(deck, io.BytesIO('word,translation\napple,яблоко\npear,груша\n'.encode()))
+        subscribe(user, deck)
+        token = sync(user)[2]
+
+        removed = [cards[0].pk, *deck.cards.values_list('pk', flat=True)]
+        cards[0].delete()
+        unsubscribe(user, deck)
+        changed, deleted, token = sync(user, token)
+        assert changed == []
+        assert sorted(deleted) == sorted(removed)
+
+        # Повторная подписка: карточки снова в наборе и не удаляются
+        subscribe(user, deck)
+        changed, deleted, token = sync(user, token)
+        assert sorted(changed) == sorted(deck.cards.values_list('pk', flat=True))
+        assert deleted == []
+
+    def test_copy_on_write_replaces_card(self, user):
+        """Личная копия общей карточки приходит изменением, общая — удалением."""
+        deck = Deck.objects.create(title='Fruits')
+        import_deck(deck, io.BytesIO('word,translation\napple,яблоко\n'.encode()))
+        subscribe(user, deck)
+        token = sync(user)[2]
+
+        shared = deck.cards.get()
+        shared_id = shared.pk
+        shared.translation = 'яблочко'
+        copy = copy_on_write(shared, user)
+        assert sync(user, token)[:2] == ([copy.pk], [shared_id])
+
+    def test_steady_state_is_cheap(self, user, cards, django_assert_max_num_queries):
+        """Синхронизация без изменений — несколько запросов без выборки всей колоды."""
+        token = sync(user)[2]
+        with django_assert_max_num_queries(3):
+            page = changes_since(user, token)
+        assert (page.changes, page.deleted, page.has_more) == ([], [], False)
+
+    def test_commit_lag(self, user, cards, settings):
+        """Изменения моложе задержки фиксации откладываются до следующей синхронизации."""
+        settings.SYNC_COMMIT_LAG_SECONDS = 60
+        assert changes_since(user).changes == []
+
+    def test_import_restamps_after_commit(self, user, cards, django_capture_on_commit_callbacks):
+        """Расписания, записанные длинным импортом, отмечаются временем после фиксации."""
+        untouched = timezone.now() - timedelta(days=1)
+        Schedule.objects.filter(user=user).update(updated_at=untouched)
+        with django_capture_on_commit_callbacks() as callbacks:
+            import_csv(user, io.BytesIO('word,translation\napple,яблоко\n'.encode()))
+        imported = Schedule.objects.get(card__word='apple')
+        committed_at = timezone.now()
+        for callback in callbacks:
+            callback()
+
+        imported.refresh_from_db()
+        assert imported.updated_at >= committed_at
+        assert set(Schedule.objects.exclude(pk=imported.pk).values_list('updated_at', flat=True)) == {untouched}
+
+    @pytest.mark.django_db(transaction=True)
+    def test_delete_user_with_cards(self, user, cards, django_user_model):
+        """Удаление пользователя с карточками и подпиской не пишет отметок на него."""
+        deck = Deck.objects.create(title='Fruits')
+        import_deck(deck, io.BytesIO('word,translation\napple,яблоко\n'.encode()))
+        subscribe(user, deck)
+        other = django_user_model.objects.create_user(username='other', password='x')
+        Card.objects.create(user=other, word='pear', translation='груша')
+
+        user.delete()
+        django_user_model.objects.filter(pk=other.pk).delete()
+        assert not Schedule.objects.exists()
+        assert not SyncTombstone.objects.exists()
+        assert deck.cards.count() == 1
+
+    def test_token_expiry_and_purge(self, user, cards):
+        """Устаревший токен требует полной синхронизации; старые отметки очищаются."""
+        old = timezone.now() - timedelta(days=31)
+        with pytest.raises(SyncTokenExpired):
+            changes_since(user, encode_token(old, old, 0, 0))
+        with pytest.raises(ValueError):
+            changes_since(user, 'broken')
+
+        cards[0].delete()
+        SyncTombstone.objects.update(deleted_at=old)
+        recent = cards[1].pk
+        cards[1].delete()
+        assert purge_tombstones() == 1
+        assert list(SyncTombstone.objects.values_list('card_id', flat=True)) == [recent]
+
+
+@pytest.mark.django_db
+class TestSyncApi:
+    """Тесты /api/sync/."""
+
+    def test_api(self, client, user_with_telegram):
+        """API отдает изменения, удаления и токен; ошибки токена — 400 и 410."""
+        card = Card.objects.create(user=user_with_telegram, word='apple', translation='яблоко')
+        url = reverse('api_sync')
+        data = client.get(url, {'telegram_id': 123456789}).json()
+        assert [(c['id'], c['word'], c['repetition']) for c in data['changes']] == [(card.pk, 'apple', 0)]
+        assert (data['deleted'], data['has_more']) == ([], False)
+
+        update_schedule(Schedule.objects.get(card=card), 5)
+        data = client.get(url, {'telegram_id': 123456789, 'since': data['next']}).json()
+        assert [(c['id'], c['repetition']) for c in data['changes']] == [(card.pk, 1)]
+
+        card_id = card.pk
+        card.delete()
+        data = client.get(url, {'telegram_id': 123456789, 'since': data['next']}).json()
+        assert (data['changes'], data['deleted']) == ([], [card_id])
+
+        old = timezone.now() - timedelta(days=31)
+        assert client.get(url, {'telegram_id': 123456789, 'since': encode_token(old, old, 0, 0)}).status_code == 410
+        assert client.get(url, {'telegram_id': 123456789, 'since': 'broken'}).status_code == 400
@@ -8,6 +8,7 @@ class CustomUserAdmin(UserAdmin):
     list_display = ('username', 'email', 'telegram_id', 'is_staff', 'is_active')
     fieldsets = UserAdmin.fieldsets + (
         (None, {'fields': ('telegram_id', 'telegram_link_token')}),
+        ('Повторения', {'fields': ('scheduler', 'scheduler_params')}),
     )
     add_fieldsets = UserAdmin.add_fieldsets + (
         (None, {'fields': ('telegram_id', 'telegram_link_token')}),
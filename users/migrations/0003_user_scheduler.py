@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-17 02:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_alter_user_options_alter_user_telegram_id_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='scheduler',
+            field=models.CharField(choices=[('sm2', 'SM-2'), ('fsrs', 'FSRS')], default='sm2', help_text='Алгоритм планирования повторений карточек', max_length=16, verbose_name='Алгоритм повторений'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='scheduler_params',
+            field=models.JSONField(blank=True, help_text='Персональные параметры алгоритма (например, веса FSRS)', null=True, verbose_name='Параметры алгоритма'),
+        ),
+    ]
@@ -21,12 +21,19 @@ class User(AbstractUser):
     Attributes:
         telegram_id: Уникальный ID пользователя в Telegram.
         telegram_link_token: Токен для привязки Telegram-аккаунта.
+        scheduler: Алгоритм планирования повторений (sm2/fsrs).
+        scheduler_params: Персональные параметры алгоритма (веса FSRS).
     
     Note:
         telegram_id должен быть уникальным, так как один Telegram-аккаунт
         может быть привязан только к одному пользователю сайта.
     """
     
+    SCHEDULER_CHOICES = [
+        ('sm2', 'SM-2'),
+        ('fsrs', 'FSRS'),
+    ]
+    
     telegram_id = models.BigIntegerField(
         null=True,
         blank=True,
@@ -42,6 +49,19 @@ class User(AbstractUser):
         verbose_name='Токен для привязки Telegram',
         help_text='Временный токен для привязки Telegram-аккаунта'
     )
+    scheduler = models.CharField(
+        max_length=16,
+        choices=SCHEDULER_CHOICES,
+        default='sm2',
+        verbose_name='Алгоритм повторений',
+        help_text='Алгоритм планирования повторений карточек'
+    )
+    scheduler_params = models.JSONField(
+        null=True,
+        blank=True,
+        verbose_name='Параметры алгоритма',
+        help_text='Персональные параметры алгоритма (например, веса FSRS)'
+    )
 
     class Meta:
         """Мета-класс для настройки модели User."""
@@ -16,8 +16,8 @@ try:
     from io import BytesIO
 except ImportError:
     qrcode = None
-from cards.models import Card, Schedule
-from django.db import models
+from cards.models import UserStats
+from cards.forecast import forecast_review_load
 
 # Create your views here.
 
@@ -124,19 +124,20 @@ def generate_telegram_link(request):
 @login_required
 def user_progress_view(request):
     """
-    Страница прогресса пользователя: всего карточек, выучено, ошибок, повторений, процент выученных.
+    Страница прогресса пользователя: всего карточек, выучено, ошибок, повторений, процент выученных,
+    прогноз нагрузки повторений на ближайшие дни.
     """
     user = request.user
-    total = Card.objects.filter(user=user).count()
-    learned = Schedule.objects.filter(card__user=user, interval__gte=21).count()
-    errors = Schedule.objects.filter(card__user=user, last_result=False).count()
-    repetitions = Schedule.objects.filter(card__user=user).aggregate(total_reps=models.Sum('repetition'))['total_reps'] or 0
-    percentage = (learned / total) * 100 if total > 0 else 0
+    stats = UserStats.objects.for_user(user)
+    forecast = forecast_review_load(user)
+    forecast_max = max((day['due'] for day in forecast), default=0)
     context = {
-        'total': total,
-        'learned': learned,
-        'errors': errors,
-        'repetitions': repetitions,
-        'percentage': percentage,
+        'total': stats.total_cards,
+        'learned': stats.learned,
+        'errors': stats.errors,
+        'repetitions': stats.repetitions,
+        'percentage': stats.percentage,
+        'forecast': forecast,
+        'forecast_max': forecast_max,
     }
     return render(request, 'users/progress.html', context)